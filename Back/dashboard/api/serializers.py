@@ -5,6 +5,7 @@ class DashboardSummarySerializer(serializers.Serializer):
     cash_balance       = serializers.IntegerField()
     total_invested     = serializers.FloatField()
     overall_profit_rate= serializers.FloatField()
+    realized_pnl       = serializers.IntegerField()
 
 class HoldingSerializer(serializers.Serializer):
     type         = serializers.CharField()  # "stock" 또는 "product"
@@ -6,7 +6,8 @@ from django.db.models        import Sum, F, Avg, Max
 from simulator.models        import VirtualPortfolio, VirtualTrade
 from financial_products.models import JoinedProduct
 from strategies.models       import Strategy, StrategyRun
-from simulator.services.price_service import fetch_current_price
+from simulator.services.lots        import realized_total
+from simulator.services.price_service import fetch_current_prices
 from .serializers            import (
     DashboardSummarySerializer,
     HoldingSerializer,
@@ -25,36 +26,28 @@ class DashboardAPIView(APIView):
         portfolio, _ = VirtualPortfolio.objects.get_or_create(user=user)
         cash = portfolio.cash_balance
 
-        # 2) 주식 보유 내역 계산
-        buys = VirtualTrade.objects.filter(
-            portfolio=portfolio, trade_type=VirtualTrade.BUY
-        )
-        # 종목별 보유 수량 집계
-        stock_summary = {}
-        for t in buys:
-            stock_summary.setdefault(t.stock_code, {
-                "stock_name": t.stock_name,
-                "quantity": 0,
-                "invested": 0,
-            })
-            stock_summary[t.stock_code]["quantity"] += t.quantity
-            stock_summary[t.stock_code]["invested"] += t.quantity * t.price
+        # 2) 주식 보유 내역 (Position 한 번 조회)
+        positions = list(portfolio.positions.filter(quantity__gt=0))
+
+        # 보유 종목 현재가는 한 번에 조회 (종목 수와 무관하게 업스트림 1회)
+        prices = fetch_current_prices(position.stock_code for position in positions)
 
         holdings = []
         total_invested = 0
         total_profit   = 0
-        for code, info in stock_summary.items():
-            qty      = info["quantity"]
-            invested = info["invested"]
-            current  = fetch_current_price(info["stock_name"])
-            profit   = (current * qty) - invested
+        for position in positions:
+            qty      = position.quantity
+            invested = position.cost_basis
+            current  = prices[position.stock_code]
+            # 시세를 한 번도 얻지 못한 종목은 원가로 평가 (손익 0, 종목별 값은 null)
+            profit   = (current * qty) - invested if current is not None else 0
             profit_rate = (profit / invested * 100) if invested else 0
             holdings.append({
                 "type": "stock",
-                "name": info["stock_name"],
+                "name": position.stock_name,
                 "quantity": qty,
-                "current_price": float(current),
-                "profit_rate": round(profit_rate, 2),
+                "current_price": float(current) if current is not None else None,
+                "profit_rate": round(profit_rate, 2) if current is not None else None,
             })
             total_invested += invested
             total_profit   += profit
@@ -76,12 +69,14 @@ class DashboardAPIView(APIView):
             total_invested += amt
             total_profit   += expected_return
 
-        # 4) 요약
+        # 4) 요약 (실현손익은 Position 에 쌓인 값, fifo 면 캐시한 로트 재계산)
         overall_rate = (total_profit / total_invested * 100) if total_invested else 0
+        realized = realized_total(portfolio)
         summary = {
             "cash_balance": cash,
             "total_invested": round(total_invested, 2),
             "overall_profit_rate": round(overall_rate, 2),
+            "realized_pnl": realized,
         }
 
         # 5) 최근 거래 5건
@@ -1,4 +1,30 @@
 # Back/dashboard/tests.py
+from unittest import mock
+
+from django.contrib.auth import get_user_model
 from django.test import TestCase
+from rest_framework.test import APIClient
+
+from simulator.models import VirtualPortfolio, VirtualTrade
+from simulator.services.execution import execute_trade
+
+
+class DashboardSummaryTests(TestCase):
+    def setUp(self):
+        user = get_user_model().objects.create(username="dash", email="dash@example.com")
+        self.portfolio = VirtualPortfolio.objects.create(user=user, cash_balance=1_000_000)
+        execute_trade(self.portfolio, VirtualTrade.BUY, "005930", "삼성전자", 100, 10)
+        execute_trade(self.portfolio, VirtualTrade.BUY, "005930", "삼성전자", 200, 10)
+        execute_trade(self.portfolio, VirtualTrade.SELL, "005930", "삼성전자", 300, 15)
+        self.client = APIClient(SERVER_NAME="localhost")
+        self.client.force_authenticate(user)
+
+    def test_realized_pnl_comes_from_stored_positions(self):
+        # 거래 내역을 다시 훑지 않는다
+        with mock.patch("simulator.services.lots.portfolio_lots") as replay, \
+                mock.patch("dashboard.api.views.fetch_current_prices", return_value={"005930": 300}):
+            response = self.client.get("/api/v1/dashboard/summary/")
 
-# Create your tests here.
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["summary"]["realized_pnl"], 2_250)
+        replay.assert_not_called()
@@ -6,6 +6,9 @@ It exposes the ASGI callable as a module-level variable named ``application``.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/4.2/howto/deployment/asgi/
+
+실시간 시세 스트림(/api/v1/simulator/stream/)은 ASGI 서버로 띄워야 한다.
+    uvicorn financial.asgi:application
 """
 
 import os
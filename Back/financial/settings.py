@@ -1,6 +1,7 @@
 # Back/financial/settings.py
 from pathlib import Path
 import mimetypes
+from celery.schedules import crontab
 from dotenv import load_dotenv
 import os
 import dotenv
@@ -58,6 +59,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.humanize',
 ]
 
 
@@ -205,3 +207,142 @@ CELERY_RESULT_SERIALIZER = "json"
 
 CELERY_TASK_ALWAYS_EAGER = True
 CELERY_TASK_EAGER_PROPAGATES = True
+
+
+###############
+# 시세 제공자 (simulator.services.providers) : yfinance / replay / synthetic
+PRICE_PROVIDER = os.getenv("PRICE_PROVIDER", "yfinance")
+PRICE_REPLAY_DIR = os.getenv("PRICE_REPLAY_DIR", str(BASE_DIR / "data" / "replay"))
+PRICE_REPLAY_AUTO_ADVANCE = os.getenv("PRICE_REPLAY_AUTO_ADVANCE", "true").lower() == "true"
+PRICE_SYNTHETIC_SEED = int(os.getenv("PRICE_SYNTHETIC_SEED", "42"))
+
+# 주식 봉 저장소 (simulator.services.bar_store) : rows / chunks
+BAR_STORE_MODE = os.getenv("BAR_STORE_MODE", "rows")
+BAR_STORE_PRICE_SCALE = int(os.getenv("BAR_STORE_PRICE_SCALE", "100"))   # chunks 모드에서 가격 × scale 을 정수로 저장
+
+# 종목 마스터 인덱스 재확인 주기(초) (simulator.services.symbol_index)
+SYMBOL_INDEX_RECHECK = int(os.getenv("SYMBOL_INDEX_RECHECK", "60"))
+
+# 시세 캐시 (simulator.services.quote_cache)
+QUOTE_CACHE_TTL = int(os.getenv("QUOTE_CACHE_TTL", "15"))              # 초, 이 시간 안에는 업스트림을 호출하지 않음
+QUOTE_CACHE_STALE_TTL = int(os.getenv("QUOTE_CACHE_STALE_TTL", "300"))  # 초, 이 시간까지는 이전 값을 주고 백그라운드 갱신
+QUOTE_CACHE_SHARED = os.getenv("QUOTE_CACHE_SHARED", "false").lower() == "true"  # 프로세스 간 공유 여부
+QUOTE_CACHE_ALIAS = "quotes"
+QUOTE_REQUEST_DEADLINE = float(os.getenv("QUOTE_REQUEST_DEADLINE", "3"))   # 초, 요청 하나가 시세를 기다리는 최대 시간
+QUOTE_FETCH_CHUNK_SIZE = int(os.getenv("QUOTE_FETCH_CHUNK_SIZE", "20"))    # 동시에 조회할 티커 묶음 크기
+QUOTE_FETCH_WORKERS = int(os.getenv("QUOTE_FETCH_WORKERS", "8"))
+
+# 백테스트 결과 캐시 (strategies.services.result_cache)
+BACKTEST_CACHE_SHARED = os.getenv("BACKTEST_CACHE_SHARED", "false").lower() == "true"  # 프로세스 간 공유 여부
+BACKTEST_CACHE_ALIAS = "backtests"
+BACKTEST_CACHE_TTL = int(os.getenv("BACKTEST_CACHE_TTL", str(7 * 24 * 60 * 60)))      # 초. 새 봉이 적재되면 TTL 과 무관하게 키가 바뀐다
+BACKTEST_CACHE_UNVERSIONED_TTL = int(os.getenv("BACKTEST_CACHE_UNVERSIONED_TTL", "3600"))  # 초. 봉 저장소에 없는 종목(제공자 데이터)이 섞인 결과
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    "quotes": (
+        {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": os.getenv("QUOTE_CACHE_REDIS_URL", "redis://localhost:6379/1"),
+        }
+        if QUOTE_CACHE_SHARED else
+        {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": "quotes",
+        }
+    ),
+    "backtests": (
+        {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": os.getenv("BACKTEST_CACHE_REDIS_URL", "redis://localhost:6379/2"),
+        }
+        if BACKTEST_CACHE_SHARED else
+        {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": "backtests",
+            "OPTIONS": {"MAX_ENTRIES": 1000},
+        }
+    ),
+}
+
+# 보유 종목 시세 백그라운드 갱신 (simulator.services.quote_refresher)
+QUOTE_REFRESH_MARKET_INTERVAL = int(os.getenv("QUOTE_REFRESH_MARKET_INTERVAL", "10"))   # 초, 장중
+QUOTE_REFRESH_IDLE_INTERVAL = int(os.getenv("QUOTE_REFRESH_IDLE_INTERVAL", "600"))      # 초, 장외
+QUOTE_REFRESH_BATCH_SIZE = int(os.getenv("QUOTE_REFRESH_BATCH_SIZE", "200"))
+# 갱신기를 운영할 때 true: 요청 처리 중에는(fetch_quotes, fetch_current_price 모두) 캐시 값만 읽고
+# TTL 만료로 업스트림을 부르지 않는다. 갱신기는 별도 프로세스이므로 QUOTE_CACHE_SHARED 도 켜야 하고,
+# 갱신기 없이 켜면 시세가 처음 조회한 값에서 멈추므로 기본값은 false 다
+QUOTE_READ_CACHE_ONLY = os.getenv("QUOTE_READ_CACHE_ONLY", "false").lower() == "true"
+
+# 실시간 시세 스트림 (simulator.services.quote_stream, ASGI 로 띄울 때만 동작)
+QUOTE_STREAM_INTERVAL = float(os.getenv("QUOTE_STREAM_INTERVAL", "2"))           # 초, 허브가 시세를 확인하는 간격
+QUOTE_STREAM_HEARTBEAT = float(os.getenv("QUOTE_STREAM_HEARTBEAT", "15"))        # 초, 연결 유지용 ping
+QUOTE_STREAM_HOLDINGS_RELOAD = float(os.getenv("QUOTE_STREAM_HOLDINGS_RELOAD", "30"))  # 초, 보유 내역 재조회
+QUOTE_STREAM_TICKET_TTL = int(os.getenv("QUOTE_STREAM_TICKET_TTL", "30"))      # 초, 스트림 연결용 일회용 티켓 유효 기간
+
+# 매매 체결 (simulator.services.execution)
+TRADE_EXECUTION_RETRIES = int(os.getenv("TRADE_EXECUTION_RETRIES", "5"))             # 직렬화 실패/잠금 오류 재시도 횟수
+TRADE_EXECUTION_BACKOFF = float(os.getenv("TRADE_EXECUTION_BACKOFF", "0.02"))        # 초, 첫 재시도 대기 (매번 두 배)
+TRADE_BATCH_MAX_ORDERS = int(os.getenv("TRADE_BATCH_MAX_ORDERS", "100"))   # 바스켓 주문 한 번의 최대 건수
+
+# 거래 내역 (simulator.services.trade_history)
+TRADE_HISTORY_PAGE_SIZE = int(os.getenv("TRADE_HISTORY_PAGE_SIZE", "50"))
+TRADE_HISTORY_MAX_PAGE_SIZE = int(os.getenv("TRADE_HISTORY_MAX_PAGE_SIZE", "200"))
+LOT_ACCOUNTING_METHOD = os.getenv("LOT_ACCOUNTING_METHOD", "average")       # 실현손익 계산 방식: average / fifo
+REALIZED_PNL_CACHE_TTL = int(os.getenv("REALIZED_PNL_CACHE_TTL", str(24 * 60 * 60)))  # 초, fifo 실현손익 합계 캐시 (새 거래가 생기면 키가 바뀐다)
+PORTFOLIO_RECENT_TRADES = int(os.getenv("PORTFOLIO_RECENT_TRADES", "20"))   # 포트폴리오 응답에 함께 싣는 최근 거래 수
+EXPORT_CHUNK_SIZE = int(os.getenv("EXPORT_CHUNK_SIZE", "2000"))             # CSV/Parquet 내보내기에서 한 번에 읽고 보내는 행 수
+
+# 수익률 순위표 (simulator.services.leaderboard)
+LEADERBOARD_MARK_INTERVAL = float(os.getenv("LEADERBOARD_MARK_INTERVAL", "5"))           # 초, 캐시된 시세로 평가액을 다시 맞추는 간격
+LEADERBOARD_RECONCILE_INTERVAL = float(os.getenv("LEADERBOARD_RECONCILE_INTERVAL", "300"))  # 초, 전체 재계산으로 보정하는 간격 (다른 프로세스 체결이 늦게 보이는 최대 시간, 0 = 끔)
+LEADERBOARD_MAX_LIMIT = int(os.getenv("LEADERBOARD_MAX_LIMIT", "100"))
+
+# 지정가/스톱 주문 매칭 엔진 (run_matching_engine)
+MATCHING_ENGINE_INTERVAL = float(os.getenv("MATCHING_ENGINE_INTERVAL", "2"))                # 초, 시세 확인 간격
+MATCHING_ENGINE_QUOTE_DEADLINE = float(os.getenv("MATCHING_ENGINE_QUOTE_DEADLINE", "5"))    # 초, 한 틱의 시세 조회 마감
+MATCHING_ENGINE_SYNC_OVERLAP = float(os.getenv("MATCHING_ENGINE_SYNC_OVERLAP", "60"))       # 초, 늦게 커밋된 주문/취소를 잡으려고 다시 보는 구간
+
+# 일별 NAV 스냅샷 (simulator.services.nav_snapshots)
+NAV_SNAPSHOT_BACKFILL_DAYS = int(os.getenv("NAV_SNAPSHOT_BACKFILL_DAYS", "30"))   # 일, 밀린 스냅샷을 최대 며칠 전까지 채울지
+NAV_CURVE_MAX_POINTS = int(os.getenv("NAV_CURVE_MAX_POINTS", "500"))             # 수익 곡선 API 의 최대 점 개수
+
+# 포트폴리오 위험 지표 (simulator.services.risk)
+RISK_BENCHMARK_SYMBOL = os.getenv("RISK_BENCHMARK_SYMBOL", "KOSPI")   # 봉 저장소에서 찾을 이름 (ingest_bars KOSPI --ticker ^KS11)
+RISK_BENCHMARK_TICKER = os.getenv("RISK_BENCHMARK_TICKER", "^KS11")   # 저장소에 없을 때 제공자에서 받을 티커
+RISK_CACHE_TTL = int(os.getenv("RISK_CACHE_TTL", str(6 * 60 * 60)))    # 초
+
+# 재무 지표 (simulator.services.price_service.fetch_fundamentals)
+FUNDAMENTALS_CACHE_TTL = int(os.getenv("FUNDAMENTALS_CACHE_TTL", str(24 * 60 * 60)))   # 초
+
+# 전략 백테스트 (strategies.services.backtest)
+BACKTEST_INITIAL_CASH = int(os.getenv("BACKTEST_INITIAL_CASH", "10000000"))
+BACKTEST_FEE_RATE = float(os.getenv("BACKTEST_FEE_RATE", "0.00015"))        # 체결 금액 대비 수수료 (매수/매도 각각)
+BACKTEST_DEFAULT_YEARS = int(os.getenv("BACKTEST_DEFAULT_YEARS", "3"))      # 구간을 주지 않았을 때 최근 몇 년
+RULE_PLAN_CACHE_SIZE = int(os.getenv("RULE_PLAN_CACHE_SIZE", "1024"))       # 컴파일된 rule_json 을 프로세스에 몇 개까지 둘지
+SWEEP_WORKERS = int(os.getenv("SWEEP_WORKERS", "0"))                         # 웹 프로세스당 파라미터 탐색 작업 프로세스 수 (0 = CPU 코어 수)
+SWEEP_MAX_COMBINATIONS = int(os.getenv("SWEEP_MAX_COMBINATIONS", "2000"))     # 한 번에 돌릴 수 있는 최대 조합 수
+PORTFOLIO_MAX_SYMBOLS = int(os.getenv("PORTFOLIO_MAX_SYMBOLS", "3000"))      # 종목 묶음 백테스트 한 번의 최대 종목 수
+PORTFOLIO_FETCH_WORKERS = int(os.getenv("PORTFOLIO_FETCH_WORKERS", "8"))     # 저장소에 없는 종목을 제공자에서 동시에 받을 스레드 수
+PORTFOLIO_FETCH_DEADLINE = float(os.getenv("PORTFOLIO_FETCH_DEADLINE", "20"))  # 초, 요청 안에서 제공자 조회를 기다리는 한도 (0 = 제한 없음)
+
+# 실시간 전략 실행기 (run_strategy_runner)
+LIVE_RUNNER_INTERVAL = float(os.getenv("LIVE_RUNNER_INTERVAL", "5"))                  # 초, 시세 확인 간격
+LIVE_RUNNER_QUOTE_DEADLINE = float(os.getenv("LIVE_RUNNER_QUOTE_DEADLINE", "3"))      # 초, 한 틱의 시세 조회 마감
+LIVE_RUNNER_RELOAD_INTERVAL = float(os.getenv("LIVE_RUNNER_RELOAD_INTERVAL", "60"))   # 초, is_live 전략을 다시 읽는 간격
+LIVE_RUNNER_WARMUP_DAYS = int(os.getenv("LIVE_RUNNER_WARMUP_DAYS", "400"))           # 일, 지표를 데울 일봉 기간 (최소)
+LIVE_RUNNER_MAX_ORDERS = int(os.getenv("LIVE_RUNNER_MAX_ORDERS", "200"))             # 한 틱에 낼 최대 주문 수 (나머지는 다음 틱)
+LIVE_MAX_SYMBOLS = int(os.getenv("LIVE_MAX_SYMBOLS", "50"))                          # 전략 하나가 실시간으로 돌릴 최대 종목 수
+
+CELERY_BEAT_SCHEDULE = {
+    "refresh-held-quotes": {
+        "task": "simulator.tasks.refresh_held_quotes",
+        "schedule": float(QUOTE_REFRESH_MARKET_INTERVAL),
+    },
+    "take-nav-snapshots": {
+        "task": "simulator.tasks.take_nav_snapshots",
+        "schedule": crontab(hour=16, minute=0, day_of_week="mon-fri"),
+    },
+}
@@ -1,6 +1,33 @@
 # Back/simulator/admin.py
 from django.contrib import admin
-from .models import VirtualPortfolio, VirtualTrade
+from .models import VirtualPortfolio, VirtualTrade, Symbol, Position, Order, PortfolioSnapshot
 
 admin.site.register(VirtualPortfolio)
 admin.site.register(VirtualTrade)
+
+
+@admin.register(Symbol)
+class SymbolAdmin(admin.ModelAdmin):
+    list_display = ('code', 'name', 'market', 'yahoo_ticker', 'is_active')
+    search_fields = ('code', 'name')
+    list_filter = ('market', 'is_active')
+
+
+@admin.register(Position)
+class PositionAdmin(admin.ModelAdmin):
+    list_display = ('portfolio', 'stock_code', 'stock_name', 'quantity', 'cost_basis', 'realized_pnl')
+    search_fields = ('portfolio__user__username', 'stock_code', 'stock_name')
+
+
+@admin.register(Order)
+class OrderAdmin(admin.ModelAdmin):
+    list_display = ('portfolio', 'side', 'order_type', 'stock_code', 'limit_price', 'stop_price', 'quantity', 'status', 'created_at')
+    search_fields = ('portfolio__user__username', 'stock_code', 'stock_name')
+    list_filter = ('status', 'order_type', 'side')
+
+
+@admin.register(PortfolioSnapshot)
+class PortfolioSnapshotAdmin(admin.ModelAdmin):
+    list_display = ('portfolio', 'date', 'cash', 'market_value', 'nav')
+    search_fields = ('portfolio__user__username',)
+    date_hierarchy = 'date'
@@ -1,6 +1,10 @@
 # Back/simulator/api/serializers.py
+from django.conf import settings
 from rest_framework import serializers
-from simulator.models import VirtualPortfolio, VirtualTrade
+from simulator.models import Order, VirtualPortfolio, VirtualTrade
+from simulator.services.execution import TradeRejected, execute_basket, execute_trade
+from simulator.services.symbol_index import get_symbol_index
+from simulator.services.trade_history import recent_trades
 
 
 class TradeSerializer(serializers.ModelSerializer):
@@ -18,47 +22,95 @@ class TradeSerializer(serializers.ModelSerializer):
 
 
 class PortfolioSerializer(serializers.ModelSerializer):
-    trades = TradeSerializer(many=True, read_only=True)
+    # 전체 내역은 거래 내역 API(커서 페이지네이션)에서, 여기에는 최근 PORTFOLIO_RECENT_TRADES 건만
+    trades = serializers.SerializerMethodField()
 
     class Meta:
         model = VirtualPortfolio
         fields = ["id", "cash_balance", "created_at", "trades"]
 
+    def get_trades(self, obj):
+        return TradeSerializer(recent_trades(obj), many=True).data
 
-class BuySellSerializer(serializers.Serializer):
+
+class TradeLegSerializer(serializers.Serializer):
     trade_type = serializers.ChoiceField(choices=[("buy", "매수"), ("sell", "매도")])
     stock_code = serializers.CharField(max_length=12)
     stock_name = serializers.CharField(max_length=100)
     price = serializers.IntegerField(min_value=1)
     quantity = serializers.IntegerField(min_value=1)
 
-    def validate(self, data):
-        if data["trade_type"] == "buy":
-            need_cash = data["price"] * data["quantity"]
-            portfolio = self.context["portfolio"]
-            if portfolio.cash_balance < need_cash:
-                raise serializers.ValidationError("잔액이 부족합니다")
-        return data
+
+class BuySellSerializer(TradeLegSerializer):
+    """
+    잔액/보유 수량은 체결 트랜잭션 안에서 검사한다 (simulator.services.execution)
+    """
+
+    def create(self, validated_data):
+        try:
+            return execute_trade(self.context["portfolio"], **validated_data)
+        except TradeRejected as exc:
+            raise serializers.ValidationError(str(exc))
+
+
+class BatchTradeSerializer(serializers.Serializer):
+    """
+    바스켓 주문. 잔액/보유 수량은 체결할 때 잠금 아래에서 한 번에 검사한다.
+    """
+    orders = TradeLegSerializer(many=True, allow_empty=False)
+
+    def validate_orders(self, value):
+        limit = settings.TRADE_BATCH_MAX_ORDERS
+        if len(value) > limit:
+            raise serializers.ValidationError(f"한 번에 최대 {limit}건까지 주문할 수 있습니다")
+        return value
 
     def create(self, validated_data):
-        portfolio = self.context["portfolio"]
-        trade_type = validated_data["trade_type"]
-        price = validated_data["price"]
-        qty = validated_data["quantity"]
-
-        from django.db import transaction
-        from django.db.models import F
-
-        with transaction.atomic():
-            if trade_type == "buy":
-                portfolio.cash_balance = F("cash_balance") - price * qty
-            else:
-                portfolio.cash_balance = F("cash_balance") + price * qty
-            portfolio.save(update_fields=["cash_balance"])
-            portfolio.refresh_from_db(fields=["cash_balance"])
-
-            trade = VirtualTrade.objects.create(
-                portfolio=portfolio,
-                **validated_data,
-            )
-        return trade
+        try:
+            cash_balance, trades = execute_basket(self.context["portfolio"], validated_data["orders"])
+        except TradeRejected as exc:
+            raise serializers.ValidationError(str(exc))
+        return {"cash_balance": cash_balance, "trades": trades}
+
+
+class OrderSerializer(serializers.ModelSerializer):
+    """
+    지정가/스톱 주문 접수. stock 에는 종목명 또는 코드를 받는다.
+    """
+    stock = serializers.CharField(max_length=100, write_only=True)
+
+    class Meta:
+        model = Order
+        fields = [
+            "id",
+            "side",
+            "order_type",
+            "stock",
+            "stock_code",
+            "stock_name",
+            "limit_price",
+            "stop_price",
+            "quantity",
+            "status",
+            "reason",
+            "created_at",
+        ]
+        read_only_fields = ["stock_code", "stock_name", "status", "reason", "created_at"]
+
+    def validate(self, data):
+        info = get_symbol_index().resolve(data.pop("stock"))
+        if info is None:
+            raise serializers.ValidationError({"stock": "등록되지 않은 종목입니다"})
+        data["stock_code"], data["stock_name"] = info.code, info.name
+
+        if data["quantity"] < 1:
+            raise serializers.ValidationError({"quantity": "수량은 1 이상이어야 합니다"})
+        if data["order_type"] == Order.LIMIT:
+            if not data.get("limit_price"):
+                raise serializers.ValidationError({"limit_price": "지정가 주문에는 지정가가 필요합니다"})
+            data["stop_price"] = None
+        else:
+            if not data.get("stop_price"):
+                raise serializers.ValidationError({"stop_price": "스톱 주문에는 스톱 가격이 필요합니다"})
+            data["limit_price"] = None
+        return data
@@ -1,8 +1,25 @@
 # Back/simulator/api/urls.py
 from django.urls import path
-from .views import PortfolioView, TradeView
+from .views import (
+    PortfolioView, EquityCurveView, RiskView, PnLView, LeaderboardView, MyRankView,
+    TradeView, TradeExportView, BatchTradeView, OrderListView, OrderCancelView,
+    QuoteCacheStatsView, StreamTicketView, SymbolSearchView, portfolio_stream,
+)
 
 urlpatterns = [
     path("portfolio/", PortfolioView.as_view(), name="sim-portfolio"),
+    path("portfolio/equity/", EquityCurveView.as_view(), name="sim-equity-curve"),
+    path("risk/", RiskView.as_view(), name="sim-risk"),
+    path("pnl/", PnLView.as_view(), name="sim-pnl"),
+    path("leaderboard/", LeaderboardView.as_view(), name="sim-leaderboard"),
+    path("leaderboard/me/", MyRankView.as_view(), name="sim-leaderboard-me"),
     path("trade/", TradeView.as_view(), name="sim-trade"),
+    path("trade/batch/", BatchTradeView.as_view(), name="sim-trade-batch"),
+    path("trades/export/", TradeExportView.as_view(), name="sim-trade-export"),
+    path("orders/", OrderListView.as_view(), name="sim-orders"),
+    path("orders/<int:pk>/cancel/", OrderCancelView.as_view(), name="sim-order-cancel"),
+    path("symbols/", SymbolSearchView.as_view(), name="sim-symbol-search"),
+    path("stream/", portfolio_stream, name="sim-stream"),
+    path("stream/ticket/", StreamTicketView.as_view(), name="sim-stream-ticket"),
+    path("quotes/stats/", QuoteCacheStatsView.as_view(), name="sim-quote-stats"),
 ]
@@ -1,25 +1,187 @@
 # Back/simulator/api/views.py
+import asyncio
+import json
+import secrets
+import time
+from datetime import date, timedelta
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core import signing
+from django.core.cache import cache
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpResponse, StreamingHttpResponse
+from django.utils import timezone
 from rest_framework import generics, permissions, status
 from rest_framework.response import Response
-from simulator.models import VirtualPortfolio
-from .serializers import PortfolioSerializer, BuySellSerializer
+from rest_framework.views import APIView
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+from simulator.models import Order, Position, VirtualPortfolio
+from simulator.services.export import TRADE_COLUMNS, ExportNegotiation, export_response
+from simulator.services.leaderboard import get_leaderboard, leaderboard_stats, load_portfolio
+from simulator.services.lots import period_totals, portfolio_lots
+from simulator.services.nav_snapshots import RANGES, equity_curve
+from simulator.services.order_service import cancel_order, place_order
+from simulator.services.quote_cache import quote_cache
+from simulator.services.risk import WINDOWS as RISK_WINDOWS, portfolio_risk
+from simulator.services.symbol_index import get_symbol_index
+from simulator.services.trade_history import filter_trades, parse_filters
+from .serializers import PortfolioSerializer, BuySellSerializer, BatchTradeSerializer, OrderSerializer
 
 
 class PortfolioView(generics.RetrieveAPIView):
     """
     GET /api/simulator/portfolio/
-    로그인 사용자의 가상 포트폴리오와 거래 내역을 반환
+    로그인 사용자의 가상 포트폴리오와 최근 거래 내역을 반환
     """
     serializer_class = PortfolioSerializer
     permission_classes = [permissions.IsAuthenticated]
 
     def get_object(self):
         portfolio, _ = VirtualPortfolio.objects.get_or_create(user=self.request.user)
-        return (
-            VirtualPortfolio.objects
-            .prefetch_related("trades")
-            .get(pk=portfolio.pk)
-        )
+        return portfolio
+
+
+class EquityCurveView(APIView):
+    """
+    GET /api/simulator/portfolio/equity/?range=3m&points=200
+    일별 NAV 스냅샷 수익 곡선. range(1m/3m/6m/1y/3y/ytd/all) 대신 start/end(YYYY-MM-DD)도 받는다.
+    points 를 넘으면 고르게 골라 줄인다 (최대 NAV_CURVE_MAX_POINTS)
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        portfolio, _ = VirtualPortfolio.objects.get_or_create(user=request.user)
+        params = request.query_params
+        try:
+            start = date.fromisoformat(params["start"]) if params.get("start") else None
+            end = date.fromisoformat(params["end"]) if params.get("end") else None
+            points = min(int(params.get("points", settings.NAV_CURVE_MAX_POINTS)), settings.NAV_CURVE_MAX_POINTS)
+        except ValueError:
+            return Response({"detail": "start/end/points 형식이 잘못되었습니다"}, status=status.HTTP_400_BAD_REQUEST)
+
+        span = params.get("range", "all")
+        if start is None and span != "all":
+            today = timezone.localdate()
+            if span == "ytd":
+                start = today.replace(month=1, day=1)
+            elif span in RANGES:
+                start = today - timedelta(days=RANGES[span])
+            else:
+                return Response({"detail": f"알 수 없는 range: {span}"}, status=status.HTTP_400_BAD_REQUEST)
+
+        curve = equity_curve(portfolio, start=start, end=end, points=max(points, 2))
+        return Response({"range": span, "points": len(curve), "curve": curve})
+
+
+class RiskView(APIView):
+    """
+    GET /api/simulator/risk/?window=1y&confidence=0.95
+    보유 종목 기준 변동성, VaR/CVaR, KOSPI 대비 베타, 상관행렬, 최대 낙폭 (window: 3m/6m/1y/3y/5y)
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        portfolio, _ = VirtualPortfolio.objects.get_or_create(user=request.user)
+        window = request.query_params.get("window", "1y")
+        try:
+            confidence = float(request.query_params.get("confidence", 0.95))
+        except ValueError:
+            confidence = None
+        if window not in RISK_WINDOWS or confidence is None or not 0.5 <= confidence < 1:
+            return Response(
+                {"detail": f"window 는 {'/'.join(RISK_WINDOWS)}, confidence 는 0.5 이상 1 미만이어야 합니다"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        return Response(portfolio_risk(portfolio, window=window, confidence=confidence))
+
+
+class PnLView(APIView):
+    """
+    GET /api/simulator/pnl/?method=fifo&period=month&limit=100
+    로트 회계로 다시 계산한 실현손익. 기간별 합계, 최근 매도 limit 건의 실현 내역, 미청산 로트를 반환
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        portfolio, _ = VirtualPortfolio.objects.get_or_create(user=request.user)
+        method = request.query_params.get("method", settings.LOT_ACCOUNTING_METHOD)
+        period = request.query_params.get("period", "month")
+        try:
+            limit = min(int(request.query_params.get("limit", 100)), 1000)
+            result = portfolio_lots(portfolio, method)
+            periods = period_totals(result.realizations, period)
+        except ValueError as exc:
+            return Response({"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response({
+            "method": method,
+            "realized_pnl": sum(item.pnl for item in result.realizations),
+            "periods": periods,
+            "realizations": [item._asdict() for item in reversed(result.realizations[-limit:])] if limit else [],
+            "open_lots": [lot._asdict() for lot in result.open_lots],
+        })
+
+
+class LeaderboardView(APIView):
+    """
+    GET /api/simulator/leaderboard/?limit=20&offset=0
+    수익률 순위 (수익률이 같으면 같은 순위). 웹 프로세스마다 따로 들고 있어 다른 프로세스의 체결은
+    stats.reconcile_interval 초까지 늦게 보일 수 있다 (stats.reconciled_at 이 마지막 보정 시각)
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        try:
+            limit = min(int(request.query_params.get("limit", 20)), settings.LEADERBOARD_MAX_LIMIT)
+            offset = max(int(request.query_params.get("offset", 0)), 0)
+        except ValueError:
+            return Response({"detail": "limit/offset 은 정수여야 합니다"}, status=status.HTTP_400_BAD_REQUEST)
+        board = get_leaderboard()
+        return Response({
+            "count": len(board),
+            "results": [row._asdict() for row in board.top(max(limit, 0), offset)],
+            "stats": leaderboard_stats(),
+        })
+
+
+class MyRankView(APIView):
+    """
+    GET /api/simulator/leaderboard/me/
+    내 순위. 다른 프로세스에서 체결했을 수 있으니 내 포트폴리오는 다시 읽고 순위를 구한다
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        portfolio, _ = VirtualPortfolio.objects.get_or_create(user=request.user)
+        board = get_leaderboard()
+        load_portfolio(board, portfolio.pk)
+        standing = board.standing(portfolio.pk)
+        count = len(board)
+        return Response({
+            **standing._asdict(),
+            "count": count,
+            "top_percent": round(standing.rank / count * 100, 2),
+        })
+
+
+class TradeExportView(APIView):
+    """
+    GET /api/simulator/trades/export/?format=csv|parquet&symbol=&side=&start=&end=
+    거래 원장 전체를 오래된 순으로 스트리밍한다 (필터는 거래 내역 조회와 같다)
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    content_negotiation_class = ExportNegotiation
+
+    def get(self, request):
+        portfolio, _ = VirtualPortfolio.objects.get_or_create(user=request.user)
+        try:
+            qs = filter_trades(portfolio, **parse_filters(request.query_params)).order_by("traded_at", "id")
+            return export_response(qs, TRADE_COLUMNS, request.query_params.get("format", "csv"), "trades")
+        except ValueError as exc:
+            return Response({"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
 
 
 class TradeView(generics.GenericAPIView):
@@ -46,3 +208,253 @@ class TradeView(generics.GenericAPIView):
             },
             status=status.HTTP_201_CREATED,
         )
+
+
+class BatchTradeView(generics.GenericAPIView):
+    """
+    POST /api/simulator/trade/batch/
+    {"orders": [{trade_type, stock_code, stock_name, price, quantity}, ...]}
+    바스켓 전체를 한 트랜잭션으로 체결하고 잔고와 거래 id 만 돌려준다 (전부 성공 또는 전부 실패)
+    """
+    serializer_class = BatchTradeSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request):
+        portfolio, _ = VirtualPortfolio.objects.get_or_create(user=request.user)
+        serializer = self.get_serializer(data=request.data, context={"portfolio": portfolio})
+        serializer.is_valid(raise_exception=True)
+        result = serializer.save()
+        return Response(
+            {
+                "cash_balance": result["cash_balance"],
+                "trade_ids": [trade.id for trade in result["trades"]],
+            },
+            status=status.HTTP_201_CREATED,
+        )
+
+
+class OrderListView(generics.ListCreateAPIView):
+    """
+    GET  /api/simulator/orders/?status=open   내 주문 목록 (status 생략 시 미체결만)
+    POST /api/simulator/orders/               지정가/스톱 주문 접수 (체결은 매칭 엔진이 처리)
+    """
+    serializer_class = OrderSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_queryset(self):
+        qs = Order.objects.filter(portfolio__user=self.request.user)
+        order_status = self.request.query_params.get("status", Order.OPEN)
+        if order_status != "all":
+            qs = qs.filter(status=order_status)
+        return qs
+
+    def perform_create(self, serializer):
+        portfolio, _ = VirtualPortfolio.objects.get_or_create(user=self.request.user)
+        serializer.instance = place_order(portfolio, **serializer.validated_data)
+
+
+class OrderCancelView(APIView):
+    """
+    POST /api/simulator/orders/<id>/cancel/
+    미체결 주문 취소
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request, pk):
+        order = generics.get_object_or_404(Order, pk=pk, portfolio__user=request.user)
+        if not cancel_order(order):
+            return Response({"detail": "이미 체결되었거나 취소된 주문입니다"}, status=status.HTTP_409_CONFLICT)
+        order.refresh_from_db()
+        return Response(OrderSerializer(order).data)
+
+
+class QuoteCacheStatsView(APIView):
+    """
+    GET /api/simulator/quotes/stats/
+    시세 캐시 hit/miss/지연 시간 카운터 (관리자 전용)
+    """
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        return Response(quote_cache.stats())
+
+
+class SymbolSearchView(APIView):
+    """
+    GET /api/simulator/symbols/?q=삼성&limit=10
+    종목명/코드 접두어 자동완성
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        query = request.query_params.get("q", "")
+        try:
+            limit = min(int(request.query_params.get("limit", 10)), 50)
+        except ValueError:
+            limit = 10
+        results = get_symbol_index().autocomplete(query, limit=limit) if query else []
+        return Response([info._asdict() for info in results])
+
+
+# ─────────────────────────────────────────────
+# 실시간 시세 스트림 (SSE, ASGI 전용)
+# ─────────────────────────────────────────────
+_TICKET_SALT = "simulator.stream-ticket"
+
+
+class StreamTicketView(APIView):
+    """
+    POST /api/simulator/stream/ticket/
+    스트림 연결용 일회용 티켓. EventSource 는 헤더를 못 붙이므로 GET /stream/?ticket=... 으로 넘긴다
+    (오래 사는 JWT 를 URL 에 실으면 접근 로그/프록시/Referer 로 샌다)
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request):
+        ticket = signing.dumps({"uid": request.user.pk, "nonce": secrets.token_urlsafe(16)}, salt=_TICKET_SALT)
+        return Response(
+            {"ticket": ticket, "expires_in": settings.QUOTE_STREAM_TICKET_TTL}, status=status.HTTP_201_CREATED,
+        )
+
+
+def _redeem_ticket(ticket):
+    """
+    유효 기간 안에 처음 쓰는 티켓이면 그 사용자, 아니면 None.
+    사용 기록은 기본 캐시에 둔다 (ASGI 프로세스를 여러 개 띄우면 기본 캐시를 공유 캐시로)
+    """
+    try:
+        payload = signing.loads(ticket, salt=_TICKET_SALT, max_age=settings.QUOTE_STREAM_TICKET_TTL)
+    except signing.BadSignature:    # 만료(SignatureExpired)도 여기로
+        return None
+    if not cache.add(f"stream-ticket:{payload['nonce']}", True, settings.QUOTE_STREAM_TICKET_TTL):
+        return None
+    return get_user_model().objects.filter(pk=payload["uid"], is_active=True).first()
+
+
+def _stream_user(request):
+    """
+    세션 사용자, 일회용 티켓(?ticket=, StreamTicketView) 또는 Authorization 헤더의 JWT
+    """
+    if request.user.is_authenticated:
+        return request.user
+    ticket = request.GET.get("ticket")
+    if ticket:
+        return _redeem_ticket(ticket)
+    auth = JWTAuthentication()
+    header = auth.get_header(request)
+    raw = auth.get_raw_token(header) if header else None
+    if not raw:
+        return None
+    try:
+        return auth.get_user(auth.get_validated_token(raw))
+    except (InvalidToken, TokenError):
+        return None
+
+
+def _load_holdings(user):
+    """
+    종목별 보유 수량과 매수 원가 {ticker: {...}}
+    """
+    index = get_symbol_index()
+    holdings = {}
+    for position in Position.objects.filter(portfolio__user=user, quantity__gt=0):
+        info = index.resolve(position.stock_code)
+        if info is None:
+            continue
+        holdings[info.ticker] = {
+            "stock_code": position.stock_code,
+            "stock_name": position.stock_name,
+            "quantity": position.quantity,
+            "invested": position.cost_basis,
+        }
+    return holdings
+
+
+def _position_event(holding, price):
+    value = holding["quantity"] * price
+    profit = value - holding["invested"]
+    return {
+        "stock_code": holding["stock_code"],
+        "stock_name": holding["stock_name"],
+        "quantity": holding["quantity"],
+        "current_price": price,
+        "market_value": value,
+        "profit": round(profit, 2),
+        "profit_rate": round(profit / holding["invested"] * 100, 2) if holding["invested"] else 0,
+    }
+
+
+def _sse(event, data):
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False, default=str)}\n\n"
+
+
+async def portfolio_stream(request):
+    """
+    GET /api/simulator/stream/?ticket=...
+    보유 종목 시세 변화와 다시 계산한 평가손익을 Server-Sent Events 로 보낸다.
+        event: position  → 값이 바뀐 종목 하나
+        event: summary   → 전체 평가금액/손익
+    ASGI 서버(financial.asgi)에서만 동작한다. WSGI 로 받으면 501
+    """
+    from simulator.services.quote_stream import get_quote_hub
+
+    if not isinstance(request, ASGIRequest):
+        # WSGI 에서는 끝나지 않는 스트림이 워커 하나를 계속 붙잡는다
+        return HttpResponse(
+            "실시간 스트림은 ASGI 서버(uvicorn financial.asgi:application)에서만 지원합니다",
+            status=501, content_type="text/plain; charset=utf-8",
+        )
+    user = await sync_to_async(_stream_user)(request)
+    if user is None:
+        return HttpResponse(status=401)
+
+    holdings = await sync_to_async(_load_holdings)(user)
+
+    async def events():
+        nonlocal holdings
+        hub = get_quote_hub()
+        sub = hub.subscribe(holdings)
+        prices = {}
+        reloaded = last_sent = time.monotonic()
+        try:
+            yield "retry: 3000\n\n"
+            while True:
+                try:
+                    ticker, price = await sub.get(timeout=settings.QUOTE_STREAM_HEARTBEAT)
+                except asyncio.TimeoutError:
+                    ticker = None
+                now = time.monotonic()
+
+                # 스트림 중에 매매가 일어날 수 있으므로 보유 내역을 주기적으로 다시 읽는다
+                if now - reloaded >= settings.QUOTE_STREAM_HOLDINGS_RELOAD:
+                    fresh = await sync_to_async(_load_holdings)(user)
+                    if set(fresh) != set(holdings):
+                        sub.close()
+                        sub = hub.subscribe(fresh)
+                    holdings, reloaded = fresh, now
+
+                if ticker is None or ticker not in holdings:
+                    if now - last_sent >= settings.QUOTE_STREAM_HEARTBEAT:
+                        yield ": ping\n\n"
+                        last_sent = now
+                    continue
+
+                prices[ticker] = price
+                yield _sse("position", _position_event(holdings[ticker], price))
+                priced = [(h, prices[t]) for t, h in holdings.items() if t in prices]
+                value = sum(h["quantity"] * p for h, p in priced)
+                invested = sum(h["invested"] for h, _ in priced)
+                yield _sse("summary", {
+                    "market_value": value,
+                    "invested": round(invested, 2),
+                    "profit": round(value - invested, 2),
+                    "profit_rate": round((value - invested) / invested * 100, 2) if invested else 0,
+                })
+                last_sent = now
+        finally:
+            sub.close()
+
+    response = StreamingHttpResponse(events(), content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"
+    return response
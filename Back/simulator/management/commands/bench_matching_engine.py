@@ -0,0 +1,61 @@
+# Back/simulator/management/commands/bench_matching_engine.py
+import random
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand
+
+from simulator.services.matching_engine import BUY, LIMIT, SELL, STOP, BookOrder, MatchingEngine
+
+
+class Command(BaseCommand):
+    help = 'Benchmarks the in-memory matching engine (no database access)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--orders', type=int, default=50000, help='미체결 주문 수')
+        parser.add_argument('--symbols', type=int, default=100)
+        parser.add_argument('--quotes', type=int, default=10000, help='넣어 볼 시세 수')
+        parser.add_argument('--cancel-ratio', type=float, default=0.1, help='접수 후 취소할 주문 비율')
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        symbols = [f"{i:06d}" for i in range(options['symbols'])]
+        base = {symbol: rng.uniform(10_000, 100_000) for symbol in symbols}
+
+        orders = []
+        for order_id in range(1, options['orders'] + 1):
+            symbol = rng.choice(symbols)
+            side = rng.choice((BUY, SELL))
+            price = int(base[symbol] * rng.uniform(0.9, 1.1))
+            if rng.random() < 0.8:
+                orders.append(BookOrder(order_id, symbol, side, LIMIT, 10, limit_price=price))
+            else:
+                orders.append(BookOrder(order_id, symbol, side, STOP, 10, stop_price=price))
+
+        engine = MatchingEngine()
+        started = time.perf_counter()
+        for order in orders:
+            engine.submit(order)
+        submit_elapsed = time.perf_counter() - started
+
+        cancels = rng.sample(range(1, len(orders) + 1), int(len(orders) * options['cancel_ratio']))
+        started = time.perf_counter()
+        for order_id in cancels:
+            engine.cancel(order_id)
+        cancel_elapsed = time.perf_counter() - started
+
+        # 종목별로 기준가 근처를 랜덤워크하는 시세를 넣는다
+        latencies, fills = np.empty(options['quotes']), 0
+        for i in range(options['quotes']):
+            symbol = rng.choice(symbols)
+            base[symbol] *= 1 + rng.gauss(0, 0.01)
+            started = time.perf_counter()
+            fills += len(engine.on_quote(symbol, int(base[symbol])))
+            latencies[i] = time.perf_counter() - started
+
+        p50, p99, worst = np.percentile(latencies, [50, 99, 100]) * 1e6
+        self.stdout.write(f"submit : {len(orders):,} orders in {submit_elapsed:.3f}s ({len(orders) / submit_elapsed:,.0f} orders/s)")
+        self.stdout.write(f"cancel : {len(cancels):,} orders in {cancel_elapsed:.3f}s")
+        self.stdout.write(f"quotes : {len(latencies):,} quotes, {fills:,} fills, {len(engine):,} still open")
+        self.stdout.write(f"latency per quote : p50 {p50:.1f}µs  p99 {p99:.1f}µs  max {worst:.1f}µs")
@@ -0,0 +1,123 @@
+# Back/simulator/management/commands/bench_trade_contention.py
+import threading
+import time
+from collections import Counter
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.db.models import F, Sum
+
+from simulator.models import Position, VirtualPortfolio, VirtualTrade
+from simulator.services.execution import TradeRejected, execute_trade
+
+BENCH_USERNAME = '__bench_trade_contention__'
+
+
+class Command(BaseCommand):
+    help = 'Fires concurrent orders at one portfolio and checks cash/position invariants afterwards'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=8)
+        parser.add_argument('--orders', type=int, default=50, help='스레드당 주문 수')
+        parser.add_argument('--cash', type=int, default=1_000_000, help='시작 현금 (일부 주문이 잔액 부족이 되도록 작게)')
+        parser.add_argument('--price', type=int, default=10_000)
+        parser.add_argument('--naive', action='store_true',
+                            help='비교용: 잔액을 읽고 파이썬에서 검사한 뒤 저장하는 예전 방식으로 실행')
+
+    def handle(self, *args, **options):
+        User = get_user_model()
+        User.objects.filter(username=BENCH_USERNAME).delete()
+        user = User.objects.create(username=BENCH_USERNAME, email=f'{BENCH_USERNAME}@example.com')
+        portfolio = VirtualPortfolio.objects.create(user=user, cash_balance=options['cash'])
+        price, code = options['price'], 'BENCH'
+
+        results = Counter()
+        lock = threading.Lock()
+        barrier = threading.Barrier(options['threads'])
+
+        def worker(index):
+            barrier.wait()
+            try:
+                for i in range(options['orders']):
+                    # 매수 둘에 매도 하나 꼴로 섞는다
+                    side = VirtualTrade.SELL if (index + i) % 3 == 2 else VirtualTrade.BUY
+                    try:
+                        if options['naive']:
+                            self._naive_trade(portfolio.pk, side, code, price)
+                        else:
+                            execute_trade(portfolio, side, code, code, price, 1)
+                        outcome = 'filled'
+                    except TradeRejected:
+                        outcome = 'rejected'
+                    except Exception as exc:
+                        outcome = f'error: {type(exc).__name__}'
+                    with lock:
+                        results[outcome] += 1
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=worker, args=(i,)) for i in range(options['threads'])]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        total = sum(results.values())
+        self.stdout.write(f"{total} orders from {options['threads']} threads in {elapsed:.2f}s "
+                          f"({total / elapsed:,.0f} orders/s)")
+        for outcome, count in sorted(results.items()):
+            self.stdout.write(f"  {outcome}: {count}")
+
+        violations = self._check(portfolio, options['cash'], code)
+        for message in violations:
+            self.stdout.write(self.style.ERROR(f"VIOLATION: {message}"))
+        if not violations:
+            self.stdout.write(self.style.SUCCESS('Invariants hold: cash >= 0, cash and position match the trade log'))
+        user.delete()
+
+    def _check(self, portfolio, initial_cash, code):
+        portfolio.refresh_from_db()
+        sums = {
+            row['trade_type']: row
+            for row in VirtualTrade.objects.filter(portfolio=portfolio).values('trade_type')
+            .annotate(qty=Sum('quantity'), amount=Sum(F('price') * F('quantity')))
+        }
+        bought = sums.get(VirtualTrade.BUY, {}).get('qty') or 0
+        sold = sums.get(VirtualTrade.SELL, {}).get('qty') or 0
+        spent = sums.get(VirtualTrade.BUY, {}).get('amount') or 0
+        received = sums.get(VirtualTrade.SELL, {}).get('amount') or 0
+        held = Position.objects.filter(portfolio=portfolio, stock_code=code).values_list('quantity', flat=True).first() or 0
+
+        violations = []
+        if portfolio.cash_balance < 0:
+            violations.append(f"negative cash {portfolio.cash_balance}")
+        if portfolio.cash_balance != initial_cash - spent + received:
+            violations.append(f"cash {portfolio.cash_balance} != trade log {initial_cash - spent + received}")
+        if held != bought - sold:
+            violations.append(f"position {held} != trade log {bought - sold}")
+        if sold > bought:
+            violations.append(f"sold {sold} more than bought {bought}")
+        return violations
+
+    def _naive_trade(self, portfolio_id, side, code, price):
+        # 예전 BuyStockAPI/SellStockAPI 방식: 잠금 없이 읽고, 검사하고, 저장
+        portfolio = VirtualPortfolio.objects.get(pk=portfolio_id)
+        position, _ = Position.objects.get_or_create(portfolio=portfolio, stock_code=code, defaults={'stock_name': code})
+        if side == VirtualTrade.BUY:
+            if portfolio.cash_balance < price:
+                raise TradeRejected('cash')
+            portfolio.cash_balance -= price
+            position.quantity += 1
+        else:
+            if position.quantity < 1:
+                raise TradeRejected('quantity')
+            portfolio.cash_balance += price
+            position.quantity -= 1
+        portfolio.save()
+        position.save()
+        VirtualTrade.objects.create(
+            portfolio=portfolio, trade_type=side, stock_code=code, stock_name=code, price=price, quantity=1,
+        )
@@ -0,0 +1,68 @@
+# Back/simulator/management/commands/ingest_bars.py
+from datetime import date
+from pathlib import Path
+
+import pandas as pd
+from django.core.management.base import BaseCommand, CommandError
+
+from simulator.services.bar_store import ingest_bars
+from simulator.services.providers import get_provider
+from simulator.services.providers.replay import _frame_to_bars
+from simulator.services.symbol_index import UnknownSymbolError, resolve_symbol
+
+
+class Command(BaseCommand):
+    help = 'Ingests OHLCV bars into the bar store from local CSV/Parquet files or the price provider'
+
+    def add_arguments(self, parser):
+        parser.add_argument('symbols', nargs='+', help='종목 코드 또는 종목명')
+        parser.add_argument('--file', help='단일 종목 CSV/Parquet 파일 (종목 하나만 지정할 때)')
+        parser.add_argument('--dir', help='<코드>.csv / <코드>.parquet 파일이 있는 디렉터리')
+        parser.add_argument('--ticker', help='제공자에서 받을 때 사용할 티커 (예: 지수 ^KS11)')
+        parser.add_argument('--start', type=date.fromisoformat, default=None)
+        parser.add_argument('--end', type=date.fromisoformat, default=None)
+        parser.add_argument('--interval', default='1d')
+        parser.add_argument('--mode', choices=['rows', 'chunks'], default=None,
+                            help='기본: settings.BAR_STORE_MODE')
+
+    def handle(self, *args, **options):
+        if (options['file'] or options['ticker']) and len(options['symbols']) != 1:
+            raise CommandError('--file/--ticker 는 종목 하나에만 사용할 수 있습니다')
+
+        total = 0
+        for query in options['symbols']:
+            code, bars = self._read(query, options)
+            count = ingest_bars(code, bars, interval=options['interval'], mode=options['mode'])
+            total += count
+            self.stdout.write(f"{code}: {count} bars")
+        self.stdout.write(self.style.SUCCESS(f"Ingested {total} bars"))
+
+    def _read(self, query, options):
+        if options['ticker']:
+            code, ticker = query, options['ticker']
+        else:
+            try:
+                info = resolve_symbol(query)
+            except UnknownSymbolError as exc:
+                raise CommandError(str(exc))
+            code, ticker = info.code, info.ticker
+
+        path = Path(options['file']) if options['file'] else None
+        if path is None and options['dir']:
+            for suffix in ('.parquet', '.csv'):
+                candidate = Path(options['dir']) / f"{code}{suffix}"
+                if candidate.exists():
+                    path = candidate
+                    break
+            else:
+                raise CommandError(f"File not found for {code} in {options['dir']}")
+
+        if path is not None:
+            if not path.exists():
+                raise CommandError(f"File not found: {path}")
+            reader = pd.read_parquet if path.suffix == '.parquet' else pd.read_csv
+            return code, _frame_to_bars(reader(path))
+
+        return code, get_provider().get_history(
+            ticker, start=options['start'], end=options['end'], interval=options['interval'],
+        )
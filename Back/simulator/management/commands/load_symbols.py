@@ -0,0 +1,97 @@
+# Back/simulator/management/commands/load_symbols.py
+import csv
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from simulator.models import Symbol
+from simulator.services.symbol_index import invalidate_symbol_index
+
+# KRX 정보데이터시스템 "전종목 기본정보" CSV 컬럼 → 일반 CSV 컬럼 순으로 찾는다
+CODE_COLUMNS   = ("단축코드", "종목코드", "code")
+NAME_COLUMNS   = ("한글 종목약명", "종목명", "name")
+MARKET_COLUMNS = ("시장구분", "market")
+ALIAS_COLUMNS  = ("영문 종목명", "한글 종목명", "aliases")
+
+MARKET_ALIASES = {
+    "KOSPI": Symbol.KOSPI,
+    "유가증권": Symbol.KOSPI,
+    "KOSDAQ": Symbol.KOSDAQ,
+    "KOSDAQ GLOBAL": Symbol.KOSDAQ,
+    "코스닥": Symbol.KOSDAQ,
+}
+
+
+def _pick(row, columns):
+    for column in columns:
+        value = row.get(column)
+        if value:
+            return value.strip()
+    return ""
+
+
+class Command(BaseCommand):
+    help = 'Loads the KRX listing (CSV) into the Symbol table'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='KRX 전종목 기본정보 CSV 또는 code,name,market[,aliases] CSV')
+        parser.add_argument('--encoding', default=None, help='기본: utf-8-sig, 실패하면 cp949')
+        parser.add_argument('--deactivate-missing', action='store_true',
+                            help='파일에 없는 기존 종목을 비활성화')
+
+    def handle(self, *args, **options):
+        path = Path(options['path'])
+        if not path.exists():
+            raise CommandError(f"File not found: {path}")
+
+        rows = self._read(path, options['encoding'])
+        symbols, skipped = {}, 0
+        for row in rows:
+            code = _pick(row, CODE_COLUMNS).lstrip("A")
+            name = _pick(row, NAME_COLUMNS)
+            market = MARKET_ALIASES.get(_pick(row, MARKET_COLUMNS).upper())
+            if not code or not name or market is None:
+                skipped += 1
+                continue
+            aliases = [
+                alias.strip()
+                for column in ALIAS_COLUMNS
+                for alias in (row.get(column) or "").split("|")
+                if alias.strip() and alias.strip() != name
+            ]
+            symbols[code] = Symbol(
+                code=code,
+                name=name,
+                market=market,
+                yahoo_ticker=f"{code}{Symbol.YAHOO_SUFFIX[market]}",
+                aliases=aliases,
+                is_active=True,
+            )
+
+        with transaction.atomic():
+            Symbol.objects.bulk_create(
+                symbols.values(),
+                batch_size=1000,
+                update_conflicts=True,
+                unique_fields=["code"],
+                update_fields=["name", "market", "yahoo_ticker", "aliases", "is_active", "updated_at"],
+            )
+            deactivated = 0
+            if options['deactivate_missing']:
+                deactivated = Symbol.objects.exclude(code__in=symbols).update(is_active=False)
+
+        # bulk_create 는 post_save 를 보내지 않으므로 직접 무효화
+        invalidate_symbol_index()
+        self.stdout.write(self.style.SUCCESS(
+            f"Loaded: {len(symbols)}, Skipped: {skipped}, Deactivated: {deactivated}"
+        ))
+
+    def _read(self, path, encoding):
+        for candidate in ([encoding] if encoding else ["utf-8-sig", "cp949"]):
+            try:
+                with open(path, mode='r', encoding=candidate, newline='') as csvfile:
+                    return list(csv.DictReader(csvfile))
+            except UnicodeDecodeError:
+                continue
+        raise CommandError(f"Could not decode {path}; pass --encoding")
@@ -0,0 +1,23 @@
+# Back/simulator/management/commands/rebuild_positions.py
+from django.core.management.base import BaseCommand
+
+from simulator.models import VirtualPortfolio
+from simulator.services.positions import rebuild_positions
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the Position table from VirtualTrade history'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', help='이 사용자(username)의 포트폴리오만 다시 계산')
+
+    def handle(self, *args, **options):
+        portfolios = VirtualPortfolio.objects.all()
+        if options['user']:
+            portfolios = portfolios.filter(user__username=options['user'])
+
+        count = 0
+        for portfolio in portfolios.iterator():
+            rebuild_positions(portfolio)
+            count += 1
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt positions for {count} portfolios"))
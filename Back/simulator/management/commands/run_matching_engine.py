@@ -0,0 +1,24 @@
+# Back/simulator/management/commands/run_matching_engine.py
+from django.core.management.base import BaseCommand
+
+from simulator.services.order_service import EngineRunner
+
+
+class Command(BaseCommand):
+    help = 'Matches open limit/stop orders against live quotes and records the fills'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='한 번만 동기화/체결하고 종료')
+
+    def handle(self, *args, **options):
+        runner = EngineRunner()
+        if options['once']:
+            filled = runner.tick()
+            self.stdout.write(self.style.SUCCESS(f"Filled {filled} orders, {len(runner.engine)} still open"))
+            return
+
+        self.stdout.write('Matching engine started (Ctrl+C to stop)')
+        try:
+            runner.run_forever()
+        except KeyboardInterrupt:
+            self.stdout.write('Matching engine stopped')
@@ -0,0 +1,24 @@
+# Back/simulator/management/commands/run_quote_refresher.py
+from django.core.management.base import BaseCommand
+
+from simulator.services.quote_refresher import held_tickers, refresh_quotes, run_forever
+
+
+class Command(BaseCommand):
+    help = 'Keeps quotes of held and interest stocks warm in the quote cache'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='한 번만 갱신하고 종료')
+
+    def handle(self, *args, **options):
+        if options['once']:
+            tickers = held_tickers()
+            count = refresh_quotes(tickers)
+            self.stdout.write(self.style.SUCCESS(f"Refreshed {count}/{len(tickers)} quotes"))
+            return
+
+        self.stdout.write('Quote refresher started (Ctrl+C to stop)')
+        try:
+            run_forever()
+        except KeyboardInterrupt:
+            self.stdout.write('Quote refresher stopped')
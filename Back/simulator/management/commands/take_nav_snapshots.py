@@ -0,0 +1,23 @@
+# Back/simulator/management/commands/take_nav_snapshots.py
+import time
+from datetime import date
+
+from django.core.management.base import BaseCommand
+
+from simulator.services.nav_snapshots import take_snapshots
+
+
+class Command(BaseCommand):
+    help = 'Writes daily NAV snapshots for every portfolio, filling only the missing days'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--date', type=date.fromisoformat, default=None, help='기본: 마지막 장 마감일')
+        parser.add_argument('--backfill', type=int, default=None,
+                            help='최대 며칠 전까지 채울지 (기본: settings.NAV_SNAPSHOT_BACKFILL_DAYS)')
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        count = take_snapshots(as_of=options['date'], backfill_days=options['backfill'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Wrote {count} snapshots in {time.monotonic() - started:.1f}s"
+        ))
@@ -0,0 +1,34 @@
+# Back/simulator/migrations/0003_seed_default_symbols.py
+from django.db import migrations
+
+# 기존 price_service 에 하드코딩되어 있던 종목들
+DEFAULT_SYMBOLS = [
+    ("005930", "삼성전자", "KOSPI", "005930.KS", ["Samsung Electronics"]),
+    ("000660", "SK하이닉스", "KOSPI", "000660.KS", ["SK hynix"]),
+    ("373220", "LG에너지솔루션", "KOSPI", "373220.KS", ["LG Energy Solution"]),
+]
+
+
+def seed(apps, schema_editor):
+    Symbol = apps.get_model("simulator", "Symbol")
+    for code, name, market, ticker, aliases in DEFAULT_SYMBOLS:
+        Symbol.objects.get_or_create(
+            code=code,
+            defaults={"name": name, "market": market, "yahoo_ticker": ticker, "aliases": aliases},
+        )
+
+
+def unseed(apps, schema_editor):
+    Symbol = apps.get_model("simulator", "Symbol")
+    Symbol.objects.filter(code__in=[row[0] for row in DEFAULT_SYMBOLS]).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("simulator", "0002_symbol"),
+    ]
+
+    operations = [
+        migrations.RunPython(seed, unseed),
+    ]
@@ -0,0 +1,48 @@
+# Back/simulator/migrations/0004_price_bars.py
+# Generated by Django 4.2.20 on 2026-10-18 08:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('simulator', '0003_seed_default_symbols'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PriceBar',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('symbol', models.CharField(max_length=20)),
+                ('interval', models.CharField(default='1d', max_length=4)),
+                ('ts', models.DateTimeField()),
+                ('open', models.FloatField()),
+                ('high', models.FloatField()),
+                ('low', models.FloatField()),
+                ('close', models.FloatField()),
+                ('volume', models.BigIntegerField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='PriceBarChunk',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('symbol', models.CharField(max_length=20)),
+                ('interval', models.CharField(default='1d', max_length=4)),
+                ('start', models.DateField()),
+                ('count', models.PositiveIntegerField()),
+                ('scale', models.PositiveIntegerField(default=1)),
+                ('data', models.BinaryField()),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='pricebarchunk',
+            constraint=models.UniqueConstraint(fields=('symbol', 'interval', 'start'), name='uniq_pricebarchunk_symbol_start'),
+        ),
+        migrations.AddConstraint(
+            model_name='pricebar',
+            constraint=models.UniqueConstraint(fields=('symbol', 'interval', 'ts'), name='uniq_pricebar_symbol_ts'),
+        ),
+    ]
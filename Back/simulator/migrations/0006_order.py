@@ -0,0 +1,45 @@
+# Back/simulator/migrations/0006_order.py
+# Generated by Django 4.2.20 on 2026-10-18 08:56
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('simulator', '0005_position'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Order',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('side', models.CharField(choices=[('buy', '매수'), ('sell', '매도')], max_length=4)),
+                ('order_type', models.CharField(choices=[('limit', '지정가'), ('stop', '스톱')], max_length=5)),
+                ('stock_code', models.CharField(max_length=12)),
+                ('stock_name', models.CharField(max_length=100)),
+                ('limit_price', models.PositiveIntegerField(blank=True, null=True)),
+                ('stop_price', models.PositiveIntegerField(blank=True, null=True)),
+                ('quantity', models.PositiveIntegerField()),
+                ('status', models.CharField(choices=[('open', '미체결'), ('filled', '체결'), ('cancelled', '취소'), ('rejected', '거부')], default='open', max_length=9)),
+                ('reason', models.CharField(blank=True, max_length=100)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('portfolio', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='orders', to='simulator.virtualportfolio')),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.AddField(
+            model_name='virtualtrade',
+            name='order',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='fills', to='simulator.order'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['status', 'updated_at'], name='order_status_updated_idx'),
+        ),
+    ]
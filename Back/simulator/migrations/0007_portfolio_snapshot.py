@@ -0,0 +1,33 @@
+# Back/simulator/migrations/0007_portfolio_snapshot.py
+# Generated by Django 4.2.20 on 2026-10-18 09:00
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('simulator', '0006_order'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PortfolioSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('cash', models.BigIntegerField()),
+                ('market_value', models.BigIntegerField()),
+                ('nav', models.BigIntegerField()),
+                ('portfolio', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='snapshots', to='simulator.virtualportfolio')),
+            ],
+            options={
+                'ordering': ['portfolio', 'date'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='portfoliosnapshot',
+            constraint=models.UniqueConstraint(fields=('portfolio', 'date'), name='uniq_snapshot_portfolio_date'),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Back/simulator/migrations/0008_trade_history_indexes.py
+# Generated by Django 4.2.20 on 2026-10-18 09:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('simulator', '0007_portfolio_snapshot'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='virtualtrade',
+            options={'ordering': ['-traded_at', '-id']},
+        ),
+        migrations.AddIndex(
+            model_name='virtualtrade',
+            index=models.Index(fields=['portfolio', '-traded_at', '-id'], name='trade_portfolio_time_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='virtualtrade',
+            index=models.Index(fields=['portfolio', 'stock_code', '-traded_at'], name='trade_portfolio_code_idx'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Back/simulator/migrations/0009_bar_versions.py
+# Generated by Django 4.2.20 on 2026-10-18 09:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('simulator', '0008_trade_history_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BarVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('symbol', models.CharField(max_length=20)),
+                ('interval', models.CharField(default='1d', max_length=4)),
+                ('version', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='barversion',
+            constraint=models.UniqueConstraint(fields=('symbol', 'interval'), name='uniq_barversion_symbol_interval'),
+        ),
+    ]
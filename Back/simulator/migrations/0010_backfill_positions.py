@@ -0,0 +1,47 @@
+# Back/simulator/migrations/0010_backfill_positions.py
+from django.db import migrations
+
+
+def backfill(apps, schema_editor):
+    """
+    Position 이 하나도 없는 포트폴리오만 거래 내역을 시간순으로 다시 적용해 채운다.
+    services.positions.rebuild_positions 와 같은 평균단가 방식이고, 보유 수량을 넘는 매도는 보유분까지만 반영한다
+    """
+    Position = apps.get_model("simulator", "Position")
+    VirtualTrade = apps.get_model("simulator", "VirtualTrade")
+
+    filled = set(Position.objects.values_list("portfolio_id", flat=True).distinct())
+    positions = {}
+    trades = (
+        VirtualTrade.objects.exclude(portfolio_id__in=filled)
+        .order_by("portfolio_id", "traded_at", "id")
+        .values_list("portfolio_id", "trade_type", "stock_code", "stock_name", "price", "quantity")
+    )
+    for pid, trade_type, code, name, price, quantity in trades.iterator(chunk_size=2000):
+        position = positions.get((pid, code))
+        if position is None:
+            position = positions[pid, code] = Position(portfolio_id=pid, stock_code=code, stock_name=name)
+        if trade_type == "buy":
+            position.quantity += quantity
+            position.cost_basis += price * quantity
+            continue
+        quantity = min(quantity, position.quantity)
+        if quantity == 0:
+            continue
+        cost = round(position.cost_basis * quantity / position.quantity)
+        position.realized_pnl += price * quantity - cost
+        position.cost_basis -= cost
+        position.quantity -= quantity
+
+    Position.objects.bulk_create(positions.values(), batch_size=2000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("simulator", "0009_bar_versions"),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
@@ -25,9 +25,182 @@ class VirtualTrade(models.Model):
     quantity    = models.PositiveIntegerField()
     traded_at   = models.DateTimeField(auto_now_add=True)
     strategy_run = models.ForeignKey("strategies.StrategyRun", null=True, blank=True, on_delete=models.SET_NULL)
+    order        = models.ForeignKey("simulator.Order", null=True, blank=True, on_delete=models.SET_NULL, related_name="fills")
 
     class Meta:
-        ordering = ["-traded_at"]
+        ordering = ["-traded_at", "-id"]
+        indexes = [
+            # 거래 내역 keyset 페이지네이션 (simulator.services.trade_history)
+            models.Index(fields=["portfolio", "-traded_at", "-id"], name="trade_portfolio_time_idx"),
+            models.Index(fields=["portfolio", "stock_code", "-traded_at"], name="trade_portfolio_code_idx"),
+        ]
 
     def __str__(self):
         return f"{self.portfolio.user.username} {self.trade_type} {self.stock_code}"
+
+
+class Symbol(models.Model):
+    KOSPI  = "KOSPI"
+    KOSDAQ = "KOSDAQ"
+    MARKET_CHOICES = [(KOSPI, "코스피"), (KOSDAQ, "코스닥")]
+    YAHOO_SUFFIX   = {KOSPI: ".KS", KOSDAQ: ".KQ"}
+
+    code         = models.CharField(max_length=12, unique=True)         # 단축코드 (예: 005930)
+    name         = models.CharField(max_length=100, db_index=True)      # 한글 종목명
+    market       = models.CharField(max_length=10, choices=MARKET_CHOICES)
+    yahoo_ticker = models.CharField(max_length=20, unique=True)         # 예: 005930.KS
+    aliases      = models.JSONField(default=list, blank=True)           # 영문명, 약칭 등
+    is_active    = models.BooleanField(default=True)
+    updated_at   = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["name"]
+
+    def __str__(self):
+        return f"{self.name}({self.code})"
+
+
+class PriceBar(models.Model):
+    """
+    주식 OHLCV 봉 (행 저장 방식, settings.BAR_STORE_MODE = "rows")
+    """
+    symbol   = models.CharField(max_length=20)                  # 종목 단축코드 (지수는 KOSPI 등)
+    interval = models.CharField(max_length=4, default="1d")     # 1d, 1m ...
+    ts       = models.DateTimeField()
+    open     = models.FloatField()
+    high     = models.FloatField()
+    low      = models.FloatField()
+    close    = models.FloatField()
+    volume   = models.BigIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["symbol", "interval", "ts"], name="uniq_pricebar_symbol_ts"),
+        ]
+
+    def __str__(self):
+        return f"{self.symbol} {self.interval} {self.ts}"
+
+
+class PriceBarChunk(models.Model):
+    """
+    봉 묶음을 델타 인코딩 + 압축해서 한 행에 담는 저장 방식 (settings.BAR_STORE_MODE = "chunks")
+    분봉은 하루, 일봉은 1년 단위로 묶는다. 인코딩/디코딩은 simulator.services.bar_store 참고
+    """
+    symbol   = models.CharField(max_length=20)
+    interval = models.CharField(max_length=4, default="1d")
+    start    = models.DateField()                               # 묶음 시작일 (일봉은 1월 1일)
+    count    = models.PositiveIntegerField()
+    scale    = models.PositiveIntegerField(default=1)           # 가격 × scale 을 정수로 저장
+    data     = models.BinaryField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["symbol", "interval", "start"], name="uniq_pricebarchunk_symbol_start"),
+        ]
+
+    def __str__(self):
+        return f"{self.symbol} {self.interval} {self.start} ({self.count})"
+
+
+class BarVersion(models.Model):
+    """
+    종목별 봉 데이터 버전. ingest_bars 가 저장할 때마다 같은 트랜잭션에서 1 씩 올린다
+    (백테스트 결과 캐시 키에 들어가므로 새 봉이 들어오면 예전 결과는 더 이상 쓰이지 않는다)
+    """
+    symbol     = models.CharField(max_length=20)
+    interval   = models.CharField(max_length=4, default="1d")
+    version    = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["symbol", "interval"], name="uniq_barversion_symbol_interval"),
+        ]
+
+    def __str__(self):
+        return f"{self.symbol} {self.interval} v{self.version}"
+
+
+class Position(models.Model):
+    """
+    종목별 보유 현황. 매매가 체결될 때 같은 트랜잭션 안에서 갱신된다 (simulator.services.positions)
+    """
+    portfolio    = models.ForeignKey(VirtualPortfolio, on_delete=models.CASCADE, related_name="positions")
+    stock_code   = models.CharField(max_length=12)
+    stock_name   = models.CharField(max_length=100)
+    quantity     = models.PositiveIntegerField(default=0)
+    cost_basis   = models.BigIntegerField(default=0)      # 보유 수량의 매수 원가 합계 (평균단가 × 수량)
+    realized_pnl = models.BigIntegerField(default=0)      # 매도로 확정된 손익 누계
+    updated_at   = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["portfolio", "stock_code"], name="uniq_position_portfolio_stock"),
+        ]
+
+    @property
+    def avg_price(self):
+        return self.cost_basis / self.quantity if self.quantity else 0
+
+    def __str__(self):
+        return f"{self.portfolio.user.username} {self.stock_code} x{self.quantity}"
+
+
+class Order(models.Model):
+    """
+    지정가/스톱 주문. 미체결 주문은 매칭 엔진(simulator.services.matching_engine)이 메모리에 올려 두고
+    시세가 들어올 때마다 체결시킨다. 체결 내역은 VirtualTrade(order=...) 로 남는다.
+    """
+    LIMIT = "limit"
+    STOP  = "stop"
+    ORDER_TYPE_CHOICES = [(LIMIT, "지정가"), (STOP, "스톱")]
+
+    OPEN      = "open"
+    FILLED    = "filled"
+    CANCELLED = "cancelled"
+    REJECTED  = "rejected"
+    STATUS_CHOICES = [(OPEN, "미체결"), (FILLED, "체결"), (CANCELLED, "취소"), (REJECTED, "거부")]
+
+    portfolio   = models.ForeignKey(VirtualPortfolio, on_delete=models.CASCADE, related_name="orders")
+    side        = models.CharField(max_length=4, choices=VirtualTrade.TRADE_CHOICES)
+    order_type  = models.CharField(max_length=5, choices=ORDER_TYPE_CHOICES)
+    stock_code  = models.CharField(max_length=12)
+    stock_name  = models.CharField(max_length=100)
+    limit_price = models.PositiveIntegerField(null=True, blank=True)
+    stop_price  = models.PositiveIntegerField(null=True, blank=True)
+    quantity    = models.PositiveIntegerField()
+    status      = models.CharField(max_length=9, choices=STATUS_CHOICES, default=OPEN)
+    reason      = models.CharField(max_length=100, blank=True)     # 거부 사유
+    created_at  = models.DateTimeField(auto_now_add=True)
+    updated_at  = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=["status", "updated_at"], name="order_status_updated_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.portfolio.user.username} {self.order_type} {self.side} {self.stock_code} x{self.quantity}"
+
+
+class PortfolioSnapshot(models.Model):
+    """
+    포트폴리오 일별 순자산(NAV) 스냅샷. 장 마감 뒤 배치(simulator.services.nav_snapshots)가 채운다.
+    nav = cash + market_value (종가 기준 평가액)
+    """
+    portfolio    = models.ForeignKey(VirtualPortfolio, on_delete=models.CASCADE, related_name="snapshots")
+    date         = models.DateField()
+    cash         = models.BigIntegerField()
+    market_value = models.BigIntegerField()
+    nav          = models.BigIntegerField()
+
+    class Meta:
+        ordering = ["portfolio", "date"]
+        constraints = [
+            models.UniqueConstraint(fields=["portfolio", "date"], name="uniq_snapshot_portfolio_date"),
+        ]
+
+    def __str__(self):
+        return f"{self.portfolio.user.username} {self.date} {self.nav}"
@@ -5,8 +5,13 @@ from .models import VirtualTrade
 from insight.models import InterestStock
 
 class VirtualTradeSerializer(serializers.ModelSerializer):
-    stock_name = serializers.CharField(source='stock.company_name', read_only=True)
+    current_price = serializers.SerializerMethodField()
 
     class Meta:
         model = VirtualTrade
-        fields = ['id', 'stock_name', 'is_buy', 'quantity', 'price', 'traded_at']
+        fields = ['id', 'trade_type', 'stock_code', 'stock_name', 'quantity', 'price', 'current_price', 'traded_at']
+
+    def get_current_price(self, obj):
+        # 뷰에서 fetch_current_prices 로 한 번에 조회한 가격을 context 로 넘겨준다
+        prices = self.context.get('prices')
+        return prices.get(obj.stock_name) if prices is not None else None
@@ -0,0 +1,411 @@
+# Back/simulator/services/bar_store.py
+"""
+주식 OHLCV 봉 저장소
+
+저장 방식은 settings.BAR_STORE_MODE 로 고른다.
+    "rows"   : PriceBar 한 행 = 봉 하나
+    "chunks" : PriceBarChunk 한 행 = 봉 묶음 (분봉은 하루, 일봉은 1년)
+               각 컬럼을 정수(가격 × scale)로 바꾼 뒤 델타 인코딩 → 가장 작은 정수형 → zlib 압축
+
+조회 결과는 항상 같은 모양의 NumPy 배열 dict 이다.
+    {"ts": datetime64[s] (UTC), "open"/"high"/"low"/"close": float64, "volume": int64}
+저장할 때마다 (종목, 간격) 의 BarVersion 을 올린다 (data_versions 로 조회).
+가격이 nan/inf 인 봉(제공자가 휴장일 등에 주는 빈 행)은 저장하지 않는다.
+"""
+import logging
+import struct
+import zlib
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from simulator.models import BarVersion, PriceBar, PriceBarChunk
+
+logger = logging.getLogger(__name__)
+COLUMNS = ("ts", "open", "high", "low", "close", "volume")
+PRICE_COLUMNS = ("open", "high", "low", "close")
+DAILY_INTERVALS = {"1d", "1wk", "1mo"}
+
+_DTYPES = (np.int8, np.int16, np.int32, np.int64)
+
+
+def empty_bars():
+    return {
+        "ts": np.empty(0, dtype="datetime64[s]"),
+        **{name: np.empty(0, dtype=np.float64) for name in PRICE_COLUMNS},
+        "volume": np.empty(0, dtype=np.int64),
+    }
+
+
+def bars_to_arrays(bars):
+    """
+    Bar(namedtuple) 목록 → 배열 dict (시간순 정렬, 같은 ts 는 마지막 값만 남김)
+    """
+    bars = list(bars)
+    if not bars:
+        return empty_bars()
+    ts = np.array([int(bar.ts.timestamp()) for bar in bars], dtype=np.int64)
+    arrays = {
+        "ts": ts,
+        **{name: np.array([getattr(bar, name) for bar in bars], dtype=np.float64) for name in PRICE_COLUMNS},
+        "volume": np.array([bar.volume for bar in bars], dtype=np.int64),
+    }
+    return _finalize(arrays)
+
+
+# ─────────────────────────────────────────────
+# 적재
+# ─────────────────────────────────────────────
+def ingest_bars(symbol, bars, interval="1d", mode=None):
+    """
+    symbol 의 봉을 저장한다 (같은 ts 는 덮어씀). bars 는 Bar 목록 또는 배열 dict.
+    가격이 비어 있는 (nan/inf) 봉은 빼고, 저장한 봉 수를 반환한다.
+    """
+    arrays = bars if isinstance(bars, dict) else bars_to_arrays(bars)
+    finite = np.logical_and.reduce([np.isfinite(np.asarray(arrays[name], dtype=np.float64)) for name in PRICE_COLUMNS])
+    if not finite.all():
+        # chunks 모드의 np.rint(nan) 은 정수로 바꿀 수 없고, rows 모드에도 nan 가격이 남는다
+        logger.warning("%s: 가격이 비어 있는 봉 %d개는 저장하지 않습니다", symbol, int((~finite).sum()))
+        arrays = {name: np.asarray(arrays[name])[finite] for name in COLUMNS}
+    if len(arrays["ts"]) == 0:
+        return 0
+    mode = mode or settings.BAR_STORE_MODE
+    with transaction.atomic():
+        saved = _ingest_chunks(symbol, arrays, interval) if mode == "chunks" else _ingest_rows(symbol, arrays, interval)
+        _bump_version(symbol, interval)
+    return saved
+
+
+def _bump_version(symbol, interval):
+    if not BarVersion.objects.filter(symbol=symbol, interval=interval).update(version=F("version") + 1):
+        version, created = BarVersion.objects.get_or_create(symbol=symbol, interval=interval, defaults={"version": 1})
+        if not created:
+            BarVersion.objects.filter(pk=version.pk).update(version=F("version") + 1)
+
+
+def data_versions(symbols, interval="1d", batch_size=500):
+    """
+    {symbol: 봉 데이터 버전}. 한 번도 적재되지 않은 종목은 0
+    """
+    symbols = list(symbols)
+    versions = dict.fromkeys(symbols, 0)
+    for i in range(0, len(symbols), batch_size):
+        versions.update(
+            BarVersion.objects.filter(symbol__in=symbols[i:i + batch_size], interval=interval)
+            .values_list("symbol", "version")
+        )
+    return versions
+
+
+def _ingest_rows(symbol, arrays, interval):
+    stamps = arrays["ts"].astype("datetime64[s]").astype(np.int64)
+    rows = [
+        PriceBar(
+            symbol=symbol,
+            interval=interval,
+            ts=datetime.fromtimestamp(int(ts), tz=dt_timezone.utc),
+            open=float(o), high=float(h), low=float(l), close=float(c), volume=int(v),
+        )
+        for ts, o, h, l, c, v in zip(
+            stamps, arrays["open"], arrays["high"], arrays["low"], arrays["close"], arrays["volume"]
+        )
+    ]
+    with transaction.atomic():
+        PriceBar.objects.bulk_create(
+            rows,
+            batch_size=2000,
+            update_conflicts=True,
+            unique_fields=["symbol", "interval", "ts"],
+            update_fields=["open", "high", "low", "close", "volume"],
+        )
+    return len(rows)
+
+
+def _ingest_chunks(symbol, arrays, interval):
+    stamps = arrays["ts"].astype("datetime64[s]").astype(np.int64)
+    starts = np.array([_chunk_start(int(ts), interval).toordinal() for ts in stamps])
+
+    with transaction.atomic():
+        existing = {
+            chunk.start: chunk
+            for chunk in PriceBarChunk.objects.select_for_update().filter(
+                symbol=symbol, interval=interval,
+                start__in=[date.fromordinal(int(o)) for o in np.unique(starts)],
+            )
+        }
+        chunks = []
+        for ordinal in np.unique(starts):
+            start = date.fromordinal(int(ordinal))
+            mask = starts == ordinal
+            part = {name: arrays[name][mask] for name in COLUMNS}
+            if start in existing:
+                # 기존 묶음과 합친 뒤 같은 ts 는 새 값으로
+                part = _finalize(_concat([decode_chunk(existing[start]), part]))
+            scale = settings.BAR_STORE_PRICE_SCALE
+            chunks.append(PriceBarChunk(
+                symbol=symbol, interval=interval, start=start,
+                count=len(part["ts"]), scale=scale, data=encode_chunk(part, scale),
+            ))
+        PriceBarChunk.objects.bulk_create(
+            chunks,
+            batch_size=500,
+            update_conflicts=True,
+            unique_fields=["symbol", "interval", "start"],
+            update_fields=["count", "scale", "data"],
+        )
+    return len(stamps)
+
+
+# ─────────────────────────────────────────────
+# 조회
+# ─────────────────────────────────────────────
+def load_bars(symbol, start=None, end=None, interval="1d", mode=None):
+    """
+    [start, end] 구간 봉을 배열 dict 로 반환한다. start/end 는 date 또는 datetime
+    """
+    mode = mode or settings.BAR_STORE_MODE
+    lo, hi = _bound(start, end_of_day=False), _bound(end, end_of_day=True)
+
+    if mode == "chunks":
+        qs = PriceBarChunk.objects.filter(symbol=symbol, interval=interval)
+        if lo is not None:
+            qs = qs.filter(start__gte=_chunk_start(lo, interval))
+        if hi is not None:
+            qs = qs.filter(start__lte=_chunk_start(hi, interval))
+        parts = [decode_chunk(chunk) for chunk in qs.order_by("start").only("count", "scale", "data")]
+        if not parts:
+            return empty_bars()
+        arrays = _concat(parts)
+        stamps = arrays["ts"].astype(np.int64)
+        mask = np.ones(len(stamps), dtype=bool)
+        if lo is not None:
+            mask &= stamps >= lo
+        if hi is not None:
+            mask &= stamps <= hi
+        return {name: values[mask] for name, values in arrays.items()}
+
+    qs = PriceBar.objects.filter(symbol=symbol, interval=interval)
+    if lo is not None:
+        qs = qs.filter(ts__gte=datetime.fromtimestamp(lo, tz=dt_timezone.utc))
+    if hi is not None:
+        qs = qs.filter(ts__lte=datetime.fromtimestamp(hi, tz=dt_timezone.utc))
+    rows = list(qs.order_by("ts").values_list(*COLUMNS))
+    if not rows:
+        return empty_bars()
+    ts, o, h, l, c, v = zip(*rows)
+    return {
+        "ts": np.array([int(value.timestamp()) for value in ts], dtype=np.int64).astype("datetime64[s]"),
+        "open": np.array(o, dtype=np.float64),
+        "high": np.array(h, dtype=np.float64),
+        "low": np.array(l, dtype=np.float64),
+        "close": np.array(c, dtype=np.float64),
+        "volume": np.array(v, dtype=np.int64),
+    }
+
+
+def load_bars_many(symbols, start=None, end=None, interval="1d", mode=None, batch_size=500):
+    """
+    여러 종목을 batch_size 개씩 묶어 한 쿼리로 읽는다 → {symbol: 배열 dict}. 봉이 없는 종목은 빠진다
+    """
+    mode = mode or settings.BAR_STORE_MODE
+    lo, hi = _bound(start, end_of_day=False), _bound(end, end_of_day=True)
+    result = {}
+    symbols = list(symbols)
+    for i in range(0, len(symbols), batch_size):
+        batch = symbols[i:i + batch_size]
+        if mode == "chunks":
+            qs = PriceBarChunk.objects.filter(symbol__in=batch, interval=interval)
+            if lo is not None:
+                qs = qs.filter(start__gte=_chunk_start(lo, interval))
+            if hi is not None:
+                qs = qs.filter(start__lte=_chunk_start(hi, interval))
+            parts = {}
+            for chunk in qs.order_by("symbol", "start").only("symbol", "count", "scale", "data"):
+                parts.setdefault(chunk.symbol, []).append(decode_chunk(chunk))
+            for symbol, chunks in parts.items():
+                arrays = _concat(chunks)
+                stamps = arrays["ts"].astype(np.int64)
+                mask = np.ones(len(stamps), dtype=bool)
+                if lo is not None:
+                    mask &= stamps >= lo
+                if hi is not None:
+                    mask &= stamps <= hi
+                if mask.any():
+                    result[symbol] = {name: values[mask] for name, values in arrays.items()}
+            continue
+
+        qs = PriceBar.objects.filter(symbol__in=batch, interval=interval)
+        if lo is not None:
+            qs = qs.filter(ts__gte=datetime.fromtimestamp(lo, tz=dt_timezone.utc))
+        if hi is not None:
+            qs = qs.filter(ts__lte=datetime.fromtimestamp(hi, tz=dt_timezone.utc))
+        rows = {}
+        for symbol, *values in qs.order_by("symbol", "ts").values_list("symbol", *COLUMNS).iterator(chunk_size=20000):
+            rows.setdefault(symbol, []).append(values)
+        for symbol, values in rows.items():
+            ts, o, h, l, c, v = zip(*values)
+            result[symbol] = {
+                "ts": np.array([int(value.timestamp()) for value in ts], dtype=np.int64).astype("datetime64[s]"),
+                "open": np.array(o, dtype=np.float64),
+                "high": np.array(h, dtype=np.float64),
+                "low": np.array(l, dtype=np.float64),
+                "close": np.array(c, dtype=np.float64),
+                "volume": np.array(v, dtype=np.int64),
+            }
+    return result
+
+
+def bar_matrix(arrays_by_symbol, symbols):
+    """
+    종목별 배열 dict → (일 수 × 종목 수) 행렬 dict. 날짜는 모든 종목의 현지 거래일 합집합이다.
+        "days"  : 현지 날짜 ordinal (일 수,)
+        "ts"    : 그날 현지 자정 datetime64[s] (일 수,)
+        "listed": 그날 봉이 있었는지 (일 수 × 종목 수, bool)
+        "open"/"high"/"low"/"close"/"volume": 봉이 없는 날은 nan
+    """
+    stamps = {symbol: local_dates(arrays["ts"]) for symbol, arrays in arrays_by_symbol.items()}
+    days = np.unique(np.concatenate(list(stamps.values()))) if stamps else np.empty(0, dtype=np.int64)
+    shape = (len(days), len(symbols))
+    matrix = {name: np.full(shape, np.nan) for name in ("open", "high", "low", "close", "volume")}
+    listed = np.zeros(shape, dtype=bool)
+    for j, symbol in enumerate(symbols):
+        if symbol not in stamps:
+            continue
+        rows = np.searchsorted(days, stamps[symbol])
+        listed[rows, j] = True
+        for name in matrix:
+            matrix[name][rows, j] = arrays_by_symbol[symbol][name]
+    midnight = np.array([_bound(date.fromordinal(int(day)), end_of_day=False) for day in days], dtype=np.int64)
+    return {"days": days, "ts": midnight.astype("datetime64[s]"), "listed": listed, **matrix}
+
+
+def local_dates(ts):
+    """
+    datetime64[s](UTC) 배열 → 현지(settings.TIME_ZONE) 날짜의 ordinal 배열
+    한국 일봉은 현지 자정(UTC 전날 15시)으로 찍히므로 UTC 날짜를 그대로 쓰면 하루씩 밀린다.
+    """
+    offset = int(timezone.localtime().utcoffset().total_seconds())
+    seconds = ts.astype("datetime64[s]").astype(np.int64) + offset
+    return seconds // 86400 + date(1970, 1, 1).toordinal()
+
+
+def align_closes(arrays, days):
+    """
+    배열 dict 의 종가를 days(date 목록) 에 맞춘다. 그날 봉이 없으면 직전 종가, 그 전 값도 없으면 nan
+    """
+    ordinals = np.array([day.toordinal() for day in days], dtype=np.int64)
+    if len(arrays["ts"]) == 0:
+        return np.full(len(ordinals), np.nan)
+    pos = np.searchsorted(local_dates(arrays["ts"]), ordinals, side="right") - 1
+    closes = arrays["close"][np.clip(pos, 0, None)]
+    return np.where(pos >= 0, closes, np.nan)
+
+
+def close_matrix(symbols, days, lookback=10, interval="1d"):
+    """
+    (종목 수 × 일 수) 종가 행렬. 첫날 이전 lookback 일까지 거슬러 올라가 직전 종가로 채운다.
+    """
+    matrix = np.full((len(symbols), len(days)), np.nan)
+    if not days:
+        return matrix
+    start = days[0] - timedelta(days=lookback)
+    for i, symbol in enumerate(symbols):
+        matrix[i] = align_closes(load_bars(symbol, start, days[-1], interval=interval), days)
+    return matrix
+
+
+# ─────────────────────────────────────────────
+# 묶음 인코딩
+# ─────────────────────────────────────────────
+def encode_chunk(arrays, scale):
+    """
+    헤더(컬럼별 정수 폭 6바이트) + 컬럼별 델타 배열을 이어 붙여 zlib 압축
+    """
+    header, body = [], []
+    for name in COLUMNS:
+        values = arrays[name]
+        if name == "ts":
+            ints = values.astype("datetime64[s]").astype(np.int64)
+        elif name == "volume":
+            ints = values.astype(np.int64)
+        else:
+            ints = np.rint(values * scale).astype(np.int64)
+        deltas = np.diff(ints, prepend=np.int64(0))
+        dtype = _smallest_dtype(deltas)
+        header.append(np.dtype(dtype).itemsize)
+        body.append(deltas.astype(dtype).tobytes())
+    return zlib.compress(struct.pack("<6B", *header) + b"".join(body))
+
+
+def decode_chunk(chunk):
+    raw = zlib.decompress(bytes(chunk.data))
+    widths = struct.unpack("<6B", raw[:6])
+    offset, arrays = 6, {}
+    for name, width in zip(COLUMNS, widths):
+        dtype = next(d for d in _DTYPES if np.dtype(d).itemsize == width)
+        size = width * chunk.count
+        ints = np.cumsum(np.frombuffer(raw, dtype=dtype, count=chunk.count, offset=offset).astype(np.int64))
+        offset += size
+        if name == "ts":
+            arrays[name] = ints.astype("datetime64[s]")
+        elif name == "volume":
+            arrays[name] = ints
+        else:
+            arrays[name] = ints / chunk.scale
+    return arrays
+
+
+# ─────────────────────────────────────────────
+# 내부 헬퍼
+# ─────────────────────────────────────────────
+def _smallest_dtype(values):
+    if len(values) == 0:
+        return np.int8
+    lo, hi = int(values.min()), int(values.max())
+    for dtype in _DTYPES:
+        info = np.iinfo(dtype)
+        if info.min <= lo and hi <= info.max:
+            return dtype
+    return np.int64
+
+
+def _finalize(arrays):
+    """
+    ts 기준 정렬 + 중복 ts 는 뒤에 온 값만 남긴다
+    """
+    stamps = arrays["ts"].astype("datetime64[s]").astype(np.int64)
+    order = np.argsort(stamps, kind="stable")
+    stamps = stamps[order]
+    keep = np.ones(len(stamps), dtype=bool)
+    keep[:-1] = stamps[1:] != stamps[:-1]
+    result = {name: np.asarray(arrays[name])[order][keep] for name in COLUMNS if name != "ts"}
+    result["ts"] = stamps[keep].astype("datetime64[s]")
+    return result
+
+
+def _concat(parts):
+    return {name: np.concatenate([part[name] for part in parts]) for name in COLUMNS}
+
+
+def _chunk_start(epoch_seconds, interval):
+    local = timezone.localtime(datetime.fromtimestamp(epoch_seconds, tz=dt_timezone.utc)).date()
+    if interval in DAILY_INTERVALS:
+        return date(local.year, 1, 1)
+    return local
+
+
+def _bound(value, end_of_day):
+    """
+    date/datetime → epoch 초. date 는 현지 기준 그날의 시작(또는 끝)
+    """
+    if value is None:
+        return None
+    if not isinstance(value, datetime):
+        value = datetime.combine(value, datetime.max.time() if end_of_day else datetime.min.time())
+    if timezone.is_naive(value):
+        value = timezone.make_aware(value)
+    return int(value.timestamp())
@@ -0,0 +1,167 @@
+# Back/simulator/services/execution.py
+"""
+매매 체결 서비스
+
+모든 매매 경로(템플릿 뷰, API, 바스켓 주문, 지정가 주문 체결)는 여기를 거친다.
+    - 잠금 순서는 항상 포트폴리오 행 → 포지션 행 (교착 방지)
+    - 매수 현금 차감은 조건부 UPDATE (cash_balance >= 금액 일 때만) 한 번으로 검사와 차감을 같이 한다
+    - 직렬화 실패/교착/SQLite 잠금 오류는 트랜잭션 전체를 짧게 쉬었다가 다시 시도한다
+      (이미 바깥 트랜잭션 안에서 불리면 다시 시도하지 않고 그대로 올린다)
+    - 커밋되면 순위표(leaderboard)에 그 포트폴리오를 다시 읽으라고 알린다
+"""
+import logging
+import numbers
+import random
+import time
+
+from django.conf import settings
+from django.db import OperationalError, connection, transaction
+from django.db.models import F
+
+from simulator.models import VirtualPortfolio, VirtualTrade
+from simulator.services.leaderboard import notify_trade
+from simulator.services.positions import TradeRejected, apply_trade, apply_trades
+
+logger = logging.getLogger(__name__)
+
+# PostgreSQL serialization_failure / deadlock_detected
+_RETRYABLE_SQLSTATES = {"40001", "40P01"}
+
+
+class InsufficientCashError(TradeRejected):
+    """현금 잔고보다 많이 사려는 경우"""
+
+
+class InvalidTradeError(TradeRejected):
+    """수량/가격이 0 이하이거나 매수/매도가 아닌 주문"""
+
+
+def validate_trade(trade_type, price, quantity):
+    """
+    트랜잭션을 열기 전에 주문 값을 검사한다. 잘못되면 InvalidTradeError
+    (음수 수량 매수는 조건부 현금 UPDATE 를 통과해 버리므로 여기서 막는다)
+    """
+    if trade_type not in (VirtualTrade.BUY, VirtualTrade.SELL):
+        raise InvalidTradeError(f"알 수 없는 주문 종류: {trade_type!r}")
+    for name, value in (("수량", quantity), ("가격", price)):
+        if isinstance(value, bool) or not isinstance(value, numbers.Integral) or value <= 0:
+            raise InvalidTradeError(f"{name}은 1 이상의 정수여야 합니다: {value!r}")
+
+
+def run_with_retries(func, retries=None):
+    """
+    func() 를 트랜잭션 하나로 실행한다. 재시도할 수 있는 DB 오류면 지수 백오프 후 다시 실행한다.
+    """
+    retries = settings.TRADE_EXECUTION_RETRIES if retries is None else retries
+    if connection.in_atomic_block:
+        # 바깥 트랜잭션을 통째로 다시 실행할 수는 없으니 세이브포인트만 두고 한 번 실행
+        with transaction.atomic():
+            return func()
+    for attempt in range(retries + 1):
+        try:
+            with transaction.atomic():
+                return func()
+        except OperationalError as exc:
+            if attempt == retries or not _is_retryable(exc):
+                raise
+            logger.debug("체결 재시도 %d/%d: %s", attempt + 1, retries, exc)
+            time.sleep(settings.TRADE_EXECUTION_BACKOFF * (2 ** attempt) * random.uniform(0.5, 1.5))
+
+
+def _is_retryable(exc):
+    cause = exc.__cause__
+    sqlstate = getattr(cause, "sqlstate", None) or getattr(cause, "pgcode", None)
+    if sqlstate in _RETRYABLE_SQLSTATES:
+        return True
+    message = str(exc)
+    # 공유 캐시 SQLite(테스트 DB 등)는 "database table is locked" 로 온다
+    return "database is locked" in message or "database table is locked" in message or "deadlock" in message.lower()
+
+
+# ─────────────────────────────────────────────
+# 단건 체결
+# ─────────────────────────────────────────────
+def execute_trade(portfolio, trade_type, stock_code, stock_name, price, quantity, order=None, strategy_run=None):
+    """
+    체결 하나를 현금/포지션/거래 내역에 반영하고 VirtualTrade 를 반환한다.
+    잔액이 모자라면 InsufficientCashError, 보유 수량이 모자라면 InsufficientQuantityError (아무것도 반영되지 않음),
+    수량/가격이 1 미만이면 InvalidTradeError
+    """
+    validate_trade(trade_type, price, quantity)
+
+    def run():
+        amount = price * quantity
+        if trade_type == VirtualTrade.BUY:
+            updated = VirtualPortfolio.objects.filter(pk=portfolio.pk, cash_balance__gte=amount).update(
+                cash_balance=F("cash_balance") - amount
+            )
+            if not updated:
+                raise InsufficientCashError("잔액이 부족합니다")
+        else:
+            VirtualPortfolio.objects.filter(pk=portfolio.pk).update(cash_balance=F("cash_balance") + amount)
+
+        # 매도 수량이 모자라면 여기서 예외 → 위의 현금 변경도 함께 롤백
+        apply_trade(portfolio, trade_type, stock_code, stock_name, price, quantity)
+        transaction.on_commit(lambda: notify_trade(portfolio.pk))
+        return VirtualTrade.objects.create(
+            portfolio=portfolio,
+            trade_type=trade_type,
+            stock_code=stock_code,
+            stock_name=stock_name,
+            price=price,
+            quantity=quantity,
+            order=order,
+            strategy_run=strategy_run,
+        )
+
+    return run_with_retries(run)
+
+
+# ─────────────────────────────────────────────
+# 바스켓 체결
+# ─────────────────────────────────────────────
+def execute_basket(portfolio, legs):
+    """
+    여러 종목 주문을 한 트랜잭션으로 체결한다 (전부 성공 또는 전부 실패).
+    legs: trade_type, stock_code, stock_name, price, quantity 키를 가진 dict 목록 (적힌 순서대로 체결)
+    반환값: (갱신된 현금 잔고, 생성된 VirtualTrade 목록)
+
+    종목 수와 상관없이 쿼리 수가 일정하다.
+        포트폴리오 잠금 1 + 포지션 잠금 1 + 현금 갱신 1 + 거래 bulk_create 1 + 포지션 bulk_update/bulk_create 2
+    현금은 바스켓 전체의 순매수 금액으로 한 번만 검사한다 (같은 바스켓의 매도 대금으로 매수 가능).
+    """
+    for leg in legs:
+        validate_trade(leg["trade_type"], leg["price"], leg["quantity"])
+    net_cost = sum(
+        leg["price"] * leg["quantity"] * (1 if leg["trade_type"] == VirtualTrade.BUY else -1)
+        for leg in legs
+    )
+
+    def run():
+        cash = (
+            VirtualPortfolio.objects.select_for_update()
+            .values_list("cash_balance", flat=True)
+            .get(pk=portfolio.pk)
+        )
+        if cash < net_cost:
+            raise InsufficientCashError(f"잔액이 부족합니다 (필요 {net_cost:,}원, 보유 {cash:,}원)")
+        apply_trades(portfolio, [
+            (leg["trade_type"], leg["stock_code"], leg["stock_name"], leg["price"], leg["quantity"])
+            for leg in legs
+        ])
+        VirtualPortfolio.objects.filter(pk=portfolio.pk).update(cash_balance=F("cash_balance") - net_cost)
+        transaction.on_commit(lambda: notify_trade(portfolio.pk))
+        trades = VirtualTrade.objects.bulk_create([
+            VirtualTrade(
+                portfolio=portfolio,
+                trade_type=leg["trade_type"],
+                stock_code=leg["stock_code"],
+                stock_name=leg["stock_name"],
+                price=leg["price"],
+                quantity=leg["quantity"],
+            )
+            for leg in legs
+        ])
+        return cash - net_cost, trades
+
+    return run_with_retries(run)
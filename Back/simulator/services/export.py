@@ -0,0 +1,164 @@
+# Back/simulator/services/export.py
+"""
+거래 원장 스트리밍 내보내기 (CSV / Parquet)
+
+쿼리셋을 values_list().iterator(chunk_size) 로 읽으면서 chunk 단위로 바로 바이트를 내보낸다.
+    - 메모리에는 chunk 하나 분량만 올라가므로 행 수와 무관하게 일정하다
+    - CSV 는 헤더를 먼저 보내므로 첫 바이트까지의 시간이 내보낼 양과 무관하다
+    - Parquet 은 chunk 하나를 row group 하나로 쓰고, 쓰는 즉시 흘려보낸다 (footer 는 마지막에)
+StreamingHttpResponse 에 그대로 넘길 수 있는 generator 를 만든다.
+"""
+import csv
+from collections import namedtuple
+from django.conf import settings
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from rest_framework.negotiation import BaseContentNegotiation
+
+CSV, PARQUET = "csv", "parquet"
+FORMATS = (CSV, PARQUET)
+CONTENT_TYPES = {CSV: "text/csv; charset=utf-8", PARQUET: "application/vnd.apache.parquet"}
+
+# kind: "int" / "str" / "datetime"
+Column = namedtuple("Column", ["name", "kind"])
+
+TRADE_COLUMNS = [
+    Column("id", "int"),
+    Column("traded_at", "datetime"),
+    Column("trade_type", "str"),
+    Column("stock_code", "str"),
+    Column("stock_name", "str"),
+    Column("price", "int"),
+    Column("quantity", "int"),
+    Column("order_id", "int"),
+    Column("strategy_run_id", "int"),
+]
+
+STRATEGY_TRADE_COLUMNS = [
+    Column("id", "int"),
+    Column("run_id", "int"),
+    Column("traded_at", "datetime"),
+    Column("trade_type", "str"),
+    Column("stock_code", "str"),
+    Column("price", "int"),
+    Column("quantity", "int"),
+]
+
+
+class _Echo:
+    """csv.writer 가 쓴 한 줄을 그대로 돌려주는 가짜 파일"""
+
+    def write(self, value):
+        return value
+
+
+def _rows(qs, columns, chunk_size):
+    return qs.values_list(*[column.name for column in columns]).iterator(chunk_size=chunk_size)
+
+
+def stream_csv(qs, columns, chunk_size=None):
+    chunk_size = chunk_size or settings.EXPORT_CHUNK_SIZE
+    writer = csv.writer(_Echo())
+    stamps = [i for i, column in enumerate(columns) if column.kind == "datetime"]
+    # 엑셀에서 한글이 깨지지 않도록 BOM 을 붙인다
+    yield ("\ufeff" + writer.writerow([column.name for column in columns])).encode()
+
+    lines = []
+    for row in _rows(qs, columns, chunk_size):
+        if stamps:
+            row = list(row)
+            for i in stamps:
+                row[i] = row[i].isoformat() if row[i] else ""
+        lines.append(writer.writerow(row))
+        if len(lines) >= chunk_size:
+            yield "".join(lines).encode()
+            lines = []
+    if lines:
+        yield "".join(lines).encode()
+
+
+class _Sink:
+    """ParquetWriter 가 쓴 바이트를 모아 두었다가 drain() 으로 넘겨준다"""
+
+    def __init__(self):
+        self.closed = False
+        self._chunks = []
+        self._size = 0
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        self._size += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._size
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self):
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def stream_parquet(qs, columns, chunk_size=None):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    chunk_size = chunk_size or settings.EXPORT_CHUNK_SIZE
+    types = {"int": pa.int64(), "str": pa.string(), "datetime": pa.timestamp("us", tz="UTC")}
+    schema = pa.schema([(column.name, types[column.kind]) for column in columns])
+    sink = _Sink()
+    writer = pq.ParquetWriter(sink, schema, compression="zstd")
+
+    def flush(values):
+        writer.write_batch(pa.RecordBatch.from_arrays(
+            [pa.array(values[i], type=schema.field(i).type) for i in range(len(columns))], schema=schema,
+        ))
+        return sink.drain()
+
+    values = [[] for _ in columns]
+    count = 0
+    for row in _rows(qs, columns, chunk_size):
+        for i, value in enumerate(row):
+            values[i].append(value)
+        count += 1
+        if count >= chunk_size:
+            yield flush(values)
+            values = [[] for _ in columns]
+            count = 0
+    if count:
+        yield flush(values)
+    writer.close()
+    yield sink.drain()
+
+
+def export_response(qs, columns, fmt, filename):
+    """
+    qs 를 fmt(csv/parquet) 로 내려보내는 StreamingHttpResponse. 정렬은 호출하는 쪽에서 정한다
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"format 은 {', '.join(FORMATS)} 중 하나여야 합니다: {fmt}")
+    stream = stream_csv if fmt == CSV else stream_parquet
+    response = StreamingHttpResponse(stream(qs, columns), content_type=CONTENT_TYPES[fmt])
+    stamp = timezone.localdate().strftime("%Y%m%d")
+    response["Content-Disposition"] = f'attachment; filename="{filename}_{stamp}.{fmt}"'
+    response["X-Accel-Buffering"] = "no"
+    return response
+
+
+class ExportNegotiation(BaseContentNegotiation):
+    """
+    ?format= 을 DRF 가 렌더러 선택에 쓰지 않도록 한다 (여기서는 파일 형식).
+    오류 응답은 첫 번째 렌더러(JSON)로 나간다
+    """
+
+    def select_parser(self, request, parsers):
+        return parsers[0]
+
+    def select_renderer(self, request, renderers, format_suffix=None):
+        return renderers[0], renderers[0].media_type
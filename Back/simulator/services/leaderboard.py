@@ -0,0 +1,305 @@
+# Back/simulator/services/leaderboard.py
+"""
+모의투자 수익률 순위표 (메모리, 증분 갱신)
+
+포트폴리오마다 NAV(현금 + 보유 종목 평가액)를 들고 있고, (-수익률, 포트폴리오 id) 를 SortedList 에 넣어
+상위 K 명 조회는 O(log n + K), 내 순위 조회는 O(log n) 이다.
+    - 체결: 커밋된 뒤 그 포트폴리오 하나만 DB 에서 다시 읽어 점수를 바꾼다 (execution.py)
+    - 시세: LEADERBOARD_MARK_INTERVAL 마다 quote_cache 에 남은 값만 확인해(업스트림 호출 없음)
+            가격이 바뀐 종목을 가진 포트폴리오만 다시 계산한다
+    - 보정: LEADERBOARD_RECONCILE_INTERVAL 마다 백그라운드 스레드가 전체를 새로 계산해 바꿔 끼우고,
+            증분 값과 어긋난 포트폴리오 수를 기록한다. 스레드는 그 프로세스에서 순위표를 처음 조회할 때 시작하므로
+            순위표를 쓰지 않는 프로세스(migrate, 테스트 러너, 스윕 워커 등)에는 뜨지 않는다
+순위표는 프로세스마다 하나이고 공유하지 않는다. notify_trade 는 체결한 프로세스의 순위표만 고치므로
+다른 프로세스에서 체결된 거래는 최대 LEADERBOARD_RECONCILE_INTERVAL 늦게 반영된다 (응답의 stats.reconciled_at).
+그래서 "내 순위" 조회는 요청한 사용자 포트폴리오를 먼저 다시 읽는다.
+시세가 없는 종목은 매수 원가로 평가한다 (nav_snapshots 와 같은 규칙).
+"""
+import logging
+import os
+import threading
+import time
+from collections import defaultdict, namedtuple
+
+from django.conf import settings
+from django.utils import timezone
+from sortedcontainers import SortedList
+
+from simulator.models import Position, VirtualPortfolio
+from simulator.services.quote_cache import quote_cache
+from simulator.services.symbol_index import get_symbol_index
+
+logger = logging.getLogger(__name__)
+
+# 순위표 한 줄. return_rate 는 % 단위
+Standing = namedtuple("Standing", ["rank", "portfolio_id", "username", "nav", "return_rate"])
+
+
+class Leaderboard:
+    def __init__(self, initial_capital):
+        self.initial_capital = initial_capital
+        self._ranked = SortedList()             # (-수익률, portfolio id)
+        self._score = {}                        # portfolio id → 수익률
+        self._nav = {}                          # portfolio id → NAV
+        self._names = {}                        # portfolio id → username
+        self._holdings = {}                     # portfolio id → {code: (수량, 매수 원가)}
+        self._holders = defaultdict(dict)       # code → {portfolio id: (수량, 매수 원가)}
+        self._marks = {}                        # code → 평가 가격
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self._score)
+
+    # ─────────────────────────────────────────────
+    # 갱신
+    # ─────────────────────────────────────────────
+    def set_portfolio(self, pid, username, cash, holdings):
+        """
+        포트폴리오 하나의 현금/보유 내역을 통째로 바꾼다. holdings: {code: (수량, 매수 원가)}
+        """
+        with self._lock:
+            for code in self._holdings.get(pid, ()):
+                holders = self._holders[code]
+                holders.pop(pid, None)
+                if not holders:
+                    del self._holders[code]
+            self._holdings[pid] = holdings
+            self._names[pid] = username
+            for code, holding in holdings.items():
+                self._holders[code][pid] = holding
+            self._rescore(pid, cash + sum(self._value(code, qty, cost) for code, (qty, cost) in holdings.items()))
+
+    def remove(self, pid):
+        with self._lock:
+            if pid not in self._score:
+                return
+            for code in self._holdings.pop(pid):
+                holders = self._holders[code]
+                holders.pop(pid, None)
+                if not holders:
+                    del self._holders[code]
+            self._ranked.remove((-self._score.pop(pid), pid))
+            del self._nav[pid], self._names[pid]
+
+    def apply_marks(self, prices):
+        """
+        {code: 가격} 중 값이 바뀐 종목을 가진 포트폴리오만 다시 계산한다. 다시 계산한 포트폴리오 수를 반환
+        """
+        with self._lock:
+            deltas = defaultdict(float)
+            for code, price in prices.items():
+                old = self._marks.get(code)
+                if not price or price == old:
+                    continue
+                for pid, (qty, cost) in self._holders.get(code, {}).items():
+                    deltas[pid] += qty * price - (qty * old if old else cost)
+                self._marks[code] = price
+            for pid, delta in deltas.items():
+                self._rescore(pid, self._nav[pid] + delta)
+            return len(deltas)
+
+    def _value(self, code, qty, cost):
+        mark = self._marks.get(code)
+        return qty * mark if mark else cost
+
+    def _rescore(self, pid, nav):
+        old = self._score.get(pid)
+        if old is not None:
+            self._ranked.remove((-old, pid))
+        score = (nav / self.initial_capital - 1.0) * 100
+        self._nav[pid] = nav
+        self._score[pid] = score
+        self._ranked.add((-score, pid))
+
+    # ─────────────────────────────────────────────
+    # 조회
+    # ─────────────────────────────────────────────
+    def top(self, limit, offset=0):
+        with self._lock:
+            rows = list(self._ranked.islice(offset, offset + limit))
+            return [self._standing(pid) for _, pid in rows]
+
+    def standing(self, pid):
+        """
+        pid 의 순위. 수익률이 같으면 같은 순위다. 순위표에 없으면 None
+        """
+        with self._lock:
+            if pid not in self._score:
+                return None
+            return self._standing(pid)
+
+    def _standing(self, pid):
+        score = self._score[pid]
+        rank = self._ranked.bisect_left((-score,)) + 1
+        return Standing(rank, pid, self._names[pid], round(self._nav[pid]), round(score, 4))
+
+    def codes(self):
+        with self._lock:
+            return list(self._holders)
+
+    def scores(self):
+        with self._lock:
+            return dict(self._score)
+
+
+# ─────────────────────────────────────────────
+# DB 에서 읽기
+# ─────────────────────────────────────────────
+def _initial_capital():
+    return VirtualPortfolio._meta.get_field("cash_balance").default
+
+
+def _current_marks(codes):
+    """
+    quote_cache 에 남아 있는 가격만 본다 {code: 가격}
+    """
+    index = get_symbol_index()
+    marks = {}
+    for code in codes:
+        info = index.resolve(code)
+        entry = quote_cache.peek(info.ticker) if info else None
+        if entry is not None and entry[0]:
+            marks[code] = entry[0]
+    return marks
+
+
+def build_leaderboard():
+    holdings = defaultdict(dict)
+    positions = Position.objects.filter(quantity__gt=0).values_list("portfolio_id", "stock_code", "quantity", "cost_basis")
+    for pid, code, quantity, cost_basis in positions.iterator(chunk_size=10000):
+        holdings[pid][code] = (quantity, cost_basis)
+
+    board = Leaderboard(_initial_capital())
+    board.apply_marks(_current_marks({code for held in holdings.values() for code in held}))
+    rows = VirtualPortfolio.objects.values_list("id", "user__username", "cash_balance")
+    for pid, username, cash in rows.iterator(chunk_size=10000):
+        board.set_portfolio(pid, username, cash, holdings.get(pid, {}))
+    return board
+
+
+def load_portfolio(board, pid):
+    """
+    포트폴리오 하나를 DB 에서 다시 읽어 board 에 반영한다 (쿼리 2번)
+    """
+    row = VirtualPortfolio.objects.filter(pk=pid).values_list("user__username", "cash_balance").first()
+    if row is None:
+        board.remove(pid)
+        return
+    holdings = {
+        code: (quantity, cost_basis)
+        for code, quantity, cost_basis in Position.objects.filter(portfolio_id=pid, quantity__gt=0)
+        .values_list("stock_code", "quantity", "cost_basis")
+    }
+    board.set_portfolio(pid, row[0], row[1], holdings)
+
+
+# ─────────────────────────────────────────────
+# 프로세스 공용 순위표
+# ─────────────────────────────────────────────
+_lock = threading.Lock()
+_board = None
+_marked_at = 0.0
+_reconciling = False
+_reconciler_pid = None      # 보정 스레드를 띄운 프로세스 (fork 된 자식에는 스레드가 따라오지 않는다)
+_touched = set()            # 보정 중에 체결된 포트폴리오 (바꿔 끼운 뒤 다시 읽는다)
+_stats = {"reconciled_at": None, "drifted": 0, "reconcile_ms": 0.0}
+
+
+def get_leaderboard():
+    global _board, _marked_at
+    start_reconciler()
+    with _lock:
+        if _board is None:
+            started = time.perf_counter()
+            _board = build_leaderboard()
+            _marked_at = time.monotonic()
+            _stats.update(reconciled_at=timezone.now(), reconcile_ms=round((time.perf_counter() - started) * 1000, 1))
+        board = _board
+        now = time.monotonic()
+        refresh_marks = now - _marked_at >= settings.LEADERBOARD_MARK_INTERVAL
+        if refresh_marks:
+            _marked_at = now
+    if refresh_marks:
+        board.apply_marks(_current_marks(board.codes()))
+    return board
+
+
+def notify_trade(pid):
+    """
+    체결이 커밋된 뒤 호출한다. 이 프로세스에 순위표가 있을 때만 그 포트폴리오를 다시 읽는다
+    """
+    with _lock:
+        board = _board
+        if _reconciling:
+            _touched.add(pid)
+    if board is not None:
+        load_portfolio(board, pid)
+
+
+def reconcile():
+    """
+    전체를 새로 계산해 바꿔 끼운다. 증분 값과 0.0001%p 넘게 어긋난 포트폴리오 수를 반환
+    """
+    global _board, _reconciling
+    with _lock:
+        _reconciling = True
+    started = time.perf_counter()
+    fresh = build_leaderboard()
+    with _lock:
+        old = _board
+        _board = fresh
+        touched = set(_touched)
+        _touched.clear()
+        _reconciling = False
+    for pid in touched:
+        load_portfolio(fresh, pid)
+
+    drifted = 0
+    if old is not None:
+        before, after = old.scores(), fresh.scores()
+        drifted = sum(1 for pid in before.keys() | after.keys() if abs(before.get(pid, 0) - after.get(pid, 0)) > 1e-4)
+    elapsed = round((time.perf_counter() - started) * 1000, 1)
+    _stats.update(reconciled_at=timezone.now(), drifted=drifted, reconcile_ms=elapsed)
+    if drifted:
+        logger.info("순위표 보정: %d개 포트폴리오 값이 달라짐 (%.1fms)", drifted, elapsed)
+    return drifted
+
+
+def start_reconciler():
+    """
+    LEADERBOARD_RECONCILE_INTERVAL 마다 reconcile 하는 스레드를 프로세스당 하나 띄운다 (여러 번 불러도 된다).
+    get_leaderboard 가 부르므로 fork 로 뜬 워커도 자기 첫 조회 때 띄운다
+    """
+    global _reconciler_pid
+    with _lock:
+        if _reconciler_pid == os.getpid() or settings.LEADERBOARD_RECONCILE_INTERVAL <= 0:
+            return
+        _reconciler_pid = os.getpid()
+    threading.Thread(target=_reconcile_loop, name="leaderboard-reconcile", daemon=True).start()
+
+
+def _reconcile_loop():
+    global _reconciling
+    from django.db import connection
+
+    while True:
+        time.sleep(settings.LEADERBOARD_RECONCILE_INTERVAL)
+        if _board is None:
+            continue        # 첫 조회가 아직 순위표를 만드는 중
+        try:
+            reconcile()
+        except Exception:
+            logger.exception("순위표 보정 실패")
+            with _lock:
+                _reconciling = False
+        finally:
+            connection.close()
+
+
+def leaderboard_stats():
+    with _lock:
+        return {
+            "portfolios": len(_board) if _board is not None else 0,
+            "reconcile_interval": settings.LEADERBOARD_RECONCILE_INTERVAL,
+            **_stats,
+        }
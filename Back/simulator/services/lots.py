@@ -0,0 +1,147 @@
+# Back/simulator/services/lots.py
+"""
+매수 로트(lot) 회계
+
+거래 내역을 시간순으로 한 번 훑으면서 종목별 미청산 로트와 매도별 실현손익을 계산한다.
+    "fifo"    : 먼저 산 로트부터 소진
+    "average" : 평균단가 (Position 과 같은 반올림 규칙이라 realized_pnl 이 일치한다)
+DB 는 거래 내역을 읽는 쿼리 한 번만 쓰고 나머지는 메모리에서 처리한다.
+실현손익 합계만 필요하면 realized_total 을 쓴다 (average 는 Position 에 쌓인 값, fifo 는 캐시한 재계산).
+"""
+from collections import defaultdict, deque, namedtuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Max, Sum
+from django.utils import timezone
+
+from simulator.models import Position, VirtualTrade
+
+FIFO, AVERAGE = "fifo", "average"
+METHODS = (FIFO, AVERAGE)
+PERIODS = ("day", "month", "year")
+
+# 아직 팔리지 않은 매수분. average 방식에서는 종목당 하나이고 price 는 평균단가
+Lot = namedtuple("Lot", ["stock_code", "stock_name", "quantity", "price", "opened_at"])
+# 매도 한 건의 실현 결과. unmatched 는 보유분을 넘어 매도된 수량 (예전 데이터에서만 생긴다)
+Realization = namedtuple(
+    "Realization",
+    ["trade_id", "stock_code", "sold_at", "quantity", "proceeds", "cost", "pnl", "unmatched"],
+)
+LotResult = namedtuple("LotResult", ["open_lots", "realizations"])
+
+
+def compute_lots(trades, method=FIFO):
+    """
+    trades: (id, trade_type, stock_code, stock_name, price, quantity, traded_at) 를 시간순으로
+    """
+    if method not in METHODS:
+        raise ValueError(f"알 수 없는 로트 방식: {method}")
+    books = defaultdict(deque)      # code → deque[[qty, price, opened_at]]  (fifo)
+    averages = {}                   # code → [qty, cost, opened_at]          (average)
+    names = {}
+    realizations = []
+
+    for trade_id, trade_type, code, name, price, quantity, traded_at in trades:
+        names[code] = name
+        if trade_type == VirtualTrade.BUY:
+            if method == FIFO:
+                books[code].append([quantity, price, traded_at])
+            else:
+                held = averages.setdefault(code, [0, 0, traded_at])
+                if held[0] == 0:
+                    held[2] = traded_at
+                held[0] += quantity
+                held[1] += price * quantity
+            continue
+
+        if method == FIFO:
+            matched, cost = _consume_fifo(books[code], quantity)
+        else:
+            matched, cost = _consume_average(averages.get(code), quantity)
+        proceeds = price * matched
+        realizations.append(Realization(
+            trade_id, code, traded_at, matched, proceeds, cost, proceeds - cost, quantity - matched,
+        ))
+
+    if method == FIFO:
+        open_lots = [
+            Lot(code, names[code], qty, price, opened_at)
+            for code, lots in books.items()
+            for qty, price, opened_at in lots
+        ]
+    else:
+        open_lots = [
+            Lot(code, names[code], qty, cost / qty, opened_at)
+            for code, (qty, cost, opened_at) in averages.items()
+            if qty
+        ]
+    return LotResult(open_lots, realizations)
+
+
+def _consume_fifo(lots, quantity):
+    matched, cost = 0, 0
+    while lots and matched < quantity:
+        lot = lots[0]
+        take = min(lot[0], quantity - matched)
+        matched += take
+        cost += take * lot[1]
+        lot[0] -= take
+        if lot[0] == 0:
+            lots.popleft()
+    return matched, cost
+
+
+def _consume_average(held, quantity):
+    if not held or not held[0]:
+        return 0, 0
+    matched = min(quantity, held[0])
+    cost = round(held[1] * matched / held[0])
+    held[0] -= matched
+    held[1] -= cost
+    return matched, cost
+
+
+def portfolio_lots(portfolio, method=None):
+    trades = (
+        VirtualTrade.objects.filter(portfolio=portfolio)
+        .order_by("traded_at", "id")
+        .values_list("id", "trade_type", "stock_code", "stock_name", "price", "quantity", "traded_at")
+    )
+    return compute_lots(trades.iterator(chunk_size=5000), method or settings.LOT_ACCOUNTING_METHOD)
+
+
+def realized_total(portfolio, method=None):
+    """
+    포트폴리오의 실현손익 합계.
+    average 는 체결 때마다 갱신되는 Position.realized_pnl 을 더하기만 하고 (쿼리 한 번),
+    fifo 는 거래 내역을 다시 계산하되 (거래 수, 마지막 거래 id) 가 같으면 캐시한 값을 쓴다
+    """
+    method = method or settings.LOT_ACCOUNTING_METHOD
+    if method == AVERAGE:
+        return Position.objects.filter(portfolio=portfolio).aggregate(total=Sum("realized_pnl"))["total"] or 0
+    state = VirtualTrade.objects.filter(portfolio=portfolio).aggregate(count=Count("id"), last=Max("id"))
+    key = f"realized:{portfolio.pk}:{method}:{state['count']}:{state['last']}"
+    return cache.get_or_set(
+        key,
+        lambda: sum(item.pnl for item in portfolio_lots(portfolio, method).realizations),
+        settings.REALIZED_PNL_CACHE_TTL,
+    )
+
+
+def period_totals(realizations, period="month"):
+    """
+    실현손익을 현지 날짜 기준 day/month/year 로 묶는다. 오래된 기간부터
+    """
+    if period not in PERIODS:
+        raise ValueError(f"알 수 없는 기간: {period}")
+    totals = {}
+    for item in realizations:
+        day = timezone.localtime(item.sold_at).date()
+        key = day.isoformat() if period == "day" else day.strftime("%Y-%m" if period == "month" else "%Y")
+        bucket = totals.setdefault(key, {"period": key, "sales": 0, "proceeds": 0, "cost": 0, "realized_pnl": 0})
+        bucket["sales"] += 1
+        bucket["proceeds"] += item.proceeds
+        bucket["cost"] += item.cost
+        bucket["realized_pnl"] += item.pnl
+    return [totals[key] for key in sorted(totals)]
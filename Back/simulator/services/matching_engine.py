@@ -0,0 +1,144 @@
+# Back/simulator/services/matching_engine.py
+"""
+지정가/스톱 주문 매칭 엔진 (메모리)
+
+종목마다 OrderBook 하나를 두고, 가격-시간 우선순위 힙 네 개로 미체결 주문을 관리한다.
+    매수 지정가 : 높은 가격 → 먼저 들어온 순
+    매도 지정가 : 낮은 가격 → 먼저 들어온 순
+    매수 스톱   : 낮은 스톱가부터 (시세 ≥ 스톱가 이면 발동)
+    매도 스톱   : 높은 스톱가부터 (시세 ≤ 스톱가 이면 발동)
+시세 하나가 들어오면 조건을 만족하는 힙 꼭대기만 꺼내므로 체결 k 건에 O(k log n) 이다.
+취소는 주문 dict 에서만 지우고 힙에서는 꺼낼 때 건너뛴다 (lazy deletion).
+
+가상 거래이므로 상대 호가는 없고, 조건을 만족한 주문은 들어온 시세로 전량 체결된다.
+이 모듈은 DB 를 건드리지 않는다. DB 반영은 simulator.services.order_service 참고
+"""
+import heapq
+import itertools
+from collections import namedtuple
+
+BUY, SELL = "buy", "sell"
+LIMIT, STOP = "limit", "stop"
+
+# 엔진이 만들어 내는 체결 하나
+Fill = namedtuple("Fill", ["order_id", "symbol", "side", "price", "quantity"])
+
+
+class BookOrder:
+    __slots__ = ("id", "symbol", "side", "order_type", "limit_price", "stop_price", "quantity", "seq")
+
+    def __init__(self, id, symbol, side, order_type, quantity, limit_price=None, stop_price=None):
+        self.id = id
+        self.symbol = symbol
+        self.side = side
+        self.order_type = order_type
+        self.quantity = quantity
+        self.limit_price = limit_price
+        self.stop_price = stop_price
+        self.seq = 0
+
+
+class OrderBook:
+    def __init__(self, symbol):
+        self.symbol = symbol
+        self._dead = 0          # 힙에 남아 있는 취소 주문 수
+        self.orders = {}        # id → BookOrder (살아 있는 주문만)
+        self._bids = []         # (-limit, seq, id)
+        self._asks = []         # (limit, seq, id)
+        self._buy_stops = []    # (stop, seq, id)
+        self._sell_stops = []   # (-stop, seq, id)
+
+    def __len__(self):
+        return len(self.orders)
+
+    def add(self, order):
+        self.orders[order.id] = order
+        if order.order_type == LIMIT:
+            if order.side == BUY:
+                heapq.heappush(self._bids, (-order.limit_price, order.seq, order.id))
+            else:
+                heapq.heappush(self._asks, (order.limit_price, order.seq, order.id))
+        elif order.side == BUY:
+            heapq.heappush(self._buy_stops, (order.stop_price, order.seq, order.id))
+        else:
+            heapq.heappush(self._sell_stops, (-order.stop_price, order.seq, order.id))
+
+    def cancel(self, order_id):
+        order = self.orders.pop(order_id, None)
+        if order is not None:
+            self._dead += 1
+            # 취소가 쌓여 힙이 살아 있는 주문보다 커지면 다시 만든다
+            if self._dead > 1024 and self._dead > len(self.orders):
+                self._compact()
+        return order
+
+    def _compact(self):
+        for name in ("_bids", "_asks", "_buy_stops", "_sell_stops"):
+            heap = [entry for entry in getattr(self, name) if entry[2] in self.orders]
+            heapq.heapify(heap)
+            setattr(self, name, heap)
+        self._dead = 0
+
+    def match(self, price):
+        """
+        시세 price 에서 체결되는 주문들을 우선순위 순서대로 꺼내 Fill 목록으로 반환한다.
+        스톱 주문이 먼저 발동하고, 그다음 지정가 주문이 체결된다.
+        """
+        fills = []
+        self._drain(self._buy_stops, lambda key: key <= price, price, fills)
+        self._drain(self._sell_stops, lambda key: -key >= price, price, fills)
+        self._drain(self._bids, lambda key: -key >= price, price, fills)
+        self._drain(self._asks, lambda key: key <= price, price, fills)
+        return fills
+
+    def _drain(self, heap, crosses, price, fills):
+        while heap:
+            key, _, order_id = heap[0]
+            order = self.orders.get(order_id)
+            if order is None:           # 취소된 주문
+                heapq.heappop(heap)
+                self._dead = max(self._dead - 1, 0)
+                continue
+            if not crosses(key):
+                break
+            heapq.heappop(heap)
+            del self.orders[order_id]
+            fills.append(Fill(order.id, self.symbol, order.side, price, order.quantity))
+
+
+class MatchingEngine:
+    def __init__(self):
+        self.books = {}         # symbol → OrderBook
+        self._where = {}        # order id → symbol
+        self._seq = itertools.count()
+
+    def __len__(self):
+        return len(self._where)
+
+    def symbols(self):
+        return [symbol for symbol, book in self.books.items() if book.orders]
+
+    def submit(self, order):
+        if order.id in self._where:
+            return
+        order.seq = next(self._seq)
+        book = self.books.get(order.symbol)
+        if book is None:
+            book = self.books[order.symbol] = OrderBook(order.symbol)
+        book.add(order)
+        self._where[order.id] = order.symbol
+
+    def cancel(self, order_id):
+        symbol = self._where.pop(order_id, None)
+        if symbol is None:
+            return None
+        return self.books[symbol].cancel(order_id)
+
+    def on_quote(self, symbol, price):
+        book = self.books.get(symbol)
+        if book is None or not book.orders:
+            return []
+        fills = book.match(price)
+        for fill in fills:
+            self._where.pop(fill.order_id, None)
+        return fills
@@ -0,0 +1,229 @@
+# Back/simulator/services/nav_snapshots.py
+"""
+포트폴리오 일별 NAV 스냅샷
+
+take_snapshots 는 모든 포트폴리오를 한 번에 계산한다.
+    - 포트폴리오마다 마지막 스냅샷 다음 영업일부터 as_of 까지만 계산 (증분)
+    - 과거 날짜의 보유 수량/현금은 현재 Position/현금에서 그 날 이후 체결을 거꾸로 빼서 구한다
+      (거래 내역 전체를 다시 돌리지 않는다)
+    - 평가는 종목 × 일 종가 행렬과 np.bincount 로 포트폴리오별로 합산한다
+종가는 봉 저장소(bar_store)를 먼저 보고, 없는 종목은 시세 제공자에서, 그래도 없으면 매수 원가로 평가한다.
+"""
+import logging
+from datetime import date, timedelta
+
+import numpy as np
+from django.conf import settings
+from django.db.models import F, Max, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from simulator.models import PortfolioSnapshot, Position, VirtualPortfolio, VirtualTrade
+from simulator.services.price_service import fetch_close_matrix, fetch_current_prices
+from simulator.services.quote_refresher import MARKET_CLOSE
+
+logger = logging.getLogger(__name__)
+
+RANGES = {"1m": 30, "3m": 91, "6m": 182, "1y": 365, "3y": 1095}
+
+
+def last_closed_session(now=None):
+    """
+    장이 마감된 가장 최근 영업일 (주말만 건너뛴다)
+    """
+    now = timezone.localtime(now)
+    day = now.date()
+    if now.time() < MARKET_CLOSE:
+        day -= timedelta(days=1)
+    while day.weekday() >= 5:
+        day -= timedelta(days=1)
+    return day
+
+
+def sessions(start, end):
+    days, day = [], start
+    while day <= end:
+        if day.weekday() < 5:
+            days.append(day)
+        day += timedelta(days=1)
+    return days
+
+
+# ─────────────────────────────────────────────
+# 스냅샷 생성
+# ─────────────────────────────────────────────
+def take_snapshots(as_of=None, backfill_days=None):
+    """
+    as_of(기본: 마지막 마감일)까지 빠진 스냅샷을 채운다. 저장한 스냅샷 수를 반환한다.
+    """
+    as_of = as_of or last_closed_session()
+    backfill_days = settings.NAV_SNAPSHOT_BACKFILL_DAYS if backfill_days is None else backfill_days
+    floor = as_of - timedelta(days=backfill_days)
+
+    rows = list(
+        VirtualPortfolio.objects.annotate(last=Max("snapshots__date"))
+        .values_list("id", "cash_balance", "created_at", "last")
+    )
+    pids, cash_now, first = [], [], []
+    for pid, cash, created_at, last in rows:
+        start = max(last + timedelta(days=1) if last else timezone.localtime(created_at).date(), floor)
+        if start <= as_of:
+            pids.append(pid)
+            cash_now.append(cash)
+            first.append(start.toordinal())
+    if not pids:
+        return 0
+    days = sessions(date.fromordinal(min(first)), as_of)
+    if not days:
+        return 0
+
+    index = {pid: i for i, pid in enumerate(pids)}
+    positions = _load_positions(index)
+    trades = _load_trades_after(index, days[0])
+    codes = sorted(set(positions["code"]) | set(trades["code"]))
+    prices = _closing_prices(codes, days)
+    code_index = {code: i for i, code in enumerate(codes)}
+
+    pos_code = np.array([code_index[code] for code in positions["code"]], dtype=np.int64)
+    trd_code = np.array([code_index[code] for code in trades["code"]], dtype=np.int64)
+    count = len(pids)
+    market_value = np.empty((count, len(days)))
+    cash = np.empty((count, len(days)))
+    cash_now = np.array(cash_now, dtype=np.float64)
+
+    for j, day in enumerate(days):
+        # 가격이 없는 종목은 매수 원가(포지션) / 체결가(거래)로 평가
+        pos_price = np.where(np.isnan(prices[pos_code, j]), positions["avg"], prices[pos_code, j]) if len(pos_code) else 0
+        trd_price = np.where(np.isnan(prices[trd_code, j]), trades["avg"], prices[trd_code, j]) if len(trd_code) else 0
+        later = trades["day"] > day.toordinal()
+        market_value[:, j] = (
+            np.bincount(positions["portfolio"], positions["qty"] * pos_price, minlength=count)
+            - np.bincount(trades["portfolio"], trades["qty"] * trd_price * later, minlength=count)
+        )
+        cash[:, j] = cash_now - np.bincount(trades["portfolio"], trades["flow"] * later, minlength=count)
+
+    ordinals = np.array([day.toordinal() for day in days])
+    first = np.array(first)
+    market_value = np.rint(market_value).astype(np.int64)
+    cash = np.rint(cash).astype(np.int64)
+
+    written, batch = 0, []
+    for i, pid in enumerate(pids):
+        for j in np.nonzero(ordinals >= first[i])[0]:
+            mv, c = int(market_value[i, j]), int(cash[i, j])
+            batch.append(PortfolioSnapshot(
+                portfolio_id=pid, date=days[j], cash=c, market_value=mv, nav=c + mv,
+            ))
+        if len(batch) >= 5000:
+            written += _flush(batch)
+            batch = []
+    written += _flush(batch)
+    logger.info("NAV 스냅샷 %d건 (%d개 포트폴리오, %s ~ %s)", written, count, days[0], days[-1])
+    return written
+
+
+def _flush(batch):
+    """
+    이미 있는 (포트폴리오, 날짜) 는 빼고 저장한다. 새로 넣은 수를 반환한다
+    """
+    if not batch:
+        return 0
+    existing = set(
+        PortfolioSnapshot.objects.filter(
+            portfolio_id__in={snapshot.portfolio_id for snapshot in batch},
+            date__range=(min(snapshot.date for snapshot in batch), max(snapshot.date for snapshot in batch)),
+        ).values_list("portfolio_id", "date")
+    )
+    fresh = [snapshot for snapshot in batch if (snapshot.portfolio_id, snapshot.date) not in existing]
+    # 동시에 돈 다른 작업과 겹치는 행은 ignore_conflicts 로 넘긴다
+    PortfolioSnapshot.objects.bulk_create(fresh, batch_size=5000, ignore_conflicts=True)
+    return len(fresh)
+
+
+def _load_positions(index):
+    portfolio, code, qty, avg = [], [], [], []
+    qs = Position.objects.filter(quantity__gt=0).values_list("portfolio_id", "stock_code", "quantity", "cost_basis")
+    for pid, stock_code, quantity, cost_basis in qs.iterator(chunk_size=10000):
+        i = index.get(pid)
+        if i is None:
+            continue
+        portfolio.append(i)
+        code.append(stock_code)
+        qty.append(quantity)
+        avg.append(cost_basis / quantity)
+    return {
+        "portfolio": np.array(portfolio, dtype=np.int64),
+        "code": code,
+        "qty": np.array(qty, dtype=np.float64),
+        "avg": np.array(avg, dtype=np.float64),
+    }
+
+
+def _load_trades_after(index, day):
+    """
+    day 이후(다음날부터) 체결을 (포트폴리오, 종목, 날짜, 매수/매도) 단위로 합친 것.
+    qty 는 순매수 수량, flow 는 현금 흐름(매수 −, 매도 +)
+    """
+    portfolio, code, days, qty, flow, avg = [], [], [], [], [], []
+    qs = (
+        VirtualTrade.objects.annotate(day=TruncDate("traded_at"))
+        .filter(day__gt=day)
+        .values("portfolio_id", "stock_code", "day", "trade_type")
+        .annotate(total_qty=Sum("quantity"), amount=Sum(F("price") * F("quantity")))
+        .values_list("portfolio_id", "stock_code", "day", "trade_type", "total_qty", "amount")
+    )
+    for pid, stock_code, trade_day, trade_type, quantity, amount in qs.iterator(chunk_size=10000):
+        i = index.get(pid)
+        if i is None:
+            continue
+        sign = 1 if trade_type == VirtualTrade.BUY else -1
+        portfolio.append(i)
+        code.append(stock_code)
+        days.append(trade_day.toordinal())
+        qty.append(sign * quantity)
+        flow.append(-sign * amount)
+        avg.append(amount / quantity)
+    return {
+        "portfolio": np.array(portfolio, dtype=np.int64),
+        "code": code,
+        "day": np.array(days, dtype=np.int64),
+        "qty": np.array(qty, dtype=np.float64),
+        "flow": np.array(flow, dtype=np.float64),
+        "avg": np.array(avg, dtype=np.float64),
+    }
+
+
+def _closing_prices(codes, days):
+    prices = fetch_close_matrix(codes, days)
+    if not codes:
+        return prices
+
+    # 오늘은 봉이 아직 적재되지 않았을 수 있으므로 현재가(장 마감 뒤에는 종가)로 평가한다
+    if days[-1] == timezone.localdate():
+        quotes = fetch_current_prices(codes)
+        for i, code in enumerate(codes):
+            if quotes.get(code):
+                prices[i, -1] = quotes[code]
+    return prices
+
+
+# ─────────────────────────────────────────────
+# 조회
+# ─────────────────────────────────────────────
+def equity_curve(portfolio, start=None, end=None, points=None):
+    """
+    [start, end] 구간 스냅샷. points 를 넘으면 처음/끝을 포함해 고르게 골라 points 개로 줄인다.
+    """
+    qs = PortfolioSnapshot.objects.filter(portfolio=portfolio)
+    if start:
+        qs = qs.filter(date__gte=start)
+    if end:
+        qs = qs.filter(date__lte=end)
+    rows = list(qs.order_by("date").values_list("date", "cash", "market_value", "nav"))
+    if points and len(rows) > points:
+        picks = np.unique(np.linspace(0, len(rows) - 1, points).round().astype(int))
+        rows = [rows[i] for i in picks]
+    return [
+        {"date": day, "cash": cash, "market_value": market_value, "nav": nav}
+        for day, cash, market_value, nav in rows
+    ]
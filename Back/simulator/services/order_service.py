@@ -0,0 +1,172 @@
+# Back/simulator/services/order_service.py
+"""
+지정가/스톱 주문의 DB 반영
+
+- place_order / cancel_order : API 에서 호출. Order 행만 만들고 바꾼다.
+- EngineRunner              : 매칭 엔진 프로세스(run_matching_engine)에서 돈다.
+                              DB 의 새 주문/취소를 엔진에 동기화하고, 시세를 넣어 나온 체결을 저장한다.
+"""
+import logging
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from simulator.models import Order
+from simulator.services.execution import InsufficientCashError, InvalidTradeError, execute_trade, run_with_retries
+from simulator.services.matching_engine import BookOrder, MatchingEngine
+from simulator.services.positions import InsufficientQuantityError
+from simulator.services.price_service import fetch_quotes
+
+logger = logging.getLogger(__name__)
+
+
+def place_order(portfolio, side, order_type, stock_code, stock_name, quantity, limit_price=None, stop_price=None):
+    return Order.objects.create(
+        portfolio=portfolio,
+        side=side,
+        order_type=order_type,
+        stock_code=stock_code,
+        stock_name=stock_name,
+        quantity=quantity,
+        limit_price=limit_price,
+        stop_price=stop_price,
+    )
+
+
+def cancel_order(order):
+    """
+    미체결 주문만 취소된다. 취소되었으면 True
+    """
+    return bool(
+        Order.objects.filter(pk=order.pk, status=Order.OPEN)
+        .update(status=Order.CANCELLED, updated_at=timezone.now())
+    )
+
+
+def to_book_order(order):
+    return BookOrder(
+        order.id, order.stock_code, order.side, order.order_type, order.quantity,
+        limit_price=order.limit_price, stop_price=order.stop_price,
+    )
+
+
+def execute_fill(fill):
+    """
+    엔진이 낸 체결 하나를 저장한다. 현금/보유 수량이 모자라면 주문을 거부 처리한다.
+    저장된 VirtualTrade 를 반환하며, 이미 처리된 주문이거나 거부되면 None
+    """
+    def run():
+        order = Order.objects.select_for_update().filter(pk=fill.order_id, status=Order.OPEN).first()
+        if order is None:
+            return None
+        try:
+            with transaction.atomic():
+                trade = execute_trade(
+                    order.portfolio, fill.side, order.stock_code, order.stock_name,
+                    fill.price, fill.quantity, order=order,
+                )
+        except InsufficientCashError:
+            return _reject(order, "잔액 부족")
+        except InsufficientQuantityError:
+            return _reject(order, "보유 수량 부족")
+        except InvalidTradeError:
+            return _reject(order, "잘못된 수량/가격")
+        order.status = Order.FILLED
+        order.save(update_fields=["status", "updated_at"])
+        return trade
+
+    return run_with_retries(run)
+
+
+def _reject(order, reason):
+    order.status = Order.REJECTED
+    order.reason = reason
+    order.save(update_fields=["status", "reason", "updated_at"])
+    return None
+
+
+class EngineRunner:
+    def __init__(self, engine=None):
+        self.engine = engine or MatchingEngine()
+        self._last_id = 0
+        self._synced_at = None
+
+    def sync(self):
+        """
+        마지막 동기화 이후 새로 들어온 미체결 주문을 엔진에 올리고, 취소/거부된 주문을 내린다.
+        id/시각은 커밋 순서가 아니므로 (먼저 만든 주문이 늦게 커밋될 수 있다) 워터마크 뒤뿐 아니라
+        MATCHING_ENGINE_SYNC_OVERLAP 초 전부터 만든/바뀐 주문도 다시 본다. 엔진이 이미 가진 주문은 submit/cancel 이 무시한다.
+        """
+        started = timezone.now()
+        new_orders = Order.objects.filter(status=Order.OPEN)
+        if self._synced_at is not None:
+            since = self._synced_at - timedelta(seconds=settings.MATCHING_ENGINE_SYNC_OVERLAP)
+            new_orders = new_orders.filter(Q(id__gt=self._last_id) | Q(created_at__gte=since))
+        for order in new_orders.order_by("id").iterator(chunk_size=2000):
+            self.engine.submit(to_book_order(order))
+            self._last_id = max(self._last_id, order.id)
+
+        if self._synced_at is not None:
+            closed = Order.objects.filter(
+                updated_at__gte=since,
+                status__in=[Order.CANCELLED, Order.REJECTED],
+            ).values_list("id", flat=True)
+            for order_id in closed.iterator(chunk_size=2000):
+                self.engine.cancel(order_id)
+        self._synced_at = started
+
+    def on_quotes(self, prices):
+        """
+        {종목코드: 가격} 시세를 엔진에 넣고 나온 체결을 저장한다. 저장한 체결 수를 반환한다.
+        """
+        count = 0
+        for symbol, price in prices.items():
+            if not price:
+                continue
+            for fill in self.engine.on_quote(symbol, price):
+                try:
+                    if execute_fill(fill) is not None:
+                        count += 1
+                except Exception:
+                    logger.exception("체결 저장 실패: order=%s", fill.order_id)
+                    self._close_failed(fill.order_id)
+        return count
+
+    def _close_failed(self, order_id):
+        """
+        저장에 실패한 체결의 주문은 엔진 책에서 이미 빠졌으므로 DB 에서도 거부로 닫는다.
+        그마저 실패하면 워터마크를 되돌려 다음 sync 가 엔진에 다시 올리게 한다.
+        """
+        try:
+            order = Order.objects.filter(pk=order_id, status=Order.OPEN).first()
+            if order is not None:
+                _reject(order, "체결 저장 실패")
+        except Exception:
+            logger.exception("주문 거부 처리 실패: order=%s", order_id)
+            self._last_id = min(self._last_id, order_id - 1)
+
+    def tick(self):
+        self.sync()
+        symbols = self.engine.symbols()
+        if not symbols:
+            return 0
+        # 마감 안에 새로 얻지 못한 시세로는 체결시키지 않는다
+        quotes = fetch_quotes(symbols, deadline=settings.MATCHING_ENGINE_QUOTE_DEADLINE)
+        return self.on_quotes({code: quote.price for code, quote in quotes.items() if not quote.stale})
+
+    def run_forever(self, stop_event=None):
+        stop_event = stop_event or threading.Event()
+        while not stop_event.is_set():
+            started = time.monotonic()
+            try:
+                filled = self.tick()
+                if filled:
+                    logger.info("주문 %d건 체결 (미체결 %d건)", filled, len(self.engine))
+            except Exception:
+                logger.exception("매칭 루프 오류")
+            stop_event.wait(max(settings.MATCHING_ENGINE_INTERVAL - (time.monotonic() - started), 0))
@@ -0,0 +1,117 @@
+# Back/simulator/services/positions.py
+"""
+Position(종목별 보유 현황) 갱신
+
+apply_trade 는 호출하는 쪽의 transaction.atomic() 안에서 불려야 하며,
+해당 포지션 행을 잠근 뒤(select_for_update) 평균단가 방식으로 수량/원가/실현손익을 반영한다.
+"""
+from django.db import transaction
+from django.utils import timezone
+
+from simulator.models import Position, VirtualTrade
+
+
+class TradeRejected(ValueError):
+    """잔액/보유 수량 부족 등으로 체결할 수 없는 주문"""
+
+
+class InsufficientQuantityError(TradeRejected):
+    """보유 수량보다 많이 팔려는 경우"""
+
+
+def _apply(position, trade_type, price, quantity):
+    if trade_type == VirtualTrade.BUY:
+        position.quantity += quantity
+        position.cost_basis += price * quantity
+        return
+    if quantity > position.quantity:
+        raise InsufficientQuantityError(
+            f"{position.stock_code} 보유 수량({position.quantity})보다 많이 매도할 수 없습니다"
+        )
+    cost = round(position.cost_basis * quantity / position.quantity)
+    position.realized_pnl += price * quantity - cost
+    position.cost_basis -= cost
+    position.quantity -= quantity
+
+
+def apply_trade(portfolio, trade_type, stock_code, stock_name, price, quantity):
+    """
+    체결 하나를 포지션에 반영하고 갱신된 Position 을 반환한다.
+    """
+    position = (
+        Position.objects.select_for_update()
+        .filter(portfolio=portfolio, stock_code=stock_code)
+        .first()
+    )
+    if position is None:
+        if trade_type != VirtualTrade.BUY:
+            raise InsufficientQuantityError(f"{stock_code} 보유 수량이 없습니다")
+        position = Position(portfolio=portfolio, stock_code=stock_code, stock_name=stock_name)
+    _apply(position, trade_type, price, quantity)
+    position.save()
+    return position
+
+
+def apply_trades(portfolio, trades):
+    """
+    체결 여러 건을 한 번에 반영한다. trades 는 (trade_type, stock_code, stock_name, price, quantity) 목록.
+    관련 포지션을 한 번에 잠그고 메모리에서 순서대로 적용한 뒤 bulk_create/bulk_update 로 저장하므로
+    건수와 상관없이 쿼리 수가 일정하다. 하나라도 수량이 모자라면 아무것도 저장하지 않고 InsufficientQuantityError
+    """
+    codes = {code for _, code, _, _, _ in trades}
+    positions = {
+        position.stock_code: position
+        for position in Position.objects.select_for_update().filter(portfolio=portfolio, stock_code__in=codes)
+    }
+    created = {}
+    for trade_type, code, name, price, quantity in trades:
+        position = positions.get(code) or created.get(code)
+        if position is None:
+            if trade_type != VirtualTrade.BUY:
+                raise InsufficientQuantityError(f"{code} 보유 수량이 없습니다")
+            position = created[code] = Position(portfolio=portfolio, stock_code=code, stock_name=name)
+        _apply(position, trade_type, price, quantity)
+
+    if positions:
+        now = timezone.now()    # bulk_update 는 auto_now 를 채우지 않는다
+        for position in positions.values():
+            position.updated_at = now
+        Position.objects.bulk_update(positions.values(), ["quantity", "cost_basis", "realized_pnl", "updated_at"])
+    if created:
+        Position.objects.bulk_create(created.values())
+    return [*positions.values(), *created.values()]
+
+
+def held_quantity(portfolio, stock_code):
+    return (
+        Position.objects.filter(portfolio=portfolio, stock_code=stock_code)
+        .values_list("quantity", flat=True)
+        .first()
+    ) or 0
+
+
+def rebuild_positions(portfolio):
+    """
+    portfolio 의 거래 내역 전체를 시간순으로 다시 적용해 Position 을 새로 만든다.
+    보유 수량을 넘는 매도(예전 방식으로 매수 행이 지워진 경우)는 보유분까지만 반영한다.
+    """
+    positions = {}
+    trades = (
+        VirtualTrade.objects.filter(portfolio=portfolio)
+        .order_by("traded_at", "id")
+        .values_list("trade_type", "stock_code", "stock_name", "price", "quantity")
+    )
+    for trade_type, code, name, price, quantity in trades.iterator(chunk_size=2000):
+        position = positions.get(code)
+        if position is None:
+            position = positions[code] = Position(portfolio=portfolio, stock_code=code, stock_name=name)
+        if trade_type == VirtualTrade.SELL:
+            quantity = min(quantity, position.quantity)
+            if quantity == 0:
+                continue
+        _apply(position, trade_type, price, quantity)
+
+    with transaction.atomic():
+        Position.objects.filter(portfolio=portfolio).delete()
+        Position.objects.bulk_create(positions.values())
+    return list(positions.values())
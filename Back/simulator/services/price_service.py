@@ -1,22 +1,181 @@
 # Back/simulator/services/price_service.py
+import logging
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, wait
+from datetime import timedelta
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+
+from simulator.services.bar_store import align_closes, bars_to_arrays, close_matrix, empty_bars, load_bars
+from simulator.services.providers import get_provider
+from simulator.services.quote_cache import quote_cache
+from simulator.services.symbol_index import get_symbol_index, resolve_symbol
+
+logger = logging.getLogger(__name__)
+
+# stale: 마감 시간 안에 새 시세를 얻지 못해 마지막으로 알려진 가격을 쓴 경우
+# price: 한 번도 얻지 못했으면 None (0 으로 평가하면 -100% 로 보인다)
+Quote = namedtuple("Quote", ["price", "stale"])
+
+_fetch_pool = ThreadPoolExecutor(
+    max_workers=settings.QUOTE_FETCH_WORKERS, thread_name_prefix="quote-fetch"
+)
+
+
+def _fetch_one(ticker):
+    return get_provider().get_price(ticker)
+
+
+def _fetch_many(tickers):
+    return get_provider().get_prices(tickers)
+
+
+def _read_max_age():
+    return float("inf") if settings.QUOTE_READ_CACHE_ONLY else None
 
-import yfinance as yf
 
 def fetch_current_price(stock_name):
-    stock_mapping = {
-        '삼성전자': '005930.KS',
-        'SK하이닉스': '000660.KS',
-        'LG에너지솔루션': '373220.KQ',
-    }
+    """
+    종목명 또는 코드의 현재가. 종목 마스터에 없으면 UnknownSymbolError
+    """
+    ticker = resolve_symbol(stock_name).ticker
+
+    # 같은 티커는 TTL 동안 캐시에서, 동시 요청은 업스트림 호출 한 번으로 처리
+    # (QUOTE_READ_CACHE_ONLY 면 fetch_quotes 처럼 캐시에 있는 값은 나이와 상관없이 쓴다)
+    return quote_cache.get(ticker, _fetch_one, _read_max_age())
+
+
+def fetch_quotes(stock_names, deadline=None):
+    """
+    여러 종목명(또는 코드)의 시세를 조회한다. {종목명: Quote(price, stale)}
+
+    캐시에 없는 티커는 QUOTE_FETCH_CHUNK_SIZE 개씩 나눠 스레드 풀에서 동시에 가져오고,
+    deadline(초, 기본 QUOTE_REQUEST_DEADLINE) 안에 끝나지 않은 묶음은 마지막으로 알려진 가격을
+    stale=True 로 돌려준다. 늦은 묶음은 백그라운드에서 계속 진행되어 다음 요청부터 캐시에 반영된다.
+    등록되지 않았거나 시세를 전혀 얻지 못한 종목은 price=None 이다 (호출하는 쪽에서 원가로 평가하거나 표시하지 않는다).
+    """
+    deadline = settings.QUOTE_REQUEST_DEADLINE if deadline is None else deadline
+    index = get_symbol_index()
+    tickers = {}
+    for name in dict.fromkeys(stock_names):
+        info = index.resolve(name)
+        if info is None:
+            logger.warning("종목 마스터에 없는 종목: %s", name)
+        tickers[name] = info.ticker if info else None
+
+    # 백그라운드 갱신기가 돌고 있으면 캐시에 있는 값은 나이와 상관없이 그대로 쓰고,
+    # 아직 한 번도 조회되지 않은 티커만 업스트림에서 가져온다
+    max_age = _read_max_age()
+    distinct = sorted({ticker for ticker in tickers.values() if ticker})
+    size = settings.QUOTE_FETCH_CHUNK_SIZE
+    futures = [
+        _fetch_pool.submit(quote_cache.get_many, distinct[i:i + size], _fetch_many, max_age)
+        for i in range(0, len(distinct), size)
+    ]
+    done, _ = wait(futures, timeout=deadline)
+
+    prices = {}
+    for future in done:
+        try:
+            prices.update(future.result())
+        except Exception:
+            logger.warning("시세 조회 실패", exc_info=True)
+
+    quotes = {}
+    for name, ticker in tickers.items():
+        if ticker is None:
+            quotes[name] = Quote(None, False)
+        elif ticker in prices:
+            quotes[name] = Quote(prices[ticker], False)
+        else:
+            entry = quote_cache.peek(ticker)
+            quotes[name] = Quote(entry[0] if entry else None, True)
+    return quotes
+
+
+def fetch_current_prices(stock_names, deadline=None):
+    """
+    fetch_quotes 의 가격만 꺼낸 버전. {종목명: 가격 또는 None}
+    """
+    return {name: quote.price for name, quote in fetch_quotes(stock_names, deadline).items()}
+
+
+def fetch_price_history(stock_name, start=None, end=None, interval="1d"):
+    """
+    종목명 또는 코드의 OHLCV 봉 목록. 종목 마스터에 없으면 UnknownSymbolError
+    """
+    ticker = resolve_symbol(stock_name).ticker
+    return get_provider().get_history(ticker, start=start, end=end, interval=interval)
+
+
+def fetch_close_matrix(codes, days, tickers=None):
+    """
+    (종목 수 × 일 수) 종가 행렬. 봉 저장소를 먼저 보고, 구간에 봉이 하나도 없는 종목은 제공자 일봉으로 채운다.
+    tickers 로 {코드: 티커} 를 주면 종목 마스터 대신 그 티커를 쓴다 (예: 지수 ^KS11)
+    """
+    prices = close_matrix(codes, days)
+    if not codes or not days:
+        return prices
+
+    index = get_symbol_index()
+    provider = get_provider()
+    for i in np.nonzero(np.isnan(prices).all(axis=1))[0]:
+        ticker = (tickers or {}).get(codes[i])
+        if ticker is None:
+            info = index.resolve(codes[i])
+            if info is None:
+                continue
+            ticker = info.ticker
+        try:
+            bars = provider.get_history(ticker, start=days[0] - timedelta(days=10), end=days[-1])
+        except Exception:
+            logger.warning("종가 조회 실패: %s", codes[i], exc_info=True)
+            continue
+        prices[i] = align_closes(bars_to_arrays(bars), days)
+    return prices
+
+
+def fetch_bars(code, start=None, end=None, interval="1d"):
+    """
+    종목 코드의 [start, end] 봉 배열 dict. 봉 저장소에 없으면 제공자에서 받는다 (저장하지는 않음)
+    """
+    arrays = load_bars(code, start, end, interval=interval)
+    if len(arrays["ts"]):
+        return arrays
+    return fetch_provider_bars(code, start, end, interval)
 
-    ticker = stock_mapping.get(stock_name)
-    if not ticker:
-        return 0  # 등록되지 않은 종목일 경우 0 반환
 
-    stock = yf.Ticker(ticker)
-    price = stock.info.get('currentPrice')  # 야후 API 기준 현재가
+def fetch_provider_bars(code, start=None, end=None, interval="1d"):
+    """
+    봉 저장소를 보지 않고 제공자에서만 받은 봉 배열 dict. 종목 마스터에 없거나 실패하면 빈 배열
+    """
+    info = get_symbol_index().resolve(code)
+    if info is None:
+        return empty_bars()
+    try:
+        bars = get_provider().get_history(info.ticker, start=start, end=end, interval=interval)
+    except Exception:
+        logger.warning("봉 조회 실패: %s", code, exc_info=True)
+        return empty_bars()
+    return bars_to_arrays(bars)
 
-    if price is None:
-        price = stock.history(period="1d")['Close'].iloc[-1]  # fallback
 
-    return int(price)
+def fetch_fundamentals(code):
+    """
+    종목 코드의 주당 지표 {"eps": ..., "bps": ...}. 하루(FUNDAMENTALS_CACHE_TTL) 동안 캐시한다
+    """
+    key = f"fundamentals:{code}"
+    values = cache.get(key)
+    if values is not None:
+        return values
+    info = get_symbol_index().resolve(code)
+    values = {}
+    if info is not None:
+        try:
+            values = get_provider().get_fundamentals(info.ticker)
+        except Exception:
+            logger.warning("재무 지표 조회 실패: %s", code, exc_info=True)
+    cache.set(key, values, settings.FUNDAMENTALS_CACHE_TTL)
+    return values
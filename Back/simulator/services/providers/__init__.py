@@ -0,0 +1,49 @@
+# Back/simulator/services/providers/__init__.py
+"""
+시세 제공자(provider) 선택
+
+settings.PRICE_PROVIDER 값으로 구현체를 고른다.
+    "yfinance"  : 야후 파이낸스 (기본값)
+    "replay"    : 로컬 CSV/Parquet 에 기록된 OHLCV 재생 (오프라인, 결정적)
+    "synthetic" : 시드 고정 랜덤워크 (오프라인, 결정적)
+그 밖의 값은 "패키지.모듈.클래스" 경로로 보고 import 한다.
+"""
+import threading
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+from .base import Bar, PriceProvider
+
+PROVIDERS = {
+    "yfinance": "simulator.services.providers.yfinance_provider.YFinanceProvider",
+    "replay": "simulator.services.providers.replay.ReplayProvider",
+    "synthetic": "simulator.services.providers.synthetic.SyntheticProvider",
+}
+
+_lock = threading.Lock()
+_provider = None
+
+
+def get_provider():
+    """
+    설정된 시세 제공자 인스턴스(프로세스당 하나)를 반환한다.
+    """
+    global _provider
+    with _lock:
+        if _provider is None:
+            path = PROVIDERS.get(settings.PRICE_PROVIDER, settings.PRICE_PROVIDER)
+            _provider = import_string(path)()
+    return _provider
+
+
+def set_provider(provider):
+    """
+    벤치마크/관리 명령에서 제공자를 직접 바꿔 끼울 때 사용한다.
+    """
+    global _provider
+    with _lock:
+        _provider = provider
+
+
+__all__ = ["Bar", "PriceProvider", "get_provider", "set_provider"]
@@ -0,0 +1,44 @@
+# Back/simulator/services/providers/base.py
+from abc import ABC, abstractmethod
+from collections import namedtuple
+
+# 하나의 OHLCV 봉. ts 는 timezone-aware datetime
+Bar = namedtuple("Bar", ["ts", "open", "high", "low", "close", "volume"])
+
+
+class PriceProvider(ABC):
+    """
+    시세 제공자 인터페이스
+
+    구현체는 최소한 get_prices 와 get_history 를 제공해야 한다 (빠지면 인스턴스를 만들 때 TypeError).
+    티커는 야후 형식("005930.KS")을 기준으로 한다.
+    """
+    name = "base"
+
+    def get_price(self, ticker):
+        """
+        단일 티커 현재가(int). 시세가 없으면 LookupError
+        """
+        prices = self.get_prices([ticker])
+        if ticker not in prices:
+            raise LookupError(f"시세 없음: {ticker}")
+        return prices[ticker]
+
+    @abstractmethod
+    def get_prices(self, tickers):
+        """
+        여러 티커 현재가를 한 번에 조회한다. {ticker: int}
+        시세를 얻지 못한 티커는 결과에서 빠진다.
+        """
+
+    @abstractmethod
+    def get_history(self, ticker, start=None, end=None, interval="1d"):
+        """
+        [start, end] 구간의 OHLCV 봉 목록(list[Bar])을 시간순으로 반환한다.
+        """
+
+    def get_fundamentals(self, ticker):
+        """
+        주당 지표 dict ({"eps": ..., "bps": ...}). 제공하지 않는 값은 빠진다.
+        """
+        return {}
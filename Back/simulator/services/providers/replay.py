@@ -0,0 +1,128 @@
+# Back/simulator/services/providers/replay.py
+"""
+기록된 OHLCV 를 재생하는 오프라인 시세 제공자
+
+settings.PRICE_REPLAY_DIR 아래의 "<티커>.csv" / "<티커>.parquet" (또는 "005930.csv" 처럼
+거래소 접미사를 뺀 이름) 파일을 읽는다. 컬럼 이름은 대소문자를 가리지 않으며
+ts/timestamp/datetime/date 중 하나와 open, high, low, close, volume 이 필요하다.
+
+현재가는 티커별 커서 위치의 종가다. PRICE_REPLAY_AUTO_ADVANCE 가 켜져 있으면
+조회할 때마다 커서가 한 칸씩 전진하고, 끝에 닿으면 처음으로 돌아간다.
+같은 파일과 같은 호출 순서라면 항상 같은 시세열이 나온다.
+"""
+import bisect
+import threading
+from datetime import datetime, time
+from pathlib import Path
+
+import pandas as pd
+from django.conf import settings
+from django.utils import timezone
+
+from .base import Bar, PriceProvider
+
+_TS_COLUMNS = ("ts", "timestamp", "datetime", "date")
+
+
+class ReplayProvider(PriceProvider):
+    name = "replay"
+
+    def __init__(self, data_dir=None, auto_advance=None):
+        self.data_dir = Path(data_dir or settings.PRICE_REPLAY_DIR)
+        self.auto_advance = settings.PRICE_REPLAY_AUTO_ADVANCE if auto_advance is None else auto_advance
+        self._lock = threading.Lock()
+        self._series = {}   # ticker → list[Bar]
+        self._cursor = {}   # ticker → int
+
+    # ─────────────────────────────────────────────
+    def get_prices(self, tickers):
+        prices = {}
+        with self._lock:
+            for ticker in tickers:
+                bars = self._bars(ticker)
+                if not bars:
+                    continue
+                pos = self._cursor.get(ticker, 0)
+                prices[ticker] = int(bars[pos].close)
+                if self.auto_advance:
+                    self._cursor[ticker] = (pos + 1) % len(bars)
+        return prices
+
+    def get_history(self, ticker, start=None, end=None, interval="1d"):
+        with self._lock:
+            bars = self._bars(ticker)
+        stamps = [bar.ts for bar in bars]
+        lo = bisect.bisect_left(stamps, _aware(start)) if start is not None else 0
+        hi = bisect.bisect_right(stamps, _aware(end, end_of_day=True)) if end is not None else len(bars)
+        return bars[lo:hi]
+
+    def advance(self, steps=1):
+        """
+        이미 읽어 둔 모든 티커의 커서를 steps 만큼 전진시킨다.
+        """
+        with self._lock:
+            for ticker, bars in self._series.items():
+                if bars:
+                    self._cursor[ticker] = (self._cursor.get(ticker, 0) + steps) % len(bars)
+
+    def seek(self, when):
+        """
+        모든 티커의 커서를 when 이후 첫 봉으로 옮긴다.
+        """
+        when = _aware(when)
+        with self._lock:
+            for ticker, bars in self._series.items():
+                pos = bisect.bisect_left([bar.ts for bar in bars], when)
+                self._cursor[ticker] = min(pos, len(bars) - 1) if bars else 0
+
+    # ─────────────────────────────────────────────
+    # 내부 헬퍼
+    # ─────────────────────────────────────────────
+    def _bars(self, ticker):
+        if ticker not in self._series:
+            self._series[ticker] = self._load(ticker)
+        return self._series[ticker]
+
+    def _load(self, ticker):
+        for stem in dict.fromkeys((ticker, ticker.split(".")[0])):
+            for suffix, reader in ((".parquet", pd.read_parquet), (".csv", pd.read_csv)):
+                path = self.data_dir / f"{stem}{suffix}"
+                if path.exists():
+                    return _frame_to_bars(reader(path))
+        return []
+
+
+def _aware(value, end_of_day=False):
+    """
+    date/datetime → aware datetime. date 는 현지 기준 그날의 시작(또는 끝)
+    """
+    if value is None:
+        return value
+    if not isinstance(value, datetime):
+        value = datetime.combine(value, time.max if end_of_day else time.min)
+    if timezone.is_aware(value):
+        return value
+    return timezone.make_aware(value)
+
+
+def _frame_to_bars(frame):
+    frame = frame.rename(columns=str.lower)
+    ts_column = next((c for c in _TS_COLUMNS if c in frame.columns), None)
+    if ts_column is None:
+        raise ValueError(f"시각 컬럼이 없습니다 ({', '.join(_TS_COLUMNS)} 중 하나 필요)")
+
+    frame = frame.sort_values(ts_column)
+    stamps = pd.to_datetime(frame[ts_column])
+    if stamps.dt.tz is None:
+        stamps = stamps.dt.tz_localize(settings.TIME_ZONE)
+
+    close = frame["close"].astype(float)
+    columns = {
+        name: frame[name].astype(float) if name in frame.columns else close
+        for name in ("open", "high", "low")
+    }
+    volume = frame["volume"].fillna(0).astype("int64") if "volume" in frame.columns else [0] * len(frame)
+    return [
+        Bar(ts.to_pydatetime(), o, h, l, c, int(v))
+        for ts, o, h, l, c, v in zip(stamps, columns["open"], columns["high"], columns["low"], close, volume)
+    ]
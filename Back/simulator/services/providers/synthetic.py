@@ -0,0 +1,87 @@
+# Back/simulator/services/providers/synthetic.py
+"""
+시드 고정 랜덤워크 시세 제공자 (부하 테스트/벤치마크용)
+
+티커마다 (PRICE_SYNTHETIC_SEED, 티커) 로 난수열이 정해지므로 같은 설정이면
+항상 같은 가격 경로가 나온다. get_prices 를 호출할 때마다 한 걸음씩 움직인다.
+"""
+import random
+import threading
+import zlib
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from .base import Bar, PriceProvider
+
+
+class SyntheticProvider(PriceProvider):
+    name = "synthetic"
+
+    def __init__(self, seed=None, start_price=50_000, volatility=0.02):
+        self.seed = settings.PRICE_SYNTHETIC_SEED if seed is None else seed
+        self.start_price = start_price
+        self.volatility = volatility
+        self._lock = threading.Lock()
+        self._walks = {}    # ticker → (Random, 현재가)
+
+    def get_prices(self, tickers):
+        prices = {}
+        with self._lock:
+            for ticker in tickers:
+                rng, price = self._walks.get(ticker) or (self._rng(ticker), float(self.start_price))
+                price = self._step(rng, price)
+                self._walks[ticker] = (rng, price)
+                prices[ticker] = int(price)
+        return prices
+
+    def get_history(self, ticker, start=None, end=None, interval="1d"):
+        """
+        일봉 경로를 만든다. 같은 티커/구간이면 결과가 같다.
+        """
+        if interval != "1d":
+            raise ValueError("synthetic 제공자는 일봉(1d)만 지원합니다")
+        today = timezone.localdate()
+        end_date = _to_date(end) or today
+        start_date = _to_date(start) or end_date - timedelta(days=365)
+
+        rng = self._rng(ticker)
+        close = float(self.start_price)
+        bars = []
+        day = start_date
+        while day <= end_date:
+            if day.weekday() < 5:
+                open_ = close
+                close = self._step(rng, open_)
+                spread = abs(rng.gauss(0, self.volatility / 2)) * open_
+                bars.append(Bar(
+                    timezone.make_aware(datetime.combine(day, time(15, 30))),
+                    open_, max(open_, close) + spread, min(open_, close) - spread, close,
+                    rng.randint(100_000, 5_000_000),
+                ))
+            day += timedelta(days=1)
+        return bars
+
+    def get_fundamentals(self, ticker):
+        """
+        시작가 기준 PER 5~30, PBR 0.5~3 이 되도록 정한다 (티커마다 고정)
+        """
+        rng = self._rng(f"fundamentals:{ticker}")
+        return {
+            "eps": self.start_price / rng.uniform(5, 30),
+            "bps": self.start_price / rng.uniform(0.5, 3),
+        }
+
+    # ─────────────────────────────────────────────
+    def _rng(self, ticker):
+        return random.Random(zlib.crc32(f"{self.seed}:{ticker}".encode()))
+
+    def _step(self, rng, price):
+        return max(price * (1 + rng.gauss(0, self.volatility)), 1.0)
+
+
+def _to_date(value):
+    if value is None:
+        return None
+    return value.date() if isinstance(value, datetime) else value
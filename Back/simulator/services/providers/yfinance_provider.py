@@ -0,0 +1,66 @@
+# Back/simulator/services/providers/yfinance_provider.py
+import yfinance as yf
+
+from .base import Bar, PriceProvider
+
+
+class YFinanceProvider(PriceProvider):
+    name = "yfinance"
+
+    def get_price(self, ticker):
+        stock = yf.Ticker(ticker)
+        price = stock.info.get('currentPrice')  # 야후 API 기준 현재가
+
+        if price is None:
+            price = stock.history(period="1d")['Close'].iloc[-1]  # fallback
+
+        return int(price)
+
+    def get_prices(self, tickers):
+        """
+        여러 티커의 최근 종가를 yf.download 한 번으로 가져온다.
+        """
+        tickers = list(tickers)
+        frame = yf.download(
+            tickers=tickers,
+            period="5d",            # 휴장일이 끼어도 마지막 거래일 종가가 남도록
+            interval="1d",
+            group_by="column",
+            auto_adjust=False,
+            progress=False,
+            threads=True,
+        )
+        if frame is None or frame.empty:
+            return {}
+
+        close = frame["Close"]
+        if getattr(close, "ndim", 2) == 1:     # 단일 티커 + 단일 레벨 컬럼
+            close = close.to_frame(name=tickers[0])
+
+        prices = {}
+        for ticker in tickers:
+            if ticker not in close:
+                continue
+            series = close[ticker].dropna()
+            if not series.empty:
+                prices[ticker] = int(series.iloc[-1])
+        return prices
+
+    def get_history(self, ticker, start=None, end=None, interval="1d"):
+        kwargs = {"interval": interval, "auto_adjust": False}
+        if start is None and end is None:
+            kwargs["period"] = "max"
+        else:
+            kwargs["start"] = start
+            kwargs["end"] = end
+        frame = yf.Ticker(ticker).history(**kwargs)
+        return [
+            Bar(ts.to_pydatetime(), float(row.Open), float(row.High), float(row.Low),
+                float(row.Close), int(row.Volume))
+            for ts, row in frame.iterrows()
+        ]
+
+    def get_fundamentals(self, ticker):
+        info = yf.Ticker(ticker).info
+        values = {"eps": info.get("trailingEps"), "bps": info.get("bookValue")}
+        return {key: float(value) for key, value in values.items() if value}
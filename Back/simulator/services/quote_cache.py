@@ -0,0 +1,281 @@
+# Back/simulator/services/quote_cache.py
+"""
+프로세스 공용 시세 캐시
+
+- TTL 안의 값은 그대로 반환 (hit)
+- TTL 은 지났지만 stale TTL 안이면 이전 값을 즉시 반환하고 백그라운드에서 갱신 (stale-while-revalidate)
+- 같은 티커를 동시에 요청하면 업스트림 호출은 한 번만 나간다 (single-flight)
+- settings.QUOTE_CACHE_SHARED 가 켜져 있으면 Django 캐시(예: Redis)에 값을 함께 기록해 프로세스 간에 공유한다
+"""
+import logging
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.cache import caches
+
+logger = logging.getLogger(__name__)
+
+_SHARED_KEY_PREFIX = "quote:"
+
+
+class QuoteCache:
+    def __init__(self, ttl, stale_ttl, shared_alias=None, max_refresh_workers=4):
+        self.ttl = ttl
+        self.stale_ttl = max(stale_ttl, ttl)
+        self.shared_alias = shared_alias
+
+        self._lock = threading.Lock()
+        self._entries = {}      # key → (value, fetched_at)
+        self._inflight = {}     # key → Future
+        self._refresher = ThreadPoolExecutor(
+            max_workers=max_refresh_workers, thread_name_prefix="quote-refresh"
+        )
+        self._stats = {
+            "hits": 0,
+            "stale_hits": 0,
+            "misses": 0,
+            "coalesced": 0,
+            "errors": 0,
+            "upstream_calls": 0,
+            "upstream_latency_total": 0.0,
+            "upstream_latency_max": 0.0,
+        }
+
+    # ─────────────────────────────────────────────
+    def get(self, key, loader, max_age=None):
+        """
+        key 의 시세를 반환한다. 캐시에 없거나 너무 오래되면 loader(key) 로 가져온다.
+        max_age 는 get_many 와 같다 (float("inf") 면 캐시에 있는 값은 항상 사용).
+        """
+        ttl = self.ttl if max_age is None else max_age
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is None:
+            entry = self._get_shared(key)
+
+        if entry is not None:
+            value, fetched_at = entry
+            age = now - fetched_at
+            if age < ttl:
+                self._incr("hits")
+                return value
+            if age < self.stale_ttl:
+                self._incr("stale_hits")
+                self._refresh_in_background(key, loader)
+                return value
+
+        self._incr("misses")
+        try:
+            return self._load(key, loader)
+        except Exception:
+            # 업스트림이 실패해도 오래된 값이 있으면 그 값을 돌려준다
+            if entry is not None:
+                logger.warning("시세 갱신 실패, 이전 값 사용: %s", key, exc_info=True)
+                return entry[0]
+            raise
+
+    def get_many(self, keys, batch_loader, max_age=None):
+        """
+        여러 key 를 한 번에 조회한다. 캐시에 없는 key 들만 batch_loader(keys) 로 한 번에 가져오며,
+        batch_loader 는 {key: 값} dict 를 반환해야 한다.
+        가져오지 못한 key 는 결과 dict 에서 빠진다.
+        max_age 를 주면 TTL 대신 그 값(초)으로 신선도를 판단한다 (float("inf") 면 캐시에 있는 값은 항상 사용).
+        """
+        ttl = self.ttl if max_age is None else max_age
+        now = time.monotonic()
+        result, stale, missing, fallback = {}, [], [], {}
+        for key in dict.fromkeys(keys):
+            with self._lock:
+                entry = self._entries.get(key)
+            if entry is None:
+                entry = self._get_shared(key)
+            if entry is not None:
+                value, fetched_at = entry
+                age = now - fetched_at
+                if age < ttl:
+                    self._incr("hits")
+                    result[key] = value
+                    continue
+                if age < self.stale_ttl:
+                    self._incr("stale_hits")
+                    result[key] = value
+                    stale.append(key)
+                    continue
+                fallback[key] = value
+            self._incr("misses")
+            missing.append(key)
+
+        if stale:
+            self._refresher.submit(self._refresh_many_quietly, stale, batch_loader)
+        if missing:
+            values, errors = self._load_many(missing, batch_loader)
+            result.update(values)
+            for key in errors:
+                if key in fallback:
+                    result[key] = fallback[key]
+            if errors:
+                logger.warning("시세 일괄 조회 실패: %s", ", ".join(errors))
+        return result
+
+    def peek(self, key):
+        """
+        업스트림 호출 없이 캐시에 남아 있는 마지막 값과 수집 시각(monotonic)을 반환한다. 없으면 None.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+        return entry if entry is not None else self._get_shared(key)
+
+    def set(self, key, value):
+        entry = (value, time.monotonic())
+        with self._lock:
+            self._entries[key] = entry
+        self._set_shared(key, value)
+
+    def invalidate(self, key=None):
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+    def stats(self):
+        with self._lock:
+            data = dict(self._stats)
+            data["size"] = len(self._entries)
+            data["inflight"] = len(self._inflight)
+        calls = data["upstream_calls"]
+        lookups = data["hits"] + data["stale_hits"] + data["misses"]
+        data["upstream_latency_avg"] = (data["upstream_latency_total"] / calls) if calls else 0.0
+        data["hit_rate"] = ((data["hits"] + data["stale_hits"]) / lookups) if lookups else 0.0
+        return data
+
+    def reset_stats(self):
+        with self._lock:
+            for name in self._stats:
+                self._stats[name] = 0.0 if isinstance(self._stats[name], float) else 0
+
+    # ─────────────────────────────────────────────
+    # 내부 헬퍼
+    # ─────────────────────────────────────────────
+    def _load(self, key, loader):
+        values, errors = self._load_many([key], lambda keys: {keys[0]: loader(keys[0])})
+        if key in errors:
+            raise errors[key]
+        return values[key]
+
+    def _load_many(self, keys, batch_loader):
+        """
+        single-flight: 이미 다른 스레드가 가져오고 있는 key 는 그 결과를 기다리고,
+        나머지만 batch_loader(keys) 한 번으로 가져온다.
+        반환값은 (값 dict, 예외 dict)
+        """
+        own, waiting = {}, {}
+        with self._lock:
+            for key in keys:
+                future = self._inflight.get(key)
+                if future is None:
+                    future = Future()
+                    self._inflight[key] = future
+                    own[key] = future
+                else:
+                    self._stats["coalesced"] += 1
+                    waiting[key] = future
+
+        values, errors = {}, {}
+        if own:
+            started = time.perf_counter()
+            try:
+                loaded = batch_loader(list(own))
+            except Exception as exc:
+                self._incr("errors")
+                loaded = {}
+                for key in own:
+                    errors[key] = exc
+            finally:
+                elapsed = time.perf_counter() - started
+                with self._lock:
+                    self._stats["upstream_calls"] += 1
+                    self._stats["upstream_latency_total"] += elapsed
+                    if elapsed > self._stats["upstream_latency_max"]:
+                        self._stats["upstream_latency_max"] = elapsed
+
+            for key, future in own.items():
+                if key in loaded:
+                    self.set(key, loaded[key])
+                    values[key] = loaded[key]
+                    future.set_result(loaded[key])
+                else:
+                    errors.setdefault(key, LookupError(f"시세 없음: {key}"))
+                    future.set_exception(errors[key])
+            with self._lock:
+                for key in own:
+                    self._inflight.pop(key, None)
+
+        for key, future in waiting.items():
+            try:
+                values[key] = future.result()
+            except Exception as exc:
+                errors[key] = exc
+        return values, errors
+
+    def _refresh_in_background(self, key, loader):
+        with self._lock:
+            if key in self._inflight:
+                return
+        self._refresher.submit(self._refresh_quietly, key, loader)
+
+    def _refresh_quietly(self, key, loader):
+        try:
+            self._load(key, loader)
+        except Exception:
+            logger.warning("백그라운드 시세 갱신 실패: %s", key, exc_info=True)
+
+    def _refresh_many_quietly(self, keys, batch_loader):
+        with self._lock:
+            keys = [key for key in keys if key not in self._inflight]
+        if keys:
+            self._load_many(keys, batch_loader)
+
+    def _incr(self, name):
+        with self._lock:
+            self._stats[name] += 1
+
+    def _shared(self):
+        return caches[self.shared_alias] if self.shared_alias else None
+
+    def _get_shared(self, key):
+        shared = self._shared()
+        if shared is None:
+            return None
+        try:
+            payload = shared.get(_SHARED_KEY_PREFIX + key)
+        except Exception:
+            logger.warning("공유 시세 캐시 조회 실패", exc_info=True)
+            return None
+        if payload is None:
+            return None
+        value, fetched_wall = payload
+        # 다른 프로세스가 기록한 벽시계 시각을 이 프로세스의 monotonic 기준으로 옮긴다
+        entry = (value, time.monotonic() - max(time.time() - fetched_wall, 0))
+        with self._lock:
+            self._entries[key] = entry
+        return entry
+
+    def _set_shared(self, key, value):
+        shared = self._shared()
+        if shared is None:
+            return
+        try:
+            shared.set(_SHARED_KEY_PREFIX + key, (value, time.time()), timeout=self.stale_ttl)
+        except Exception:
+            logger.warning("공유 시세 캐시 기록 실패", exc_info=True)
+
+
+quote_cache = QuoteCache(
+    ttl=settings.QUOTE_CACHE_TTL,
+    stale_ttl=settings.QUOTE_CACHE_STALE_TTL,
+    shared_alias=settings.QUOTE_CACHE_ALIAS if settings.QUOTE_CACHE_SHARED else None,
+)
@@ -0,0 +1,92 @@
+# Back/simulator/services/quote_refresher.py
+"""
+보유/관심 종목 시세를 주기적으로 quote_cache 에 채워 넣는 백그라운드 갱신기
+
+- 대상: 보유 중인 Position 종목 + InterestStock 종목 (종목 마스터로 티커 변환)
+- 주기: 장중(평일 09:00~15:30 KST)에는 QUOTE_REFRESH_MARKET_INTERVAL,
+        장외에는 QUOTE_REFRESH_IDLE_INTERVAL
+- 웹 프로세스와 갱신기가 다른 프로세스라면 QUOTE_CACHE_SHARED 를 켜야 값이 공유된다
+"""
+import logging
+import threading
+import time as systime
+from datetime import time
+
+from django.conf import settings
+from django.utils import timezone
+
+from simulator.services.providers import get_provider
+from simulator.services.quote_cache import quote_cache
+from simulator.services.symbol_index import get_symbol_index
+
+logger = logging.getLogger(__name__)
+
+MARKET_OPEN  = time(9, 0)
+MARKET_CLOSE = time(15, 30)
+
+
+def is_market_open(now=None):
+    now = timezone.localtime(now)
+    return now.weekday() < 5 and MARKET_OPEN <= now.time() <= MARKET_CLOSE
+
+
+def next_interval(now=None):
+    if is_market_open(now):
+        return settings.QUOTE_REFRESH_MARKET_INTERVAL
+    return settings.QUOTE_REFRESH_IDLE_INTERVAL
+
+
+def held_tickers():
+    """
+    현재 갱신해야 할 티커 집합 (정렬된 list)
+    """
+    from insight.models import InterestStock
+    from simulator.models import Position
+
+    codes = set(Position.objects.filter(quantity__gt=0).values_list("stock_code", flat=True).distinct())
+    codes.update(InterestStock.objects.values_list("stock_code", flat=True).distinct())
+
+    index = get_symbol_index()
+    tickers = set()
+    for code in codes:
+        info = index.resolve(code)
+        if info is not None:
+            tickers.add(info.ticker)
+    return sorted(tickers)
+
+
+def refresh_quotes(tickers=None):
+    """
+    tickers(기본: held_tickers()) 시세를 QUOTE_REFRESH_BATCH_SIZE 개씩 묶어 가져와 캐시에 기록한다.
+    갱신한 티커 수를 반환한다.
+    """
+    tickers = held_tickers() if tickers is None else list(tickers)
+    provider = get_provider()
+    size = settings.QUOTE_REFRESH_BATCH_SIZE
+    refreshed = 0
+    for start in range(0, len(tickers), size):
+        chunk = tickers[start:start + size]
+        try:
+            prices = provider.get_prices(chunk)
+        except Exception:
+            logger.warning("시세 갱신 실패 (%d개)", len(chunk), exc_info=True)
+            continue
+        for ticker, price in prices.items():
+            quote_cache.set(ticker, price)
+        refreshed += len(prices)
+    return refreshed
+
+
+def run_forever(stop_event=None):
+    """
+    stop_event 가 설정될 때까지 장중/장외 주기에 맞춰 refresh_quotes 를 반복한다.
+    """
+    stop_event = stop_event or threading.Event()
+    while not stop_event.is_set():
+        started = systime.monotonic()
+        try:
+            count = refresh_quotes()
+            logger.info("시세 %d개 갱신 (%.2fs)", count, systime.monotonic() - started)
+        except Exception:
+            logger.exception("시세 갱신 루프 오류")
+        stop_event.wait(max(next_interval() - (systime.monotonic() - started), 0))
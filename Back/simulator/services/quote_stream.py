@@ -0,0 +1,108 @@
+# Back/simulator/services/quote_stream.py
+"""
+실시간 시세 팬아웃 허브 (ASGI 스트리밍용)
+
+구독자가 몇 명이든 허브 하나가 QUOTE_STREAM_INTERVAL 마다 "구독 중인 티커 전체"를
+quote_cache 에서 한 번에 조회하고, 값이 바뀐 티커만 해당 티커를 구독한 큐에 밀어 넣는다.
+삼성전자를 1,000명이 보고 있어도 업스트림 조회는 틱마다 한 번이다.
+"""
+import asyncio
+import logging
+import weakref
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+from simulator.services.providers import get_provider
+from simulator.services.quote_cache import quote_cache
+
+logger = logging.getLogger(__name__)
+
+
+class Subscription:
+    def __init__(self, hub, tickers, maxsize):
+        self.hub = hub
+        self.tickers = frozenset(tickers)
+        self.queue = asyncio.Queue(maxsize=maxsize)
+
+    def push(self, ticker, price):
+        # 느린 구독자 때문에 허브가 막히지 않도록 가득 차면 가장 오래된 값을 버린다
+        if self.queue.full():
+            try:
+                self.queue.get_nowait()
+            except asyncio.QueueEmpty:
+                pass
+        self.queue.put_nowait((ticker, price))
+
+    async def get(self, timeout):
+        return await asyncio.wait_for(self.queue.get(), timeout)
+
+    def close(self):
+        self.hub.unsubscribe(self)
+
+
+class QuoteHub:
+    def __init__(self, interval):
+        self.interval = interval
+        self._subscribers = {}      # ticker → set[Subscription]
+        self._last = {}             # ticker → 마지막으로 보낸 가격
+        self._task = None
+
+    def subscribe(self, tickers, maxsize=256):
+        sub = Subscription(self, tickers, maxsize)
+        for ticker in sub.tickers:
+            self._subscribers.setdefault(ticker, set()).add(sub)
+            if ticker in self._last:
+                sub.push(ticker, self._last[ticker])
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+        return sub
+
+    def unsubscribe(self, sub):
+        for ticker in sub.tickers:
+            subs = self._subscribers.get(ticker)
+            if subs is None:
+                continue
+            subs.discard(sub)
+            if not subs:
+                del self._subscribers[ticker]
+                self._last.pop(ticker, None)
+
+    def stats(self):
+        return {
+            "tickers": len(self._subscribers),
+            "subscriptions": len({sub for subs in self._subscribers.values() for sub in subs}),
+        }
+
+    async def _run(self):
+        while self._subscribers:
+            tickers = list(self._subscribers)
+            try:
+                prices = await sync_to_async(quote_cache.get_many, thread_sensitive=False)(
+                    tickers, lambda keys: get_provider().get_prices(keys)
+                )
+            except Exception:
+                logger.warning("스트림 시세 조회 실패", exc_info=True)
+                prices = {}
+            for ticker, price in prices.items():
+                if self._last.get(ticker) == price:
+                    continue
+                self._last[ticker] = price
+                for sub in list(self._subscribers.get(ticker, ())):
+                    sub.push(ticker, price)
+            await asyncio.sleep(self.interval)
+        self._task = None
+
+
+_hubs = weakref.WeakKeyDictionary()
+
+
+def get_quote_hub():
+    """
+    현재 이벤트 루프의 허브 (ASGI 서버 프로세스당 하나)
+    """
+    loop = asyncio.get_running_loop()
+    hub = _hubs.get(loop)
+    if hub is None:
+        hub = _hubs[loop] = QuoteHub(settings.QUOTE_STREAM_INTERVAL)
+    return hub
@@ -0,0 +1,146 @@
+# Back/simulator/services/risk.py
+"""
+포트폴리오 위험 지표
+
+보유 종목 + 벤치마크(KOSPI) 종가를 (종목 × 일) 행렬 하나로 맞춘 뒤 일간 수익률 행렬에서 한 번에 계산한다.
+    - 변동성       : 일간 수익률 표준편차 × √252
+    - VaR / CVaR   : 모수적(정규분포) / 역사적(분위수), 1일 기준 손실률과 금액
+    - 베타         : cov(포트폴리오, 벤치마크) / var(벤치마크)
+    - 상관행렬     : 보유 종목 간
+    - 최대 낙폭    : 현재 비중을 기간 내내 유지했다고 가정한 누적 수익 곡선 기준
+결과는 (포트폴리오 보유 상태, 날짜, 조건) 키로 캐시한다.
+"""
+import hashlib
+import time
+from datetime import timedelta
+from statistics import NormalDist
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from simulator.services.nav_snapshots import sessions
+from simulator.services.price_service import fetch_close_matrix
+
+TRADING_DAYS = 252
+WINDOWS = {"3m": 91, "6m": 182, "1y": 365, "3y": 1095, "5y": 1826}
+
+
+def portfolio_risk(portfolio, window="1y", confidence=0.95):
+    """
+    현재 보유 종목 기준 위험 지표 dict. 보유 종목이 없거나 가격 이력이 부족하거나 평가액이 0 이면 None 값이 들어간다.
+    """
+    holdings = sorted(portfolio.positions.filter(quantity__gt=0).values_list("stock_code", "quantity"))
+    today = timezone.localdate()
+    state = hashlib.sha256(repr(holdings).encode()).hexdigest()[:16]
+    key = f"risk:{portfolio.pk}:{state}:{today.isoformat()}:{window}:{confidence}"
+    cached = cache.get(key)
+    if cached is not None:
+        return cached
+
+    days = sessions(today - timedelta(days=WINDOWS[window]), today)
+    codes = [code for code, _ in holdings]
+    benchmark = settings.RISK_BENCHMARK_SYMBOL
+    prices = fetch_close_matrix(
+        codes + [benchmark], days, tickers={benchmark: settings.RISK_BENCHMARK_TICKER},
+    )
+    quantities = np.array([quantity for _, quantity in holdings], dtype=np.float64)
+
+    started = time.perf_counter()
+    result = compute_risk(prices[:-1], quantities, prices[-1], confidence)
+    result["compute_ms"] = round((time.perf_counter() - started) * 1000, 3)
+    result["codes"] = codes
+    result["window"] = window
+    result["as_of"] = today
+    cache.set(key, result, settings.RISK_CACHE_TTL)
+    return result
+
+
+def compute_risk(prices, quantities, benchmark, confidence=0.95):
+    """
+    prices: (종목 × 일) 종가, quantities: 종목별 보유 수량, benchmark: 벤치마크 종가 (일)
+    값이 빠진 날은 직전 값으로 채우고, 어느 한 종목이라도 값이 없는 앞부분 날짜는 버린다.
+    """
+    empty = {
+        "observations": 0, "market_value": 0, "weights": [],
+        "volatility": None, "var": None, "cvar": None, "beta": None,
+        "correlation": [], "max_drawdown": None, "confidence": confidence,
+    }
+    if len(quantities) == 0:
+        return empty
+
+    matrix = _ffill(np.vstack([prices, benchmark[None, :]]))
+    valid = ~np.isnan(matrix[:-1]).any(axis=0)
+    matrix = matrix[:, valid]
+    if matrix.shape[1] < 3:
+        return empty
+
+    last = matrix[:-1, -1]
+    values = quantities * last
+    market_value = float(values.sum())
+    if market_value <= 0:
+        # 마지막 종가가 모두 0 (거래 정지/상장 폐지 등) 이면 비중을 정할 수 없다
+        return empty
+    weights = values / market_value
+
+    returns = matrix[:, 1:] / matrix[:, :-1] - 1.0        # (종목+1) × (일-1)
+    asset_returns, bench_returns = returns[:-1], returns[-1]
+    port = weights @ asset_returns
+
+    mu, sigma = float(port.mean()), float(port.std(ddof=1))
+    z = NormalDist().inv_cdf(1 - confidence)
+    tail = 1 - confidence
+    parametric_var = -(mu + z * sigma)
+    parametric_cvar = -(mu - sigma * NormalDist().pdf(z) / tail)
+    cutoff = np.quantile(port, tail)
+    historical_var = -float(cutoff)
+    historical_cvar = -float(port[port <= cutoff].mean())
+
+    beta = None
+    if not np.isnan(bench_returns).any():
+        bench_var = float(bench_returns.var(ddof=1))
+        if bench_var > 0:
+            beta = float(np.cov(port, bench_returns)[0, 1] / bench_var)
+
+    curve = np.cumprod(1.0 + port)
+    drawdown = curve / np.maximum.accumulate(curve) - 1.0
+
+    correlation = np.corrcoef(asset_returns) if len(weights) > 1 else np.ones((1, 1))
+    return {
+        "observations": int(port.size),
+        "market_value": round(market_value),
+        "weights": np.round(weights, 6).tolist(),
+        "volatility": {
+            "daily": sigma,
+            "annualized": sigma * float(np.sqrt(TRADING_DAYS)),
+        },
+        "var": {
+            "parametric": parametric_var,
+            "historical": historical_var,
+            "parametric_amount": round(parametric_var * market_value),
+            "historical_amount": round(historical_var * market_value),
+        },
+        "cvar": {
+            "parametric": parametric_cvar,
+            "historical": historical_cvar,
+            "parametric_amount": round(parametric_cvar * market_value),
+            "historical_amount": round(historical_cvar * market_value),
+        },
+        "beta": beta,
+        "correlation": np.round(np.nan_to_num(correlation), 4).tolist(),
+        "max_drawdown": float(drawdown.min()),
+        "confidence": confidence,
+    }
+
+
+def _ffill(matrix):
+    """
+    행마다 nan 을 직전 값으로 채운다 (앞부분 nan 은 그대로)
+    """
+    mask = np.isnan(matrix)
+    idx = np.where(~mask, np.arange(matrix.shape[1]), 0)
+    np.maximum.accumulate(idx, axis=1, out=idx)
+    filled = matrix[np.arange(matrix.shape[0])[:, None], idx]
+    filled[mask & (np.cumsum(~mask, axis=1) == 0)] = np.nan
+    return filled
@@ -0,0 +1,146 @@
+# Back/simulator/services/symbol_index.py
+"""
+종목 마스터(Symbol) 메모리 인덱스
+
+- resolve(): 종목명/별칭/단축코드/야후 티커 → SymbolInfo (정확히 일치)
+- autocomplete(): 접두어 검색 (트라이)
+
+인덱스는 프로세스마다 한 번 만들고, 같은 프로세스에서 Symbol 이 바뀌면 시그널로 무효화한다.
+다른 프로세스에서 바뀐 경우를 위해 SYMBOL_INDEX_RECHECK 초마다 (행 수, 최종 수정 시각)을 확인해 다시 만든다.
+"""
+import threading
+import time
+from collections import namedtuple
+
+from django.conf import settings
+from django.db.models import Count, Max
+
+SymbolInfo = namedtuple("SymbolInfo", ["code", "name", "market", "ticker"])
+
+
+class UnknownSymbolError(LookupError):
+    """종목 마스터에 없는 종목명/코드"""
+
+
+def normalize(text):
+    return "".join(str(text).split()).lower()
+
+
+class _TrieNode:
+    __slots__ = ("children", "codes")
+
+    def __init__(self):
+        self.children = {}
+        self.codes = []
+
+
+class SymbolIndex:
+    def __init__(self, symbols):
+        self._by_code = {}
+        self._exact = {}
+        self._root = _TrieNode()
+        for info, aliases in symbols:
+            self._add(info, aliases)
+
+    def __len__(self):
+        return len(self._by_code)
+
+    def resolve(self, query):
+        """
+        종목명/별칭/코드/티커와 정확히 일치하는 종목. 없으면 None
+        """
+        if not query:
+            return None
+        return self._exact.get(normalize(query))
+
+    def autocomplete(self, prefix, limit=10):
+        """
+        prefix 로 시작하는 종목 최대 limit 개 (이름이 짧은 것 → 가나다 순)
+        """
+        node = self._root
+        for ch in normalize(prefix):
+            node = node.children.get(ch)
+            if node is None:
+                return []
+
+        # 짧은 키가 먼저 나오도록 너비 우선으로 훑는다
+        found, level = {}, [node]
+        while level and len(found) < limit:
+            for current in level:
+                for code in current.codes:
+                    found.setdefault(code, None)
+            level = [child for current in level for _, child in sorted(current.children.items())]
+        return [self._by_code[code] for code in list(found)[:limit]]
+
+    def names(self):
+        return sorted(info.name for info in self._by_code.values())
+
+    # ─────────────────────────────────────────────
+    def _add(self, info, aliases):
+        self._by_code[info.code] = info
+        for key in {info.code, info.ticker, info.name, *aliases}:
+            key = normalize(key)
+            if not key:
+                continue
+            self._exact.setdefault(key, info)
+            node = self._root
+            for ch in key:
+                node = node.children.setdefault(ch, _TrieNode())
+            node.codes.append(info.code)
+
+
+# ─────────────────────────────────────────────
+# 프로세스 공용 인덱스
+# ─────────────────────────────────────────────
+_lock = threading.Lock()
+_index = None
+_signature = None
+_checked_at = 0.0
+
+
+def _current_signature():
+    from simulator.models import Symbol
+
+    row = Symbol.objects.filter(is_active=True).aggregate(n=Count("id"), last=Max("updated_at"))
+    return row["n"], row["last"]
+
+
+def _build():
+    from simulator.models import Symbol
+
+    rows = Symbol.objects.filter(is_active=True).values_list(
+        "code", "name", "market", "yahoo_ticker", "aliases"
+    )
+    return SymbolIndex(
+        (SymbolInfo(code, name, market, ticker), aliases or [])
+        for code, name, market, ticker, aliases in rows
+    )
+
+
+def get_symbol_index():
+    global _index, _signature, _checked_at
+    with _lock:
+        now = time.monotonic()
+        if _index is None or now - _checked_at >= settings.SYMBOL_INDEX_RECHECK:
+            signature = _current_signature()
+            if _index is None or signature != _signature:
+                _index = _build()
+                _signature = signature
+            _checked_at = now
+        return _index
+
+
+def invalidate_symbol_index():
+    global _index
+    with _lock:
+        _index = None
+
+
+def resolve_symbol(query):
+    """
+    종목명 또는 코드 → SymbolInfo. 없으면 UnknownSymbolError
+    """
+    info = get_symbol_index().resolve(query)
+    if info is None:
+        raise UnknownSymbolError(f"등록되지 않은 종목입니다: {query}")
+    return info
@@ -0,0 +1,101 @@
+# Back/simulator/services/trade_history.py
+"""
+거래 내역 조회 (keyset 페이지네이션)
+
+정렬은 항상 (traded_at DESC, id DESC) 이고, 커서는 마지막 행의 (traded_at, id) 이다.
+다음 페이지는 "커서보다 앞선 행" 조건으로 인덱스(portfolio, traded_at, id)를 그대로 타므로
+OFFSET 과 달리 몇 번째 페이지든 비용이 같다.
+"""
+import base64
+from datetime import date, datetime, time, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+
+from simulator.models import VirtualTrade
+from simulator.services.symbol_index import get_symbol_index
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+
+class InvalidCursorError(ValueError):
+    """커서 문자열을 해석할 수 없는 경우"""
+
+
+def encode_cursor(trade):
+    micros = (trade.traded_at - _EPOCH) // timedelta(microseconds=1)
+    return base64.urlsafe_b64encode(f"{micros}:{trade.id}".encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        micros, trade_id = raw.split(":")
+        return _EPOCH + timedelta(microseconds=int(micros)), int(trade_id)
+    except (ValueError, UnicodeDecodeError) as exc:
+        raise InvalidCursorError("잘못된 커서입니다") from exc
+
+
+def filter_trades(portfolio, symbol=None, side=None, start=None, end=None):
+    """
+    symbol: 종목 코드 또는 종목명, side: buy/sell, start/end: date (현지 날짜 기준, 양끝 포함)
+    """
+    qs = VirtualTrade.objects.filter(portfolio=portfolio)
+    if symbol:
+        info = get_symbol_index().resolve(symbol)
+        qs = qs.filter(stock_code=info.code if info else symbol)
+    if side:
+        qs = qs.filter(trade_type=side)
+    # 날짜는 __date 대신 시각 범위로 걸어야 인덱스를 탄다
+    if start:
+        qs = qs.filter(traded_at__gte=timezone.make_aware(datetime.combine(start, time.min)))
+    if end:
+        qs = qs.filter(traded_at__lt=timezone.make_aware(datetime.combine(end + timedelta(days=1), time.min)))
+    return qs
+
+
+def page_trades(qs, cursor=None, limit=None):
+    """
+    최신순으로 limit 개. 반환값은 (거래 목록, 다음 커서 또는 None)
+    """
+    limit = min(limit or settings.TRADE_HISTORY_PAGE_SIZE, settings.TRADE_HISTORY_MAX_PAGE_SIZE)
+    if cursor:
+        traded_at, trade_id = decode_cursor(cursor)
+        qs = qs.filter(Q(traded_at__lt=traded_at) | Q(traded_at=traded_at, id__lt=trade_id))
+    rows = list(qs.order_by("-traded_at", "-id")[:limit + 1])
+    if len(rows) > limit:
+        return rows[:limit], encode_cursor(rows[limit - 1])
+    return rows, None
+
+
+def parse_filters(params):
+    """
+    쿼리 파라미터(symbol, side, start, end)를 filter_trades 인자로 바꾼다. 형식이 잘못되면 ValueError
+    """
+    side = params.get("side") or None
+    if side not in (None, VirtualTrade.BUY, VirtualTrade.SELL):
+        raise ValueError(f"side 는 buy 또는 sell 이어야 합니다: {side}")
+    return {
+        "symbol": params.get("symbol") or None,
+        "side": side,
+        "start": date.fromisoformat(params["start"]) if params.get("start") else None,
+        "end": date.fromisoformat(params["end"]) if params.get("end") else None,
+    }
+
+
+def history_page(portfolio, params):
+    """
+    쿼리 파라미터(symbol, side, start, end, cursor, limit)로 한 페이지를 조회한다.
+    형식이 잘못되면 ValueError (InvalidCursorError 포함)
+    """
+    qs = filter_trades(portfolio, **parse_filters(params))
+    limit = int(params["limit"]) if params.get("limit") else None
+    return page_trades(qs, cursor=params.get("cursor") or None, limit=limit)
+
+
+def recent_trades(portfolio, limit=None):
+    return list(
+        VirtualTrade.objects.filter(portfolio=portfolio)
+        .order_by("-traded_at", "-id")[:limit or settings.PORTFOLIO_RECENT_TRADES]
+    )
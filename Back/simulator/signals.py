@@ -0,0 +1,13 @@
+# Back/simulator/signals.py
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from simulator.models import Symbol
+from simulator.services.symbol_index import invalidate_symbol_index
+
+
+# 종목 마스터가 바뀌면 메모리 인덱스를 다시 만든다
+@receiver(post_save, sender=Symbol)
+@receiver(post_delete, sender=Symbol)
+def symbol_changed(sender, **kwargs):
+    invalidate_symbol_index()
@@ -0,0 +1,35 @@
+# Back/simulator/tasks.py
+import logging
+
+from celery import shared_task
+from django.core.cache import cache
+
+from simulator.services.nav_snapshots import take_snapshots
+from simulator.services.quote_refresher import next_interval, refresh_quotes
+
+logger = logging.getLogger(__name__)
+
+_REFRESH_LOCK_KEY = "simulator:quote-refresh"
+
+
+@shared_task(ignore_result=True)
+def refresh_held_quotes():
+    """
+    beat 는 장중 주기로 이 작업을 호출한다. 장외에는 더 긴 간격이 지나기 전까지 건너뛴다.
+    """
+    # 지금이 장중인지에 따른 간격 동안 한 번만 실행되도록 잠금
+    if not cache.add(_REFRESH_LOCK_KEY, 1, timeout=max(next_interval() - 1, 1)):
+        return 0
+    count = refresh_quotes()
+    logger.info("Refreshed %d quotes", count)
+    return count
+
+
+@shared_task(ignore_result=True)
+def take_nav_snapshots():
+    """
+    장 마감 뒤 하루 한 번. 빠진 날짜만 채우므로 여러 번 실행되어도 괜찮다.
+    """
+    count = take_snapshots()
+    logger.info("Took %d NAV snapshots", count)
+    return count
@@ -1,4 +1,1177 @@
 # Back/simulator/tests.py
-from django.test import TestCase
+import codecs
+import csv
+import io
+import os
+import tempfile
+import threading
+import time
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from importlib import import_module
+from pathlib import Path
+from unittest import mock
 
-# Create your tests here.
+import numpy as np
+from django.apps import apps as django_apps
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.core.management import call_command
+from django.db import connections
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from simulator.api.views import _stream_user
+from simulator.models import Order, PortfolioSnapshot, Position, PriceBarChunk, Symbol, VirtualPortfolio, VirtualTrade
+from simulator.services import leaderboard, nav_snapshots
+from simulator.services.bar_store import (
+    bar_matrix,
+    bars_to_arrays,
+    data_versions,
+    decode_chunk,
+    encode_chunk,
+    ingest_bars,
+    load_bars,
+    load_bars_many,
+)
+from simulator.services.execution import (
+    InsufficientCashError,
+    InvalidTradeError,
+    execute_basket,
+    execute_trade,
+)
+from simulator.services.export import TRADE_COLUMNS, stream_csv, stream_parquet
+from simulator.services.leaderboard import get_leaderboard
+from simulator.services.lots import Lot, Realization, compute_lots, period_totals, realized_total
+from simulator.services.matching_engine import BUY, LIMIT, SELL, STOP, BookOrder, MatchingEngine
+from simulator.services.nav_snapshots import equity_curve, take_snapshots
+from simulator.services.order_service import EngineRunner, cancel_order, place_order
+from simulator.services.positions import (
+    InsufficientQuantityError,
+    TradeRejected,
+    apply_trade,
+    apply_trades,
+    held_quantity,
+    rebuild_positions,
+)
+from simulator.services.price_service import Quote, fetch_current_price, fetch_quotes
+from simulator.services.providers.base import Bar, PriceProvider
+from simulator.services.providers.replay import ReplayProvider
+from simulator.services.quote_cache import QuoteCache, quote_cache
+from simulator.services.risk import compute_risk
+from simulator.services.symbol_index import (
+    SymbolIndex,
+    SymbolInfo,
+    UnknownSymbolError,
+    get_symbol_index,
+    invalidate_symbol_index,
+    resolve_symbol,
+)
+from simulator.services.trade_history import (
+    InvalidCursorError,
+    decode_cursor,
+    encode_cursor,
+    filter_trades,
+    page_trades,
+)
+
+CODE, NAME = "005930", "삼성전자"
+
+
+def make_portfolio(username="trader", cash=1_000_000):
+    user = get_user_model().objects.create(username=username, email=f"{username}@example.com")
+    return VirtualPortfolio.objects.create(user=user, cash_balance=cash)
+
+
+# ─────────────────────────────────────────────
+# 매매 체결 (simulator.services.execution)
+# ─────────────────────────────────────────────
+class ExecuteTradeTests(TestCase):
+    def setUp(self):
+        self.portfolio = make_portfolio()
+
+    def position(self):
+        return Position.objects.get(portfolio=self.portfolio, stock_code=CODE)
+
+    def test_buy_without_enough_cash_is_rejected(self):
+        with self.assertRaises(InsufficientCashError):
+            execute_trade(self.portfolio, VirtualTrade.BUY, CODE, NAME, 10_000, 101)
+
+        self.portfolio.refresh_from_db()
+        self.assertEqual(self.portfolio.cash_balance, 1_000_000)
+        self.assertFalse(Position.objects.filter(portfolio=self.portfolio).exists())
+        self.assertFalse(VirtualTrade.objects.filter(portfolio=self.portfolio).exists())
+
+    def test_oversell_is_rejected_and_rolls_back_cash(self):
+        execute_trade(self.portfolio, VirtualTrade.BUY, CODE, NAME, 10_000, 5)
+
+        with self.assertRaises(InsufficientQuantityError):
+            execute_trade(self.portfolio, VirtualTrade.SELL, CODE, NAME, 12_000, 6)
+
+        self.portfolio.refresh_from_db()
+        self.assertEqual(self.portfolio.cash_balance, 950_000)
+        self.assertEqual(self.position().quantity, 5)
+        self.assertEqual(VirtualTrade.objects.filter(portfolio=self.portfolio).count(), 1)
+
+    def test_sell_without_position_is_rejected(self):
+        with self.assertRaises(InsufficientQuantityError):
+            execute_trade(self.portfolio, VirtualTrade.SELL, CODE, NAME, 10_000, 1)
+        self.portfolio.refresh_from_db()
+        self.assertEqual(self.portfolio.cash_balance, 1_000_000)
+
+    def test_partial_sell_keeps_cash_and_position_consistent(self):
+        execute_trade(self.portfolio, VirtualTrade.BUY, CODE, NAME, 10_000, 4)
+        execute_trade(self.portfolio, VirtualTrade.BUY, CODE, NAME, 13_000, 6)
+        execute_trade(self.portfolio, VirtualTrade.SELL, CODE, NAME, 15_000, 3)
+
+        self.portfolio.refresh_from_db()
+        position = self.position()
+        self.assertEqual(self.portfolio.cash_balance, 1_000_000 - 40_000 - 78_000 + 45_000)
+        self.assertEqual(position.quantity, 7)
+        # 평균단가 11,800원 × 3주가 원가에서 빠지고, 차익이 실현손익으로
+        self.assertEqual(position.cost_basis, 118_000 - 35_400)
+        self.assertEqual(position.realized_pnl, 45_000 - 35_400)
+
+    def test_invalid_quantity_or_price_is_rejected_before_touching_cash(self):
+        for price, quantity in ((10_000, 0), (10_000, -5), (0, 1), (10_000, 1.5), (10_000, True)):
+            with self.subTest(price=price, quantity=quantity):
+                with self.assertRaises(InvalidTradeError):
+                    execute_trade(self.portfolio, VirtualTrade.BUY, CODE, NAME, price, quantity)
+        self.portfolio.refresh_from_db()
+        self.assertEqual(self.portfolio.cash_balance, 1_000_000)
+        self.assertFalse(VirtualTrade.objects.exists())
+
+    def test_basket_is_all_or_nothing(self):
+        execute_trade(self.portfolio, VirtualTrade.BUY, CODE, NAME, 10_000, 2)
+        legs = [
+            {"trade_type": VirtualTrade.BUY, "stock_code": "000660", "stock_name": "SK하이닉스",
+             "price": 100_000, "quantity": 1},
+            {"trade_type": VirtualTrade.SELL, "stock_code": CODE, "stock_name": NAME,
+             "price": 10_000, "quantity": 3},
+        ]
+        with self.assertRaises(InsufficientQuantityError):
+            execute_basket(self.portfolio, legs)
+
+        self.portfolio.refresh_from_db()
+        self.assertEqual(self.portfolio.cash_balance, 980_000)
+        self.assertFalse(Position.objects.filter(stock_code="000660").exists())
+
+        legs[1]["quantity"] = 2
+        cash, trades = execute_basket(self.portfolio, legs)
+        self.assertEqual(cash, 980_000 - 100_000 + 20_000)
+        self.assertEqual(len(trades), 2)
+        self.assertEqual(self.position().quantity, 0)
+
+
+class BatchTradeAPITests(TestCase):
+    url = "/api/v1/simulator/trade/batch/"
+
+    def setUp(self):
+        self.portfolio = make_portfolio()
+        self.client = APIClient(SERVER_NAME="localhost")
+        self.client.force_authenticate(self.portfolio.user)
+
+    def leg(self, trade_type=VirtualTrade.BUY, price=10_000, quantity=1):
+        return {"trade_type": trade_type, "stock_code": CODE, "stock_name": NAME, "price": price, "quantity": quantity}
+
+    def assertNothingTraded(self):
+        self.portfolio.refresh_from_db()
+        self.assertEqual(self.portfolio.cash_balance, 1_000_000)
+        self.assertFalse(VirtualTrade.objects.exists())
+
+    def test_basket_fills(self):
+        response = self.client.post(self.url, {"orders": [self.leg(quantity=2), self.leg(VirtualTrade.SELL)]}, format="json")
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data["cash_balance"], 990_000)
+        self.assertEqual(len(response.data["trade_ids"]), 2)
+
+    @override_settings(TRADE_BATCH_MAX_ORDERS=2)
+    def test_order_cap(self):
+        response = self.client.post(self.url, {"orders": [self.leg()] * 3}, format="json")
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("최대 2건", str(response.data["orders"]))
+        self.assertNothingTraded()
+
+    def test_invalid_legs_are_reported_per_leg(self):
+        orders = [self.leg(), self.leg(quantity=0), {**self.leg(), "trade_type": "hold"}]
+
+        response = self.client.post(self.url, {"orders": orders}, format="json")
+
+        self.assertEqual(response.status_code, 400)
+        errors = response.data["orders"]
+        self.assertEqual(errors[0], {})
+        self.assertIn("quantity", errors[1])
+        self.assertIn("trade_type", errors[2])
+        self.assertNothingTraded()
+
+    def test_rejected_leg_rolls_back_the_basket(self):
+        response = self.client.post(self.url, {"orders": [self.leg(), self.leg(VirtualTrade.SELL, quantity=5)]}, format="json")
+
+        self.assertEqual(response.status_code, 400)
+        self.assertNothingTraded()
+
+    def test_empty_basket_is_rejected(self):
+        self.assertEqual(self.client.post(self.url, {"orders": []}, format="json").status_code, 400)
+
+
+class ConcurrentSellTests(TransactionTestCase):
+    def test_concurrent_sells_cannot_go_below_zero(self):
+        portfolio = make_portfolio()
+        execute_trade(portfolio, VirtualTrade.BUY, CODE, NAME, 10_000, 5)
+
+        outcomes = []
+        barrier = threading.Barrier(2)
+
+        def sell():
+            barrier.wait()
+            try:
+                execute_trade(portfolio, VirtualTrade.SELL, CODE, NAME, 10_000, 3)
+                outcomes.append("filled")
+            except TradeRejected:
+                outcomes.append("rejected")
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=sell) for _ in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(sorted(outcomes), ["filled", "rejected"])
+        portfolio.refresh_from_db()
+        self.assertEqual(Position.objects.get(portfolio=portfolio, stock_code=CODE).quantity, 2)
+        self.assertEqual(portfolio.cash_balance, 1_000_000 - 50_000 + 30_000)
+        self.assertEqual(VirtualTrade.objects.filter(trade_type=VirtualTrade.SELL).count(), 1)
+
+
+# ─────────────────────────────────────────────
+# 포지션 (simulator.services.positions)
+# ─────────────────────────────────────────────
+class PositionTests(TestCase):
+    def setUp(self):
+        self.portfolio = make_portfolio()
+
+    def test_apply_trade_uses_average_cost(self):
+        apply_trade(self.portfolio, VirtualTrade.BUY, CODE, NAME, 1_000, 10)
+        apply_trade(self.portfolio, VirtualTrade.BUY, CODE, NAME, 2_500, 10)
+        position = apply_trade(self.portfolio, VirtualTrade.SELL, CODE, NAME, 3_000, 5)
+
+        self.assertEqual(position.quantity, 15)
+        self.assertEqual(position.avg_price, 1_750)
+        self.assertEqual(position.cost_basis, 26_250)
+        self.assertEqual(position.realized_pnl, 5 * (3_000 - 1_750))
+
+    def test_selling_everything_keeps_realized_pnl(self):
+        apply_trade(self.portfolio, VirtualTrade.BUY, CODE, NAME, 1_000, 3)
+        position = apply_trade(self.portfolio, VirtualTrade.SELL, CODE, NAME, 900, 3)
+
+        self.assertEqual((position.quantity, position.cost_basis, position.avg_price), (0, 0, 0))
+        self.assertEqual(position.realized_pnl, -300)
+        self.assertEqual(held_quantity(self.portfolio, CODE), 0)
+
+    def test_apply_trades_matches_apply_trade(self):
+        trades = [
+            (VirtualTrade.BUY, CODE, NAME, 1_000, 7),
+            (VirtualTrade.BUY, "000660", "SK하이닉스", 5_000, 2),
+            (VirtualTrade.SELL, CODE, NAME, 1_300, 4),
+            (VirtualTrade.BUY, CODE, NAME, 1_100, 1),
+        ]
+        other = make_portfolio("other")
+        for trade in trades:
+            apply_trade(other, *trade)
+        apply_trades(self.portfolio, trades)
+
+        def state(portfolio):
+            return sorted(Position.objects.filter(portfolio=portfolio).values_list(
+                "stock_code", "quantity", "cost_basis", "realized_pnl"))
+
+        self.assertEqual(state(self.portfolio), state(other))
+
+    def test_apply_trades_saves_nothing_when_a_leg_oversells(self):
+        apply_trade(self.portfolio, VirtualTrade.BUY, CODE, NAME, 1_000, 2)
+        with self.assertRaises(InsufficientQuantityError):
+            apply_trades(self.portfolio, [
+                (VirtualTrade.BUY, "000660", "SK하이닉스", 5_000, 1),
+                (VirtualTrade.SELL, CODE, NAME, 1_000, 3),
+            ])
+        self.assertEqual(held_quantity(self.portfolio, CODE), 2)
+        self.assertFalse(Position.objects.filter(stock_code="000660").exists())
+
+    def test_rebuild_positions_replays_trade_log(self):
+        execute_trade(self.portfolio, VirtualTrade.BUY, CODE, NAME, 1_000, 10)
+        execute_trade(self.portfolio, VirtualTrade.SELL, CODE, NAME, 1_500, 4)
+        expected = Position.objects.values_list("quantity", "cost_basis", "realized_pnl").get()
+
+        Position.objects.all().delete()
+        # 예전 방식으로 매수 행이 지워져 보유분보다 많이 판 기록은 보유분까지만 반영
+        VirtualTrade.objects.create(portfolio=self.portfolio, trade_type=VirtualTrade.SELL,
+                                    stock_code="000660", stock_name="SK하이닉스", price=5_000, quantity=1)
+        rebuild_positions(self.portfolio)
+
+        self.assertEqual(Position.objects.values_list("quantity", "cost_basis", "realized_pnl").get(stock_code=CODE),
+                         expected)
+        self.assertEqual(held_quantity(self.portfolio, "000660"), 0)
+
+    def test_backfill_migration_fills_only_portfolios_without_positions(self):
+        execute_trade(self.portfolio, VirtualTrade.BUY, CODE, NAME, 1_000, 10)
+        execute_trade(self.portfolio, VirtualTrade.SELL, CODE, NAME, 1_500, 4)
+        expected = Position.objects.values_list("quantity", "cost_basis", "realized_pnl").get()
+        Position.objects.all().delete()
+        # Position 이 이미 있는 포트폴리오는 건드리지 않는다
+        other = make_portfolio("other")
+        execute_trade(other, VirtualTrade.BUY, CODE, NAME, 2_000, 3)
+        Position.objects.filter(portfolio=other).update(quantity=7)
+
+        import_module("simulator.migrations.0010_backfill_positions").backfill(django_apps, None)
+
+        self.assertEqual(Position.objects.values_list("quantity", "cost_basis", "realized_pnl")
+                         .get(portfolio=self.portfolio), expected)
+        self.assertEqual(held_quantity(other, CODE), 7)
+
+
+# ─────────────────────────────────────────────
+# 매칭 엔진 (simulator.services.matching_engine / order_service)
+# ─────────────────────────────────────────────
+class MatchingEngineTests(SimpleTestCase):
+    def setUp(self):
+        self.engine = MatchingEngine()
+
+    def submit(self, id, side, order_type, quantity=1, limit_price=None, stop_price=None):
+        self.engine.submit(BookOrder(id, CODE, side, order_type, quantity,
+                                     limit_price=limit_price, stop_price=stop_price))
+
+    def test_limit_orders_fill_by_price_then_time(self):
+        self.submit(1, BUY, LIMIT, limit_price=100)
+        self.submit(2, BUY, LIMIT, limit_price=105)
+        self.submit(3, BUY, LIMIT, limit_price=105)
+        self.submit(4, SELL, LIMIT, limit_price=110)
+
+        self.assertEqual(self.engine.on_quote(CODE, 106), [])
+        fills = self.engine.on_quote(CODE, 104)
+        self.assertEqual([fill.order_id for fill in fills], [2, 3])
+        self.assertTrue(all(fill.price == 104 for fill in fills))
+        self.assertEqual([fill.order_id for fill in self.engine.on_quote(CODE, 111)], [4])
+        self.assertEqual(len(self.engine), 1)
+
+    def test_stop_orders_trigger_through_the_stop_price(self):
+        self.submit(1, SELL, STOP, stop_price=95)
+        self.submit(2, BUY, STOP, stop_price=120)
+
+        self.assertEqual(self.engine.on_quote(CODE, 100), [])
+        self.assertEqual([fill.order_id for fill in self.engine.on_quote(CODE, 95)], [1])
+        self.assertEqual([fill.order_id for fill in self.engine.on_quote(CODE, 121)], [2])
+
+    def test_cancelled_orders_never_fill(self):
+        self.submit(1, BUY, LIMIT, limit_price=100)
+        self.submit(2, BUY, LIMIT, limit_price=100)
+        self.assertEqual(self.engine.cancel(1).id, 1)
+        self.assertIsNone(self.engine.cancel(1))
+
+        self.assertEqual([fill.order_id for fill in self.engine.on_quote(CODE, 99)], [2])
+        self.assertEqual(self.engine.symbols(), [])
+
+    def test_duplicate_submit_is_ignored(self):
+        self.submit(1, BUY, LIMIT, limit_price=100)
+        self.submit(1, BUY, LIMIT, limit_price=100)
+        self.assertEqual(len(self.engine.on_quote(CODE, 90)), 1)
+
+
+class EngineRunnerTests(TestCase):
+    def setUp(self):
+        self.portfolio = make_portfolio(cash=100_000)
+        self.runner = EngineRunner()
+
+    def order(self, side, quantity, **prices):
+        return place_order(self.portfolio, side, Order.LIMIT, CODE, NAME, quantity, **prices)
+
+    def test_fills_are_saved_and_orders_closed(self):
+        order = self.order(VirtualTrade.BUY, 5, limit_price=10_000)
+        self.runner.sync()
+
+        self.assertEqual(self.runner.on_quotes({CODE: 10_500}), 0)
+        self.assertEqual(self.runner.on_quotes({CODE: 9_000}), 1)
+
+        order.refresh_from_db()
+        self.portfolio.refresh_from_db()
+        self.assertEqual(order.status, Order.FILLED)
+        self.assertEqual(order.fills.get().price, 9_000)
+        self.assertEqual(self.portfolio.cash_balance, 100_000 - 45_000)
+        self.assertEqual(held_quantity(self.portfolio, CODE), 5)
+
+    def test_unaffordable_fill_rejects_the_order(self):
+        order = self.order(VirtualTrade.BUY, 20, limit_price=10_000)
+        self.runner.sync()
+
+        self.assertEqual(self.runner.on_quotes({CODE: 9_000}), 0)
+        order.refresh_from_db()
+        self.assertEqual((order.status, order.reason), (Order.REJECTED, "잔액 부족"))
+        self.assertFalse(VirtualTrade.objects.exists())
+
+    def test_failed_fill_rejects_the_order(self):
+        order = self.order(VirtualTrade.BUY, 1, limit_price=10_000)
+        self.runner.sync()
+
+        with mock.patch("simulator.services.order_service.execute_trade", side_effect=RuntimeError), \
+                self.assertLogs("simulator.services.order_service", "ERROR"):
+            self.assertEqual(self.runner.on_quotes({CODE: 9_000}), 0)
+
+        order.refresh_from_db()
+        self.assertEqual((order.status, order.reason), (Order.REJECTED, "체결 저장 실패"))
+
+    def test_failed_fill_is_resubmitted_when_it_cannot_be_rejected(self):
+        order = self.order(VirtualTrade.BUY, 1, limit_price=10_000)
+        self.runner.sync()
+
+        with mock.patch("simulator.services.order_service.execute_trade", side_effect=RuntimeError), \
+                mock.patch("simulator.services.order_service._reject", side_effect=RuntimeError), \
+                self.assertLogs("simulator.services.order_service", "ERROR"):
+            self.runner.on_quotes({CODE: 9_000})
+        self.assertEqual(len(self.runner.engine), 0)
+
+        self.runner.sync()
+        self.assertEqual(self.runner.on_quotes({CODE: 9_000}), 1)
+        order.refresh_from_db()
+        self.assertEqual(order.status, Order.FILLED)
+
+    def test_sync_drops_cancelled_orders(self):
+        order = self.order(VirtualTrade.BUY, 1, limit_price=10_000)
+        self.runner.sync()
+        self.assertTrue(cancel_order(order))
+        self.runner.sync()
+
+        self.assertEqual(len(self.runner.engine), 0)
+        self.assertEqual(self.runner.on_quotes({CODE: 9_000}), 0)
+
+    def test_sync_picks_up_orders_that_commit_late(self):
+        late = self.order(VirtualTrade.BUY, 1, limit_price=10_000)
+        later = self.order(VirtualTrade.BUY, 1, limit_price=10_000)
+        # late 의 트랜잭션이 아직 커밋되지 않은 것처럼 보이게 한다 (id 는 later 보다 작다)
+        Order.objects.filter(pk=late.pk).delete()
+        self.runner.sync()
+        self.assertEqual(len(self.runner.engine), 1)
+
+        late.save(force_insert=True)
+        self.runner.sync()
+
+        self.assertLess(late.pk, later.pk)
+        self.assertEqual(len(self.runner.engine), 2)
+
+
+# ─────────────────────────────────────────────
+# 시세 스트림 인증 (simulator.api.views)
+# ─────────────────────────────────────────────
+class StreamAuthTests(TestCase):
+    def setUp(self):
+        self.portfolio = make_portfolio()
+        self.client = APIClient(SERVER_NAME="localhost")
+        self.client.force_authenticate(self.portfolio.user)
+
+    def issue(self):
+        response = self.client.post("/api/v1/simulator/stream/ticket/")
+        self.assertEqual(response.status_code, 201)
+        return response.data["ticket"]
+
+    def stream_user(self, query):
+        request = RequestFactory().get("/api/v1/simulator/stream/", query)
+        request.user = AnonymousUser()
+        return _stream_user(request)
+
+    def test_ticket_is_single_use(self):
+        ticket = self.issue()
+        self.assertEqual(self.stream_user({"ticket": ticket}), self.portfolio.user)
+        self.assertIsNone(self.stream_user({"ticket": ticket}))
+
+    def test_expired_or_forged_tickets_are_refused(self):
+        ticket = self.issue()
+        self.assertIsNone(self.stream_user({"ticket": ticket + "x"}))
+        with override_settings(QUOTE_STREAM_TICKET_TTL=-1):
+            self.assertIsNone(self.stream_user({"ticket": ticket}))
+
+    def test_jwt_in_query_string_is_not_accepted(self):
+        token = str(AccessToken.for_user(self.portfolio.user))
+        self.assertIsNone(self.stream_user({"token": token}))
+
+    def test_stream_refuses_wsgi(self):
+        response = self.client.get("/api/v1/simulator/stream/", {"ticket": self.issue()})
+        self.assertEqual(response.status_code, 501)
+
+
+# ─────────────────────────────────────────────
+# 시세 캐시 (simulator.services.quote_cache)
+# ─────────────────────────────────────────────
+class FakeClock:
+    def __init__(self):
+        self.now = 1_000.0
+
+    def monotonic(self):
+        return self.now
+
+    def perf_counter(self):
+        return self.now
+
+    def time(self):
+        return self.now
+
+
+class FakeProvider:
+    """
+    호출 횟수를 세는 업스트림. gate 를 주면 풀릴 때까지 응답하지 않는다
+    """
+    def __init__(self, gate=None):
+        self.calls = 0
+        self.price = 100
+        self.gate = gate
+        self.entered = threading.Event()
+
+    def __call__(self, key):
+        self.calls += 1
+        self.entered.set()
+        if self.gate is not None:
+            self.gate.wait(5)
+        return self.price
+
+
+class QuoteCacheTests(SimpleTestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        patcher = mock.patch("simulator.services.quote_cache.time", self.clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def make_cache(self, ttl=10, stale_ttl=10):
+        cache = QuoteCache(ttl=ttl, stale_ttl=stale_ttl, max_refresh_workers=1)
+        self.addCleanup(cache._refresher.shutdown)
+        return cache
+
+    def test_ttl_expiry_reloads(self):
+        cache, provider = self.make_cache(), FakeProvider()
+
+        self.assertEqual(cache.get(CODE, provider), 100)
+        self.clock.now += 9
+        provider.price = 200
+        self.assertEqual(cache.get(CODE, provider), 100)
+        self.clock.now += 2
+        self.assertEqual(cache.get(CODE, provider), 200)
+
+        self.assertEqual(provider.calls, 2)
+        self.assertEqual((cache.stats()["hits"], cache.stats()["misses"]), (1, 2))
+
+    def test_stale_value_is_served_while_refreshing(self):
+        cache, provider = self.make_cache(ttl=10, stale_ttl=60), FakeProvider()
+        cache.get(CODE, provider)
+        provider.price = 200
+        self.clock.now += 30
+
+        self.assertEqual(cache.get(CODE, provider), 100)
+        cache._refresher.shutdown(wait=True)
+
+        self.assertEqual(provider.calls, 2)
+        self.assertEqual(cache.get(CODE, provider), 200)
+        self.assertEqual(cache.stats()["stale_hits"], 1)
+
+    def test_failed_reload_falls_back_to_the_old_value(self):
+        cache = self.make_cache()
+        cache.get(CODE, FakeProvider())
+        self.clock.now += 11
+
+        with self.assertLogs("simulator.services.quote_cache", "WARNING"):
+            self.assertEqual(cache.get(CODE, mock.Mock(side_effect=RuntimeError)), 100)
+        with self.assertRaises(RuntimeError):
+            cache.get("000660", mock.Mock(side_effect=RuntimeError))
+
+    def test_concurrent_misses_share_one_upstream_call(self):
+        cache, gate = self.make_cache(), threading.Event()
+        provider = FakeProvider(gate)
+        results = []
+
+        def lookup():
+            results.append(cache.get(CODE, provider))
+
+        threads = [threading.Thread(target=lookup) for _ in range(4)]
+        threads[0].start()
+        self.assertTrue(provider.entered.wait(5))
+        for thread in threads[1:]:
+            thread.start()
+        deadline = time.monotonic() + 5
+        while cache.stats()["coalesced"] < 3 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        gate.set()
+        for thread in threads:
+            thread.join(5)
+
+        self.assertEqual(provider.calls, 1)
+        self.assertEqual(results, [100] * 4)
+        self.assertEqual(cache.stats()["coalesced"], 3)
+
+
+# ─────────────────────────────────────────────
+# 시세 (simulator.services.price_service)
+# ─────────────────────────────────────────────
+class UnpricedPositionTests(TestCase):
+    def setUp(self):
+        self.portfolio = make_portfolio()
+        # 종목 마스터에 없어 시세를 얻을 수 없는 종목
+        apply_trade(self.portfolio, VirtualTrade.BUY, "NOQUOTE", "상장폐지", 1_000, 10)
+
+    def test_unknown_quote_is_none_not_zero(self):
+        self.assertEqual(fetch_quotes(["NOQUOTE"], deadline=0)["NOQUOTE"], Quote(None, False))
+
+    def test_current_price_honours_read_cache_only(self):
+        Symbol.objects.create(code="TEST03", name="캐시전용", market=Symbol.KOSPI, yahoo_ticker="TEST03.KS")
+        # TTL 이 한참 지난 값이어도 업스트림을 부르지 않는다
+        with quote_cache._lock:
+            quote_cache._entries["TEST03.KS"] = (12_345, time.monotonic() - 10 * quote_cache.stale_ttl)
+        try:
+            with override_settings(QUOTE_READ_CACHE_ONLY=True), \
+                    mock.patch("simulator.services.price_service._fetch_one") as fetch_one:
+                self.assertEqual(fetch_current_price("TEST03"), 12_345)
+            fetch_one.assert_not_called()
+        finally:
+            quote_cache.invalidate("TEST03.KS")
+
+    def test_profit_rate_falls_back_to_cost_basis(self):
+        client = APIClient(SERVER_NAME="localhost")
+        client.force_authenticate(self.portfolio.user)
+        response = client.get("/simulator/api/profit-rate/")
+
+        self.assertEqual(response.status_code, 200)
+        position = response.data["positions"][0]
+        self.assertIsNone(position["current_price"])
+        self.assertIsNone(position["profit_rate"])
+        self.assertEqual((response.data["total_invested"], response.data["total_profit"]), (10_000, 0))
+        self.assertEqual(response.data["overall_rate"], 0)
+
+
+# ─────────────────────────────────────────────
+# 매수 화면/API (simulator.views)
+# ─────────────────────────────────────────────
+@mock.patch("simulator.views.fetch_current_price", return_value=10_000)
+class BuyViewTests(TestCase):
+    def setUp(self):
+        self.portfolio = make_portfolio()
+        self.api = APIClient(SERVER_NAME="localhost")
+        self.api.force_authenticate(self.portfolio.user)
+        self.client.force_login(self.portfolio.user)
+
+    def test_api_rejects_bad_quantities(self, _):
+        for quantity in (0, -1, "abc", None):
+            response = self.api.post("/simulator/api/buy/", {"stock_name": NAME, "quantity": quantity}, format="json")
+            self.assertEqual(response.status_code, 400, quantity)
+        self.assertFalse(VirtualTrade.objects.exists())
+
+    def test_form_shows_error_for_bad_quantities(self, _):
+        # 템플릿 대신 넘긴 context 를 본다
+        with mock.patch("simulator.views.render", return_value=HttpResponse()) as render:
+            for quantity in ("0", "-1", "abc"):
+                response = self.client.post("/simulator/buy/", {"stock_name": NAME, "quantity": quantity},
+                                            SERVER_NAME="localhost")
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(render.call_args.args[2]["error_message"], "매수 수량은 1 이상의 정수여야 합니다.")
+        self.assertFalse(VirtualTrade.objects.exists())
+
+    def test_unpriced_symbol_is_a_bad_request(self, fetch):
+        fetch.return_value = None
+        response = self.api.post("/simulator/api/buy/", {"stock_name": NAME, "quantity": 1}, format="json")
+
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(VirtualTrade.objects.exists())
+
+    def test_valid_quantity_buys(self, _):
+        response = self.api.post("/simulator/api/buy/", {"stock_name": NAME, "quantity": "3"}, format="json")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(held_quantity(self.portfolio, CODE), 3)
+
+
+# ─────────────────────────────────────────────
+# 거래 내역 (simulator.services.trade_history)
+# ─────────────────────────────────────────────
+class TradeHistoryTests(TestCase):
+    def setUp(self):
+        self.portfolio = make_portfolio()
+        self.client = APIClient(SERVER_NAME="localhost")
+        self.client.force_authenticate(self.portfolio.user)
+        tie = datetime(2024, 3, 4, 1, 2, 3, 456789, tzinfo=dt_timezone.utc)
+        # 세 건은 같은 시각, 나머지는 하루씩 앞선다
+        times = [tie - timedelta(days=2), tie - timedelta(days=1), tie, tie, tie]
+        for traded_at in times:
+            trade = VirtualTrade.objects.create(
+                portfolio=self.portfolio, trade_type=VirtualTrade.BUY,
+                stock_code=CODE, stock_name=NAME, price=100, quantity=1,
+            )
+            VirtualTrade.objects.filter(pk=trade.pk).update(traded_at=traded_at)
+        self.newest_first = list(
+            VirtualTrade.objects.order_by("-traded_at", "-id").values_list("id", flat=True)
+        )
+
+    def test_cursor_round_trip_keeps_microseconds(self):
+        trade = VirtualTrade.objects.get(pk=self.newest_first[0])
+
+        self.assertEqual(decode_cursor(encode_cursor(trade)), (trade.traded_at, trade.id))
+
+    def test_pages_walk_through_ties_without_gaps(self):
+        qs = filter_trades(self.portfolio)
+        seen, cursor = [], None
+        for _ in range(5):
+            trades, cursor = page_trades(qs, cursor=cursor, limit=2)
+            seen += [trade.id for trade in trades]
+            if cursor is None:
+                break
+
+        self.assertIsNone(cursor)
+        self.assertEqual(seen, self.newest_first)
+
+    def test_invalid_cursor_is_rejected(self):
+        # 잘못된 base64, 구분자 없음("not-a-cursor"), 숫자가 아님("abc:1")
+        for cursor in ("!!!", "bm90LWEtY3Vyc29y", "YWJjOjE"):
+            with self.subTest(cursor=cursor), self.assertRaises(InvalidCursorError):
+                decode_cursor(cursor)
+
+        response = self.client.get("/simulator/api/history/", {"cursor": "!!!"})
+        self.assertEqual(response.status_code, 400)
+
+    def test_api_next_link_follows_the_cursor(self):
+        first = self.client.get("/simulator/api/history/", {"limit": 3})
+        second = self.client.get(first.data["next"])
+
+        ids = [row["id"] for row in first.data["results"] + second.data["results"]]
+        self.assertEqual(ids, self.newest_first)
+        self.assertIsNone(second.data["next"])
+
+
+# ─────────────────────────────────────────────
+# 거래 원장 내보내기 (simulator.services.export)
+# ─────────────────────────────────────────────
+class TradeExportTests(TestCase):
+    def setUp(self):
+        self.portfolio = make_portfolio()
+        self.client = APIClient(SERVER_NAME="localhost")
+        self.client.force_authenticate(self.portfolio.user)
+        for i, name in enumerate((NAME, "삼성전자우, 보통", NAME)):
+            trade = VirtualTrade.objects.create(
+                portfolio=self.portfolio, trade_type=VirtualTrade.BUY,
+                stock_code=CODE, stock_name=name, price=100 + i, quantity=i + 1,
+            )
+            VirtualTrade.objects.filter(pk=trade.pk).update(
+                traded_at=datetime(2024, 1, 2 + i, 6, tzinfo=dt_timezone.utc)
+            )
+        self.qs = VirtualTrade.objects.filter(portfolio=self.portfolio).order_by("traded_at", "id")
+
+    def test_csv_streams_chunks_after_a_bom_header(self):
+        chunks = list(stream_csv(self.qs, TRADE_COLUMNS, chunk_size=2))
+
+        # 헤더 한 번 + 행 2개 + 행 1개
+        self.assertEqual(len(chunks), 3)
+        self.assertTrue(chunks[0].startswith(codecs.BOM_UTF8))
+        rows = list(csv.reader(io.StringIO(b"".join(chunks).decode("utf-8-sig"))))
+        self.assertEqual(rows[0], [column.name for column in TRADE_COLUMNS])
+        self.assertEqual([row[4] for row in rows[1:]], [NAME, "삼성전자우, 보통", NAME])
+        self.assertEqual(rows[1][1], "2024-01-02T06:00:00+00:00")
+        self.assertEqual(rows[1][-2:], ["", ""])
+
+    def test_parquet_writes_one_row_group_per_chunk(self):
+        import pyarrow.parquet as pq
+
+        data = b"".join(stream_parquet(self.qs, TRADE_COLUMNS, chunk_size=2))
+
+        parquet = pq.ParquetFile(io.BytesIO(data))
+        self.assertEqual(parquet.metadata.num_row_groups, 2)
+        table = parquet.read()
+        self.assertEqual(table.column_names, [column.name for column in TRADE_COLUMNS])
+        self.assertEqual(table.column("quantity").to_pylist(), [1, 2, 3])
+        self.assertEqual(table.column("traded_at").to_pylist()[0], datetime(2024, 1, 2, 6, tzinfo=dt_timezone.utc))
+        self.assertEqual(table.column("order_id").to_pylist(), [None] * 3)
+
+    def test_export_endpoint(self):
+        response = self.client.get("/api/v1/simulator/trades/export/", {"format": "csv", "start": "2024-01-03"})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("attachment;", response["Content-Disposition"])
+        rows = list(csv.reader(io.StringIO(b"".join(response.streaming_content).decode("utf-8-sig"))))
+        self.assertEqual(len(rows), 3)
+
+        self.assertEqual(self.client.get("/api/v1/simulator/trades/export/", {"format": "xlsx"}).status_code, 400)
+
+
+# ─────────────────────────────────────────────
+# 종목 마스터 (simulator.services.symbol_index / load_symbols)
+# ─────────────────────────────────────────────
+class SymbolIndexTests(SimpleTestCase):
+    index = SymbolIndex([
+        (SymbolInfo("005930", "삼성전자", "KOSPI", "005930.KS"), ["Samsung Electronics"]),
+        (SymbolInfo("005935", "삼성전자우", "KOSPI", "005935.KS"), []),
+        (SymbolInfo("028260", "삼성물산", "KOSPI", "028260.KS"), []),
+        (SymbolInfo("035720", "카카오", "KOSPI", "035720.KS"), ["Kakao"]),
+    ])
+
+    def codes(self, prefix, limit=10):
+        return [info.code for info in self.index.autocomplete(prefix, limit)]
+
+    def test_prefix_search_prefers_shorter_names(self):
+        self.assertEqual(self.codes("삼성"), ["028260", "005930", "005935"])
+        self.assertEqual(self.codes("삼성전"), ["005930", "005935"])
+        self.assertEqual(self.codes("삼성", limit=1), ["028260"])
+        self.assertEqual(self.codes("0059"), ["005930", "005935"])
+        self.assertEqual(self.codes("현대"), [])
+
+    def test_resolve_by_code_name_alias_and_ticker(self):
+        for query in ("005930", "삼성전자", "삼성 전자", "samsung electronics", "005930.ks"):
+            with self.subTest(query=query):
+                self.assertEqual(self.index.resolve(query).code, "005930")
+        self.assertIsNone(self.index.resolve("삼성"))
+        self.assertIsNone(self.index.resolve(""))
+
+
+class SymbolIndexReloadTests(TestCase):
+    def setUp(self):
+        invalidate_symbol_index()
+        self.addCleanup(invalidate_symbol_index)
+
+    def rename(self, name):
+        # 다른 프로세스가 바꾼 것처럼 시그널 없이 바꾼다
+        Symbol.objects.filter(code=CODE).update(name=name, updated_at=timezone.now())
+
+    def test_reloads_when_signature_changes(self):
+        self.assertEqual(resolve_symbol(CODE).name, NAME)
+
+        self.rename("삼성전자(신)")
+        with override_settings(SYMBOL_INDEX_RECHECK=3600):
+            self.assertEqual(resolve_symbol(CODE).name, NAME)
+        with override_settings(SYMBOL_INDEX_RECHECK=0):
+            self.assertEqual(resolve_symbol(CODE).name, "삼성전자(신)")
+        with self.assertRaises(UnknownSymbolError):
+            resolve_symbol(NAME)
+
+    def test_load_symbols_command(self):
+        rows = [
+            "단축코드,한글 종목약명,시장구분,영문 종목명",
+            "A035720,카카오,KOSPI,Kakao Corp",
+            "A293490,카카오게임즈,KOSDAQ GLOBAL,Kakao Games",
+            "A999999,없는시장,KONEX,",
+        ]
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "krx.csv"
+            path.write_text("\n".join(rows), encoding="cp949")
+            out = io.StringIO()
+            call_command("load_symbols", str(path), "--deactivate-missing", stdout=out)
+
+        self.assertIn("Loaded: 2, Skipped: 1", out.getvalue())
+        games = Symbol.objects.get(code="293490")
+        self.assertEqual((games.market, games.yahoo_ticker, games.aliases), ("KOSDAQ", "293490.KQ", ["Kakao Games"]))
+        self.assertFalse(Symbol.objects.get(code=CODE).is_active)
+        self.assertEqual(resolve_symbol("kakao corp").code, "035720")
+        self.assertIsNone(get_symbol_index().resolve(CODE))
+
+
+# ─────────────────────────────────────────────
+# 시세 제공자 인터페이스 (simulator.services.providers.base)
+# ─────────────────────────────────────────────
+class PricesOnly(PriceProvider):
+    def get_prices(self, tickers):
+        return {ticker: 100 for ticker in tickers}
+
+
+class PriceProviderTests(SimpleTestCase):
+    def test_incomplete_provider_fails_on_instantiation(self):
+        with self.assertRaisesMessage(TypeError, "get_history"):
+            PricesOnly()
+
+    def test_defaults_build_on_get_prices(self):
+        class Complete(PricesOnly):
+            def get_history(self, ticker, start=None, end=None, interval="1d"):
+                return []
+
+        provider = Complete()
+        self.assertEqual(provider.get_price("005930.KS"), 100)
+        self.assertEqual(provider.get_fundamentals("005930.KS"), {})
+
+
+# ─────────────────────────────────────────────
+# 재생 시세 제공자 (simulator.services.providers.replay)
+# ─────────────────────────────────────────────
+class ReplayProviderTests(SimpleTestCase):
+    def test_history_accepts_dates(self):
+        with tempfile.TemporaryDirectory() as data_dir:
+            Path(data_dir, "005930.csv").write_text(
+                "date,open,high,low,close,volume\n"
+                "2024-01-02 15:30,100,110,90,105,1000\n"
+                "2024-01-03 15:30,105,115,95,110,1000\n"
+                "2024-01-04 15:30,110,120,100,115,1000\n"
+            )
+            provider = ReplayProvider(data_dir)
+
+            bars = provider.get_history("005930.KS", start=date(2024, 1, 3), end=date(2024, 1, 4))
+
+        self.assertEqual([bar.close for bar in bars], [110, 115])
+
+
+# ─────────────────────────────────────────────
+# 위험 지표 (simulator.services.risk)
+# ─────────────────────────────────────────────
+class ComputeRiskTests(SimpleTestCase):
+    def test_zero_market_value_returns_empty_metrics(self):
+        prices = np.array([[100.0, 90.0, 50.0, 0.0]])
+        benchmark = np.array([2500.0, 2510.0, 2490.0, 2500.0])
+
+        result = compute_risk(prices, np.array([10.0]), benchmark)
+
+        self.assertEqual(result["market_value"], 0)
+        self.assertIsNone(result["var"])
+        self.assertEqual(result["weights"], [])
+
+
+# ─────────────────────────────────────────────
+# 수익률 순위표 (simulator.services.leaderboard)
+# ─────────────────────────────────────────────
+@mock.patch.object(leaderboard, "_board", None)
+class LeaderboardReconcileTests(TestCase):
+    @mock.patch.object(leaderboard, "_reconciler_pid", None)
+    @mock.patch("simulator.services.leaderboard.threading.Thread")
+    def test_reconciler_starts_on_first_leaderboard_access(self, thread):
+        django_apps.get_app_config("simulator").ready()
+        thread.assert_not_called()
+
+        get_leaderboard()
+        get_leaderboard()
+
+        thread.assert_called_once()
+        self.assertEqual(leaderboard._reconciler_pid, os.getpid())
+
+    def test_reconcile_picks_up_trades_from_other_processes(self):
+        portfolio = make_portfolio(cash=1_000_000)
+        self.assertEqual(get_leaderboard().standing(portfolio.pk).nav, 1_000_000)
+        # 다른 프로세스의 체결 (이 프로세스의 notify_trade 는 불리지 않는다)
+        VirtualPortfolio.objects.filter(pk=portfolio.pk).update(cash_balance=1_200_000)
+        self.assertEqual(get_leaderboard().standing(portfolio.pk).nav, 1_000_000)
+
+        leaderboard.reconcile()
+
+        self.assertEqual(get_leaderboard().standing(portfolio.pk).nav, 1_200_000)
+
+
+# ─────────────────────────────────────────────
+# 봉 저장소 (simulator.services.bar_store)
+# ─────────────────────────────────────────────
+def daily_bars(first, closes):
+    """first(date) 부터 하루씩, 종가 closes 인 Bar 목록 (현지 15시)"""
+    start = datetime(first.year, first.month, first.day, 6, tzinfo=dt_timezone.utc)
+    return [Bar(start + timedelta(days=i), c, c + 1, c - 1, c, 1000 + i) for i, c in enumerate(closes)]
+
+
+class BarStoreTests(TestCase):
+    def assertBarsEqual(self, actual, expected):
+        for name in ("ts", "open", "high", "low", "close", "volume"):
+            np.testing.assert_array_equal(actual[name], expected[name], err_msg=name)
+
+    def test_encode_decode_round_trip(self):
+        arrays = {
+            # 첫 값이 큰 (델타가 int64 여야 하는) 값과 같은 ts 가 되풀이되는 경우
+            "ts": np.array([1_700_000_000, 1_700_000_000, 1_700_086_400], dtype="datetime64[s]"),
+            "open": np.array([12_345_678.91, 12_345_678.91, 1.5]),
+            "high": np.array([99_999_999.99, 0.01, 2.0]),
+            "low": np.array([0.0, 0.0, 1.0]),
+            "close": np.array([123.45, 123.45, 1.75]),
+            "volume": np.array([5_000_000_000_000, 0, 7], dtype=np.int64),
+        }
+        chunk = PriceBarChunk(count=3, scale=100, data=encode_chunk(arrays, 100))
+
+        self.assertBarsEqual(decode_chunk(chunk), arrays)
+
+    def test_overlapping_ingests_keep_the_last_value(self):
+        for mode in ("rows", "chunks"):
+            with self.subTest(mode=mode):
+                code = f"MERGE-{mode}"
+                ingest_bars(code, daily_bars(date(2024, 3, 4), [100, 101, 102, 103, 104]), mode=mode)
+                ingest_bars(code, daily_bars(date(2024, 3, 7), [203, 204, 205]), mode=mode)
+
+                bars = load_bars(code, mode=mode)
+                self.assertEqual(bars["close"].tolist(), [100, 101, 102, 203, 204, 205])
+                self.assertEqual(data_versions([code])[code], 2)
+
+    def test_range_load_across_chunk_boundaries(self):
+        bars = daily_bars(date(2023, 12, 20), range(100, 122))      # 2023-12-20 ~ 2024-01-10
+        for mode in ("rows", "chunks"):
+            ingest_bars(f"SPAN-{mode}", bars, mode=mode)
+        self.assertEqual(PriceBarChunk.objects.filter(symbol="SPAN-chunks").count(), 2)
+
+        expected = load_bars("SPAN-rows", date(2023, 12, 30), date(2024, 1, 2), mode="rows")
+        self.assertEqual(expected["close"].tolist(), [110, 111, 112, 113])
+        self.assertBarsEqual(load_bars("SPAN-chunks", date(2023, 12, 30), date(2024, 1, 2), mode="chunks"), expected)
+        many = load_bars_many(["SPAN-chunks", "NONE"], date(2023, 12, 30), date(2024, 1, 2), mode="chunks")
+        self.assertEqual(list(many), ["SPAN-chunks"])
+        self.assertBarsEqual(many["SPAN-chunks"], expected)
+
+    def test_nan_prices_are_not_stored(self):
+        bars = daily_bars(date(2024, 5, 1), [100, float("nan"), 102])
+        for mode in ("rows", "chunks"):
+            with self.subTest(mode=mode), self.assertLogs("simulator.services.bar_store", "WARNING"):
+                self.assertEqual(ingest_bars(f"NAN-{mode}", bars, mode=mode), 2)
+                self.assertEqual(load_bars(f"NAN-{mode}", mode=mode)["close"].tolist(), [100, 102])
+
+    def test_bar_matrix_aligns_symbols_on_the_union_of_days(self):
+        a = bars_to_arrays(daily_bars(date(2024, 5, 1), [10, 11, 12]))
+        b = bars_to_arrays(daily_bars(date(2024, 5, 2), [20, 21]))
+
+        matrix = bar_matrix({"A": a, "B": b}, ["A", "B", "C"])
+
+        self.assertEqual([date.fromordinal(int(day)) for day in matrix["days"]],
+                         [date(2024, 5, 1), date(2024, 5, 2), date(2024, 5, 3)])
+        self.assertEqual(matrix["listed"].tolist(), [[True, False, False], [True, True, False], [True, True, False]])
+        np.testing.assert_array_equal(matrix["close"][:, 1], [np.nan, 20, 21])
+        self.assertTrue(np.isnan(matrix["close"][:, 2]).all())
+
+
+# ─────────────────────────────────────────────
+# 로트 회계 (simulator.services.lots)
+# ─────────────────────────────────────────────
+def at(day, hour=6):
+    return datetime(2024, 1, 1, hour, tzinfo=dt_timezone.utc) + timedelta(days=day)
+
+
+class ComputeLotsTests(SimpleTestCase):
+    TRADES = [
+        (1, VirtualTrade.BUY, CODE, NAME, 100, 10, at(0)),
+        (2, VirtualTrade.BUY, CODE, NAME, 200, 10, at(1)),
+        (3, VirtualTrade.SELL, CODE, NAME, 300, 15, at(2)),
+    ]
+
+    def test_fifo_consumes_oldest_lots_first(self):
+        result = compute_lots(self.TRADES, "fifo")
+
+        sale = result.realizations[0]
+        # 10 × 100 + 5 × 200
+        self.assertEqual((sale.quantity, sale.proceeds, sale.cost, sale.pnl, sale.unmatched), (15, 4_500, 2_000, 2_500, 0))
+        self.assertEqual(result.open_lots, [Lot(CODE, NAME, 5, 200, at(1))])
+
+    def test_average_uses_the_mean_cost(self):
+        result = compute_lots(self.TRADES, "average")
+
+        sale = result.realizations[0]
+        # 평균단가 150 → round(3,000 × 15 / 20)
+        self.assertEqual((sale.cost, sale.pnl), (2_250, 2_250))
+        self.assertEqual(result.open_lots, [Lot(CODE, NAME, 5, 150.0, at(0))])
+
+    def test_partial_lot_consumption_and_oversell(self):
+        trades = [
+            (1, VirtualTrade.BUY, CODE, NAME, 100, 10, at(0)),
+            (2, VirtualTrade.SELL, CODE, NAME, 150, 3, at(1)),
+            (3, VirtualTrade.SELL, CODE, NAME, 160, 4, at(2)),
+            # 보유분(3) 을 넘는 매도는 unmatched 로 남는다 (예전 데이터)
+            (4, VirtualTrade.SELL, CODE, NAME, 170, 5, at(3)),
+        ]
+        for method in ("fifo", "average"):
+            with self.subTest(method=method):
+                result = compute_lots(trades, method)
+
+                self.assertEqual([(r.quantity, r.cost, r.pnl, r.unmatched) for r in result.realizations],
+                                 [(3, 300, 150, 0), (4, 400, 240, 0), (3, 300, 210, 2)])
+                self.assertEqual(result.open_lots, [])
+
+    def test_unknown_method_is_rejected(self):
+        with self.assertRaises(ValueError):
+            compute_lots([], "lifo")
+
+    def test_period_totals_group_by_local_date(self):
+        realizations = [
+            Realization(1, CODE, at(0), 1, 100, 80, 20, 0),
+            # UTC 1월 31일 16시 = 한국 2월 1일 01시
+            Realization(2, CODE, at(30, hour=16), 1, 100, 90, 10, 0),
+            Realization(3, CODE, at(40), 2, 300, 350, -50, 0),
+        ]
+
+        self.assertEqual(period_totals(realizations, "month"), [
+            {"period": "2024-01", "sales": 1, "proceeds": 100, "cost": 80, "realized_pnl": 20},
+            {"period": "2024-02", "sales": 2, "proceeds": 400, "cost": 440, "realized_pnl": -40},
+        ])
+        self.assertEqual([row["period"] for row in period_totals(realizations, "day")],
+                         ["2024-01-01", "2024-02-01", "2024-02-10"])
+        self.assertEqual(period_totals(realizations, "year")[0]["realized_pnl"], -20)
+        with self.assertRaises(ValueError):
+            period_totals(realizations, "week")
+
+
+class RealizedTotalTests(TestCase):
+    def setUp(self):
+        self.portfolio = make_portfolio()
+        execute_trade(self.portfolio, VirtualTrade.BUY, CODE, NAME, 100, 10)
+        execute_trade(self.portfolio, VirtualTrade.BUY, CODE, NAME, 200, 10)
+        execute_trade(self.portfolio, VirtualTrade.SELL, CODE, NAME, 300, 15)
+
+    def test_average_reads_the_stored_position_value(self):
+        with self.assertNumQueries(1):
+            self.assertEqual(realized_total(self.portfolio, "average"), 2_250)
+
+    def test_fifo_replay_is_cached_until_the_next_trade(self):
+        self.assertEqual(realized_total(self.portfolio, "fifo"), 2_500)
+        with self.assertNumQueries(1):
+            self.assertEqual(realized_total(self.portfolio, "fifo"), 2_500)
+
+        execute_trade(self.portfolio, VirtualTrade.SELL, CODE, NAME, 100, 5)
+
+        self.assertEqual(realized_total(self.portfolio, "fifo"), 2_000)
+
+
+# ─────────────────────────────────────────────
+# NAV 스냅샷 (simulator.services.nav_snapshots)
+# ─────────────────────────────────────────────
+# 2024-01-01(월) ~ 01-05(금) 종가
+CLOSES = {date(2024, 1, day): close for day, close in zip(range(1, 6), (95, 98, 110, 120, 130))}
+
+
+def fake_close_matrix(codes, days):
+    return np.array([[CLOSES.get(day, np.nan) for day in days] for _ in codes], dtype=np.float64)
+
+
+@mock.patch("simulator.services.nav_snapshots.fetch_close_matrix", fake_close_matrix)
+class NavSnapshotTests(TestCase):
+    def setUp(self):
+        self.portfolio = make_portfolio()
+        VirtualPortfolio.objects.filter(pk=self.portfolio.pk).update(
+            created_at=datetime(2024, 1, 1, 1, tzinfo=dt_timezone.utc)
+        )
+        # 1월 3일 (수) 15시(KST)에 10주 매수
+        trade = execute_trade(self.portfolio, VirtualTrade.BUY, CODE, NAME, 100, 10)
+        VirtualTrade.objects.filter(pk=trade.pk).update(traded_at=datetime(2024, 1, 3, 6, tzinfo=dt_timezone.utc))
+
+    def curve(self, **kwargs):
+        return [(row["date"].day, row["cash"], row["market_value"], row["nav"])
+                for row in equity_curve(self.portfolio, **kwargs)]
+
+    def test_backfill_rewinds_later_trades(self):
+        self.assertEqual(take_snapshots(as_of=date(2024, 1, 5), backfill_days=30), 5)
+
+        self.assertEqual(self.curve(), [
+            (1, 1_000_000, 0, 1_000_000),
+            (2, 1_000_000, 0, 1_000_000),
+            (3, 999_000, 1_100, 1_000_100),
+            (4, 999_000, 1_200, 1_000_200),
+            (5, 999_000, 1_300, 1_000_300),
+        ])
+
+    def test_incremental_runs_only_write_missing_days(self):
+        self.assertEqual(take_snapshots(as_of=date(2024, 1, 3), backfill_days=30), 3)
+        self.assertEqual(take_snapshots(as_of=date(2024, 1, 5), backfill_days=30), 2)
+        self.assertEqual(take_snapshots(as_of=date(2024, 1, 5), backfill_days=30), 0)
+
+        self.assertEqual([row[3] for row in self.curve()], [1_000_000, 1_000_000, 1_000_100, 1_000_200, 1_000_300])
+
+    def test_flush_counts_only_inserted_rows(self):
+        take_snapshots(as_of=date(2024, 1, 2), backfill_days=30)
+        batch = [
+            PortfolioSnapshot(portfolio=self.portfolio, date=date(2024, 1, day), cash=0, market_value=0, nav=0)
+            for day in (2, 3)
+        ]
+
+        self.assertEqual(nav_snapshots._flush(batch), 1)
+        self.assertEqual(PortfolioSnapshot.objects.count(), 3)
+
+    def test_equity_curve_range_and_thinning(self):
+        take_snapshots(as_of=date(2024, 1, 5), backfill_days=30)
+
+        self.assertEqual([row[0] for row in self.curve(start=date(2024, 1, 2), end=date(2024, 1, 4))], [2, 3, 4])
+        self.assertEqual([row[0] for row in self.curve(points=3)], [1, 3, 5])
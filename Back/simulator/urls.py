@@ -1,12 +1,14 @@
 # Back/simulator/urls.py
 
 from django.urls import path
-from . import views 
+from . import views
+
+app_name = 'simulator'
 
 urlpatterns = [
     path('portfolio/', views.my_portfolio, name='my_portfolio'),
     path('buy/', views.buy_stock, name='buy_stock'),
-    path('sell/<int:trade_id>/', views.sell_stock, name='sell_stock'),
+    path('sell/<str:stock_code>/', views.sell_stock, name='sell_stock'),
     path('history/', views.trade_history, name='trade_history'),
 
     # DRF 기반 API
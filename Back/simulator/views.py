@@ -5,32 +5,42 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework import status
 from .serializers import VirtualTradeSerializer
 from django.shortcuts import render, redirect, get_object_or_404
+from django.contrib import messages
 from django.contrib.auth.decorators import login_required
-from .models import VirtualPortfolio, VirtualTrade
-from insight.models import InterestStock
-from simulator.services.price_service import fetch_current_price
+from django.http import HttpResponseBadRequest
+from .models import Position, VirtualPortfolio, VirtualTrade
+from simulator.services.price_service import fetch_current_price, fetch_current_prices, fetch_quotes
+from simulator.services.execution import InsufficientCashError, execute_trade
+from simulator.services.positions import InsufficientQuantityError, TradeRejected
+from simulator.services.symbol_index import UnknownSymbolError, get_symbol_index, resolve_symbol
+from simulator.services.trade_history import history_page
+
+
+def available_stock_names():
+    # 종목 마스터(Symbol)에 등록된 활성 종목명
+    return get_symbol_index().names()
 
-AVAILABLE_STOCKS = [
-    '삼성전자',
-    'SK하이닉스',
-    'LG에너지솔루션',
-]
 
 @login_required
 def my_portfolio(request):
     portfolio = VirtualPortfolio.objects.get(user=request.user)
-    trades = VirtualTrade.objects.filter(portfolio=portfolio)
-
-    for trade in trades:
-        trade.current_price = fetch_current_price(trade.stock.company_name)
-        total_buy = trade.quantity * trade.price
-        total_now = trade.quantity * trade.current_price
-        trade.profit_rate = (total_now / total_buy * 100) if total_buy else 0
+    positions = list(portfolio.positions.filter(quantity__gt=0).order_by('stock_name'))
+    quotes = fetch_quotes(position.stock_code for position in positions)
+
+    for position in positions:
+        position.current_price, position.price_stale = quotes[position.stock_code]
+        if position.current_price is None:
+            # 시세를 한 번도 얻지 못한 종목은 평가하지 않는다 (화면에 - 로 표시)
+            position.market_value = position.profit_rate = None
+            continue
+        total_now = position.quantity * position.current_price
+        position.market_value = total_now
+        position.profit_rate = (total_now / position.cost_basis * 100) if position.cost_basis else 0
 
     return render(request, 'simulator/my_portfolio.html', {
         'portfolio': portfolio,
-        'trades': trades,
-        'available_stocks': AVAILABLE_STOCKS,
+        'positions': positions,
+        'available_stocks': available_stock_names(),
     })
 
 @login_required
@@ -42,65 +52,81 @@ def buy_stock(request):
 
     if request.method == 'POST':
         stock_name = request.POST.get('stock_name')
-        quantity = int(request.POST.get('quantity'))
 
-        try:
-            stock_obj = InterestStock.objects.get(company_name=stock_name)
-        except InterestStock.DoesNotExist:
+        def failed(message):
             return render(request, 'simulator/buy_stock.html', {
-                'error_message': '선택한 종목이 존재하지 않습니다',
-                'available_stock_names': AVAILABLE_STOCKS,
+                'error_message': message,
+                'available_stock_names': available_stock_names(),
             })
 
-        price = fetch_current_price(stock_name)
-        total_cost = quantity * price
-
-        if portfolio.cash_balance >= total_cost:
-            portfolio.cash_balance -= total_cost
-            portfolio.save()
-
-            VirtualTrade.objects.create(
-                portfolio=portfolio,
-                stock=stock_obj,
-                quantity=quantity,
-                price=price,
-                is_buy=True
-            )
+        try:
+            quantity = parse_buy_quantity(request.POST.get('quantity'))
+        except (TypeError, ValueError):
+            return failed('매수 수량은 1 이상의 정수여야 합니다.')
+        try:
+            symbol = resolve_symbol(stock_name)
+        except UnknownSymbolError:
+            return failed('선택한 종목이 존재하지 않습니다')
 
-            return redirect('simulator:my_portfolio')
-        else:
-            return render(request, 'simulator/buy_stock.html', {
-                'error_message': '현금이 부족합니다.',
-                'available_stock_names': AVAILABLE_STOCKS,
-            })
+        price = fetch_current_price(symbol.code)
+        if price is None:
+            return failed('시세를 알 수 없는 종목입니다.')
+        try:
+            execute_trade(portfolio, VirtualTrade.BUY, symbol.code, symbol.name, price, quantity)
+        except InsufficientCashError:
+            return failed('현금이 부족합니다.')
+        except TradeRejected as exc:
+            return failed(str(exc))
+        return redirect('simulator:my_portfolio')
 
     return render(request, 'simulator/buy_stock.html', {
-        'available_stock_names': AVAILABLE_STOCKS,
+        'available_stock_names': available_stock_names(),
     })
 
-@login_required
-def sell_stock(request, trade_id):
-    trade = get_object_or_404(VirtualTrade, id=trade_id, portfolio__user=request.user)
-    portfolio = trade.portfolio
+def parse_buy_quantity(raw):
+    """
+    매수 수량. 1 이상의 정수가 아니면 (비어 있어도) ValueError
+    """
+    if raw is None or raw == '' or isinstance(raw, bool) or (isinstance(raw, float) and not raw.is_integer()):
+        raise ValueError('매수 수량은 1 이상의 정수여야 합니다')
+    quantity = int(raw)
+    if quantity < 1:
+        raise ValueError('매수 수량은 1 이상의 정수여야 합니다')
+    return quantity
+
+
+def parse_sell_quantity(raw, held):
+    """
+    매도 수량. 비어 있으면 전량, 1 이상 보유 수량 이하의 정수가 아니면 ValueError
+    """
+    if raw is None or raw == '':
+        return held
+    if isinstance(raw, bool) or (isinstance(raw, float) and not raw.is_integer()):
+        raise ValueError('매도 수량은 정수여야 합니다')
+    quantity = int(raw)
+    if not 1 <= quantity <= held:
+        raise ValueError(f'매도 수량은 1 이상 {held} 이하여야 합니다')
+    return quantity
 
-    if request.method == 'POST':
-        sell_price = int(request.POST.get('price'))
-        quantity = trade.quantity
-
-        VirtualTrade.objects.create(
-            portfolio=portfolio,
-            stock=trade.stock,
-            quantity=quantity,
-            price=sell_price,
-            is_buy=False
-        )
 
-        portfolio.cash_balance += sell_price * quantity
-        portfolio.save()
-
-        trade.delete()
+@login_required
+def sell_stock(request, stock_code):
+    position = get_object_or_404(Position, portfolio__user=request.user, stock_code=stock_code)
 
-        return redirect('simulator:my_portfolio')
+    if request.method == 'POST':
+        # 수량을 비워 두면 전량 매도, 일부만 팔 수도 있다. 가격은 클라이언트가 아니라 현재가
+        try:
+            quantity = parse_sell_quantity(request.POST.get('quantity'), position.quantity)
+        except ValueError:
+            messages.error(request, f'매도 수량은 1 이상 {position.quantity} 이하의 정수여야 합니다.')
+            return redirect('simulator:my_portfolio')
+        try:
+            sell_price = fetch_current_price(position.stock_code)
+            execute_trade(position.portfolio, VirtualTrade.SELL, position.stock_code, position.stock_name, sell_price, quantity)
+        except UnknownSymbolError:
+            messages.error(request, '종목 마스터에 없는 종목이라 시세를 알 수 없습니다.')
+        except InsufficientQuantityError:
+            messages.error(request, '보유 수량이 부족합니다.')
 
     return redirect('simulator:my_portfolio')
 
@@ -111,11 +137,18 @@ def trade_history(request):
         defaults={'cash_balance': 10000000}
     )
 
-    trades = portfolio.trades.all().order_by('-traded_at')
+    try:
+        trades, next_cursor = history_page(portfolio, request.GET)
+    except ValueError as exc:
+        return HttpResponseBadRequest(str(exc))
 
+    # 다음 페이지 링크는 현재 필터를 유지한 채 커서만 바꾼다
+    query = request.GET.copy()
+    query['cursor'] = next_cursor
     return render(request, 'simulator/trade_history.html', {
         'portfolio': portfolio,
         'trades': trades,
+        'next_query': query.urlencode() if next_cursor else None,
     })
 
 
@@ -124,8 +157,9 @@ class MyPortfolioAPI(APIView):
 
     def get(self, request):
         portfolio, _ = VirtualPortfolio.objects.get_or_create(user=request.user)
-        trades = portfolio.trades.all()
-        serializer = VirtualTradeSerializer(trades, many=True)
+        trades = list(portfolio.trades.all())
+        prices = fetch_current_prices(trade.stock_name for trade in trades)
+        serializer = VirtualTradeSerializer(trades, many=True, context={'prices': prices})
         return Response({
             'cash_balance': portfolio.cash_balance,
             'trades': serializer.data,
@@ -137,29 +171,25 @@ class BuyStockAPI(APIView):
 
     def post(self, request):
         stock_name = request.data.get('stock_name')
-        quantity = int(request.data.get('quantity'))
         try:
-            stock_obj = InterestStock.objects.get(company_name=stock_name)
-        except InterestStock.DoesNotExist:
+            quantity = parse_buy_quantity(request.data.get('quantity'))
+        except (TypeError, ValueError):
+            return Response({'error': '매수 수량은 1 이상의 정수여야 합니다'}, status=400)
+        try:
+            symbol = resolve_symbol(stock_name)
+        except UnknownSymbolError:
             return Response({'error': '종목 없음'}, status=400)
 
-        price = fetch_current_price(stock_name)
-        total_cost = quantity * price
+        price = fetch_current_price(symbol.code)
+        if price is None:
+            return Response({'error': '시세 없음'}, status=400)
         portfolio, _ = VirtualPortfolio.objects.get_or_create(user=request.user)
-
-        if portfolio.cash_balance < total_cost:
+        try:
+            trade = execute_trade(portfolio, VirtualTrade.BUY, symbol.code, symbol.name, price, quantity)
+        except InsufficientCashError:
             return Response({'error': '현금 부족'}, status=400)
-
-        portfolio.cash_balance -= total_cost
-        portfolio.save()
-
-        trade = VirtualTrade.objects.create(
-            portfolio=portfolio,
-            stock=stock_obj,
-            quantity=quantity,
-            price=price,
-            is_buy=True
-        )
+        except TradeRejected as exc:
+            return Response({'error': str(exc)}, status=400)
 
         return Response({'message': '매수 성공', 'trade_id': trade.id})
 
@@ -173,20 +203,23 @@ class SellStockAPI(APIView):
         except VirtualTrade.DoesNotExist:
             return Response({'error': '거래 없음'}, status=404)
 
+        # trade_id 는 어떤 종목을 팔지 가리킬 뿐이고, 매수 내역은 지우지 않는다 (실현손익은 로트 회계로 계산)
         portfolio = trade.portfolio
-        sell_price = fetch_current_price(trade.stock.company_name)
-
-        VirtualTrade.objects.create(
-            portfolio=portfolio,
-            stock=trade.stock,
-            quantity=trade.quantity,
-            price=sell_price,
-            is_buy=False
-        )
+        position = Position.objects.filter(portfolio=portfolio, stock_code=trade.stock_code, quantity__gt=0).first()
+        if position is None:
+            return Response({'error': '보유 종목 없음'}, status=404)
+        try:
+            quantity = parse_sell_quantity(request.data.get('quantity'), position.quantity)
+        except (TypeError, ValueError):
+            return Response({'error': f'매도 수량은 1 이상 {position.quantity} 이하의 정수여야 합니다'}, status=400)
 
-        portfolio.cash_balance += sell_price * trade.quantity
-        portfolio.save()
-        trade.delete()
+        try:
+            sell_price = fetch_current_price(trade.stock_code)
+            execute_trade(portfolio, VirtualTrade.SELL, trade.stock_code, trade.stock_name, sell_price, quantity)
+        except UnknownSymbolError:
+            return Response({'error': '종목 없음'}, status=404)
+        except InsufficientQuantityError:
+            return Response({'error': '보유 수량 부족'}, status=400)
 
         return Response({'message': '매도 완료'})
 
@@ -195,10 +228,21 @@ class TradeHistoryAPI(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
-        portfolio = VirtualPortfolio.objects.get(user=request.user)
-        trades = portfolio.trades.all().order_by('-traded_at')
-        serializer = VirtualTradeSerializer(trades, many=True)
-        return Response(serializer.data)
+        portfolio, _ = VirtualPortfolio.objects.get_or_create(user=request.user)
+        try:
+            trades, next_cursor = history_page(portfolio, request.query_params)
+        except ValueError as exc:
+            return Response({'error': str(exc)}, status=400)
+
+        next_url = None
+        if next_cursor:
+            query = request.query_params.copy()
+            query['cursor'] = next_cursor
+            next_url = request.build_absolute_uri(f"{request.path}?{query.urlencode()}")
+        return Response({
+            'next': next_url,
+            'results': VirtualTradeSerializer(trades, many=True).data,
+        })
 
 
 class ProfitRateAPI(APIView):
@@ -210,28 +254,35 @@ class ProfitRateAPI(APIView):
         except VirtualPortfolio.DoesNotExist:
             return Response({'error': '포트폴리오 없음'}, status=404)
 
-        trades = portfolio.trades.filter(is_buy=True)
+        # 보유 종목은 Position 한 번 조회로 끝난다
+        positions = list(portfolio.positions.filter(quantity__gt=0))
+        quotes = fetch_quotes(position.stock_code for position in positions)
         result = []
         total_profit = 0
         total_invested = 0
 
-        for trade in trades:
-            current_price = fetch_current_price(trade.stock.company_name)
-            invested = trade.quantity * trade.price
-            now_value = trade.quantity * current_price
-            profit = now_value - invested
-            profit_rate = (profit / invested * 100) if invested else 0
-
-            total_profit += profit
+        for position in positions:
+            current_price, stale = quotes[position.stock_code]
+            invested = position.cost_basis
             total_invested += invested
+            if current_price is None:
+                # 시세를 한 번도 얻지 못한 종목은 원가로 평가한다 (합계 손익 0, 종목별 값은 null)
+                profit = profit_rate = None
+            else:
+                profit = position.quantity * current_price - invested
+                profit_rate = (profit / invested * 100) if invested else 0
+                total_profit += profit
 
             result.append({
-                'company_name': trade.stock.company_name,
-                'quantity': trade.quantity,
-                'buy_price': float(trade.price),
-                'current_price': float(current_price),
-                'profit': float(profit),
-                'profit_rate': round(profit_rate, 2),
+                'stock_code': position.stock_code,
+                'company_name': position.stock_name,
+                'quantity': position.quantity,
+                'buy_price': round(position.avg_price, 2),
+                'current_price': float(current_price) if current_price is not None else None,
+                'profit': float(profit) if profit is not None else None,
+                'profit_rate': round(profit_rate, 2) if profit_rate is not None else None,
+                'realized_pnl': position.realized_pnl,
+                'stale': stale,
             })
 
         overall_rate = (total_profit / total_invested * 100) if total_invested else 0
@@ -240,5 +291,6 @@ class ProfitRateAPI(APIView):
             'total_profit': round(total_profit, 2),
             'total_invested': round(total_invested, 2),
             'overall_rate': round(overall_rate, 2),
+            'stale': any(position['stale'] for position in result),
             'positions': result
         })
\ No newline at end of file
@@ -10,9 +10,9 @@ class StrategyAdmin(admin.ModelAdmin):
 
 @admin.register(StrategyRun)
 class StrategyRunAdmin(admin.ModelAdmin):
-    list_display = ('strategy', 'started_at', 'ended_at', 'total_return')
+    list_display = ('strategy', 'mode', 'started_at', 'ended_at', 'period_start', 'period_end', 'total_return')
     search_fields = ('strategy__name',)
-    list_filter = ('started_at',)
+    list_filter = ('mode', 'started_at')
 
 @admin.register(StrategyTrade)
 class StrategyTradeAdmin(admin.ModelAdmin):
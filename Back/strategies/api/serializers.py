@@ -1,6 +1,7 @@
 # Back/strategies/api/serializers.py
 from rest_framework import serializers
 from strategies.models import Strategy, StrategyRun, StrategyTrade
+from strategies.services.rules import LegacyRuleError, RuleError, get_plan
 # from marketplace.models import Purchase # 직접 임포트 최소화 (필요시 함수 내에서)
 
 class StrategySerializer(serializers.ModelSerializer):
@@ -15,8 +16,57 @@ class StrategySerializer(serializers.ModelSerializer):
             'rule_json', 'is_public', 'is_paid',
             'price_point', 'created_at', 
             'is_purchased', 'is_listed_on_marketplace',
+            'is_live', 'live_symbols', 'live_budget',
         ]
         read_only_fields = ['user', 'created_at']
+        extra_kwargs = {'live_budget': {'min_value': 10_000}}
+
+    def validate_rule_json(self, value):
+        # 실행할 때가 아니라 저장할 때 규칙 오류를 알려준다 (컴파일 결과는 캐시에 남는다)
+        # 계좌 상태 지표를 쓰는 예전 형식 규칙은 계산은 못 해도 저장/수정은 된다
+        try:
+            get_plan(value)
+        except LegacyRuleError:
+            pass
+        except RuleError as exc:
+            raise serializers.ValidationError(str(exc))
+        return value
+
+    def validate_live_symbols(self, value):
+        from django.conf import settings
+        from simulator.services.symbol_index import UnknownSymbolError, resolve_symbol
+
+        if not isinstance(value, list) or not all(isinstance(item, str) for item in value):
+            raise serializers.ValidationError('종목명 또는 코드 배열이어야 합니다')
+        codes, unknown = [], []
+        for query in value:
+            try:
+                codes.append(resolve_symbol(query).code)
+            except UnknownSymbolError:
+                unknown.append(query)
+        if unknown:
+            raise serializers.ValidationError(f"알 수 없는 종목: {', '.join(unknown[:10])}")
+        codes = list(dict.fromkeys(codes))
+        if len(codes) > settings.LIVE_MAX_SYMBOLS:
+            raise serializers.ValidationError(f'실시간 종목은 최대 {settings.LIVE_MAX_SYMBOLS}개입니다')
+        return codes
+
+    def validate(self, attrs):
+        # 실시간 실행은 한 종목 규칙만 (종목 묶음 규칙은 리밸런싱 백테스트 전용)
+        def current(field):
+            return attrs.get(field, getattr(self.instance, field, None))
+
+        if current('is_live'):
+            if not current('live_symbols'):
+                raise serializers.ValidationError({'live_symbols': '실시간 실행할 종목을 한 개 이상 주세요'})
+            try:
+                plan = get_plan(current('rule_json'))
+            except RuleError as exc:
+                # 예전 형식 규칙(LegacyRuleError)은 저장은 되지만 실행할 수는 없다
+                raise serializers.ValidationError({'rule_json': str(exc)})
+            if plan.ranking is not None:
+                raise serializers.ValidationError({'is_live': 'rank 를 쓰는 규칙은 실시간으로 실행할 수 없습니다'})
+        return attrs
 
     def get_is_purchased(self, obj_strategy):
         request = self.context.get('request', None)
@@ -68,6 +118,10 @@ class StrategySerializer(serializers.ModelSerializer):
         
         if not can_view_rule_json:
             representation.pop('rule_json', None)
+        # 실시간 실행 설정은 소유자에게만
+        if not (request and instance_strategy.user_id == getattr(request.user, 'id', None)):
+            for field in ('is_live', 'live_symbols', 'live_budget'):
+                representation.pop(field, None)
             
         return representation
 
@@ -77,11 +131,84 @@ class StrategyRunSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = StrategyRun
-        fields = ['id', 'strategy_id', 'strategy_name', 'started_at', 'ended_at', 'total_return']
+        fields = [
+            'id', 'strategy_id', 'strategy_name', 'mode', 'started_at', 'ended_at', 'total_return',
+            'period_start', 'period_end', 'universe', 'stats',
+        ]
 
 class StrategyTradeSerializer(serializers.ModelSerializer):
     run_id = serializers.PrimaryKeyRelatedField(read_only=True, source='run.id')
 
     class Meta:
         model = StrategyTrade
-        fields = ['id', 'run_id', 'stock_code', 'trade_type', 'price', 'quantity', 'traded_at']
\ No newline at end of file
+        fields = ['id', 'run_id', 'stock_code', 'trade_type', 'price', 'quantity', 'traded_at']
+
+
+class BacktestRequestSerializer(serializers.Serializer):
+    symbol = serializers.CharField(max_length=100)          # 종목명 또는 코드
+    start = serializers.DateField(required=False)
+    end = serializers.DateField(required=False)
+    initial_cash = serializers.IntegerField(required=False, min_value=10_000)
+
+    def validate_symbol(self, value):
+        from simulator.services.symbol_index import UnknownSymbolError, resolve_symbol
+        try:
+            return resolve_symbol(value).code
+        except UnknownSymbolError as exc:
+            raise serializers.ValidationError(str(exc))
+
+    def validate(self, attrs):
+        if attrs.get('start') and attrs.get('end') and attrs['start'] >= attrs['end']:
+            raise serializers.ValidationError('start 는 end 보다 앞이어야 합니다')
+        return attrs
+
+
+class SweepRequestSerializer(BacktestRequestSerializer):
+    # {"buy_conditions.1.value": [10, 15, 20], "sell_conditions.0.value.period": {"min": 20, "max": 120, "step": 20}}
+    params = serializers.DictField()
+    method = serializers.ChoiceField(choices=['grid', 'random'], default='grid')
+    samples = serializers.IntegerField(required=False, min_value=1)
+    seed = serializers.IntegerField(required=False)
+    metric = serializers.ChoiceField(
+        choices=['total_return', 'sharpe', 'cagr', 'max_drawdown', 'win_rate'], default='total_return',
+    )
+    top_n = serializers.IntegerField(default=3, min_value=1, max_value=20)
+
+
+class PortfolioBacktestRequestSerializer(serializers.Serializer):
+    universe = serializers.ListField(child=serializers.CharField(max_length=100), required=False, allow_empty=False)
+    market = serializers.ChoiceField(choices=['KOSPI', 'KOSDAQ', 'ALL'], required=False)    # universe 대신 시장 전체
+    start = serializers.DateField(required=False)
+    end = serializers.DateField(required=False)
+    initial_cash = serializers.IntegerField(required=False, min_value=10_000)
+
+    def validate_universe(self, value):
+        from simulator.services.symbol_index import UnknownSymbolError, resolve_symbol
+        codes, unknown = [], []
+        for query in value:
+            try:
+                codes.append(resolve_symbol(query).code)
+            except UnknownSymbolError:
+                unknown.append(query)
+        if unknown:
+            raise serializers.ValidationError(f"알 수 없는 종목: {', '.join(unknown[:10])}")
+        return list(dict.fromkeys(codes))
+
+    def validate(self, attrs):
+        from django.conf import settings
+        from simulator.models import Symbol
+
+        if ('universe' in attrs) == ('market' in attrs):
+            raise serializers.ValidationError('universe 와 market 중 하나만 주세요')
+        if 'market' in attrs:
+            qs = Symbol.objects.filter(is_active=True).order_by('code')
+            if attrs['market'] != 'ALL':
+                qs = qs.filter(market=attrs['market'])
+            attrs['universe'] = list(qs.values_list('code', flat=True))
+        if not attrs['universe']:
+            raise serializers.ValidationError('종목이 없습니다')
+        if len(attrs['universe']) > settings.PORTFOLIO_MAX_SYMBOLS:
+            raise serializers.ValidationError(f'종목은 최대 {settings.PORTFOLIO_MAX_SYMBOLS}개입니다')
+        if attrs.get('start') and attrs.get('end') and attrs['start'] >= attrs['end']:
+            raise serializers.ValidationError('start 는 end 보다 앞이어야 합니다')
+        return attrs
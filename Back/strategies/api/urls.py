@@ -6,5 +6,10 @@ urlpatterns = [
     path('strategies/', views.StrategyListCreateAPIView.as_view(), name='strategy-list-create'),
     path('strategies/<int:pk>/', views.StrategyRetrieveUpdateDestroyAPIView.as_view(), name='strategy-detail'),
     path('strategies/<int:pk>/runs/', views.StrategyRunListAPIView.as_view(), name='strategy-run-list'),
+    path('strategies/<int:pk>/backtest/', views.StrategyBacktestAPIView.as_view(), name='strategy-backtest'),
+    path('strategies/<int:pk>/portfolio-backtest/', views.StrategyPortfolioBacktestAPIView.as_view(),
+         name='strategy-portfolio-backtest'),
+    path('strategies/<int:pk>/sweep/', views.StrategySweepAPIView.as_view(), name='strategy-sweep'),
     path('runs/<int:run_pk>/trades/', views.StrategyTradeListAPIView.as_view(), name='run-trade-list'),
+    path('runs/<int:run_pk>/trades/export/', views.StrategyTradeExportAPIView.as_view(), name='run-trade-export'),
 ]
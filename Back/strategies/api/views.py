@@ -1,9 +1,19 @@
 # Back/strategies/api/views.py
-from rest_framework import generics, permissions
+import json
+
+from django.http import StreamingHttpResponse
+from rest_framework import generics, permissions, status
 from rest_framework.exceptions import PermissionDenied
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from simulator.services.export import STRATEGY_TRADE_COLUMNS, ExportNegotiation, export_response
 from strategies.models import Strategy, StrategyRun, StrategyTrade
+from strategies.services.backtest import backtest_strategy
+from strategies.services.portfolio import backtest_portfolio
+from strategies.services.sweep import sweep_strategy
 from .serializers import (
-    StrategySerializer, StrategyRunSerializer, StrategyTradeSerializer
+    StrategySerializer, StrategyRunSerializer, StrategyTradeSerializer, BacktestRequestSerializer,
+    SweepRequestSerializer, PortfolioBacktestRequestSerializer,
 )
 
 class StrategyListCreateAPIView(generics.ListCreateAPIView):
@@ -53,6 +63,73 @@ class StrategyRunListAPIView(generics.ListAPIView):
         strategy = generics.get_object_or_404(Strategy, pk=strategy_pk, user=self.request.user)
         return StrategyRun.objects.filter(strategy=strategy)
 
+class StrategyBacktestAPIView(APIView):
+    """
+    POST /api/strategies/strategies/<pk>/backtest/  {"symbol": "삼성전자", "start": "2015-01-01", "end": "2024-12-31"}
+    한 종목 일봉으로 백테스트를 돌려 StrategyRun 과 체결 내역을 저장한다
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request, pk):
+        strategy = generics.get_object_or_404(Strategy, pk=pk, user=request.user)
+        serializer = BacktestRequestSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        try:
+            run = backtest_strategy(
+                strategy, data['symbol'], data.get('start'), data.get('end'), data.get('initial_cash'),
+            )
+        except ValueError as exc:
+            return Response({'detail': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(StrategyRunSerializer(run).data, status=status.HTTP_201_CREATED)
+
+class StrategyPortfolioBacktestAPIView(APIView):
+    """
+    POST /api/strategies/strategies/<pk>/portfolio-backtest/  {"market": "KOSPI", "start": "2015-01-01"}
+    rank/top_n/rebalance 규칙을 종목 묶음(universe 목록 또는 market 전체)으로 백테스트해 StrategyRun 을 저장한다
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request, pk):
+        strategy = generics.get_object_or_404(Strategy, pk=pk, user=request.user)
+        serializer = PortfolioBacktestRequestSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        try:
+            run = backtest_portfolio(
+                strategy, data['universe'], data.get('start'), data.get('end'), data.get('initial_cash'),
+            )
+        except ValueError as exc:
+            return Response({'detail': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(StrategyRunSerializer(run).data, status=status.HTTP_201_CREATED)
+
+class StrategySweepAPIView(APIView):
+    """
+    POST /api/strategies/strategies/<pk>/sweep/
+        {"symbol": "삼성전자", "params": {"buy_conditions.0.value": [10, 15, 20]}, "method": "grid", "top_n": 3}
+    조합마다 백테스트 결과를 끝나는 대로 NDJSON 한 줄씩 흘려보내고, 마지막 줄에 저장한 상위 top_n 개 StrategyRun 을 알려준다.
+    중간에 연결이 끊기면 그때까지 끝난 조합 중 상위 top_n 개를 저장한다
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request, pk):
+        strategy = generics.get_object_or_404(Strategy, pk=pk, user=request.user)
+        serializer = SweepRequestSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        try:
+            lines = sweep_strategy(
+                strategy, data['symbol'], data['params'], data['method'], data.get('samples'), data.get('seed'),
+                data['metric'], data['top_n'], data.get('start'), data.get('end'), data.get('initial_cash'),
+            )
+        except ValueError as exc:
+            return Response({'detail': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        response = StreamingHttpResponse(
+            (json.dumps(line, ensure_ascii=False) + "\n" for line in lines), content_type="application/x-ndjson",
+        )
+        response["X-Accel-Buffering"] = "no"
+        return response
+
 class StrategyTradeListAPIView(generics.ListAPIView):
     serializer_class = StrategyTradeSerializer
     permission_classes = [permissions.IsAuthenticated]
@@ -61,4 +138,21 @@ class StrategyTradeListAPIView(generics.ListAPIView):
         # 해당 실행이 현재 사용자의 전략에 속하는 실행인지 확인
         run_pk = self.kwargs['run_pk']
         run = generics.get_object_or_404(StrategyRun, pk=run_pk, strategy__user=self.request.user)
-        return StrategyTrade.objects.filter(run=run)
\ No newline at end of file
+        return StrategyTrade.objects.filter(run=run)
+
+
+class StrategyTradeExportAPIView(APIView):
+    """
+    GET /api/strategies/runs/<run_pk>/trades/export/?format=csv|parquet
+    실행 한 번의 체결 내역 전체를 시간순으로 스트리밍
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    content_negotiation_class = ExportNegotiation
+
+    def get(self, request, run_pk):
+        run = generics.get_object_or_404(StrategyRun, pk=run_pk, strategy__user=request.user)
+        qs = StrategyTrade.objects.filter(run=run).order_by("traded_at", "id")
+        try:
+            return export_response(qs, STRATEGY_TRADE_COLUMNS, request.query_params.get("format", "csv"), f"run_{run.pk}_trades")
+        except ValueError as exc:
+            return Response({"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
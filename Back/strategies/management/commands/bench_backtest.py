@@ -0,0 +1,49 @@
+# Back/strategies/management/commands/bench_backtest.py
+import time
+from datetime import timedelta
+
+import numpy as np
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from simulator.services.bar_store import bars_to_arrays
+from simulator.services.providers.synthetic import SyntheticProvider
+from strategies.services.backtest import run_backtest
+
+SAMPLE_RULE = {
+    "buy_conditions": [
+        {"indicator": "CLOSE", "operator": ">", "value": {"indicator": "SMA", "period": 20}},
+        {"indicator": "PER", "operator": "<=", "value": 25},
+    ],
+    "sell_conditions": [
+        {"indicator": "CLOSE", "operator": "<", "value": {"indicator": "SMA", "period": 60}},
+    ],
+}
+
+
+class Command(BaseCommand):
+    help = 'Benchmarks the vectorized backtest engine on synthetic daily bars (no database access)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--years', type=int, default=10, help='일봉 기간 (년)')
+        parser.add_argument('--repeat', type=int, default=50)
+        parser.add_argument('--ticker', default='005930.KS')
+
+    def handle(self, *args, **options):
+        provider = SyntheticProvider()
+        end = timezone.localdate()
+        start = end - timedelta(days=365 * options['years'])
+        bars = bars_to_arrays(provider.get_history(options['ticker'], start=start, end=end))
+        fundamentals = provider.get_fundamentals(options['ticker'])
+
+        timings = np.empty(options['repeat'])
+        for i in range(options['repeat']):
+            started = time.perf_counter()
+            result = run_backtest(SAMPLE_RULE, bars, fundamentals)
+            timings[i] = time.perf_counter() - started
+
+        p50, p99 = np.percentile(timings, [50, 99]) * 1000
+        self.stdout.write(f"bars   : {len(bars['close']):,} ({options['years']} years)")
+        self.stdout.write(f"result : {result.total_return:.2f}% return, {result.stats['trades']} round trips, "
+                          f"max drawdown {result.stats['max_drawdown']}%")
+        self.stdout.write(self.style.SUCCESS(f"backtest p50 {p50:.2f}ms, p99 {p99:.2f}ms"))
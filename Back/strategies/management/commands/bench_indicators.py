@@ -0,0 +1,64 @@
+# Back/strategies/management/commands/bench_indicators.py
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand, CommandError
+
+from strategies.services.indicators import INDICATORS, compute, make_stream
+
+
+class Command(BaseCommand):
+    help = 'Benchmarks incremental indicator updates across many symbols and checks them against batch mode'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--symbols', type=int, default=5000, help='종목 수')
+        parser.add_argument('--bars', type=int, default=500, help='종목별 봉 수 (앞 절반은 워밍업)')
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        n, length = options['symbols'], options['bars']
+        if length < 4:
+            raise CommandError('--bars 는 4 이상이어야 합니다')
+        bars = _random_bars(n, length, options['seed'])
+        fundamentals = [{"eps": 1000.0 + i, "bps": 20000.0 + i} for i in range(n)]
+        names = [name for name in INDICATORS if name not in ("OPEN", "HIGH", "LOW", "CLOSE", "VOLUME")]
+        streams = [make_stream(name, INDICATORS[name].defaults, fundamentals, n) for name in names]
+        warm = length // 2
+
+        outputs = np.empty((len(names), length, n))
+        timings = np.empty(length - warm)
+        for t in range(length):
+            row = [bars[field][t] for field in ("open", "high", "low", "close", "volume")]
+            started = time.perf_counter()
+            for k, stream in enumerate(streams):
+                outputs[k, t] = stream.update(*row)
+            if t >= warm:
+                timings[t - warm] = time.perf_counter() - started
+
+        mismatched = []
+        for k, name in enumerate(names):
+            batch = compute(name, INDICATORS[name].defaults, bars, fundamentals)
+            if not np.array_equal(batch, outputs[k], equal_nan=True):
+                mismatched.append(name)
+
+        updates = n * len(names)
+        p50, p99 = np.percentile(timings, [50, 99]) * 1000
+        self.stdout.write(f"symbols    : {n:,} × {len(names)} indicators ({', '.join(names)})")
+        self.stdout.write(f"tick       : p50 {p50:.3f}ms, p99 {p99:.3f}ms for {updates:,} updates")
+        if mismatched:
+            raise CommandError(f"batch 와 증분 결과가 다름: {', '.join(mismatched)}")
+        self.stdout.write("batch check: identical")
+        self.stdout.write(self.style.SUCCESS(f"{updates / np.median(timings):,.0f} updates/s"))
+
+
+def _random_bars(n, length, seed):
+    rng = np.random.default_rng(seed)
+    close = 50000 * np.exp(np.cumsum(rng.normal(0, 0.02, (length, n)), axis=0))
+    spread = rng.random((length, n)) * 0.02
+    return {
+        "open": close * (1 + rng.normal(0, 0.005, (length, n))),
+        "high": close * (1 + spread),
+        "low": close * (1 - spread),
+        "close": close,
+        "volume": rng.integers(1_000, 1_000_000, (length, n)).astype(np.float64),
+    }
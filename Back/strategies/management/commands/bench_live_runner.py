@@ -0,0 +1,83 @@
+# Back/strategies/management/commands/bench_live_runner.py
+import time
+from datetime import datetime, time as day_time, timedelta
+
+import numpy as np
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from simulator.models import VirtualTrade
+from strategies.management.commands.bench_portfolio import _random_universe
+from strategies.models import StrategyRun
+from strategies.services.live_runner import LiveRunner, LiveStrategy
+from strategies.services.rules import compile_rule
+
+
+def sample_rule(rng):
+    """
+    기간/임계값만 다른 규칙 (같은 조합을 고른 전략끼리는 Plan 이 같다)
+    """
+    sma, rsi, ema = (int(rng.choice(options)) for options in ([5, 10, 20, 60, 120], [40, 50, 60, 70], [10, 20, 50]))
+    return {
+        "buy_conditions": [
+            {"indicator": "CLOSE", "operator": ">", "value": {"indicator": "SMA", "period": sma}},
+            {"indicator": "RSI", "operator": "<", "value": rsi},
+        ],
+        "sell_conditions": [
+            {"indicator": "CLOSE", "operator": "<", "value": {"indicator": "EMA", "period": ema}},
+        ],
+    }
+
+
+class Command(BaseCommand):
+    help = 'Benchmarks live strategy evaluation per quote tick on a synthetic universe (no database access)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--strategies', type=int, default=5000, help='실시간 전략 수')
+        parser.add_argument('--symbols', type=int, default=2000, help='전체 종목 수')
+        parser.add_argument('--per-strategy', type=int, default=5, help='전략 하나가 돌리는 종목 수')
+        parser.add_argument('--ticks', type=int, default=300)
+        parser.add_argument('--ticks-per-day', type=int, default=60)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        rng = np.random.default_rng(options['seed'])
+        codes = [f"{i:06d}" for i in range(options['symbols'])]
+        entries = []
+        for i in range(options['strategies']):
+            plan = compile_rule(sample_rule(rng))
+            picks = rng.choice(len(codes), options['per_strategy'], replace=False)
+            entries.append((LiveStrategy(i, StrategyRun(id=i), None, [codes[j] for j in picks], 1_000_000), plan))
+
+        started = time.perf_counter()
+        runner = LiveRunner()
+        specs = sorted({spec for _, plan in entries for spec in plan.nodes})
+        runner.warm(codes, _random_universe(len(codes), 300, options['seed']), specs)
+        runner.assign(entries)
+        built = time.perf_counter() - started
+
+        # 장중 시세: 직전 종가에서 시작하는 랜덤 워크, ticks-per-day 틱마다 다음 날
+        price = runner._bar["close"].copy()
+        day = datetime.combine(timezone.localdate(), day_time(9, 0))
+        orders = 0
+        for t in range(options['ticks']):
+            now = timezone.make_aware(day + timedelta(days=t // options['ticks_per_day'], seconds=t))
+            price = price * np.exp(rng.normal(0, 0.003, len(price)))
+            prices = dict(zip(runner.codes, np.round(price).tolist()))
+            tick = time.perf_counter()
+            signals = runner.evaluate(prices, now)
+            runner.histogram.record("tick", time.perf_counter() - tick)
+            # 주문은 DB 없이 바로 체결된 것으로 친다
+            for order in signals:
+                order.group.traded[order.leg] = runner._day
+                order.group.held[order.leg] = 1 if order.side == VirtualTrade.BUY else 0
+            orders += len(signals)
+
+        legs = sum(len(group) for group in runner.groups)
+        self.stdout.write(
+            f"setup    : {len(runner)} strategies, {len(runner.groups)} distinct plans, {legs:,} legs, "
+            f"{len(runner.codes):,} symbols, {len(runner.streams)} indicator streams (built in {built:.2f}s)"
+        )
+        for line in runner.histogram.format():
+            self.stdout.write(line)
+        self.stdout.write(self.style.SUCCESS(f"{options['ticks']} ticks, {orders:,} signals"))
@@ -0,0 +1,50 @@
+# Back/strategies/management/commands/bench_sweep.py
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from simulator.services.bar_store import bars_to_arrays
+from simulator.services.providers.synthetic import SyntheticProvider
+from strategies.management.commands.bench_backtest import SAMPLE_RULE
+from strategies.services.sweep import compile_combos, expand, pool_size, run_sweep
+
+SAMPLE_PARAMS = {
+    "buy_conditions.0.value.period": {"min": 5, "max": 60, "step": 5},
+    "buy_conditions.1.value": [10, 15, 20, 25, 30],
+    "sell_conditions.0.value.period": {"min": 20, "max": 120, "step": 10},
+}
+
+
+class Command(BaseCommand):
+    help = 'Benchmarks the parameter sweep runner on synthetic daily bars for several worker counts (no database access)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--years', type=int, default=10, help='일봉 기간 (년)')
+        parser.add_argument('--workers', default='1,2,4', help='쉼표로 구분한 프로세스 수 목록 (SWEEP_WORKERS 풀 크기까지)')
+        parser.add_argument('--ticker', default='005930.KS')
+
+    def handle(self, *args, **options):
+        provider = SyntheticProvider()
+        end = timezone.localdate()
+        start = end - timedelta(days=365 * options['years'])
+        bars = bars_to_arrays(provider.get_history(options['ticker'], start=start, end=end))
+        fundamentals = provider.get_fundamentals(options['ticker'])
+        combos = expand(SAMPLE_PARAMS)
+        plans = compile_combos(SAMPLE_RULE, combos)
+        self.stdout.write(f"bars   : {len(bars['close']):,} ({options['years']} years), {len(combos):,} combinations")
+
+        baseline = None
+        for workers in [min(int(value), pool_size()) for value in options['workers'].split(',')]:
+            started = time.perf_counter()
+            best = max(
+                run_sweep(plans, combos, bars, fundamentals, settings.BACKTEST_INITIAL_CASH, settings.BACKTEST_FEE_RATE, workers),
+                key=lambda result: (result.total_return, -result.index),
+            )
+            rate = len(combos) / (time.perf_counter() - started)
+            baseline = baseline or rate
+            self.stdout.write(f"workers {workers:>2}: {rate:,.0f} combinations/s (x{rate / baseline:.2f}), "
+                              f"best {best.total_return:.2f}% {best.params}")
+        self.stdout.write(self.style.SUCCESS("done"))
@@ -0,0 +1,33 @@
+# Back/strategies/management/commands/run_strategy_runner.py
+from django.core.management.base import BaseCommand
+
+from strategies.services.live_runner import LiveRunner
+
+
+class Command(BaseCommand):
+    help = 'Evaluates live (is_live) strategies on every quote tick and records their trades in the simulator'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='전략을 읽고 한 틱만 돌린 뒤 종료')
+
+    def handle(self, *args, **options):
+        runner = LiveRunner()
+        if options['once']:
+            runner.load()
+            filled = runner.tick()
+            self._report(runner)
+            self.stdout.write(self.style.SUCCESS(
+                f"{len(runner)} live strategies on {len(runner.codes)} symbols, {filled} trades"
+            ))
+            return
+
+        self.stdout.write('Strategy runner started (Ctrl+C to stop)')
+        try:
+            runner.run_forever()
+        except KeyboardInterrupt:
+            self._report(runner)
+            self.stdout.write('Strategy runner stopped')
+
+    def _report(self, runner):
+        for line in runner.histogram.format():
+            self.stdout.write(line)
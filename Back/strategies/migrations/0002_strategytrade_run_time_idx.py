@@ -0,0 +1,18 @@
+# Back/strategies/migrations/0002_strategytrade_run_time_idx.py
+# Generated by Django 4.2.20 on 2026-10-18 09:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('strategies', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='strategytrade',
+            index=models.Index(fields=['run', 'traded_at', 'id'], name='strategytrade_run_time_idx'),
+        ),
+    ]
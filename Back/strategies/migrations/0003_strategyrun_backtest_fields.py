@@ -0,0 +1,39 @@
+# Back/strategies/migrations/0003_strategyrun_backtest_fields.py
+# Generated by Django 4.2.20 on 2026-10-18 09:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('strategies', '0002_strategytrade_run_time_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='strategyrun',
+            name='mode',
+            field=models.CharField(choices=[('backtest', '백테스트'), ('live', '실시간')], default='backtest', max_length=8),
+        ),
+        migrations.AddField(
+            model_name='strategyrun',
+            name='period_end',
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='strategyrun',
+            name='period_start',
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='strategyrun',
+            name='stats',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.AddField(
+            model_name='strategyrun',
+            name='universe',
+            field=models.JSONField(blank=True, default=list),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Back/strategies/migrations/0004_strategy_live.py
+# Generated by Django 4.2.20 on 2026-10-18 09:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('strategies', '0003_strategyrun_backtest_fields'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='strategy',
+            name='is_live',
+            field=models.BooleanField(db_index=True, default=False),
+        ),
+        migrations.AddField(
+            model_name='strategy',
+            name='live_budget',
+            field=models.PositiveIntegerField(default=1000000),
+        ),
+        migrations.AddField(
+            model_name='strategy',
+            name='live_symbols',
+            field=models.JSONField(blank=True, default=list),
+        ),
+    ]
@@ -12,6 +12,10 @@ class Strategy(models.Model):
     is_paid     = models.BooleanField(default=False)
     price_point = models.PositiveIntegerField(default=0)
     created_at  = models.DateTimeField(auto_now_add=True)
+    # 실시간 실행 (strategies.services.live_runner)
+    is_live      = models.BooleanField(default=False, db_index=True)
+    live_symbols = models.JSONField(default=list, blank=True)           # 종목 코드 목록
+    live_budget  = models.PositiveIntegerField(default=1_000_000)       # 종목당 한 번에 매수할 금액
 
     class Meta:
         unique_together = ("user", "name")
@@ -21,10 +25,19 @@ class Strategy(models.Model):
 
 
 class StrategyRun(models.Model):
+    BACKTEST = "backtest"
+    LIVE     = "live"
+    MODE_CHOICES = [(BACKTEST, "백테스트"), (LIVE, "실시간")]
+
     strategy     = models.ForeignKey(Strategy, on_delete=models.CASCADE, related_name="runs")
+    mode         = models.CharField(max_length=8, choices=MODE_CHOICES, default=BACKTEST)
     started_at   = models.DateTimeField(auto_now_add=True)
     ended_at     = models.DateTimeField(null=True, blank=True)
-    total_return = models.DecimalField(max_digits=7, decimal_places=2, null=True, blank=True)
+    total_return = models.DecimalField(max_digits=7, decimal_places=2, null=True, blank=True)   # %
+    period_start = models.DateField(null=True, blank=True)      # 백테스트 구간
+    period_end   = models.DateField(null=True, blank=True)
+    universe     = models.JSONField(default=list, blank=True)    # 종목 코드 목록
+    stats        = models.JSONField(default=dict, blank=True)    # 최대 낙폭, 거래 수 등 (strategies.services.backtest)
 
     def __str__(self):
         return f"{self.strategy.name} run"
@@ -38,5 +51,11 @@ class StrategyTrade(models.Model):
     quantity   = models.PositiveIntegerField()
     traded_at  = models.DateTimeField()
 
+    class Meta:
+        indexes = [
+            # 실행별 체결 내역을 시간순으로 읽는다 (목록, 내보내기)
+            models.Index(fields=["run", "traded_at", "id"], name="strategytrade_run_time_idx"),
+        ]
+
     def __str__(self):
         return f"{self.run.id} {self.stock_code}"
@@ -0,0 +1,234 @@
+# Back/strategies/services/backtest.py
+"""
+전략 백테스트 (벡터화)
+
+rule_json 예:
+    {
+        "buy_conditions":  [{"indicator": "PER", "operator": "<=", "value": 10}],
+        "sell_conditions": [{"indicator": "CLOSE", "operator": "<", "value": {"indicator": "SMA", "period": 20}}]
+    }
+    - 같은 목록 안의 조건은 모두 만족해야 한다 (AND)
+    - sell_conditions 가 없으면 매수 조건이 풀리는 날 판다
+    - value 는 숫자 또는 다른 지표
+규칙 해석은 strategies.services.rules (컴파일 + 캐시) 가 맡는다.
+
+계산 순서 (모두 일 단위 배열 연산)
+    1. 지표마다 한 번씩 배열을 만들고 조건별로 비교해 불리언 마스크 (nan 은 항상 False)
+    2. 매수 마스크 → 1, 매도 마스크 → 0 을 찍고 앞으로 채워 "그날 종가 기준 목표 보유 여부"
+    3. 다음 날 시가에 체결 → 보유 여부가 바뀌는 날이 체결일
+    4. 수량은 매수 시점 현금 전부 (왕복 거래 수만큼만 도는 짧은 루프), 평가액은 현금 + 수량 × 종가
+"""
+import math
+import time
+from collections import namedtuple
+from datetime import datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from simulator.services.price_service import fetch_bars, fetch_fundamentals
+from strategies.models import StrategyRun, StrategyTrade
+from strategies.services.result_cache import get_result, result_key, store_result
+from strategies.services.rules import Plan, get_plan
+
+BUY, SELL = "buy", "sell"
+TRADING_DAYS = 252
+
+# index 는 봉 위치 (체결일)
+Fill = namedtuple("Fill", ["index", "side", "price", "quantity"])
+BacktestResult = namedtuple("BacktestResult", ["equity", "fills", "total_return", "stats"])
+
+
+# ─────────────────────────────────────────────
+# 체결/평가
+# ─────────────────────────────────────────────
+def target_positions(buy, sell):
+    """
+    매수일 1, 매도일 0 을 찍고 앞으로 채운다 (같은 날 둘 다면 매도)
+    """
+    marks = np.where(sell, 0, np.where(buy, 1, -1))
+    idx = np.where(marks >= 0, np.arange(len(marks)), 0)
+    np.maximum.accumulate(idx, out=idx)
+    target = marks[idx]
+    return np.where(target < 0, 0, target).astype(np.int8)
+
+
+def simulate(bars, buy, sell, initial_cash, fee_rate):
+    """
+    종가에 나온 신호를 다음 날 시가에 체결한다. 마지막 날까지 들고 있는 포지션은 종가로 평가만 한다
+    """
+    n = len(bars["close"])
+    held = np.zeros(n, dtype=np.int8)
+    held[1:] = target_positions(buy, sell)[:-1]
+    change = np.diff(held, prepend=0)
+    entries = np.flatnonzero(change == 1)
+    exits = np.flatnonzero(change == -1)
+    opens = bars["open"]
+
+    qty_delta = np.zeros(n + 1)
+    cash_delta = np.zeros(n + 1)
+    fills = []
+    cash = float(initial_cash)
+    for k, entry in enumerate(entries):
+        price = opens[entry]
+        quantity = math.floor(cash / (price * (1 + fee_rate))) if price > 0 else 0
+        if quantity <= 0:
+            continue
+        cost = quantity * price * (1 + fee_rate)
+        cash -= cost
+        qty_delta[entry] += quantity
+        cash_delta[entry] -= cost
+        fills.append(Fill(int(entry), BUY, price, quantity))
+        if k < len(exits):
+            exit_ = exits[k]
+            proceeds = quantity * opens[exit_] * (1 - fee_rate)
+            cash += proceeds
+            qty_delta[exit_] -= quantity
+            cash_delta[exit_] += proceeds
+            fills.append(Fill(int(exit_), SELL, opens[exit_], quantity))
+
+    quantities = np.cumsum(qty_delta[:n])
+    equity = initial_cash + np.cumsum(cash_delta[:n]) + quantities * bars["close"]
+    total_return = float(equity[-1] / initial_cash - 1.0) * 100 if n else 0.0
+    return BacktestResult(equity, fills, total_return, _stats(equity, fills, held))
+
+
+def _stats(equity, fills, held):
+    n = len(equity)
+    if n < 2:
+        return {"bars": n, "trades": 0}
+    buys = [fill for fill in fills if fill.side == BUY]
+    sells = [fill for fill in fills if fill.side == SELL]
+    wins = sum(1 for buy, sell in zip(buys, sells) if sell.price > buy.price)
+    return {
+        "bars": n,
+        "trades": len(sells),
+        "win_rate": round(wins / len(sells) * 100, 2) if sells else None,
+        "exposure": round(float(held.mean()) * 100, 2),
+        **equity_stats(equity),
+    }
+
+
+def equity_stats(equity):
+    """
+    평가액 곡선만으로 구하는 통계 (봉 2개 이상)
+    """
+    daily = equity[1:] / equity[:-1] - 1.0
+    drawdown = equity / np.maximum.accumulate(equity) - 1.0
+    sigma = float(daily.std(ddof=1))
+    years = len(equity) / TRADING_DAYS
+    return {
+        "max_drawdown": round(float(drawdown.min()) * 100, 2),
+        "cagr": round(float((equity[-1] / equity[0]) ** (1 / years) - 1) * 100, 2) if equity[-1] > 0 else None,
+        "sharpe": round(float(daily.mean()) / sigma * math.sqrt(TRADING_DAYS), 3) if sigma > 0 else None,
+        "final_equity": round(float(equity[-1])),
+    }
+
+
+def run_backtest(rule, bars, fundamentals=None, initial_cash=None, fee_rate=None):
+    """
+    rule: rule_json 또는 컴파일된 Plan
+    """
+    plan = rule if isinstance(rule, Plan) else get_plan(rule)
+    buy, sell = plan.evaluate(bars, fundamentals)
+    return simulate(
+        bars, buy, sell,
+        settings.BACKTEST_INITIAL_CASH if initial_cash is None else initial_cash,
+        settings.BACKTEST_FEE_RATE if fee_rate is None else fee_rate,
+    )
+
+
+# ─────────────────────────────────────────────
+# 실행 + 저장
+# ─────────────────────────────────────────────
+def backtest_strategy(strategy, code, start=None, end=None, initial_cash=None):
+    """
+    strategy 를 code 한 종목의 [start, end] 일봉으로 돌리고 StrategyRun 과 StrategyTrade 를 저장한다.
+    같은 규칙/구간/데이터의 결과가 캐시에 있으면 다시 계산하지 않는다 (result_cache).
+    봉이 없으면 ValueError, 규칙이 잘못되면 RuleError (ValueError 의 하위 클래스)
+    """
+    plan = get_plan(strategy.rule_json)
+    start, end = backtest_period(start, end)
+    initial_cash = initial_cash or settings.BACKTEST_INITIAL_CASH
+    fundamentals = fetch_fundamentals(code)
+    key = result_key(
+        plan, [code], start, end, initial_cash, settings.BACKTEST_FEE_RATE,
+        [fundamentals] if plan.needs_fundamentals() else None,
+    )
+    cached = get_result(key)
+    if cached is not None:
+        return save_run(strategy, cached, {**cached.stats, "cached": True}, [code], start, end, cached.trades)
+
+    _, _, bars = load_bars(code, start, end)
+    started = time.perf_counter()
+    result = run_backtest(plan, bars, fundamentals, initial_cash)
+    stats = {**result.stats, "elapsed_ms": round((time.perf_counter() - started) * 1000, 3)}
+    trades = fill_rows(code, result, bars)
+    store_result(key, result.total_return, stats, trades)
+    return save_run(strategy, result, stats, [code], start, end, trades)
+
+
+def backtest_period(start=None, end=None):
+    """
+    구간을 주지 않으면 최근 BACKTEST_DEFAULT_YEARS 년
+    """
+    end = end or timezone.localdate()
+    return start or end - timedelta(days=365 * settings.BACKTEST_DEFAULT_YEARS), end
+
+
+def load_bars(code, start=None, end=None):
+    """
+    (start, end, 일봉 배열). 봉이 없으면 ValueError
+    """
+    start, end = backtest_period(start, end)
+    bars = fetch_bars(code, start, end)
+    if len(bars["close"]) < 2:
+        raise ValueError(f"{code} 의 {start} ~ {end} 일봉이 없습니다")
+    return start, end, bars
+
+
+def fill_rows(code, result, bars):
+    """
+    save_run 에 넘길 체결 목록
+    """
+    return [(code, fill.side, fill.price, fill.quantity, bars["ts"][fill.index]) for fill in result.fills]
+
+
+def save_run(strategy, result, stats, universe, start, end, trades):
+    """
+    result: total_return 이 있는 결과 (BacktestResult, PortfolioResult, CachedResult)
+    trades: (종목 코드, buy/sell, 가격, 수량, datetime64 체결 시각) 목록
+    """
+    with transaction.atomic():
+        run = StrategyRun.objects.create(
+            strategy=strategy,
+            mode=StrategyRun.BACKTEST,
+            total_return=_clamp_return(result.total_return),
+            period_start=start,
+            period_end=end,
+            universe=universe,
+            stats=stats,
+        )
+        StrategyTrade.objects.bulk_create([
+            StrategyTrade(
+                run=run, stock_code=code, trade_type=side, price=round(price), quantity=int(quantity),
+                traded_at=_to_datetime(ts),
+            )
+            for code, side, price, quantity, ts in trades
+        ], batch_size=5000)
+        run.ended_at = timezone.now()
+        run.save(update_fields=["ended_at"])
+    return run
+
+
+def _clamp_return(value):
+    # DecimalField(max_digits=7, decimal_places=2)
+    return Decimal(str(round(min(max(float(value), -99999.99), 99999.99), 2)))
+
+
+def _to_datetime(ts):
+    seconds = int(np.datetime64(ts, "s").astype(np.int64))
+    return datetime.fromtimestamp(seconds, tz=dt_timezone.utc)
@@ -0,0 +1,514 @@
+# Back/strategies/services/indicators.py
+"""
+전략 지표
+
+두 가지 방식으로 같은 값을 낸다.
+    배치(batch)   : 봉 배열 전체를 한 번에 계산 (백테스트). 시간이 0번 축이라 (일 × 종목) 행렬도 그대로 받는다
+    증분(stream)  : 새 봉 하나마다 O(1) 로 갱신 (실시간). 상태는 종목 수 길이의 배열이라 여러 종목을 한 번에 갱신한다
+두 방식은 덧셈/곱셈 순서까지 같게 맞춰 두었으므로 결과가 비트 단위로 같다.
+    - 이동합계는 "합 += (새 값 - 빠지는 값)" (배치는 그 차이를 cumsum)
+    - EMA/와일더 평활은 첫 period 개 평균으로 시작해 "y += alpha × (x - y)"
+증분 계산기의 peek 은 상태를 바꾸지 않고 "이 봉이 들어오면 나올 값" 을 낸다 (장중 임시 봉, strategies.services.live_runner).
+
+INDICATORS 는 rule_json 에서 쓸 수 있는 지표 이름 → Indicator(배치 함수, 증분 클래스, 파라미터 기본값, 워밍업 봉 수) 이다.
+값이 아직 없는 구간은 nan 이다.
+"""
+from collections import namedtuple
+
+import numpy as np
+
+Indicator = namedtuple("Indicator", ["batch", "stream", "defaults", "warmup"])
+
+
+# ─────────────────────────────────────────────
+# 배치
+# ─────────────────────────────────────────────
+def _moving_sum(x, period):
+    """
+    t 까지 최근 period 개의 합 (t < period - 1 도 그때까지의 합)
+    """
+    d = np.array(x, dtype=np.float64)
+    d[period:] -= x[:-period]
+    return np.cumsum(d, axis=0)
+
+
+def _recursive(x, start, seed, alpha):
+    """
+    y[start] = seed, 이후 y[t] = y[t-1] + alpha × (x[t] - y[t-1])
+    """
+    out = np.full(x.shape, np.nan)
+    if start >= len(x):
+        return out
+    if x.ndim == 1:
+        # 1차원은 파이썬 float 로 도는 편이 NumPy 스칼라보다 훨씬 빠르다 (연산 결과는 같다)
+        y = float(seed)
+        values = [y]
+        for value in x[start + 1:].tolist():
+            y = y + alpha * (value - y)
+            values.append(y)
+        out[start:] = values
+    else:
+        y = np.array(seed, dtype=np.float64)
+        out[start] = y
+        for t in range(start + 1, len(x)):
+            y = y + alpha * (x[t] - y)
+            out[t] = y
+    return out
+
+
+def _seeded(x, period, alpha, offset=0):
+    """
+    x[offset:] 의 첫 period 개 평균으로 시작하는 지수 평활
+    """
+    start = offset + period - 1
+    if start >= len(x):
+        return np.full(x.shape, np.nan)
+    seed = np.cumsum(x[offset:start + 1], axis=0)[-1] / period
+    return _recursive(x, start, seed, alpha)
+
+
+def sma(x, period):
+    out = np.full(np.shape(x), np.nan)
+    if period <= len(x):
+        out[period - 1:] = _moving_sum(x, period)[period - 1:] / period
+    return out
+
+
+def ema(x, period):
+    return _seeded(np.asarray(x, dtype=np.float64), period, 2.0 / (period + 1))
+
+
+def rsi(x, period):
+    """
+    와일더 RSI = 100 × 평균 상승 / (평균 상승 + 평균 하락). 둘 다 0 이면 50
+    """
+    x = np.asarray(x, dtype=np.float64)
+    diff = np.zeros(x.shape)
+    diff[1:] = x[1:] - x[:-1]
+    gain = _seeded(np.maximum(diff, 0.0), period, 1.0 / period, offset=1)
+    loss = _seeded(np.maximum(-diff, 0.0), period, 1.0 / period, offset=1)
+    total = gain + loss
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(total > 0, 100.0 * gain / total, np.where(np.isnan(total), np.nan, 50.0))
+
+
+def macd(x, fast, slow, signal):
+    """
+    (MACD 선, 시그널 선, 히스토그램)
+    """
+    x = np.asarray(x, dtype=np.float64)
+    line = ema(x, fast) - ema(x, slow)
+    signal_line = _seeded(line, signal, 2.0 / (signal + 1), offset=slow - 1)
+    return line, signal_line, line - signal_line
+
+
+def bollinger(x, period, k):
+    """
+    (중심선, 상단, 하단). 표준편차는 모집단 기준
+    """
+    x = np.asarray(x, dtype=np.float64)
+    mid = sma(x, period)
+    out = np.full(x.shape, np.nan)
+    if period <= len(x):
+        squares = _moving_sum(x * x, period)[period - 1:] / period
+        out[period - 1:] = np.sqrt(np.maximum(squares - mid[period - 1:] * mid[period - 1:], 0.0))
+    return mid, mid + k * out, mid - k * out
+
+
+def atr(high, low, close, period):
+    high, low, close = (np.asarray(values, dtype=np.float64) for values in (high, low, close))
+    tr = high - low
+    if len(close) > 1:
+        prev = close[:-1]
+        tr[1:] = np.maximum(np.maximum(tr[1:], np.abs(high[1:] - prev)), np.abs(low[1:] - prev))
+    return _seeded(tr, period, 1.0 / period)
+
+
+def pct_change(x, period):
+    x = np.asarray(x, dtype=np.float64)
+    out = np.full(x.shape, np.nan)
+    if period < len(x):
+        out[period:] = (x[period:] / x[:-period] - 1.0) * 100
+    return out
+
+
+# ─────────────────────────────────────────────
+# 증분
+# ─────────────────────────────────────────────
+class _State:
+    """
+    peek 을 위한 상태 저장/복원. 상태 배열은 제자리에서 바꾸지 않고 새로 만들어 넣으므로 참조만 저장하면 된다
+    (제자리에 쓰는 링 버퍼는 _Ring 이 덮어쓸 행만 따로 저장한다)
+    """
+
+    def _save(self):
+        return {name: value._save() if isinstance(value, _State) else value for name, value in self.__dict__.items()}
+
+    def _restore(self, saved):
+        for name, value in saved.items():
+            current = self.__dict__[name]
+            if isinstance(current, _State):
+                current._restore(value)
+            else:
+                self.__dict__[name] = value
+
+
+class Stream(_State):
+    """
+    update(open, high, low, close, volume) → 현재 값. 인자는 종목 수 길이의 배열 (또는 스칼라)
+    peek(...) 은 같은 값을 내지만 상태는 그대로 둔다
+    """
+
+    def __init__(self, width=1):
+        self.width = width
+        self.count = 0
+
+    def peek(self, open_, high, low, close, volume):
+        saved = self._save()
+        try:
+            return self.update(open_, high, low, close, volume)
+        finally:
+            self._restore(saved)
+
+    def _nan(self):
+        return np.full(self.width, np.nan)
+
+
+class _Field(Stream):
+    def __init__(self, field, width=1):
+        super().__init__(width)
+        self.field = field
+
+    def update(self, open_, high, low, close, volume):
+        return np.asarray((open_, high, low, close, volume)[self.field], dtype=np.float64)
+
+
+class _Ring(_State):
+    """최근 period 개 값. push 는 밀려나는 값(처음 period 번은 0)을 돌려준다"""
+
+    def __init__(self, period, width):
+        self.period = period
+        self.values = np.zeros((period, width))
+        self.pos = 0
+
+    def push(self, value):
+        old = self.values[self.pos].copy()
+        self.values[self.pos] = value
+        self.pos = (self.pos + 1) % self.period
+        return old
+
+    def _save(self):
+        return self.pos, self.values[self.pos].copy()
+
+    def _restore(self, saved):
+        self.pos, row = saved
+        self.values[self.pos] = row
+
+
+class _MovingSum(_State):
+    """링 버퍼 + 이동합계. 합 += (새 값 - 빠지는 값)"""
+
+    def __init__(self, period, width):
+        self.ring = _Ring(period, width)
+        self.total = np.zeros(width)
+
+    def push(self, value):
+        self.total = self.total + (value - self.ring.push(value))
+        return self.total
+
+
+class _Seeded(_State):
+    """첫 period 개 평균으로 시작하는 지수 평활. 시작 전에는 None"""
+
+    def __init__(self, period, alpha, width):
+        self.period = period
+        self.alpha = alpha
+        self.total = np.zeros(width)
+        self.seen = 0
+        self.value = None
+
+    def push(self, x):
+        if self.value is not None:
+            self.value = self.value + self.alpha * (x - self.value)
+        else:
+            self.total = self.total + x
+            self.seen += 1
+            if self.seen == self.period:
+                self.value = self.total / self.period
+        return self.value
+
+
+class SMAStream(Stream):
+    def __init__(self, period, width=1):
+        super().__init__(width)
+        self.period = period
+        self._sum = _MovingSum(period, width)
+
+    def update(self, open_, high, low, close, volume):
+        self.count += 1
+        total = self._sum.push(close)
+        return total / self.period if self.count >= self.period else self._nan()
+
+
+class EMAStream(Stream):
+    def __init__(self, period, width=1):
+        super().__init__(width)
+        self._ema = _Seeded(period, 2.0 / (period + 1), width)
+
+    def update(self, open_, high, low, close, volume):
+        value = self._ema.push(np.asarray(close, dtype=np.float64))
+        return value if value is not None else self._nan()
+
+
+class RSIStream(Stream):
+    def __init__(self, period, width=1):
+        super().__init__(width)
+        self._gain = _Seeded(period, 1.0 / period, width)
+        self._loss = _Seeded(period, 1.0 / period, width)
+        self._prev = None
+
+    def update(self, open_, high, low, close, volume):
+        close = np.array(close, dtype=np.float64)
+        prev, self._prev = self._prev, close
+        if prev is None:
+            return self._nan()
+        diff = close - prev
+        gain = self._gain.push(np.maximum(diff, 0.0))
+        loss = self._loss.push(np.maximum(-diff, 0.0))
+        if gain is None:
+            return self._nan()
+        total = gain + loss
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.where(total > 0, 100.0 * gain / total, 50.0)
+
+
+class MACDStream(Stream):
+    """output: 0 = MACD 선, 1 = 시그널, 2 = 히스토그램"""
+
+    def __init__(self, fast, slow, signal, output=0, width=1):
+        super().__init__(width)
+        self.output = output
+        self._fast = _Seeded(fast, 2.0 / (fast + 1), width)
+        self._slow = _Seeded(slow, 2.0 / (slow + 1), width)
+        self._signal = _Seeded(signal, 2.0 / (signal + 1), width)
+
+    def update(self, open_, high, low, close, volume):
+        close = np.asarray(close, dtype=np.float64)
+        fast, slow = self._fast.push(close), self._slow.push(close)
+        if fast is None or slow is None:
+            return self._nan()
+        line = fast - slow
+        if self.output == 0:
+            self._signal.push(line)
+            return line
+        signal = self._signal.push(line)
+        if signal is None:
+            return self._nan()
+        return signal if self.output == 1 else line - signal
+
+
+class BollingerStream(Stream):
+    """band: 0 = 중심선, 1 = 상단, -1 = 하단"""
+
+    def __init__(self, period, k, band=1, width=1):
+        super().__init__(width)
+        self.period = period
+        self.k = k
+        self.band = band
+        self._sum = _MovingSum(period, width)
+        self._squares = _MovingSum(period, width)
+
+    def update(self, open_, high, low, close, volume):
+        close = np.asarray(close, dtype=np.float64)
+        self.count += 1
+        total = self._sum.push(close)
+        squares = self._squares.push(close * close)
+        if self.count < self.period:
+            return self._nan()
+        mid = total / self.period
+        if self.band == 0:
+            return mid
+        std = np.sqrt(np.maximum(squares / self.period - mid * mid, 0.0))
+        return mid + self.k * std if self.band > 0 else mid - self.k * std
+
+
+class ATRStream(Stream):
+    def __init__(self, period, width=1):
+        super().__init__(width)
+        self._atr = _Seeded(period, 1.0 / period, width)
+        self._prev = None
+
+    def update(self, open_, high, low, close, volume):
+        high, low = np.asarray(high, dtype=np.float64), np.asarray(low, dtype=np.float64)
+        tr = high - low
+        if self._prev is not None:
+            tr = np.maximum(np.maximum(tr, np.abs(high - self._prev)), np.abs(low - self._prev))
+        self._prev = np.array(close, dtype=np.float64)
+        value = self._atr.push(tr)
+        return value if value is not None else self._nan()
+
+
+class ReturnStream(Stream):
+    def __init__(self, period, width=1):
+        super().__init__(width)
+        self.period = period
+        self._ring = _Ring(period, width)
+
+    def update(self, open_, high, low, close, volume):
+        close = np.asarray(close, dtype=np.float64)
+        old = self._ring.push(close)
+        self.count += 1
+        if self.count <= self.period:
+            return self._nan()
+        return (close / old - 1.0) * 100
+
+
+class RatioStream(Stream):
+    """종가 / 주당 지표 (PER, PBR). per_share 는 종목 수 길이의 배열"""
+
+    def __init__(self, per_share, width=1):
+        super().__init__(width)
+        per_share = np.asarray(per_share, dtype=np.float64)
+        self.per_share = np.where(per_share > 0, per_share, np.nan)
+
+    def update(self, open_, high, low, close, volume):
+        return np.asarray(close, dtype=np.float64) / self.per_share
+
+
+# ─────────────────────────────────────────────
+# 레지스트리
+# ─────────────────────────────────────────────
+def _per_share(fundamentals, key):
+    """
+    재무 지표 dict (또는 종목별 dict 목록) → 주당 값. 없거나 0 이하(적자/자본잠식)면 nan
+    """
+    if isinstance(fundamentals, dict):
+        value = fundamentals.get(key)
+        return value if value and value > 0 else np.nan
+    return np.array([_per_share(item, key) for item in fundamentals])
+
+
+def _ratio(key):
+    def batch(bars, fundamentals):
+        return bars["close"] / _per_share(fundamentals, key)
+    return batch
+
+
+def _field(name, index):
+    return Indicator(
+        lambda bars, fundamentals: np.asarray(bars[name], dtype=np.float64),
+        lambda fundamentals, width: _Field(index, width),
+        {}, lambda: 1,
+    )
+
+
+_MACD = {"fast": 12, "slow": 26, "signal": 9}
+_BANDS = {"period": 20, "k": 2.0}
+
+INDICATORS = {
+    "OPEN": _field("open", 0),
+    "HIGH": _field("high", 1),
+    "LOW": _field("low", 2),
+    "CLOSE": _field("close", 3),
+    "VOLUME": _field("volume", 4),
+    "SMA": Indicator(
+        lambda bars, fundamentals, period: sma(bars["close"], period),
+        lambda fundamentals, width, period: SMAStream(period, width),
+        {"period": 20}, lambda period: period,
+    ),
+    "EMA": Indicator(
+        lambda bars, fundamentals, period: ema(bars["close"], period),
+        lambda fundamentals, width, period: EMAStream(period, width),
+        {"period": 20}, lambda period: period,
+    ),
+    "RSI": Indicator(
+        lambda bars, fundamentals, period: rsi(bars["close"], period),
+        lambda fundamentals, width, period: RSIStream(period, width),
+        {"period": 14}, lambda period: period + 1,
+    ),
+    "MACD": Indicator(
+        lambda bars, fundamentals, **params: macd(bars["close"], **params)[0],
+        lambda fundamentals, width, **params: MACDStream(**params, output=0, width=width),
+        _MACD, lambda fast, slow, signal: slow,
+    ),
+    "MACD_SIGNAL": Indicator(
+        lambda bars, fundamentals, **params: macd(bars["close"], **params)[1],
+        lambda fundamentals, width, **params: MACDStream(**params, output=1, width=width),
+        _MACD, lambda fast, slow, signal: slow + signal - 1,
+    ),
+    "MACD_HIST": Indicator(
+        lambda bars, fundamentals, **params: macd(bars["close"], **params)[2],
+        lambda fundamentals, width, **params: MACDStream(**params, output=2, width=width),
+        _MACD, lambda fast, slow, signal: slow + signal - 1,
+    ),
+    "BB_UPPER": Indicator(
+        lambda bars, fundamentals, period, k: bollinger(bars["close"], period, k)[1],
+        lambda fundamentals, width, period, k: BollingerStream(period, k, 1, width),
+        _BANDS, lambda period, k: period,
+    ),
+    "BB_LOWER": Indicator(
+        lambda bars, fundamentals, period, k: bollinger(bars["close"], period, k)[2],
+        lambda fundamentals, width, period, k: BollingerStream(period, k, -1, width),
+        _BANDS, lambda period, k: period,
+    ),
+    "ATR": Indicator(
+        lambda bars, fundamentals, period: atr(bars["high"], bars["low"], bars["close"], period),
+        lambda fundamentals, width, period: ATRStream(period, width),
+        {"period": 14}, lambda period: period,
+    ),
+    "RETURN": Indicator(
+        lambda bars, fundamentals, period: pct_change(bars["close"], period),
+        lambda fundamentals, width, period: ReturnStream(period, width),
+        {"period": 1}, lambda period: period + 1,
+    ),
+    "PER": Indicator(
+        _ratio("eps"),
+        lambda fundamentals, width: RatioStream(_per_share(fundamentals, "eps"), width),
+        {}, lambda: 1,
+    ),
+    "PBR": Indicator(
+        _ratio("bps"),
+        lambda fundamentals, width: RatioStream(_per_share(fundamentals, "bps"), width),
+        {}, lambda: 1,
+    ),
+}
+
+# 재무 지표가 필요한 지표 (없으면 종목별 재무 지표를 읽지 않아도 된다)
+FUNDAMENTAL_INDICATORS = {"PER", "PBR"}
+
+# rule_json 에서 받는 다른 이름
+ALIASES = {
+    "PRICE": "CLOSE", "종가": "CLOSE", "시가": "OPEN", "고가": "HIGH", "저가": "LOW", "거래량": "VOLUME",
+    "BB_MID": "SMA", "수익률": "RETURN",
+}
+
+# 정수 파라미터 / 실수 파라미터(기본값이 float 인 것)의 허용 범위
+PARAM_RANGE = (1, 2000)
+FLOAT_PARAM_RANGE = (0.0, 10.0)
+
+
+def validate(name, params):
+    """
+    파라미터 조합 검사. 잘못되면 ValueError
+    """
+    if "fast" in params and params["fast"] >= params["slow"]:
+        raise ValueError(f"{name}: fast({params['fast']}) 는 slow({params['slow']}) 보다 작아야 합니다")
+
+
+def compute(name, params, bars, fundamentals):
+    return INDICATORS[name].batch(bars, fundamentals, **params)
+
+
+def make_stream(name, params, fundamentals=None, width=1):
+    """
+    증분 계산기. fundamentals 는 종목별 재무 지표 dict 목록 (width 개)
+    """
+    return INDICATORS[name].stream(fundamentals if fundamentals is not None else [{}] * width, width, **params)
+
+
+def warmup(name, params):
+    """
+    값이 처음 나오기까지 필요한 봉 수
+    """
+    return INDICATORS[name].warmup(**params)
+
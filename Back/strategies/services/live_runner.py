@@ -0,0 +1,463 @@
+# Back/strategies/services/live_runner.py
+"""
+실시간 전략 실행기 (run_strategy_runner)
+
+is_live 전략을 한 번 읽어 Plan 으로 컴파일하고, 시세가 들어올 때마다 증분 지표로 신호를 계산해
+시뮬레이터 체결(execute_trade, strategy_run=전략의 LIVE 실행)로 낸다.
+    - 지표는 전략마다가 아니라 IndicatorSpec 마다 증분 계산기 하나(폭 = 실시간 전략이 쓰는 모든 종목)로 계산한다.
+      SMA(20) 을 쓰는 전략이 수천 개여도 틱마다 벡터 연산 한 번이다
+    - 조건은 Plan.digest 마다 한 번, 그 Plan 을 쓰는 전략들의 종목 합집합 위에서 평가한다 (_PlanGroup).
+      다리(전략 × 종목)의 보유/체결 여부도 배열이라 전략 수와 상관없이 묶음마다 몇 번의 벡터 연산으로 끝난다
+    - 일봉 기준이다. 계산기는 어제까지의 일봉으로 데워 두고, 장중에는 오늘 시세로 만든 임시 봉을 peek 해서
+      (상태를 바꾸지 않고) 값을 낸다. 날짜가 바뀌면 전날 임시 봉을 update 로 확정한다.
+      시세에는 거래량이 없으므로 장중 VOLUME 은 nan 이다 (거래량 조건은 참이 되지 않음)
+    - 신호는 백테스트와 같다. 보유 중이 아닌데 매수 조건이면 사고, 보유 중인데 매도 조건(없으면 매수 조건이 풀림)이면
+      판다. 장중 신호가 깜박여도 왕복 매매하지 않도록 같은 전략/종목은 하루에 한 번만 주문한다
+    - 매수 수량 = live_budget // 가격, 매도는 전량. 먼저 팔고 산다. 한 틱에 LIVE_RUNNER_MAX_ORDERS 건까지만 내고
+      나머지는 다음 틱으로 미뤄 틱 지연을 묶어 둔다
+    - 틱마다 단계별(시세/지표/신호/주문) 걸린 시간을 TickHistogram 에 모은다
+보유 수량과 마지막 체결일은 그 실행의 VirtualTrade 로 복원하므로 실행기를 다시 띄워도 이어서 돈다.
+주기적으로 다시 적재할 때는 메모리의 다리 상태(거부된 주문의 주문일, 직접 팔아 비운 보유 수량 등
+VirtualTrade 로는 알 수 없는 것)를 실행 id 와 종목으로 이어 붙인다.
+"""
+import logging
+import threading
+import time
+from collections import namedtuple
+from datetime import timedelta
+
+import numpy as np
+from django.conf import settings
+from django.db.models import Max, Q, Sum
+from django.utils import timezone
+
+from simulator.models import VirtualPortfolio, VirtualTrade
+from simulator.services.execution import execute_trade
+from simulator.services.positions import InsufficientQuantityError, TradeRejected
+from simulator.services.price_service import fetch_quotes
+from simulator.services.quote_refresher import is_market_open
+from simulator.services.symbol_index import get_symbol_index
+from strategies.models import Strategy, StrategyRun
+from strategies.services.indicators import FUNDAMENTAL_INDICATORS, make_stream
+from strategies.services.portfolio import load_universe, universe_fundamentals
+from strategies.services.rules import Plan, RuleError, get_plan
+
+logger = logging.getLogger(__name__)
+
+# run: 이 전략의 LIVE StrategyRun, codes: 실제로 돌리는 종목 코드 (봉이 없는 종목은 빠진다)
+LiveStrategy = namedtuple("LiveStrategy", ["id", "run", "portfolio", "codes", "budget"])
+# group/leg: 어느 _PlanGroup 의 몇 번째 다리인지
+LiveOrder = namedtuple("LiveOrder", ["group", "leg", "side"])
+
+FIELDS = ("open", "high", "low", "close", "volume")
+PHASES = ("quotes", "indicators", "signals", "orders", "tick")
+BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+
+
+# ─────────────────────────────────────────────
+# 틱 시간 히스토그램
+# ─────────────────────────────────────────────
+class TickHistogram:
+    """
+    단계별 걸린 시간 분포. 구간 경계는 BUCKETS_MS (마지막 칸은 그보다 긴 것)
+    tick 은 시세 조회를 뺀 한 틱 처리 시간이다 (지표 + 신호 + 주문)
+    """
+
+    def __init__(self, phases=PHASES):
+        self._lock = threading.Lock()
+        self.counts = {phase: np.zeros(len(BUCKETS_MS) + 1, dtype=np.int64) for phase in phases}
+        self.totals = dict.fromkeys(phases, 0.0)
+        self.maxima = dict.fromkeys(phases, 0.0)
+
+    def record(self, phase, seconds):
+        ms = seconds * 1000
+        with self._lock:
+            self.counts[phase][np.searchsorted(BUCKETS_MS, ms)] += 1
+            self.totals[phase] += ms
+            self.maxima[phase] = max(self.maxima[phase], ms)
+
+    def report(self):
+        """
+        {단계: {count, mean_ms, max_ms, p50_ms, p99_ms, buckets}}. 백분위는 그 값이 든 칸의 위쪽 경계 (최댓값을 넘지 않게)
+        """
+        with self._lock:
+            out = {}
+            for phase, counts in self.counts.items():
+                n = int(counts.sum())
+                if not n:
+                    continue
+                cumulative = np.cumsum(counts)
+                longest = round(self.maxima[phase], 3)
+                bounds = BUCKETS_MS + (longest,)
+                out[phase] = {
+                    "count": n,
+                    "mean_ms": round(self.totals[phase] / n, 3),
+                    "max_ms": longest,
+                    "p50_ms": min(bounds[int(np.searchsorted(cumulative, 0.5 * n))], longest),
+                    "p99_ms": min(bounds[int(np.searchsorted(cumulative, 0.99 * n))], longest),
+                    "buckets": {
+                        (f"<={bound}ms" if i < len(BUCKETS_MS) else f">{BUCKETS_MS[-1]}ms"): int(count)
+                        for i, (bound, count) in enumerate(zip(bounds, counts)) if count
+                    },
+                }
+            return out
+
+    def format(self):
+        lines = []
+        for phase, row in self.report().items():
+            buckets = " ".join(f"{bound}:{count}" for bound, count in row["buckets"].items())
+            lines.append(
+                f"{phase:<10} n={row['count']:<6} mean {row['mean_ms']}ms  p50 {row['p50_ms']}ms  "
+                f"p99 {row['p99_ms']}ms  max {row['max_ms']}ms  [{buckets}]"
+            )
+        return lines
+
+
+# ─────────────────────────────────────────────
+# 같은 Plan 을 쓰는 전략 묶음
+# ─────────────────────────────────────────────
+class _PlanGroup:
+    """
+    다리(leg) = (전략, 종목) 하나. columns 는 묶음이 쓰는 종목 열(실행기 전체 기준),
+    slot/owner 는 다리마다 columns 안의 위치와 strategies 안의 위치
+    """
+
+    def __init__(self, plan, strategies, column_of, held, traded):
+        self.plan = plan
+        self.strategies = strategies
+        legs = [(i, column_of[code], (s.run.id, code)) for i, s in enumerate(strategies) for code in s.codes]
+        self.columns, self.slot = np.unique([column for _, column, _ in legs], return_inverse=True)
+        self.owner = np.array([i for i, _, _ in legs], dtype=np.int64)
+        self.held = np.array([held.get(key, 0) for _, _, key in legs], dtype=np.int64)
+        self.traded = np.array([traded.get(key, 0) for _, _, key in legs], dtype=np.int64)
+
+    def __len__(self):
+        return len(self.owner)
+
+    def signals(self, current, fresh, today):
+        """
+        → (매도할 다리, 매수할 다리). fresh: 이번 틱에 새 시세가 들어온 종목 열
+        """
+        values = [current[spec][self.columns] for spec in self.plan.nodes]
+        n = len(self.columns)
+        buy = Plan.masks(self.plan.buy, values, n)
+        sell = Plan.masks(self.plan.sell, values, n) if self.plan.sell is not None else ~buy
+        ready = fresh[self.columns][self.slot] & (self.traded != today)
+        held = self.held > 0
+        return np.flatnonzero(sell[self.slot] & held & ready), np.flatnonzero(buy[self.slot] & ~held & ready)
+
+
+# ─────────────────────────────────────────────
+# 실행기
+# ─────────────────────────────────────────────
+class LiveRunner:
+    def __init__(self):
+        self.strategies = []
+        self.groups = []
+        self.codes = []             # 종목 열 순서
+        self.names = {}
+        self.streams = {}           # IndicatorSpec → 증분 계산기 (폭 = len(codes))
+        self.histogram = TickHistogram()
+        self._column = {}           # 종목 코드 → 열
+        self._signature = None
+        self._loaded_at = None
+        self._day = None
+        self._bar = None            # 오늘 임시 봉 {open, high, low, close, volume}
+        self._quoted = None         # 오늘 시세가 한 번이라도 들어온 종목 열
+
+    def __len__(self):
+        return len(self.strategies)
+
+    # ── 적재 ──
+    def load(self):
+        """
+        is_live 전략을 다시 읽는다. 종목/지표 구성이 바뀌었으면 계산기를 새로 데운다. 실시간 전략 수를 반환
+        """
+        self._loaded_at = time.monotonic()
+        kept_held, kept_traded = self._leg_state()     # 계산기를 새로 만들면 열 순서가 바뀌므로 먼저
+        index = get_symbol_index()
+        rows = []
+        for strategy in Strategy.objects.filter(is_live=True).order_by("id"):
+            try:
+                plan = get_plan(strategy.rule_json)
+            except RuleError as exc:
+                logger.warning("실시간 전략 %s 의 규칙 오류: %s", strategy.id, exc)
+                continue
+            if plan.ranking is not None:
+                logger.warning("실시간 전략 %s: rank 를 쓰는 규칙은 실시간으로 돌리지 않습니다", strategy.id)
+                continue
+            codes = [code for code in dict.fromkeys(strategy.live_symbols) if index.resolve(code) is not None]
+            if codes:
+                rows.append((strategy, plan, codes))
+
+        codes = sorted({code for _, _, strategy_codes in rows for code in strategy_codes})
+        specs = sorted({spec for _, plan, _ in rows for spec in plan.nodes})
+        if (codes, specs) != self._signature:
+            self._build(codes, specs, max((plan.lookback() for _, plan, _ in rows), default=1))
+            self._signature = (codes, specs)
+        self.names = {code: index.resolve(code).name for code in self.codes}
+
+        runs = self._open_runs(rows)
+        users = {strategy.user_id for strategy, _, _ in rows}
+        portfolios = {portfolio.user_id: portfolio for portfolio in VirtualPortfolio.objects.filter(user_id__in=users)}
+        entries = []
+        for strategy, plan, strategy_codes in rows:
+            if strategy.user_id not in portfolios:
+                portfolios[strategy.user_id], _ = VirtualPortfolio.objects.get_or_create(user_id=strategy.user_id)
+            live = LiveStrategy(strategy.id, runs[strategy.id], portfolios[strategy.user_id], strategy_codes,
+                                strategy.live_budget)
+            entries.append((live, plan))
+        held, traded = _restore(runs.values())
+        held.update(kept_held)
+        for key, day in kept_traded.items():
+            traded[key] = max(traded.get(key, 0), day)
+        self.assign(entries, held, traded)
+        return len(self.strategies)
+
+    def _leg_state(self):
+        """
+        지금 묶음들의 ({(실행 id, 종목): 보유 수량}, {(실행 id, 종목): 마지막 주문일 ordinal})
+        """
+        held, traded = {}, {}
+        for group in self.groups:
+            for leg in range(len(group)):
+                key = (group.strategies[group.owner[leg]].run.id, self.codes[group.columns[group.slot[leg]]])
+                held[key] = int(group.held[leg])
+                traded[key] = int(group.traded[leg])
+        return held, traded
+
+    def _build(self, codes, specs, lookback):
+        """
+        어제까지의 일봉으로 계산기를 데운다
+        """
+        end = timezone.localdate() - timedelta(days=1)
+        start = end - timedelta(days=max(settings.LIVE_RUNNER_WARMUP_DAYS, lookback * 2))
+        # 요청이 아니므로 제공자 조회 마감을 두지 않는다
+        bars = load_universe(codes, start, end, deadline=0)
+        fundamentals = None
+        if any(spec.name in FUNDAMENTAL_INDICATORS for spec in specs):
+            fundamentals = universe_fundamentals(codes, deadline=0)
+        self.warm(codes, bars, specs, fundamentals)
+        if codes:
+            logger.info("실시간 실행기: 종목 %d개, 지표 %d개를 일봉 %s ~ %s 로 데움", len(self.codes), len(specs), start, end)
+
+    def warm(self, codes, bars, specs, fundamentals=None):
+        """
+        codes 열 순서의 bar_matrix 로 specs 계산기를 만들고 끝까지 update 한다. 봉이 하나도 없는 종목은 뺀다
+        """
+        has = bars["listed"].any(axis=0) if len(codes) else np.zeros(0, dtype=bool)
+        dropped = [code for code, ok in zip(codes, has) if not ok]
+        if dropped:
+            logger.warning("일봉이 없어 실시간 실행에서 뺀 종목: %s", ", ".join(dropped[:20]))
+        self.codes = [code for code, ok in zip(codes, has) if ok]
+        self._column = {code: j for j, code in enumerate(self.codes)}
+        if fundamentals is not None:
+            fundamentals = [item for item, ok in zip(fundamentals, has) if ok]
+
+        width = len(self.codes)
+        self.streams = {spec: make_stream(spec.name, dict(spec.params), fundamentals, width) for spec in specs}
+        close = np.full(width, np.nan)
+        if width:
+            history = _history({name: bars[name][:, has] for name in FIELDS})
+            for t in range(len(history["close"])):
+                row = [history[name][t] for name in FIELDS]
+                for stream in self.streams.values():
+                    stream.update(*row)
+            if len(history["close"]):
+                close = history["close"][-1].copy()
+        self._new_day(timezone.localdate().toordinal(), close)
+
+    def assign(self, entries, held=None, traded=None):
+        """
+        entries: (LiveStrategy, Plan) 목록 → Plan.digest 별 묶음. 계산기가 없는 종목은 빠진다
+        held/traded: {(실행 id, 종목): 보유 수량 / 마지막 체결일 ordinal}
+        """
+        by_plan = {}
+        for live, plan in entries:
+            codes = [code for code in live.codes if code in self._column]
+            if codes:
+                by_plan.setdefault(plan.digest, (plan, []))[1].append(live._replace(codes=codes))
+        self.groups = [
+            _PlanGroup(plan, members, self._column, held or {}, traded or {}) for plan, members in by_plan.values()
+        ]
+        self.strategies = [live for group in self.groups for live in group.strategies]
+
+    def _open_runs(self, rows):
+        """
+        전략마다 열려 있는 LIVE 실행 (없으면 만든다). 더는 실시간이 아닌 전략의 실행은 닫는다
+        """
+        ids = [strategy.id for strategy, _, _ in rows]
+        StrategyRun.objects.filter(mode=StrategyRun.LIVE, ended_at__isnull=True).exclude(strategy_id__in=ids) \
+            .update(ended_at=timezone.now())
+        runs = {}
+        for run in StrategyRun.objects.filter(strategy_id__in=ids, mode=StrategyRun.LIVE, ended_at__isnull=True) \
+                .order_by("id"):
+            runs[run.strategy_id] = run
+        missing = []
+        for strategy, _, codes in rows:
+            run = runs.get(strategy.id)
+            if run is None:
+                missing.append(StrategyRun(strategy=strategy, mode=StrategyRun.LIVE, universe=codes))
+            elif run.universe != codes:
+                run.universe = codes
+                run.save(update_fields=["universe"])
+        for run in StrategyRun.objects.bulk_create(missing):
+            runs[run.strategy_id] = run
+        return runs
+
+    # ── 틱 ──
+    def _new_day(self, today, close):
+        self._day = today
+        self._bar = {"open": close, "high": close, "low": close, "close": close,
+                     "volume": np.full(len(close), np.nan)}
+        self._quoted = np.zeros(len(close), dtype=bool)
+
+    def _roll(self, today):
+        """
+        날짜가 바뀌면 전날 임시 봉을 확정한다 (시세가 없던 종목은 직전 종가로 채운 봉)
+        """
+        bar = self._bar
+        if self._quoted.any():
+            for stream in self.streams.values():
+                stream.update(bar["open"], bar["high"], bar["low"], bar["close"], bar["volume"])
+        self._new_day(today, bar["close"])
+
+    def evaluate(self, prices, now=None):
+        """
+        {종목코드: 가격} 시세를 오늘 임시 봉에 반영하고 모든 실시간 전략을 평가한다 → 낼 주문 목록 (매도 먼저)
+        """
+        started = time.perf_counter()
+        today = timezone.localdate(now).toordinal()
+        if today != self._day:
+            self._roll(today)
+
+        quoted = [(self._column[code], price) for code, price in prices.items() if price and code in self._column]
+        columns = np.array([column for column, _ in quoted], dtype=np.int64)
+        fresh = np.zeros(len(self.codes), dtype=bool)
+        fresh[columns] = True
+        bar = self._bar
+        first = fresh & ~self._quoted
+        close = bar["close"].copy()
+        close[columns] = [price for _, price in quoted]
+        bar["open"] = np.where(first, close, bar["open"])
+        bar["high"] = np.where(first, close, np.fmax(bar["high"], close))
+        bar["low"] = np.where(first, close, np.fmin(bar["low"], close))
+        bar["close"] = close
+        self._quoted |= fresh
+
+        current = {spec: stream.peek(*(bar[name] for name in FIELDS)) for spec, stream in self.streams.items()}
+        evaluated = time.perf_counter()
+
+        sells, buys = [], []
+        for group in self.groups:
+            sell, buy = group.signals(current, fresh, today)
+            sells.extend(LiveOrder(group, leg, VirtualTrade.SELL) for leg in sell.tolist())
+            buys.extend(LiveOrder(group, leg, VirtualTrade.BUY) for leg in buy.tolist())
+        self.histogram.record("indicators", evaluated - started)
+        self.histogram.record("signals", time.perf_counter() - evaluated)
+        return sells + buys
+
+    def on_quotes(self, prices, now=None):
+        """
+        evaluate 후 주문을 LIVE_RUNNER_MAX_ORDERS 건까지 낸다. 체결 수를 반환한다
+        """
+        started = time.perf_counter()
+        orders = self.evaluate(prices, now)
+        if len(orders) > settings.LIVE_RUNNER_MAX_ORDERS:
+            logger.warning("주문 %d건 중 %d건만 냅니다 (나머지는 다음 틱)", len(orders), settings.LIVE_RUNNER_MAX_ORDERS)
+        submitted = time.perf_counter()
+        filled = sum(self._execute(order) for order in orders[:settings.LIVE_RUNNER_MAX_ORDERS])
+        finished = time.perf_counter()
+        self.histogram.record("orders", finished - submitted)
+        self.histogram.record("tick", finished - started)
+        return filled
+
+    def _execute(self, order):
+        group, leg = order.group, order.leg
+        strategy = group.strategies[group.owner[leg]]
+        column = group.columns[group.slot[leg]]
+        code = self.codes[column]
+        price = int(round(self._bar["close"][column]))
+        quantity = int(group.held[leg]) if order.side == VirtualTrade.SELL else strategy.budget // price
+        # 거부되더라도 오늘은 다시 시도하지 않는다
+        group.traded[leg] = self._day
+        if quantity <= 0:
+            return 0
+        try:
+            execute_trade(strategy.portfolio, order.side, code, self.names[code], price, quantity,
+                          strategy_run=strategy.run)
+        except InsufficientQuantityError:
+            # 사용자가 직접 팔아 버린 경우. 보유하지 않은 것으로 본다
+            logger.info("실시간 전략 %s: %s 보유 수량 부족, 포지션을 비웁니다", strategy.id, code)
+            group.held[leg] = 0
+            return 0
+        except TradeRejected as exc:
+            logger.info("실시간 전략 %s: %s %s 거부 (%s)", strategy.id, order.side, code, exc)
+            return 0
+        except Exception:
+            logger.exception("실시간 전략 %s: %s %s 체결 실패", strategy.id, order.side, code)
+            return 0
+        group.held[leg] = quantity if order.side == VirtualTrade.BUY else 0
+        return 1
+
+    def tick(self):
+        if self._loaded_at is None or time.monotonic() - self._loaded_at >= settings.LIVE_RUNNER_RELOAD_INTERVAL:
+            self.load()
+        if not self.codes or not is_market_open():
+            return 0
+        started = time.perf_counter()
+        # 마감 안에 새로 얻지 못한 시세로는 주문하지 않는다
+        quotes = fetch_quotes(self.codes, deadline=settings.LIVE_RUNNER_QUOTE_DEADLINE)
+        self.histogram.record("quotes", time.perf_counter() - started)
+        return self.on_quotes({code: quote.price for code, quote in quotes.items() if not quote.stale})
+
+    def run_forever(self, stop_event=None):
+        stop_event = stop_event or threading.Event()
+        while not stop_event.is_set():
+            started = time.monotonic()
+            try:
+                filled = self.tick()
+                if filled:
+                    logger.info("실시간 전략 체결 %d건 (전략 %d개)", filled, len(self))
+            except Exception:
+                logger.exception("실시간 실행 루프 오류")
+            stop_event.wait(max(settings.LIVE_RUNNER_INTERVAL - (time.monotonic() - started), 0))
+
+
+def _history(bars):
+    """
+    데울 일봉 행렬. 빠진 날은 직전 종가, 첫 봉 이전은 첫 종가로 채운다
+    (증분 계산기는 모든 종목이 같은 날 시작하므로 앞쪽 nan 이 이동합계/평활에 섞이지 않게)
+    """
+    close = bars["close"]
+    valid = ~np.isnan(close)
+    rows = np.where(valid, np.arange(len(close))[:, None], 0)
+    np.maximum.accumulate(rows, axis=0, out=rows)
+    rows = np.maximum(rows, np.argmax(valid, axis=0))
+    close = close[rows, np.arange(close.shape[1])]
+    return {
+        **{name: np.where(np.isnan(bars[name]), close, bars[name]) for name in ("open", "high", "low")},
+        "close": close,
+        "volume": np.nan_to_num(bars["volume"]),
+    }
+
+
+def _restore(runs):
+    """
+    실행들의 VirtualTrade → ({(실행 id, 종목): 보유 수량}, {(실행 id, 종목): 마지막 체결일 ordinal})
+    """
+    held, traded = {}, {}
+    rows = (
+        VirtualTrade.objects.filter(strategy_run__in=list(runs))
+        .values("strategy_run_id", "stock_code")
+        .annotate(
+            bought=Sum("quantity", filter=Q(trade_type=VirtualTrade.BUY)),
+            sold=Sum("quantity", filter=Q(trade_type=VirtualTrade.SELL)),
+            last=Max("traded_at"),
+        )
+    )
+    for row in rows:
+        key = (row["strategy_run_id"], row["stock_code"])
+        held[key] = max((row["bought"] or 0) - (row["sold"] or 0), 0)
+        traded[key] = timezone.localtime(row["last"]).date().toordinal()
+    return held, traded
@@ -0,0 +1,298 @@
+# Back/strategies/services/portfolio.py
+"""
+종목 묶음(횡단면) 백테스트
+
+rank/top_n/rebalance 를 쓰는 규칙을 (일 수 × 종목 수) 행렬 위에서 돌린다 (행렬은 bar_store.bar_matrix).
+    1. 지표는 종목마다가 아니라 행렬 통째로 계산한다. 상장일이 다른 종목은 첫 봉 날짜가 같은 무리끼리 묶어 계산해
+       앞쪽 nan 이 이동합계/평활에 섞이지 않게 한다. 봉이 빠진 날은 직전 종가로 채운다
+    2. 리밸런싱 신호일(첫날, 그리고 주/월/분기 마지막 거래일. daily 는 매일) 종가 기준으로 편입 조건을 만족하는 종목 중
+       순위 상위 top_n 을 np.argpartition 으로 한 번에 고른다 (신호일 수 × 종목 수)
+    3. 다음 거래일 시가에 같은 비중(1/top_n)으로 맞춘다. 먼저 팔고 남은 현금 안에서 산다.
+       그날 봉이 없는 종목은 사고팔지 않는다 (리밸런싱 횟수만큼만 도는 루프, 안은 종목 벡터 연산)
+    4. 평가액 = 현금 + 보유 수량 · 종가 (봉이 없는 날은 직전 종가). 구간마다 행렬 × 벡터 한 번
+    5. 기간 끝 전에 봉이 끊긴 종목(상장 폐지)은 마지막 봉 다음 거래일에 마지막 종가로 모두 판다.
+       그대로 두면 시가가 없어 리밸런싱에서도 팔리지 않고 끝까지 들고 있게 된다
+재무 지표(PER/PBR)는 현재 값 하나로 전 기간을 계산한다 (한 종목 백테스트와 같음).
+봉 저장소나 캐시에 없는 종목은 제공자에서 스레드 풀(PORTFOLIO_FETCH_WORKERS 개)로 동시에 받고,
+PORTFOLIO_FETCH_DEADLINE 안에 다 받지 못하면 요청을 붙잡아 두지 않고 ValueError 로 끝낸다.
+"""
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, wait
+from datetime import date
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+
+from simulator.services.bar_store import bar_matrix, load_bars_many
+from simulator.services.price_service import fetch_fundamentals, fetch_provider_bars
+from simulator.services.symbol_index import get_symbol_index
+from strategies.services.backtest import BUY, SELL, TRADING_DAYS, backtest_period, equity_stats, save_run
+from strategies.services.result_cache import get_result, result_key, store_result
+from strategies.services.rules import Plan, RuleError, get_plan
+
+FIELDS = ("open", "high", "low", "close", "volume")
+_EPOCH = date(1970, 1, 1).toordinal()
+
+# column 은 종목 열 위치, index 는 체결일 행 위치
+PortfolioFill = namedtuple("PortfolioFill", ["index", "column", "side", "price", "quantity"])
+PortfolioResult = namedtuple("PortfolioResult", ["equity", "fills", "total_return", "stats"])
+
+_fetch_pool = ThreadPoolExecutor(
+    max_workers=settings.PORTFOLIO_FETCH_WORKERS, thread_name_prefix="universe-fetch"
+)
+
+
+# ─────────────────────────────────────────────
+# 신호
+# ─────────────────────────────────────────────
+def _ffill(matrix):
+    """
+    열마다 nan 을 직전 값으로 채운다 (첫 봉 이전은 nan 그대로)
+    """
+    idx = np.where(np.isnan(matrix), 0, np.arange(len(matrix))[:, None])
+    np.maximum.accumulate(idx, axis=0, out=idx)
+    return matrix[idx, np.arange(matrix.shape[1])]
+
+
+def _filled(bars):
+    close = _ffill(bars["close"])
+    return {
+        **{name: np.where(np.isnan(bars[name]), close, bars[name]) for name in ("open", "high", "low")},
+        "close": close,
+        "volume": np.nan_to_num(bars["volume"]),
+    }
+
+
+def series(plan, bars, fundamentals):
+    """
+    노드마다 (일 수 × 종목 수) 지표 행렬. 첫 봉 날짜가 같은 종목끼리 묶어 계산한다
+    """
+    filled = _filled(bars)
+    shape = filled["close"].shape
+    has = ~np.isnan(filled["close"][-1]) if shape[0] else np.zeros(shape[1], dtype=bool)
+    first = np.argmax(~np.isnan(filled["close"]), axis=0)
+    out = [np.full(shape, np.nan) for _ in plan.nodes]
+    for start in np.unique(first[has]):
+        cols = np.flatnonzero(has & (first == start))
+        part = {name: filled[name][start:, cols] for name in FIELDS}
+        for matrix, values in zip(out, plan.series(part, [fundamentals[col] for col in cols])):
+            matrix[start:, cols] = values
+    return out
+
+
+def signal_rows(days, rebalance):
+    """
+    리밸런싱 신호를 내는 행 (첫날 + 기간 마지막 거래일). 마지막 행은 다음 날이 없으므로 뺀다
+    """
+    if rebalance == "daily":
+        return np.arange(max(len(days) - 1, 0))
+    if rebalance == "weekly":
+        key = (days - 1) // 7                   # ordinal 1 (0001-01-01) 이 월요일
+    else:
+        months = (days - _EPOCH).astype("datetime64[D]").astype("datetime64[M]").astype(np.int64)
+        key = months // 3 if rebalance == "quarterly" else months
+    ends = np.flatnonzero(key[1:] != key[:-1])
+    return np.union1d([0], ends) if len(days) > 1 else np.empty(0, dtype=np.int64)
+
+
+def select(plan, values, listed, rows):
+    """
+    → (고른 열 (신호일 수 × top_n), 유효 여부 (신호일 수 × top_n))
+    """
+    ranking = plan.ranking
+    score = values[ranking.node][rows]
+    eligible = plan.masks(plan.buy, [node[rows] for node in values], score.shape) & listed[rows] & ~np.isnan(score)
+    key = np.where(eligible, -score if ranking.descending else score, np.inf)
+    k = min(ranking.top_n, key.shape[1])
+    if k == 0:
+        return np.empty((len(rows), 0), dtype=np.int64), np.empty((len(rows), 0), dtype=bool)
+    picks = np.argpartition(key, k - 1, axis=1)[:, :k]
+    return picks, np.take_along_axis(key, picks, axis=1) < np.inf
+
+
+# ─────────────────────────────────────────────
+# 체결/평가
+# ─────────────────────────────────────────────
+def delisted(listed):
+    """
+    → {마지막 봉 다음 행: 그날 정리할 열 목록}. 기간 끝 전에 봉이 끊긴 종목만
+    """
+    days = len(listed)
+    last = days - 1 - np.argmax(listed[::-1], axis=0)
+    exits = {}
+    for col in np.flatnonzero(listed.any(axis=0) & (last < days - 1)):
+        exits.setdefault(int(last[col]) + 1, []).append(int(col))
+    return exits
+
+
+def simulate(bars, rows, picks, chosen, top_n, initial_cash, fee_rate):
+    days, n = bars["close"].shape
+    opens = bars["open"]
+    marks = np.nan_to_num(_ffill(bars["close"]))
+    qty = np.zeros(n)
+    cash = float(initial_cash)
+    equity = np.empty(days)
+    invested = np.empty(days)
+    fills = []
+    traded = 0.0
+    prev = 0
+    exits = delisted(bars["listed"])
+    rebalances = {int(row) + 1: r for r, row in enumerate(rows)}
+
+    for e in sorted(rebalances.keys() | exits.keys()):
+        invested[prev:e] = marks[prev:e] @ qty
+        equity[prev:e] = cash + invested[prev:e]
+        prev = e
+
+        for col in exits.get(e, ()):
+            if qty[col] > 0:
+                # 마지막 종가 (marks 는 그 뒤로 같은 값) 로 정리한다
+                proceeds = float(qty[col] * marks[e, col]) * (1 - fee_rate)
+                cash += proceeds
+                traded += proceeds
+                fills.append(PortfolioFill(e, col, SELL, float(marks[e, col]), int(qty[col])))
+                qty[col] = 0.0
+        if e not in rebalances:
+            continue
+        r = rebalances[e]
+
+        price = opens[e]
+        tradable = ~np.isnan(price) & (price > 0)
+        price = np.where(tradable, price, 0.0)
+        value = cash + np.where(tradable, price, marks[e - 1]) @ qty
+        weight = np.zeros(n)
+        weight[picks[r][chosen[r]]] = 1.0 / top_n
+        want = np.floor(np.divide(weight * value, price * (1 + fee_rate), out=np.zeros(n), where=tradable))
+        delta = np.where(tradable, want - qty, 0.0)
+
+        sells = np.minimum(delta, 0.0)
+        proceeds = float(-sells @ price) * (1 - fee_rate)
+        cash += proceeds
+        buys = np.maximum(delta, 0.0)
+        cost = float(buys @ price) * (1 + fee_rate)
+        if cost > cash:
+            # 파는 쪽 수수료만큼 모자랄 수 있다 → 사는 수량을 같은 비율로 줄인다
+            buys = np.floor(buys * (cash / cost))
+            cost = float(buys @ price) * (1 + fee_rate)
+        cash -= cost
+        qty += buys + sells
+        traded += proceeds + cost
+
+        for col in np.flatnonzero(sells):
+            fills.append(PortfolioFill(int(e), int(col), SELL, float(price[col]), int(-sells[col])))
+        for col in np.flatnonzero(buys):
+            fills.append(PortfolioFill(int(e), int(col), BUY, float(price[col]), int(buys[col])))
+
+    invested[prev:] = marks[prev:] @ qty
+    equity[prev:] = cash + invested[prev:]
+    total_return = float(equity[-1] / initial_cash - 1.0) * 100 if days else 0.0
+    stats = {"bars": days, "symbols": n, "rebalances": len(rows), "trades": len(fills)}
+    if days >= 2:
+        stats.update(
+            exposure=round(float(np.mean(invested / equity)) * 100, 2),
+            turnover=round(traded / float(equity.mean()) / (days / TRADING_DAYS), 2),
+            **equity_stats(equity),
+        )
+    return PortfolioResult(equity, fills, total_return, stats)
+
+
+def run_portfolio_backtest(rule, bars, fundamentals=None, initial_cash=None, fee_rate=None):
+    """
+    rule: rank 를 쓰는 rule_json 또는 Plan. bars: bar_matrix 결과, fundamentals: 종목 열 순서의 dict 목록
+    """
+    plan = rule if isinstance(rule, Plan) else get_plan(rule)
+    if plan.ranking is None:
+        raise RuleError("종목 묶음 백테스트에는 rank / top_n 이 있는 규칙이 필요합니다")
+    width = bars["close"].shape[1]
+    values = series(plan, bars, fundamentals or [{}] * width)
+    rows = signal_rows(bars["days"], plan.ranking.rebalance)
+    picks, chosen = select(plan, values, bars["listed"], rows)
+    return simulate(
+        bars, rows, picks, chosen, plan.ranking.top_n,
+        settings.BACKTEST_INITIAL_CASH if initial_cash is None else initial_cash,
+        settings.BACKTEST_FEE_RATE if fee_rate is None else fee_rate,
+    )
+
+
+# ─────────────────────────────────────────────
+# 실행 + 저장
+# ─────────────────────────────────────────────
+def _gather(fetch, codes, what, deadline=None):
+    """
+    codes 마다 fetch(code) 를 스레드 풀에서 동시에 부른다 → {코드: 결과}.
+    deadline(초, 기본 PORTFOLIO_FETCH_DEADLINE, 0 이면 제한 없음) 안에 끝나지 않으면 남은 조회를 취소하고 ValueError
+    """
+    if not codes:
+        return {}
+    deadline = settings.PORTFOLIO_FETCH_DEADLINE if deadline is None else deadline
+    get_symbol_index()      # 종목 마스터(DB)는 요청 스레드에서 읽어 둔다
+    futures = {_fetch_pool.submit(fetch, code): code for code in codes}
+    done, pending = wait(futures, timeout=deadline or None)
+    if pending:
+        for future in pending:
+            future.cancel()
+        missing = sorted(futures[future] for future in pending)
+        raise ValueError(
+            f"{what}를 {deadline}초 안에 받지 못한 종목이 {len(missing)}개 있습니다 "
+            f"({', '.join(missing[:10])}). 잠시 후 다시 시도하세요"
+        )
+    return {futures[future]: future.result() for future in done}
+
+
+def load_universe(codes, start, end, deadline=None):
+    """
+    봉 저장소에서 한꺼번에 읽고, 저장소에 없는 종목만 제공자에서 동시에 받는다 → bar_matrix
+    """
+    arrays = load_bars_many(codes, start, end)
+    missing = [code for code in codes if code not in arrays]
+    fetched = _gather(lambda code: fetch_provider_bars(code, start, end), missing, "일봉", deadline)
+    arrays.update({code: bars for code, bars in fetched.items() if len(bars["ts"])})
+    return bar_matrix(arrays, codes)
+
+
+def universe_fundamentals(codes, deadline=None):
+    """
+    종목 열 순서의 재무 지표 목록. 캐시에 있는 것은 한 번에 읽고, 없는 것만 동시에 받는다
+    """
+    cached = cache.get_many([f"fundamentals:{code}" for code in codes])
+    values = {code: cached.get(f"fundamentals:{code}") for code in codes}
+    values.update(_gather(fetch_fundamentals, [code for code, value in values.items() if value is None], "재무 지표", deadline))
+    return [values[code] for code in codes]
+
+
+def backtest_portfolio(strategy, codes, start=None, end=None, initial_cash=None):
+    """
+    strategy 를 codes 종목 묶음의 [start, end] 일봉으로 돌리고 StrategyRun 과 StrategyTrade 를 저장한다.
+    같은 규칙/종목/구간/데이터의 결과가 캐시에 있으면 다시 계산하지 않는다 (result_cache)
+    """
+    plan = get_plan(strategy.rule_json)
+    if plan.ranking is None:
+        raise RuleError("종목 묶음 백테스트에는 rank / top_n 이 있는 규칙이 필요합니다")
+    start, end = backtest_period(start, end)
+    initial_cash = initial_cash or settings.BACKTEST_INITIAL_CASH
+    fundamentals = universe_fundamentals(codes) if plan.needs_fundamentals() else None
+    key = result_key(plan, codes, start, end, initial_cash, settings.BACKTEST_FEE_RATE, fundamentals)
+    cached = get_result(key)
+    if cached is not None:
+        return save_run(strategy, cached, {**cached.stats, "cached": True}, list(codes), start, end, cached.trades)
+
+    started = time.perf_counter()
+    bars = load_universe(codes, start, end)
+    if len(bars["days"]) < 2:
+        raise ValueError(f"{start} ~ {end} 일봉이 있는 종목이 없습니다")
+    loaded = time.perf_counter()
+
+    result = run_portfolio_backtest(plan, bars, fundamentals, initial_cash)
+    stats = {
+        **result.stats,
+        "load_ms": round((loaded - started) * 1000, 1),
+        "elapsed_ms": round((time.perf_counter() - loaded) * 1000, 1),
+    }
+    trades = [
+        (codes[fill.column], fill.side, fill.price, fill.quantity, bars["ts"][fill.index]) for fill in result.fills
+    ]
+    store_result(key, result.total_return, stats, trades)
+    return save_run(strategy, result, stats, list(codes), start, end, trades)
+
@@ -0,0 +1,74 @@
+# Back/strategies/services/result_cache.py
+"""
+백테스트 결과 캐시 (내용 주소)
+
+키 = sha256(Plan.digest, 종목 목록, 구간, 초기 자금, 수수료, 종목별 봉 데이터 버전, 재무 지표)
+    - Plan.digest 는 정규화한 규칙의 해시라서 어느 Strategy 행이 가진 규칙이든 같은 키가 된다
+      (마켓플레이스 구매로 복제된 전략, 표기만 다른 규칙 포함)
+    - 데이터 버전은 bar_store.ingest_bars 가 올리는 BarVersion 이다. 새 봉이 들어오면 키가 바뀌므로
+      따로 지우지 않아도 예전 결과는 쓰이지 않고 TTL 로 사라진다
+    - 버전은 봉을 읽기 전에 조회한다. 그 사이에 적재가 끼어들면 새 데이터 결과가 옛 키로 저장될 뿐
+      (다시는 조회되지 않음), 옛 데이터 결과가 새 키로 저장되는 일은 없다
+    - 봉 저장소에 없는 종목(버전 0, 제공자에서 받은 데이터)이 섞이면 BACKTEST_CACHE_UNVERSIONED_TTL 만 둔다
+값은 StrategyRun 을 다시 만드는 데 필요한 것만 담는다 (수익률, 통계, 체결 목록). 적중해도 요청한 전략의
+StrategyRun 은 새로 저장한다.
+"""
+import hashlib
+import json
+import threading
+from collections import namedtuple
+
+from django.conf import settings
+from django.core.cache import caches
+
+from simulator.services.bar_store import data_versions
+
+# trades: save_run 에 넘기는 (종목 코드, buy/sell, 가격, 수량, 체결 시각) 목록
+CachedResult = namedtuple("CachedResult", ["total_return", "stats", "trades"])
+# versioned: 모든 종목이 봉 저장소에서 온 데이터인지 (TTL 을 고른다)
+CacheKey = namedtuple("CacheKey", ["key", "versioned"])
+
+_lock = threading.Lock()
+_stats = {"hits": 0, "misses": 0, "stores": 0}
+
+
+def _cache():
+    return caches[settings.BACKTEST_CACHE_ALIAS]
+
+
+def result_key(plan, codes, start, end, initial_cash, fee_rate, fundamentals=None):
+    """
+    fundamentals: 규칙이 재무 지표를 쓸 때만 종목 순서대로 넘긴다 (값이 바뀌면 결과도 바뀌므로)
+    """
+    versions = data_versions(codes)
+    document = {
+        "plan": plan.digest,
+        "universe": list(codes),
+        "start": start.isoformat(),
+        "end": end.isoformat(),
+        "initial_cash": initial_cash,
+        "fee_rate": fee_rate,
+        "versions": [versions[code] for code in codes],
+        "fundamentals": fundamentals,
+    }
+    raw = json.dumps(document, sort_keys=True, separators=(",", ":"), default=str)
+    return CacheKey("backtest:" + hashlib.sha256(raw.encode()).hexdigest(), all(versions.values()))
+
+
+def get_result(cache_key):
+    value = _cache().get(cache_key.key)
+    with _lock:
+        _stats["hits" if value is not None else "misses"] += 1
+    return value
+
+
+def store_result(cache_key, total_return, stats, trades):
+    ttl = settings.BACKTEST_CACHE_TTL if cache_key.versioned else settings.BACKTEST_CACHE_UNVERSIONED_TTL
+    _cache().set(cache_key.key, CachedResult(float(total_return), stats, list(trades)), ttl)
+    with _lock:
+        _stats["stores"] += 1
+
+
+def result_cache_stats():
+    with _lock:
+        return dict(_stats)
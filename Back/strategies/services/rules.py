@@ -0,0 +1,326 @@
+# Back/strategies/services/rules.py
+"""
+rule_json 컴파일러
+
+rule_json 을 한 번 검사/정규화해 Plan 으로 만든다.
+    - 지표는 (이름, 파라미터) 로 정규화한 IndicatorSpec 이고, 같은 지표는 규칙 안에서 한 번만 계산한다
+      (예: 매수 "CLOSE > SMA(20)" 과 매도 "SMA(20) < 50000" 은 SMA(20) 노드 하나를 같이 쓴다)
+    - 조건은 (왼쪽 노드, 연산자, 오른쪽 노드 또는 상수) 이다
+    - canonical 은 별칭/기본값/조건 순서를 정리한 JSON 이고 digest 는 그 sha256 이다
+      → 표기만 다른 같은 규칙은 digest 가 같다
+종목 묶음(횡단면) 규칙은 rank/top_n/rebalance 를 더 쓴다. 이때 buy_conditions 는 편입 가능 조건이다 (없어도 됨).
+    {"conditions": [{"indicator": "PER", "operator": ">", "value": 0}],
+     "rank": {"indicator": "PER", "order": "asc"}, "top_n": 10, "rebalance": "monthly"}
+    → 매달 첫 거래일 종가 기준 PER 가 0 보다 큰 종목 중 낮은 10개를 같은 비중으로 (strategies.services.portfolio)
+예전 프런트(RuleDisplay.vue)가 만들던 형식도 받는다.
+    - actions / portfolio_rules 는 화면 표시용 메타데이터라 컴파일할 때 무시한다 (canonical/digest 에도 안 들어간다)
+    - 조건의 {"type": "indicator", "name": ...} 표기는 indicator 와 같다
+    - 수익률(%)/손실률/balance/금액 같은 계좌 상태 지표는 시세로 계산할 수 없어 LegacyRuleError 를 낸다
+      → 저장은 되지만(serializers.StrategySerializer) 백테스트/실시간 실행은 할 수 없다
+Plan 은 프로세스 LRU 캐시에 보관한다 (get_plan). 마켓플레이스에서 복제된 전략처럼 rule_json 이 같으면
+같은 Plan 객체를 함께 쓴다.
+"""
+import hashlib
+import json
+import threading
+from collections import OrderedDict, namedtuple
+
+import numpy as np
+from django.conf import settings
+
+from strategies.services.indicators import (
+    ALIASES, FLOAT_PARAM_RANGE, FUNDAMENTAL_INDICATORS, INDICATORS, PARAM_RANGE, compute, validate, warmup,
+)
+
+OPERATORS = {
+    "<": np.less,
+    "<=": np.less_equal,
+    ">": np.greater,
+    ">=": np.greater_equal,
+    "==": np.equal,
+    "!=": np.not_equal,
+}
+RULE_KEYS = {"buy_conditions", "sell_conditions", "conditions", "rank", "top_n", "rebalance"}
+LEGACY_KEYS = {"actions", "portfolio_rules"}
+# 예전 규칙의 계좌 상태 지표 (이름에 포함되면). 정확히 "수익률" 은 ALIASES 에서 RETURN 으로 먼저 풀린다
+LEGACY_INDICATORS = ("수익률", "손실률", "balance", "금액")
+_SPEC_KEYS = {"indicator", "name", "type"}
+REBALANCE = ("daily", "weekly", "monthly", "quarterly")
+MAX_TOP_N = 500
+
+# params: 정렬된 (이름, 값) tuple
+IndicatorSpec = namedtuple("IndicatorSpec", ["name", "params"])
+# left/right: Plan.nodes 의 위치. right 가 None 이면 const 와 비교한다
+Condition = namedtuple("Condition", ["left", "operator", "right", "const"])
+# 횡단면 순위. node: 순위 지표 노드, descending: 큰 값이 먼저
+Ranking = namedtuple("Ranking", ["node", "descending", "top_n", "rebalance"])
+
+
+class RuleError(ValueError):
+    """rule_json 을 해석할 수 없는 경우"""
+
+
+class LegacyRuleError(RuleError):
+    """예전 형식 규칙이라 저장은 되지만 계산할 수 없는 경우"""
+
+
+class Plan:
+    __slots__ = ("nodes", "buy", "sell", "ranking", "canonical", "digest")
+
+    def __init__(self, nodes, buy, sell, canonical, ranking=None):
+        self.nodes = nodes          # tuple[IndicatorSpec]
+        self.buy = buy              # tuple[Condition] (AND). 횡단면 규칙에서는 편입 가능 조건
+        self.sell = sell            # tuple[Condition] 또는 None (매수 조건이 풀리면 매도)
+        self.ranking = ranking      # Ranking 또는 None (한 종목 규칙)
+        self.canonical = canonical
+        self.digest = hashlib.sha256(canonical.encode()).hexdigest()
+
+    def __repr__(self):
+        return f"<Plan {self.digest[:12]} nodes={len(self.nodes)} buy={len(self.buy)} sell={len(self.sell or ())}>"
+
+    def lookback(self):
+        """
+        모든 지표가 값을 내려면 필요한 최소 봉 수
+        """
+        return max((warmup(spec.name, dict(spec.params)) for spec in self.nodes), default=1)
+
+    def needs_fundamentals(self):
+        return any(spec.name in FUNDAMENTAL_INDICATORS for spec in self.nodes)
+
+    def series(self, bars, fundamentals):
+        """
+        노드마다 한 번씩 계산한 지표 배열 목록
+        """
+        return [compute(spec.name, dict(spec.params), bars, fundamentals) for spec in self.nodes]
+
+    def evaluate(self, bars, fundamentals=None):
+        """
+        (매수 마스크, 매도 마스크). 둘 다 그날 종가까지의 정보로만 계산한다
+        """
+        if self.ranking is not None:
+            raise RuleError("rank 를 쓰는 규칙은 종목 묶음 백테스트로만 돌릴 수 있습니다")
+        values = self.series(bars, fundamentals or {})
+        buy = self.masks(self.buy, values, len(bars["close"]))
+        sell = self.masks(self.sell, values, len(bars["close"])) if self.sell is not None else ~buy
+        return buy, sell
+
+    @staticmethod
+    def masks(conditions, values, shape):
+        """
+        shape: 봉 수, 또는 (일 수 × 종목 수) 행렬의 shape
+        """
+        mask = np.ones(shape, dtype=bool)
+        with np.errstate(invalid="ignore"):
+            for condition in conditions:
+                left = values[condition.left]
+                right = values[condition.right] if condition.right is not None else condition.const
+                mask &= OPERATORS[condition.operator](left, right) & ~np.isnan(left) & ~np.isnan(right)
+        return mask
+
+
+# ─────────────────────────────────────────────
+# 컴파일
+# ─────────────────────────────────────────────
+def compile_rule(rule):
+    """
+    rule_json → Plan. 잘못된 규칙이면 RuleError
+    """
+    if not isinstance(rule, dict):
+        raise RuleError("rule_json 은 객체여야 합니다")
+    rule = {key: value for key, value in rule.items() if key not in LEGACY_KEYS}
+    unknown = set(rule) - RULE_KEYS
+    if unknown:
+        raise RuleError(f"알 수 없는 키: {', '.join(sorted(unknown))} (허용: {', '.join(sorted(RULE_KEYS))})")
+    if "buy_conditions" in rule and "conditions" in rule:
+        raise RuleError("buy_conditions 와 conditions 는 함께 쓸 수 없습니다")
+
+    ranked = "rank" in rule
+    if not ranked and ({"top_n", "rebalance"} & set(rule)):
+        raise RuleError("top_n / rebalance 는 rank 와 함께 써야 합니다")
+    if ranked and rule.get("sell_conditions"):
+        raise RuleError("rank 를 쓰는 규칙에는 sell_conditions 를 쓸 수 없습니다 (리밸런싱 때 순위에서 빠지면 판다)")
+    buy = _conditions(rule.get("buy_conditions", rule.get("conditions", [] if ranked else None)), "buy_conditions")
+    if not buy and not ranked:
+        raise RuleError("buy_conditions 가 비어 있습니다")
+    sell = _conditions(rule["sell_conditions"], "sell_conditions") if rule.get("sell_conditions") else None
+    ranking = _ranking(rule) if ranked else None
+
+    # 정규화한 조건을 정렬해 노드 번호를 매긴다 (AND 는 순서와 무관하므로 표기 순서가 달라도 같은 Plan)
+    buy = sorted(set(buy), key=_sort_key)
+    sell = sorted(set(sell), key=_sort_key) if sell is not None else None
+    nodes = {}
+    for condition in buy + (sell or []):
+        nodes.setdefault(condition[0], len(nodes))
+        if isinstance(condition[2], IndicatorSpec):
+            nodes.setdefault(condition[2], len(nodes))
+    if ranking is not None:
+        nodes.setdefault(ranking[0], len(nodes))
+
+    def link(conditions):
+        return tuple(
+            Condition(nodes[left], operator, nodes[right], None) if isinstance(right, IndicatorSpec)
+            else Condition(nodes[left], operator, None, right)
+            for left, operator, right in conditions
+        )
+
+    document = {
+        "buy_conditions": [_condition_json(condition) for condition in buy],
+        "sell_conditions": [_condition_json(condition) for condition in sell] if sell is not None else None,
+    }
+    if ranking is not None:
+        spec, descending, top_n, rebalance = ranking
+        document.update(
+            rank={**_spec_json(spec), "order": "desc" if descending else "asc"}, top_n=top_n, rebalance=rebalance,
+        )
+        ranking = Ranking(nodes[spec], descending, top_n, rebalance)
+    canonical = json.dumps(document, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return Plan(tuple(nodes), link(buy), link(sell) if sell is not None else None, canonical, ranking)
+
+
+def _ranking(rule):
+    """
+    → (순위 IndicatorSpec, 큰 값 먼저 여부, top_n, rebalance)
+    """
+    item = rule["rank"]
+    if not isinstance(item, dict):
+        raise RuleError("rank 는 객체여야 합니다")
+    order = item.get("order", "desc")
+    if order not in ("asc", "desc"):
+        raise RuleError(f"rank.order 는 asc 또는 desc 여야 합니다: {order!r}")
+    spec = _spec({key: value for key, value in item.items() if key != "order"}, "rank")
+    top_n = rule.get("top_n")
+    if isinstance(top_n, bool) or not isinstance(top_n, int) or not 1 <= top_n <= MAX_TOP_N:
+        raise RuleError(f"top_n 은 1~{MAX_TOP_N} 사이 정수여야 합니다: {top_n!r}")
+    rebalance = rule.get("rebalance", "monthly")
+    if rebalance not in REBALANCE:
+        raise RuleError(f"rebalance 는 {', '.join(REBALANCE)} 중 하나여야 합니다: {rebalance!r}")
+    return spec, order == "desc", top_n, rebalance
+
+
+def _conditions(items, field):
+    if not isinstance(items, list):
+        raise RuleError(f"{field} 는 배열이어야 합니다")
+    # 예전 형식 조건이 있어도 나머지 조건의 형식 오류는 먼저 알려준다
+    conditions, legacy = [], None
+    for i, item in enumerate(items):
+        try:
+            conditions.append(_condition(item, f"{field}[{i}]"))
+        except LegacyRuleError as exc:
+            legacy = legacy or exc
+    if legacy is not None:
+        raise legacy
+    return conditions
+
+
+def _condition(item, where):
+    """
+    → (왼쪽 IndicatorSpec, 연산자, 오른쪽 IndicatorSpec 또는 float)
+    """
+    if not isinstance(item, dict):
+        raise RuleError(f"{where}: 조건은 객체여야 합니다")
+    operator = item.get("operator")
+    if operator not in OPERATORS:
+        raise RuleError(f"{where}: 알 수 없는 연산자 {operator!r} (허용: {' '.join(OPERATORS)})")
+    if "value" not in item:
+        raise RuleError(f"{where}: value 가 없습니다")
+
+    left = _spec({key: value for key, value in item.items() if key not in ("operator", "value")}, where)
+    value = item["value"]
+    if isinstance(value, dict):
+        right = _spec(value, f"{where}.value")
+    elif isinstance(value, (int, float)) and not isinstance(value, bool) and np.isfinite(value):
+        right = float(value)
+    else:
+        raise RuleError(f"{where}: value 는 숫자 또는 지표여야 합니다: {value!r}")
+    return left, operator, right
+
+
+def _spec(item, where):
+    raw = item.get("indicator") or item.get("name")
+    if not isinstance(raw, str):
+        raise RuleError(f"{where}: indicator 가 없습니다")
+    name = ALIASES.get(raw, ALIASES.get(raw.upper(), raw.upper()))
+    if name not in INDICATORS:
+        if any(word in raw.lower() for word in LEGACY_INDICATORS):
+            raise LegacyRuleError(f"{where}: 계좌 상태 지표 {raw!r} 는 예전 형식이라 백테스트/실행할 수 없습니다")
+        raise RuleError(f"{where}: 알 수 없는 지표 {raw!r} (사용 가능: {', '.join(sorted(INDICATORS))})")
+
+    defaults = INDICATORS[name].defaults
+    params = dict(defaults)
+    for key, value in item.items():
+        if key in _SPEC_KEYS:
+            continue
+        if key not in defaults:
+            raise RuleError(f"{where}: {name} 에는 {key!r} 파라미터가 없습니다")
+        params[key] = _param(key, value, defaults[key], where)
+    try:
+        validate(name, params)
+    except ValueError as exc:
+        raise RuleError(f"{where}: {exc}") from None
+    return IndicatorSpec(name, tuple(sorted(params.items())))
+
+
+def _param(key, value, default, where):
+    """
+    기본값이 float 인 파라미터(볼린저 k 등)는 실수, 나머지는 정수
+    """
+    if isinstance(default, float):
+        low, high = FLOAT_PARAM_RANGE
+        if isinstance(value, bool) or not isinstance(value, (int, float)) or not low < value <= high:
+            raise RuleError(f"{where}: {key} 는 {low:g} 초과 {high:g} 이하 숫자여야 합니다: {value!r}")
+        return float(value)
+    low, high = PARAM_RANGE
+    if isinstance(value, bool) or not isinstance(value, int) or not low <= value <= high:
+        raise RuleError(f"{where}: {key} 는 {low}~{high} 사이 정수여야 합니다: {value!r}")
+    return value
+
+
+def _sort_key(condition):
+    return json.dumps(_condition_json(condition), sort_keys=True, ensure_ascii=False)
+
+
+def _spec_json(spec):
+    return {"indicator": spec.name, **dict(spec.params)}
+
+
+def _condition_json(condition):
+    left, operator, right = condition
+    return {
+        **_spec_json(left),
+        "operator": operator,
+        "value": _spec_json(right) if isinstance(right, IndicatorSpec) else right,
+    }
+
+
+# ─────────────────────────────────────────────
+# 캐시
+# ─────────────────────────────────────────────
+_lock = threading.Lock()
+_plans = OrderedDict()      # rule_json 원문 sha256 → Plan
+_interned = {}              # Plan.digest → Plan (표기만 다른 규칙도 같은 객체를 쓴다)
+
+
+def rule_key(rule):
+    return hashlib.sha256(json.dumps(rule, sort_keys=True, ensure_ascii=False).encode()).hexdigest()
+
+
+def get_plan(rule):
+    """
+    compile_rule 의 캐시 버전. 같은 rule_json 이면 컴파일 없이 같은 Plan 을 돌려준다
+    """
+    key = rule_key(rule)
+    with _lock:
+        plan = _plans.get(key)
+        if plan is not None:
+            _plans.move_to_end(key)
+            return plan
+
+    plan = compile_rule(rule)
+    with _lock:
+        plan = _interned.setdefault(plan.digest, plan)
+        _plans[key] = plan
+        while len(_plans) > settings.RULE_PLAN_CACHE_SIZE:
+            _, evicted = _plans.popitem(last=False)
+            if evicted not in _plans.values():
+                _interned.pop(evicted.digest, None)
+    return plan
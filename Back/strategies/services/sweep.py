@@ -0,0 +1,373 @@
+# Back/strategies/services/sweep.py
+"""
+전략 파라미터 탐색 (grid / random)
+
+params 는 rule_json 안의 위치 → 후보 값이다. 위치는 점으로 이은 키/인덱스.
+    {
+        "buy_conditions.1.value": [10, 15, 20],                          # PER 기준
+        "sell_conditions.0.value.period": {"min": 20, "max": 120, "step": 20}, # 이동평균 기간
+        "buy_conditions.0.value.k": {"min": 1.5, "max": 3.0}             # step 이 없으면 random 에서만 (연속 구간)
+    }
+    - grid  : 모든 조합
+    - random: samples 개를 뽑는다 (이산 값만 있으면 중복 없이)
+
+봉 배열은 부모 프로세스가 공유 메모리 한 덩어리 (필드 × 봉 수) 에 올리고, 작업 프로세스는 그 위에
+NumPy 뷰만 만든다 → 조합 수와 무관하게 가격은 복사/피클링하지 않는다.
+조합은 묶음으로 프로세스 공용 ProcessPoolExecutor (SWEEP_WORKERS 개) 에 넘기고, 끝나는 대로 결과를 흘려보낸다.
+풀은 요청마다 만들지 않으므로 동시에 여러 탐색이 와도 작업 프로세스 수는 SWEEP_WORKERS 를 넘지 않는다
+(웹 프로세스마다 풀이 하나씩이다). 탐색 하나는 workers 개 묶음까지만 풀에 올려 두고 하나가 끝나면 다음을 넣는다.
+탐색이 끝나면 (클라이언트가 끊겨도 그때까지 끝난 조합으로) metric 기준 상위 top_n 개만 다시 돌려 StrategyRun 으로 저장한다.
+"""
+import copy
+import heapq
+import itertools
+import math
+import os
+import random
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import shared_memory
+
+import numpy as np
+from django.conf import settings
+
+from simulator.services.price_service import fetch_fundamentals
+from strategies.services.backtest import fill_rows, load_bars, run_backtest, save_run
+from strategies.services.rules import compile_rule
+
+GRID, RANDOM = "grid", "random"
+METHODS = (GRID, RANDOM)
+# 클수록 좋은 값 (max_drawdown 은 음수 %)
+METRICS = ("total_return", "sharpe", "cagr", "max_drawdown", "win_rate")
+FIELDS = ("open", "high", "low", "close", "volume")
+
+# params: {위치: 값}
+SweepResult = namedtuple("SweepResult", ["index", "params", "total_return", "stats"])
+
+
+class SweepError(ValueError):
+    """탐색 조건이 잘못된 경우"""
+
+
+# ─────────────────────────────────────────────
+# 조합 만들기
+# ─────────────────────────────────────────────
+def _path(path):
+    return [int(part) if part.isdigit() else part for part in path.split(".")]
+
+
+def apply_params(rule, combo):
+    """
+    rule_json 복사본에 combo({위치: 값}) 를 넣는다. 마지막 키는 없어도 된다 (지표 기본값 덮어쓰기)
+    """
+    rule = copy.deepcopy(rule)
+    for path, value in combo.items():
+        *parents, last = _path(path)
+        node = rule
+        try:
+            for part in parents:
+                node = node[part]
+            if isinstance(node, list):
+                node[last] = value
+            elif isinstance(node, dict) and isinstance(last, str):
+                node[last] = value
+            else:
+                raise TypeError
+        except (KeyError, IndexError, TypeError):
+            raise SweepError(f"rule_json 에 {path!r} 위치가 없습니다") from None
+    return rule
+
+
+def _candidates(path, spec, method):
+    """
+    → 이산 값 목록, 또는 (min, max) 연속 구간 (random 전용)
+    """
+    if isinstance(spec, list):
+        if not spec:
+            raise SweepError(f"{path}: 후보 값이 비어 있습니다")
+        return spec
+    if not isinstance(spec, dict) or "min" not in spec or "max" not in spec:
+        raise SweepError(f"{path}: 후보는 값 목록 또는 {{min, max, step}} 이어야 합니다")
+    low, high, step = spec["min"], spec["max"], spec.get("step")
+    if not all(isinstance(value, (int, float)) and not isinstance(value, bool) for value in (low, high, step or 1)):
+        raise SweepError(f"{path}: min/max/step 은 숫자여야 합니다")
+    if low > high:
+        raise SweepError(f"{path}: min 이 max 보다 큽니다")
+    if step is None:
+        if method == GRID:
+            raise SweepError(f"{path}: grid 탐색에는 step 이 필요합니다")
+        return (low, high)
+    if step <= 0:
+        raise SweepError(f"{path}: step 은 0 보다 커야 합니다")
+    count = int(math.floor((high - low) / step + 1e-9)) + 1
+    if all(isinstance(value, int) for value in (low, high, step)):
+        return [low + i * step for i in range(count)]
+    return [round(low + i * step, 10) for i in range(count)]
+
+
+def expand(params, method=GRID, samples=None, seed=None):
+    """
+    → 조합 목록 [{위치: 값}]. SWEEP_MAX_COMBINATIONS 를 넘으면 SweepError
+    """
+    if not params:
+        raise SweepError("params 가 비어 있습니다")
+    if method not in METHODS:
+        raise SweepError(f"method 는 {', '.join(METHODS)} 중 하나여야 합니다")
+    limit = settings.SWEEP_MAX_COMBINATIONS
+    paths = sorted(params)
+    candidates = [_candidates(path, params[path], method) for path in paths]
+    discrete = all(isinstance(values, list) for values in candidates)
+    size = math.prod(len(values) for values in candidates) if discrete else None
+
+    if method == GRID:
+        if size > limit:
+            raise SweepError(f"조합이 {size:,}개로 최대 {limit:,}개를 넘습니다")
+        return [dict(zip(paths, values)) for values in itertools.product(*candidates)]
+
+    samples = samples or min(size or limit, limit)
+    if samples > limit:
+        raise SweepError(f"samples 는 최대 {limit:,}개입니다")
+    rng = random.Random(seed)
+    if discrete:
+        # 전체 조합을 만들지 않고 번호만 뽑아 자리값으로 푼다
+        picks = rng.sample(range(size), min(samples, size))
+        combos = []
+        for pick in picks:
+            combo = {}
+            for path, values in zip(reversed(paths), reversed(candidates)):
+                pick, i = divmod(pick, len(values))
+                combo[path] = values[i]
+            combos.append({path: combo[path] for path in paths})
+        return combos
+
+    def draw(values):
+        if isinstance(values, list):
+            return rng.choice(values)
+        low, high = values
+        if isinstance(low, int) and isinstance(high, int):
+            return rng.randint(low, high)
+        return round(rng.uniform(low, high), 6)
+
+    return [{path: draw(values) for path, values in zip(paths, candidates)} for _ in range(samples)]
+
+
+# ─────────────────────────────────────────────
+# 공유 메모리 + 작업 프로세스
+# ─────────────────────────────────────────────
+class SharedBars:
+    """봉 배열을 공유 메모리 (필드 × 봉 수) 로 올린다. 부모만 close() 로 해제한다"""
+
+    def __init__(self, bars):
+        self.shape = (len(FIELDS), len(bars["close"]))
+        self.shm = shared_memory.SharedMemory(create=True, size=max(8 * self.shape[0] * self.shape[1], 8))
+        block = np.ndarray(self.shape, dtype=np.float64, buffer=self.shm.buf)
+        for i, field in enumerate(FIELDS):
+            block[i] = bars[field]
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    def close(self):
+        self.shm.close()
+        self.shm.unlink()
+
+
+_pool = None
+_pool_lock = threading.Lock()
+_worker = {}
+
+
+def pool_size():
+    return settings.SWEEP_WORKERS or os.cpu_count() or 1
+
+
+def _get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=pool_size(), initializer=_init_worker)
+        return _pool
+
+
+def _discard_pool(pool):
+    """
+    작업 프로세스가 죽어 깨진 풀은 버린다. 다음 탐색이 새로 만든다
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _init_worker():
+    import django
+    from django.apps import apps
+
+    if not apps.ready:
+        django.setup()
+
+
+def _attach(name, shape):
+    """
+    작업 프로세스가 마지막으로 붙은 공유 메모리의 봉 뷰. 다른 탐색의 묶음이 오면 바꿔 붙는다
+    """
+    if _worker.get("name") != name:
+        _worker.pop("bars", None)
+        old = _worker.pop("shm", None)
+        if old is not None:
+            old.close()
+        shm = shared_memory.SharedMemory(name=name)
+        block = np.ndarray(shape, dtype=np.float64, buffer=shm.buf)
+        _worker.update(
+            name=name,
+            shm=shm,        # 뷰가 살아 있는 동안 닫히지 않도록 들고 있는다
+            bars={field: block[i] for i, field in enumerate(FIELDS)},
+        )
+    return _worker["bars"]
+
+
+def _run_chunk(context, tasks):
+    """
+    context: (공유 메모리 이름, shape, 재무 지표, 초기 자금, 수수료)
+    """
+    name, shape, fundamentals, initial_cash, fee_rate = context
+    return _evaluate(tasks, _attach(name, shape), fundamentals, initial_cash, fee_rate)
+
+
+def _evaluate(tasks, bars, fundamentals, initial_cash, fee_rate):
+    """
+    tasks: [(번호, Plan)] → [(번호, 수익률, 통계)]
+    """
+    out = []
+    for index, plan in tasks:
+        result = run_backtest(plan, bars, fundamentals, initial_cash, fee_rate)
+        out.append((index, result.total_return, result.stats))
+    return out
+
+
+def compile_combos(rule, combos):
+    """
+    조합마다 컴파일한 Plan 목록. 탐색용 규칙은 한 번 쓰고 버리므로 get_plan 캐시에 넣지 않는다
+    """
+    return [compile_rule(apply_params(rule, combo)) for combo in combos]
+
+
+def run_sweep(plans, combos, bars, fundamentals, initial_cash, fee_rate, workers=None):
+    """
+    조합마다 백테스트를 돌려 끝나는 순서대로 SweepResult 를 내보낸다 (generator).
+    workers: 공용 풀에 한 번에 올려 둘 묶음 수 (풀 크기까지). 1 이면 현재 프로세스에서 돈다
+    """
+    workers = min(workers or pool_size(), pool_size())
+    tasks = list(enumerate(plans))
+    # 묶음이 너무 작으면 IPC 비용이, 너무 크면 마지막 묶음 대기가 커진다 (작업자당 4묶음 정도)
+    chunk = max(1, min(64, math.ceil(len(tasks) / (workers * 4))))
+    chunks = [tasks[i:i + chunk] for i in range(0, len(tasks), chunk)]
+
+    if workers <= 1 or len(chunks) <= 1:
+        for part in chunks:
+            for index, total_return, stats in _evaluate(part, bars, fundamentals, initial_cash, fee_rate):
+                yield SweepResult(index, combos[index], total_return, stats)
+        return
+
+    shared = SharedBars(bars)
+    context = (shared.name, shared.shape, fundamentals, initial_cash, fee_rate)
+    pool = _get_pool()
+    pending = iter(chunks)
+    running = set()
+    try:
+        for part in itertools.islice(pending, workers):
+            running.add(pool.submit(_run_chunk, context, part))
+        while running:
+            done, running = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                part = next(pending, None)
+                if part is not None:
+                    running.add(pool.submit(_run_chunk, context, part))
+                for index, total_return, stats in future.result():
+                    yield SweepResult(index, combos[index], total_return, stats)
+    except BrokenProcessPool:
+        _discard_pool(pool)
+        raise
+    finally:
+        # 중간에 닫혀도 아직 시작하지 않은 묶음은 버리고 공유 메모리를 해제한다
+        # (이미 돌고 있는 묶음은 붙어 있는 매핑으로 끝까지 돈다)
+        for future in running:
+            future.cancel()
+        shared.close()
+
+
+def score(result, metric):
+    value = result.total_return if metric == "total_return" else result.stats.get(metric)
+    return value if value is not None else -math.inf
+
+
+# ─────────────────────────────────────────────
+# 전략 단위 실행
+# ─────────────────────────────────────────────
+def sweep_strategy(strategy, code, params, method=GRID, samples=None, seed=None, metric="total_return",
+                   top_n=3, start=None, end=None, initial_cash=None, workers=None):
+    """
+    조건 검사와 봉 읽기를 먼저 끝내고 (잘못되면 여기서 ValueError), 결과를 한 줄씩 내보내는 generator 를 반환한다.
+    generator 는 조합이 끝나는 대로 dict 를 내보내고, 마지막에 상위 top_n 개를 저장한 뒤 요약 dict 를 내보낸다.
+    클라이언트가 중간에 끊겨 generator 가 닫혀도 그때까지 끝난 조합 중 상위 top_n 개는 저장한다
+    """
+    if metric not in METRICS:
+        raise SweepError(f"metric 은 {', '.join(METRICS)} 중 하나여야 합니다")
+    combos = expand(params, method, samples, seed)
+    plans = compile_combos(strategy.rule_json, combos)
+    if plans[0].ranking is not None:
+        raise SweepError("rank 를 쓰는 규칙은 아직 파라미터 탐색을 지원하지 않습니다")
+    start, end, bars = load_bars(code, start, end)
+    fundamentals = fetch_fundamentals(code)
+    initial_cash = initial_cash or settings.BACKTEST_INITIAL_CASH
+    fee_rate = settings.BACKTEST_FEE_RATE
+
+    def save_best(best, completed):
+        runs = []
+        for rank, (_, _, result) in enumerate(sorted(best, key=lambda entry: entry[:2], reverse=True), start=1):
+            rerun = run_backtest(plans[result.index], bars, fundamentals, initial_cash, fee_rate)
+            stats = {**rerun.stats, "sweep": {
+                "rank": rank, "metric": metric, "params": result.params,
+                "combinations": len(combos), "completed": completed,
+            }}
+            run = save_run(strategy, rerun, stats, [code], start, end, fill_rows(code, rerun, bars))
+            value = score(result, metric)
+            runs.append({
+                "run_id": run.pk, "rank": rank, "params": result.params,
+                metric: round(value, 4) if math.isfinite(value) else None,
+            })
+        return runs
+
+    def stream():
+        started = time.perf_counter()
+        best = []       # (점수, -번호, SweepResult) 최소 힙
+        completed = 0
+        results = run_sweep(plans, combos, bars, fundamentals, initial_cash, fee_rate, workers)
+        try:
+            for result in results:
+                completed += 1
+                entry = (score(result, metric), -result.index, result)
+                if len(best) < top_n:
+                    heapq.heappush(best, entry)
+                elif entry[:2] > best[0][:2]:
+                    heapq.heapreplace(best, entry)
+                yield {
+                    "index": result.index, "params": result.params,
+                    "total_return": round(result.total_return, 2), "stats": result.stats,
+                }
+        finally:
+            # 끊겼으면 남은 묶음을 먼저 버리고 (공유 메모리 해제), 끝난 조합 중에서 저장한다
+            results.close()
+            elapsed = time.perf_counter() - started
+            runs = save_best(best, completed)
+        yield {
+            "done": True, "combinations": len(combos), "elapsed_ms": round(elapsed * 1000, 1),
+            "per_second": round(len(combos) / elapsed, 1) if elapsed > 0 else None, "runs": runs,
+        }
+
+    return stream()
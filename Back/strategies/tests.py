@@ -1,4 +1,557 @@
 # Back/strategies/tests.py
-from django.test import TestCase
+import os
+import threading
+import time
+from concurrent.futures.process import BrokenProcessPool
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from multiprocessing import shared_memory
+from unittest import mock
 
-# Create your tests here.
+import numpy as np
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from simulator.models import Symbol, VirtualPortfolio, VirtualTrade
+from simulator.services.bar_store import bar_matrix, bars_to_arrays, data_versions, ingest_bars
+from simulator.services.providers.base import Bar
+from strategies.management.commands.bench_indicators import _random_bars
+from strategies.models import Strategy, StrategyRun
+from strategies.services import sweep
+from strategies.services.backtest import BUY, SELL, backtest_strategy, load_bars, simulate, target_positions
+from strategies.services.indicators import INDICATORS, compute, make_stream
+from strategies.services.live_runner import LiveRunner
+from strategies.services.portfolio import load_universe, run_portfolio_backtest, select, series, signal_rows
+from strategies.services.rules import LegacyRuleError, RuleError, compile_rule, get_plan
+from strategies.services.sweep import RANDOM, SharedBars, SweepError, compile_combos, expand, run_sweep, sweep_strategy
+
+# 예전 프런트(RuleDisplay.vue)가 저장하던 형식
+LEGACY_RULE = {
+    "conditions": [{"type": "indicator", "name": "RSI", "operator": "<", "value": 30}],
+    "actions": {"buy_signal_strength": 1, "sell_signal_strength": 1},
+    "portfolio_rules": {"max_stocks": 5, "rebalance_period_days": 30},
+}
+LEGACY_ACCOUNT_RULE = {
+    "conditions": [{"type": "indicator", "name": "손실률", "operator": "<", "value": -10}],
+    "actions": {"sell_signal_strength": 1},
+}
+
+
+# ─────────────────────────────────────────────
+# 규칙 컴파일 (strategies.services.rules)
+# ─────────────────────────────────────────────
+class CompileRuleTests(SimpleTestCase):
+    def test_equivalent_rules_share_a_digest(self):
+        a = compile_rule({"buy_conditions": [
+            {"indicator": "close", "operator": ">", "value": {"indicator": "SMA", "period": 20}},
+            {"indicator": "RSI", "operator": "<", "value": 70},
+        ]})
+        b = compile_rule({"conditions": [
+            {"name": "RSI", "period": 14, "operator": "<", "value": 70.0},
+            {"indicator": "CLOSE", "operator": ">", "value": {"name": "sma", "period": 20}},
+        ]})
+        self.assertEqual(a.digest, b.digest)
+        self.assertEqual(len(a.nodes), 3)
+
+    def test_invalid_rules_are_rejected(self):
+        cases = {
+            "not an object": [],
+            "unknown key": {"buy_conditions": [], "foo": 1},
+            "empty buy": {"buy_conditions": []},
+            "both buy keys": {"buy_conditions": [{"indicator": "RSI", "operator": "<", "value": 30}],
+                              "conditions": []},
+            "bad operator": {"buy_conditions": [{"indicator": "RSI", "operator": "=>", "value": 30}]},
+            "missing value": {"buy_conditions": [{"indicator": "RSI", "operator": "<"}]},
+            "unknown indicator": {"buy_conditions": [{"indicator": "FOO", "operator": "<", "value": 1}]},
+            "unknown param": {"buy_conditions": [{"indicator": "RSI", "span": 3, "operator": "<", "value": 1}]},
+            "bool param": {"buy_conditions": [{"indicator": "RSI", "period": True, "operator": "<", "value": 1}]},
+            "nan value": {"buy_conditions": [{"indicator": "RSI", "operator": "<", "value": float("nan")}]},
+            "top_n without rank": {"buy_conditions": [{"indicator": "RSI", "operator": "<", "value": 30}],
+                                   "top_n": 5},
+            "rank with sell": {"rank": {"indicator": "PER"}, "top_n": 5,
+                               "sell_conditions": [{"indicator": "RSI", "operator": ">", "value": 70}]},
+            "bad top_n": {"rank": {"indicator": "PER"}, "top_n": 0},
+            "bad rebalance": {"rank": {"indicator": "PER"}, "top_n": 5, "rebalance": "hourly"},
+        }
+        for label, rule in cases.items():
+            with self.subTest(label):
+                with self.assertRaises(RuleError):
+                    compile_rule(rule)
+
+    def test_legacy_display_keys_are_ignored(self):
+        plan = compile_rule(LEGACY_RULE)
+        self.assertEqual(
+            plan.digest,
+            compile_rule({"buy_conditions": [{"indicator": "RSI", "operator": "<", "value": 30}]}).digest,
+        )
+
+    def test_legacy_account_indicators_raise_legacy_error(self):
+        with self.assertRaises(LegacyRuleError):
+            compile_rule(LEGACY_ACCOUNT_RULE)
+        # 예전 형식 조건과 함께 있어도 다른 조건의 형식 오류는 일반 RuleError
+        broken = {"conditions": [*LEGACY_ACCOUNT_RULE["conditions"], {"indicator": "RSI", "operator": "<"}]}
+        with self.assertRaises(RuleError) as caught:
+            compile_rule(broken)
+        self.assertNotIsInstance(caught.exception, LegacyRuleError)
+
+
+class StrategyRuleValidationTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create(username="owner", email="owner@example.com")
+        self.client = APIClient(SERVER_NAME="localhost")
+        self.client.force_authenticate(self.user)
+
+    def put(self, strategy, rule):
+        return self.client.put(
+            f"/api/v1/strategies/strategies/{strategy.pk}/",
+            {"name": strategy.name, "description": "", "rule_json": rule},
+            format="json",
+        )
+
+    def test_legacy_strategies_can_still_be_edited(self):
+        for i, rule in enumerate((LEGACY_RULE, LEGACY_ACCOUNT_RULE)):
+            strategy = Strategy.objects.create(user=self.user, name=f"legacy {i}", rule_json=rule)
+            with self.subTest(rule=rule):
+                response = self.put(strategy, rule)
+                self.assertEqual(response.status_code, 200, response.data)
+
+    def test_legacy_rule_cannot_go_live(self):
+        strategy = Strategy.objects.create(
+            user=self.user, name="legacy", rule_json=LEGACY_ACCOUNT_RULE, live_symbols=["005930"],
+        )
+        response = self.client.patch(f"/api/v1/strategies/strategies/{strategy.pk}/", {"is_live": True}, format="json")
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("rule_json", response.data)
+
+    def test_malformed_rules_are_rejected_on_save(self):
+        strategy = Strategy.objects.create(user=self.user, name="new", rule_json=LEGACY_RULE)
+        response = self.put(strategy, {"buy_conditions": [{"indicator": "RSI", "operator": "=>", "value": 30}]})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("rule_json", response.data)
+
+
+# ─────────────────────────────────────────────
+# 지표 배치/증분 (strategies.services.indicators)
+# ─────────────────────────────────────────────
+FIELDS = ("open", "high", "low", "close", "volume")
+PARAM_VARIANTS = {
+    "SMA": [{"period": 1}, {"period": 7}],
+    "EMA": [{"period": 1}, {"period": 9}],
+    "RSI": [{"period": 2}, {"period": 21}],
+    "MACD": [{"fast": 3, "slow": 10, "signal": 4}],
+    "MACD_SIGNAL": [{"fast": 3, "slow": 10, "signal": 4}],
+    "MACD_HIST": [{"fast": 3, "slow": 10, "signal": 4}],
+    "BB_UPPER": [{"period": 5, "k": 1.5}],
+    "BB_LOWER": [{"period": 5, "k": 0.5}],
+    "ATR": [{"period": 3}],
+    "RETURN": [{"period": 5}],
+}
+
+
+class IndicatorStreamTests(SimpleTestCase):
+    width, length = 7, 120
+
+    def setUp(self):
+        self.bars = _random_bars(self.width, self.length, seed=3)
+        # 적자(eps < 0)/자본잠식(bps 0)/재무 없음 종목도 섞는다
+        self.fundamentals = [{"eps": 1000.0 + i, "bps": 20000.0 + i} for i in range(self.width - 3)]
+        self.fundamentals += [{"eps": -500.0, "bps": 0}, {}, {"eps": 2500.0}]
+
+    def cases(self):
+        for name, indicator in INDICATORS.items():
+            for params in [indicator.defaults, *PARAM_VARIANTS.get(name, [])]:
+                yield name, dict(params)
+
+    def rows(self):
+        for t in range(self.length):
+            yield [self.bars[field][t] for field in FIELDS]
+
+    def test_stream_matches_batch_bit_for_bit(self):
+        for name, params in self.cases():
+            with self.subTest(name=name, params=params):
+                stream = make_stream(name, params, self.fundamentals, self.width)
+                incremental = np.array([stream.update(*row) for row in self.rows()])
+                batch = compute(name, params, self.bars, self.fundamentals)
+                np.testing.assert_array_equal(incremental, batch)
+
+    def test_single_symbol_batch_matches_matrix_column(self):
+        column = {field: values[:, 2] for field, values in self.bars.items()}
+        for name, params in self.cases():
+            with self.subTest(name=name, params=params):
+                np.testing.assert_array_equal(
+                    compute(name, params, column, self.fundamentals[2]),
+                    compute(name, params, self.bars, self.fundamentals)[:, 2],
+                )
+
+    def test_peek_returns_next_value_without_changing_state(self):
+        rng = np.random.default_rng(5)
+        for name, params in self.cases():
+            with self.subTest(name=name, params=params):
+                stream = make_stream(name, params, self.fundamentals, self.width)
+                reference = make_stream(name, params, self.fundamentals, self.width)
+                for row in self.rows():
+                    # 장중 임시 봉을 몇 번 흘려 본 뒤 실제 봉을 넣는다
+                    for _ in range(2):
+                        stream.peek(*[value * (1 + rng.normal(0, 0.01, self.width)) for value in row])
+                    peeked = stream.peek(*row)
+                    np.testing.assert_array_equal(peeked, stream.update(*row))
+                    np.testing.assert_array_equal(peeked, reference.update(*row))
+
+
+# ─────────────────────────────────────────────
+# 백테스트 엔진 (strategies.services.backtest)
+# ─────────────────────────────────────────────
+class BacktestEngineTests(SimpleTestCase):
+    def test_target_positions_prefers_sell_on_the_same_day(self):
+        buy = np.array([True, False, False, True, True, False])
+        sell = np.array([False, False, True, True, False, False])
+
+        self.assertEqual(target_positions(buy, sell).tolist(), [1, 1, 0, 0, 1, 1])
+
+    def test_signals_fill_at_the_next_open_with_fees(self):
+        bars = {"open": np.array([10.0, 20, 30, 40, 50, 60]), "close": np.array([15.0, 25, 35, 45, 55, 65])}
+        # 0일 매수 신호, 2일 매도 신호, 3일 매수+매도(→ 매도), 4일 매수 신호
+        buy = np.array([True, False, False, True, True, False])
+        sell = np.array([False, False, True, True, False, False])
+
+        result = simulate(bars, buy, sell, 1_000, 0.01)
+
+        # 1일 시가 20 에 floor(1000 / 20.2) = 49주, 3일 시가 40 에 매도, 5일 시가 60 에 floor(1950.6 / 60.6) = 32주
+        self.assertEqual([(f.index, f.side, f.price, f.quantity) for f in result.fills],
+                         [(1, BUY, 20, 49), (3, SELL, 40, 49), (5, BUY, 60, 32)])
+        cash_after_exit = 1_000 - 49 * 20 * 1.01 + 49 * 40 * 0.99
+        expected = [1_000, 1_000 - 49 * 20 * 1.01 + 49 * 25, 1_000 - 49 * 20 * 1.01 + 49 * 35,
+                    cash_after_exit, cash_after_exit, cash_after_exit - 32 * 60 * 1.01 + 32 * 65]
+        np.testing.assert_allclose(result.equity, expected)
+        self.assertAlmostEqual(result.total_return, (expected[-1] / 1_000 - 1) * 100)
+        self.assertEqual((result.stats["trades"], result.stats["win_rate"]), (1, 100.0))
+
+    def test_no_signal_keeps_cash(self):
+        bars = {"open": np.array([10.0, 11, 12]), "close": np.array([10.0, 11, 12])}
+        never = np.zeros(3, dtype=bool)
+
+        result = simulate(bars, never, never, 1_000, 0.01)
+
+        self.assertEqual(result.fills, [])
+        self.assertEqual(result.total_return, 0.0)
+
+
+# ─────────────────────────────────────────────
+# 백테스트 결과 캐시 (strategies.services.result_cache)
+# ─────────────────────────────────────────────
+class BacktestResultCacheTests(TestCase):
+    code = "TEST01"
+    start, end = date(2024, 1, 1), date(2024, 6, 30)
+
+    def setUp(self):
+        caches[settings.BACKTEST_CACHE_ALIAS].clear()
+        self.user = get_user_model().objects.create(username="quant", email="quant@example.com")
+        rule = {"buy_conditions": [{"indicator": "CLOSE", "operator": ">", "value": {"indicator": "SMA", "period": 5}}]}
+        self.strategy = Strategy.objects.create(user=self.user, name="sma", rule_json=rule)
+        rng = np.random.default_rng(11)
+        closes = 10_000 * np.exp(np.cumsum(rng.normal(0, 0.03, 100)))
+        self.ingest([(i, close) for i, close in enumerate(closes)])
+
+    def ingest(self, rows):
+        ingest_bars(self.code, [
+            Bar(datetime(2024, 1, 2, 6, tzinfo=dt_timezone.utc) + timedelta(days=i), c, c * 1.01, c * 0.99, c, 1000)
+            for i, c in rows
+        ])
+
+    def run_backtest(self, strategy=None):
+        return backtest_strategy(strategy or self.strategy, self.code, self.start, self.end)
+
+    def test_same_rule_and_data_hits_the_cache(self):
+        first = self.run_backtest()
+        # 표기만 다른 같은 규칙(다른 전략 행)도 같은 결과를 쓴다
+        clone = Strategy.objects.create(user=self.user, name="clone", rule_json={"conditions": [
+            {"name": "close", "operator": ">", "value": {"name": "sma", "period": 5}},
+        ]})
+        second = self.run_backtest(clone)
+
+        self.assertNotIn("cached", first.stats)
+        self.assertTrue(second.stats["cached"])
+        self.assertEqual(second.total_return, first.total_return)
+        self.assertEqual(second.trades.count(), first.trades.count())
+
+    def test_new_bars_invalidate_the_cached_result(self):
+        before = data_versions([self.code])[self.code]
+        first = self.run_backtest()
+        # 마지막 봉을 급락으로 고친다 → 버전이 오르고 결과가 다시 계산된다
+        self.ingest([(99, 1_000.0)])
+
+        self.assertEqual(data_versions([self.code])[self.code], before + 1)
+        second = self.run_backtest()
+        self.assertNotIn("cached", second.stats)
+        self.assertNotEqual(second.stats["final_equity"], first.stats["final_equity"])
+        self.assertTrue(self.run_backtest().stats["cached"])
+
+
+# ─────────────────────────────────────────────
+# 파라미터 탐색 (strategies.services.sweep)
+# ─────────────────────────────────────────────
+class SweepStrategyTests(TestCase):
+    code = "TEST03"
+    start, end = date(2024, 1, 1), date(2024, 6, 30)
+
+    def setUp(self):
+        user = get_user_model().objects.create(username="sweeper", email="sweeper@example.com")
+        rule = {"buy_conditions": [{"indicator": "CLOSE", "operator": ">", "value": {"indicator": "SMA", "period": 5}}]}
+        self.strategy = Strategy.objects.create(user=user, name="sma", rule_json=rule)
+        closes = 10_000 * np.exp(np.cumsum(np.random.default_rng(5).normal(0, 0.03, 100)))
+        ingest_bars(self.code, [
+            Bar(datetime(2024, 1, 2, 6, tzinfo=dt_timezone.utc) + timedelta(days=i), c, c * 1.01, c * 0.99, c, 1000)
+            for i, c in enumerate(closes)
+        ])
+
+    PARAMS = {"buy_conditions.0.value.period": [3, 5, 8, 13]}
+
+    def tearDown(self):
+        if sweep._pool is not None:
+            sweep._discard_pool(sweep._pool)
+
+    def runs(self):
+        return StrategyRun.objects.filter(strategy=self.strategy)
+
+    def start_sweep(self, **options):
+        return sweep_strategy(self.strategy, self.code, self.PARAMS, start=self.start, end=self.end, **options)
+
+    def test_results_stream_before_top_runs_are_saved(self):
+        lines = self.start_sweep(top_n=2, workers=1)
+
+        first = next(lines)
+        # 첫 줄은 탐색이 끝나기 전에 나온다
+        self.assertIn("params", first)
+        self.assertFalse(self.runs().exists())
+        rest = list(lines)
+
+        self.assertEqual(len(rest), len(self.PARAMS["buy_conditions.0.value.period"]))
+        self.assertTrue(rest[-1]["done"])
+        self.assertEqual(sorted(run["run_id"] for run in rest[-1]["runs"]), sorted(self.runs().values_list("pk", flat=True)))
+
+    def test_disconnect_saves_best_of_finished_combinations(self):
+        lines = self.start_sweep(top_n=2, workers=1)
+        next(lines)
+        lines.close()
+
+        run = self.runs().get()
+        self.assertEqual((run.stats["sweep"]["completed"], run.stats["sweep"]["combinations"]), (1, 4))
+
+    def plans_and_bars(self):
+        combos = expand({"buy_conditions.0.value.period": list(range(2, 18, 2))})
+        _, _, bars = load_bars(self.code, self.start, self.end)
+        return compile_combos(self.strategy.rule_json, combos), combos, bars
+
+    def sweep_results(self, workers):
+        plans, combos, bars = self.plans_and_bars()
+        results = run_sweep(plans, combos, bars, {}, 1_000_000, 0.00015, workers)
+        return sorted((result.index, result.total_return) for result in results)
+
+    @override_settings(SWEEP_WORKERS=2)
+    def test_process_pool_matches_in_process_run(self):
+        blocks = []
+
+        def shared_bars(bars):
+            block = SharedBars(bars)
+            blocks.append(block.name)
+            return block
+
+        expected = self.sweep_results(1)
+        with mock.patch("strategies.services.sweep.SharedBars", side_effect=shared_bars):
+            self.assertEqual(self.sweep_results(2), expected)
+
+        self.assertEqual(len(blocks), 1)
+        with self.assertRaises(FileNotFoundError):
+            shared_memory.SharedMemory(name=blocks[0])
+
+    @override_settings(SWEEP_WORKERS=2)
+    def test_broken_pool_is_replaced(self):
+        broken = sweep._get_pool()
+        with self.assertRaises(BrokenProcessPool):
+            broken.submit(os._exit, 1).result()
+
+        with self.assertRaises(BrokenProcessPool):
+            self.sweep_results(2)
+        self.assertIsNone(sweep._pool)
+        self.assertEqual(self.sweep_results(2), self.sweep_results(1))
+        self.assertIsNot(sweep._pool, broken)
+
+
+class ExpandTests(SimpleTestCase):
+    def test_grid_is_the_full_product_in_path_order(self):
+        combos = expand({"b": {"min": 1, "max": 5, "step": 2}, "a": [10, 20]})
+
+        self.assertEqual(combos, [
+            {"a": 10, "b": 1}, {"a": 10, "b": 3}, {"a": 10, "b": 5},
+            {"a": 20, "b": 1}, {"a": 20, "b": 3}, {"a": 20, "b": 5},
+        ])
+        self.assertEqual(expand({"k": {"min": 1.5, "max": 2.0, "step": 0.25}}), [{"k": 1.5}, {"k": 1.75}, {"k": 2.0}])
+
+    def test_grid_needs_a_step_and_respects_the_limit(self):
+        with self.assertRaisesMessage(SweepError, "step"):
+            expand({"k": {"min": 1.5, "max": 3.0}})
+        with override_settings(SWEEP_MAX_COMBINATIONS=5):
+            with self.assertRaisesMessage(SweepError, "최대"):
+                expand({"a": [1, 2, 3], "b": [1, 2]})
+
+    def test_random_discrete_samples_are_unique_and_seeded(self):
+        params = {"a": list(range(10)), "b": list(range(10))}
+        combos = expand(params, RANDOM, samples=30, seed=7)
+
+        self.assertEqual(len({(combo["a"], combo["b"]) for combo in combos}), 30)
+        self.assertEqual(expand(params, RANDOM, samples=30, seed=7), combos)
+        # 조합 수보다 많이 달라고 해도 있는 만큼만
+        self.assertEqual(len(expand({"a": [1, 2]}, RANDOM, samples=5)), 2)
+
+    def test_random_continuous_ranges_stay_in_bounds(self):
+        combos = expand({"k": {"min": 1.5, "max": 3.0}, "n": {"min": 5, "max": 9}}, RANDOM, samples=50, seed=1)
+
+        self.assertEqual(len(combos), 50)
+        self.assertTrue(all(1.5 <= combo["k"] <= 3.0 for combo in combos))
+        self.assertTrue(all(isinstance(combo["n"], int) and 5 <= combo["n"] <= 9 for combo in combos))
+
+
+# ─────────────────────────────────────────────
+# 종목 묶음 백테스트 (strategies.services.portfolio)
+# ─────────────────────────────────────────────
+def provider_bars(closes):
+    return bars_to_arrays([
+        Bar(datetime(2024, 1, 2, 6, tzinfo=dt_timezone.utc) + timedelta(days=i), c, c, c, c, 1000)
+        for i, c in enumerate(closes)
+    ])
+
+
+class UniverseLoadTests(TestCase):
+    start, end = date(2024, 1, 1), date(2024, 1, 31)
+
+    def test_missing_symbols_are_fetched_concurrently(self):
+        active, peak = [0], [0]
+        lock = threading.Lock()
+
+        def slow_fetch(code, start, end):
+            with lock:
+                active[0] += 1
+                peak[0] = max(peak[0], active[0])
+            time.sleep(0.05)
+            with lock:
+                active[0] -= 1
+            return provider_bars([100.0] * 5)
+
+        with mock.patch("strategies.services.portfolio.fetch_provider_bars", slow_fetch):
+            bars = load_universe(["A1", "B22", "C333"], self.start, self.end)
+
+        self.assertGreater(peak[0], 1)
+        self.assertEqual(bars["close"].shape[1], 3)
+
+    @override_settings(PORTFOLIO_FETCH_DEADLINE=0.05)
+    def test_slow_provider_fails_fast(self):
+        def stuck_fetch(code, start, end):
+            time.sleep(0.5)
+            return provider_bars([100.0] * 5)
+
+        with mock.patch("strategies.services.portfolio.fetch_provider_bars", stuck_fetch):
+            started = time.perf_counter()
+            with self.assertRaisesMessage(ValueError, "일봉"):
+                load_universe(["SLOW1"], self.start, self.end)
+        self.assertLess(time.perf_counter() - started, 0.4)
+
+
+def ranked_rule(order="desc", top_n=2, buy_conditions=(), rebalance="monthly"):
+    return {
+        "buy_conditions": list(buy_conditions),
+        "rank": {"indicator": "CLOSE", "order": order},
+        "top_n": top_n,
+        "rebalance": rebalance,
+    }
+
+
+class RankSelectTests(SimpleTestCase):
+    # 열 순서: A 100, B 50, C 70, D 30
+    bars = bar_matrix(
+        {code: provider_bars([close] * 5) for code, close in zip("ABCD", (100.0, 50.0, 70.0, 30.0))}, list("ABCD")
+    )
+
+    def chosen(self, rule):
+        plan = get_plan(rule)
+        rows = np.array([0])
+        picks, valid = select(plan, series(plan, self.bars, [{}] * 4), self.bars["listed"], rows)
+        return sorted("ABCD"[col] for col in picks[0][valid[0]])
+
+    def test_top_n_by_order(self):
+        self.assertEqual(self.chosen(ranked_rule("desc")), ["A", "C"])
+        self.assertEqual(self.chosen(ranked_rule("asc")), ["B", "D"])
+        self.assertEqual(self.chosen(ranked_rule("desc", top_n=10)), ["A", "B", "C", "D"])
+
+    def test_buy_conditions_filter_eligibility(self):
+        below_80 = [{"indicator": "CLOSE", "operator": "<", "value": 80}]
+        self.assertEqual(self.chosen(ranked_rule("desc", buy_conditions=below_80)), ["B", "C"])
+
+        below_40 = [{"indicator": "CLOSE", "operator": "<", "value": 40}]
+        self.assertEqual(self.chosen(ranked_rule("desc", buy_conditions=below_40)), ["D"])
+
+    def test_signal_rows_by_rebalance_period(self):
+        # 2024-01-01(월) ~ 2024-07-31 매일
+        days = np.arange(date(2024, 1, 1).toordinal(), date(2024, 7, 31).toordinal() + 1)
+
+        self.assertEqual(signal_rows(days, "weekly")[:4].tolist(), [0, 6, 13, 20])      # 일요일
+        self.assertEqual(signal_rows(days, "monthly").tolist(), [0, 30, 59, 90, 120, 151, 181])
+        self.assertEqual(signal_rows(days, "quarterly").tolist(), [0, 90, 181])
+        self.assertEqual(len(signal_rows(days, "daily")), len(days) - 1)
+        self.assertEqual(len(signal_rows(days[:1], "monthly")), 0)
+
+    def test_equal_weight_sizing(self):
+        result = run_portfolio_backtest(ranked_rule("desc"), self.bars, initial_cash=10_000, fee_rate=0.01)
+
+        # 5,000 원씩: floor(5000 / 101) = 49 주, floor(5000 / 70.7) = 70 주
+        self.assertEqual([(f.index, "ABCD"[f.column], f.side, f.quantity) for f in result.fills],
+                         [(1, "A", "buy", 49), (1, "C", "buy", 70)])
+        cost = (49 * 100 + 70 * 70) * 1.01
+        self.assertAlmostEqual(result.equity[-1], 10_000 - cost + 49 * 100 + 70 * 70)
+
+
+class DelistedSymbolTests(SimpleTestCase):
+    def test_delisted_holding_is_sold_at_last_close(self):
+        # A 는 열흘 만에 봉이 끊긴다 (상장 폐지), B 는 끝까지 있다
+        bars = bar_matrix({"A": provider_bars([100.0] * 10), "B": provider_bars([50.0] * 30)}, ["A", "B"])
+        rule = {"rank": {"indicator": "CLOSE", "order": "desc"}, "top_n": 1, "rebalance": "monthly"}
+
+        result = run_portfolio_backtest(rule, bars, initial_cash=10_000, fee_rate=0)
+
+        self.assertEqual([(f.column, f.side) for f in result.fills], [(0, "buy"), (0, "sell")])
+        sell = result.fills[-1]
+        self.assertEqual((sell.index, sell.price, sell.quantity), (10, 100.0, 100))
+        self.assertEqual(result.equity[-1], 10_000)
+
+
+# ─────────────────────────────────────────────
+# 실시간 실행기 (strategies.services.live_runner)
+# ─────────────────────────────────────────────
+class LiveRunnerReloadTests(TestCase):
+    code = "TEST02"
+
+    def setUp(self):
+        Symbol.objects.create(code=self.code, name="테스트", market=Symbol.KOSPI, yahoo_ticker=f"{self.code}.KS")
+        yesterday = timezone.localdate() - timedelta(days=1)
+        ingest_bars(self.code, [
+            Bar(datetime.combine(yesterday - timedelta(days=i), datetime.min.time(), dt_timezone.utc),
+                10_000, 10_100, 9_900, 10_000, 1000)
+            for i in range(30)
+        ])
+        user = get_user_model().objects.create(username="live", email="live@example.com")
+        self.portfolio = VirtualPortfolio.objects.create(user=user, cash_balance=5_000)
+        Strategy.objects.create(
+            user=user, name="always", is_live=True, live_symbols=[self.code], live_budget=1_000_000,
+            rule_json={"buy_conditions": [{"indicator": "CLOSE", "operator": ">", "value": 0}]},
+        )
+
+    def test_rejected_leg_is_not_retried_after_reload(self):
+        runner = LiveRunner()
+        runner.load()
+        self.assertEqual(runner.on_quotes({self.code: 10_000}), 0)    # 잔액 부족으로 거부
+        self.assertFalse(VirtualTrade.objects.exists())
+
+        runner.load()
+        self.assertEqual(runner.evaluate({self.code: 10_050}), [])